@@ -0,0 +1,58 @@
+"""add_action_item_inbox
+
+Revision ID: add_action_item_inbox
+Revises: add_assessment_compliance_snapshots
+Create Date: 2026-10-16 22:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_action_item_inbox'
+down_revision = 'add_assessment_compliance_snapshots'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Materialized inbox rows (populate with scripts/backfill_action_item_inbox.py)
+    op.create_table(
+        'action_item_inbox',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('tenants.id'), nullable=False),
+        sa.Column('origin', sa.String(length=50), nullable=False),
+        sa.Column('origin_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('assigned_to', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('assigned_role', sa.String(length=50), nullable=True),
+        sa.Column('completed_by', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('visibility', sa.String(length=20), nullable=False),
+        sa.Column('item_type', sa.String(length=50), nullable=False),
+        sa.Column('title', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('priority', sa.String(length=20), nullable=False),
+        sa.Column('due_date', sa.DateTime(), nullable=True),
+        sa.Column('assigned_at', sa.DateTime(), nullable=False),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.Column('source_type', sa.String(length=50), nullable=False),
+        sa.Column('source_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('action_url', sa.String(length=500), nullable=True),
+        sa.Column('item_metadata', postgresql.JSON(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('origin', 'origin_id', name='uq_action_item_inbox_origin'),
+    )
+    op.create_index('ix_action_item_inbox_tenant_assigned_to', 'action_item_inbox', ['tenant_id', 'assigned_to'])
+    op.create_index('ix_action_item_inbox_tenant_completed_by', 'action_item_inbox', ['tenant_id', 'completed_by'])
+    op.create_index('ix_action_item_inbox_tenant_role', 'action_item_inbox', ['tenant_id', 'assigned_role'])
+    op.create_index('ix_action_item_inbox_tenant_order', 'action_item_inbox', ['tenant_id', 'assigned_at', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_action_item_inbox_tenant_order', table_name='action_item_inbox')
+    op.drop_index('ix_action_item_inbox_tenant_role', table_name='action_item_inbox')
+    op.drop_index('ix_action_item_inbox_tenant_completed_by', table_name='action_item_inbox')
+    op.drop_index('ix_action_item_inbox_tenant_assigned_to', table_name='action_item_inbox')
+    op.drop_table('action_item_inbox')
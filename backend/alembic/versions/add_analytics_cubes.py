@@ -0,0 +1,55 @@
+"""add_analytics_cubes
+
+Revision ID: add_analytics_cubes
+Revises: add_assessment_analytics_rollups
+Create Date: 2026-10-17 01:15:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_analytics_cubes'
+down_revision = 'add_assessment_analytics_rollups'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Daily prompt usage rollup (filled by scripts/refresh_analytics_cubes.py)
+    op.create_table(
+        'prompt_usage_daily_rollups',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('day', sa.DateTime(), nullable=False),
+        sa.Column('agent_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('agents.id'), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('user_role', sa.String(length=50), nullable=True),
+        sa.Column('department', sa.String(length=100), nullable=True),
+        sa.Column('model_vendor', sa.String(length=100), nullable=False),
+        sa.Column('model_name', sa.String(length=100), nullable=False),
+        sa.Column('request_count', sa.Integer(), nullable=False),
+        sa.Column('total_tokens', sa.Integer(), nullable=False),
+        sa.Column('total_cost', sa.Numeric(14, 6), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('idx_prompt_usage_rollup_tenant_day', 'prompt_usage_daily_rollups', ['tenant_id', 'day'])
+
+    # Per-tenant refresh watermarks
+    op.create_table(
+        'analytics_cube_watermarks',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('cube', sa.String(length=50), nullable=False),
+        sa.Column('watermark', sa.DateTime(), nullable=True),
+        sa.Column('refreshed_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('tenant_id', 'cube', name='uq_analytics_cube_watermark'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('analytics_cube_watermarks')
+    op.drop_index('idx_prompt_usage_rollup_tenant_day', table_name='prompt_usage_daily_rollups')
+    op.drop_table('prompt_usage_daily_rollups')
@@ -0,0 +1,54 @@
+"""add_assessment_analytics_rollups
+
+Revision ID: add_assessment_analytics_rollups
+Revises: add_action_item_inbox
+Create Date: 2026-10-16 23:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_assessment_analytics_rollups'
+down_revision = 'add_action_item_inbox'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Assignment counts per assessment, vendor, quarter and status
+    op.create_table(
+        'assessment_analytics_rollups',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('tenants.id'), nullable=False),
+        sa.Column('assessment_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('assessments.id'), nullable=False),
+        sa.Column('vendor_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('vendors.id'), nullable=True),
+        sa.Column('period_start', sa.DateTime(), nullable=True),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('assignment_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_assessment_analytics_rollups_assessment_id', 'assessment_analytics_rollups', ['assessment_id'])
+    op.create_index('ix_assessment_analytics_rollups_tenant_period', 'assessment_analytics_rollups', ['tenant_id', 'period_start'])
+    op.create_index('ix_assessment_analytics_rollups_tenant_vendor', 'assessment_analytics_rollups', ['tenant_id', 'vendor_id'])
+    op.create_index('ix_assessment_assignments_tenant_due_date', 'assessment_assignments', ['tenant_id', 'due_date'])
+
+    # Seed the rollup from existing assignments
+    op.execute("""
+        INSERT INTO assessment_analytics_rollups
+            (id, tenant_id, assessment_id, vendor_id, period_start, status, assignment_count, updated_at)
+        SELECT gen_random_uuid(), tenant_id, assessment_id, vendor_id,
+               date_trunc('quarter', COALESCE(completed_at, assigned_at)), status, COUNT(*), now()
+        FROM assessment_assignments
+        GROUP BY tenant_id, assessment_id, vendor_id, date_trunc('quarter', COALESCE(completed_at, assigned_at)), status
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_assessment_assignments_tenant_due_date', table_name='assessment_assignments')
+    op.drop_index('ix_assessment_analytics_rollups_tenant_vendor', table_name='assessment_analytics_rollups')
+    op.drop_index('ix_assessment_analytics_rollups_tenant_period', table_name='assessment_analytics_rollups')
+    op.drop_index('ix_assessment_analytics_rollups_assessment_id', table_name='assessment_analytics_rollups')
+    op.drop_table('assessment_analytics_rollups')
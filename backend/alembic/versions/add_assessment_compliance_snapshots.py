@@ -0,0 +1,40 @@
+"""add_assessment_compliance_snapshots
+
+Revision ID: add_assessment_compliance_snapshots
+Revises: 822686d386b4
+Create Date: 2026-10-16 20:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_assessment_compliance_snapshots'
+down_revision = '822686d386b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Materialized compliance scores per assessment assignment
+    op.create_table(
+        'assessment_compliance_snapshots',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('assignment_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('assessment_assignments.id'), nullable=False),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('tenants.id'), nullable=False),
+        sa.Column('question_frameworks', postgresql.JSON(), nullable=False),
+        sa.Column('evaluations', postgresql.JSON(), nullable=False),
+        sa.Column('framework_scores', postgresql.JSON(), nullable=False),
+        sa.Column('calculated_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_assessment_compliance_snapshots_assignment_id', 'assessment_compliance_snapshots', ['assignment_id'], unique=True)
+    op.create_index('ix_assessment_compliance_snapshots_tenant_id', 'assessment_compliance_snapshots', ['tenant_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_assessment_compliance_snapshots_tenant_id', table_name='assessment_compliance_snapshots')
+    op.drop_index('ix_assessment_compliance_snapshots_assignment_id', table_name='assessment_compliance_snapshots')
+    op.drop_table('assessment_compliance_snapshots')
@@ -0,0 +1,40 @@
+"""add_assessment_rollup_unique_key
+
+Revision ID: add_assessment_rollup_unique_key
+Revises: add_webhook_delivery_leases
+Create Date: 2026-10-17 10:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_assessment_rollup_unique_key'
+down_revision = 'add_webhook_delivery_leases'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Concurrent refreshes could leave duplicate or stale rollup rows; rebuild before adding the key
+    op.execute("DELETE FROM assessment_analytics_rollups")
+    op.execute("""
+        INSERT INTO assessment_analytics_rollups
+            (id, tenant_id, assessment_id, vendor_id, period_start, status, assignment_count, updated_at)
+        SELECT gen_random_uuid(), tenant_id, assessment_id, vendor_id,
+               date_trunc('quarter', COALESCE(completed_at, assigned_at)), status, COUNT(*), now()
+        FROM assessment_assignments
+        GROUP BY tenant_id, assessment_id, vendor_id, date_trunc('quarter', COALESCE(completed_at, assigned_at)), status
+    """)
+    op.create_index(
+        'uq_assessment_analytics_rollups_dimensions',
+        'assessment_analytics_rollups',
+        ['assessment_id', 'tenant_id', 'vendor_id', 'period_start', 'status'],
+        unique=True,
+        postgresql_nulls_not_distinct=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_assessment_analytics_rollups_dimensions', table_name='assessment_analytics_rollups')
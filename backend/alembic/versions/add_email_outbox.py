@@ -0,0 +1,46 @@
+"""add_email_outbox
+
+Revision ID: add_email_outbox
+Revises: add_webhook_outbox
+Create Date: 2026-10-17 05:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_email_outbox'
+down_revision = 'add_webhook_outbox'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Outbound email queue (drained by scripts/send_queued_emails.py)
+    op.create_table(
+        'email_outbox',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('to_email', sa.String(length=255), nullable=False),
+        sa.Column('cc', postgresql.JSONB(), nullable=True),
+        sa.Column('bcc', postgresql.JSONB(), nullable=True),
+        sa.Column('subject', sa.String(length=500), nullable=False),
+        sa.Column('html_body', sa.Text(), nullable=False),
+        sa.Column('text_body', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='pending'),
+        sa.Column('attempt_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_email_outbox_tenant_id', 'email_outbox', ['tenant_id'])
+    op.create_index('ix_email_outbox_status_next_attempt', 'email_outbox', ['status', 'next_attempt_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_email_outbox_status_next_attempt', table_name='email_outbox')
+    op.drop_index('ix_email_outbox_tenant_id', table_name='email_outbox')
+    op.drop_table('email_outbox')
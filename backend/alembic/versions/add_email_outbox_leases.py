@@ -0,0 +1,26 @@
+"""add_email_outbox_leases
+
+Revision ID: add_email_outbox_leases
+Revises: add_assessment_rollup_unique_key
+Create Date: 2026-10-17 10:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_email_outbox_leases'
+down_revision = 'add_assessment_rollup_unique_key'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Set by each claim; a worker only writes results while its token is still on the row
+    op.add_column('email_outbox', sa.Column('lease_token', postgresql.UUID(as_uuid=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('email_outbox', 'lease_token')
@@ -0,0 +1,33 @@
+"""add_reminder_claims
+
+Revision ID: add_reminder_claims
+Revises: add_email_outbox
+Create Date: 2026-10-17 07:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_reminder_claims'
+down_revision = 'add_email_outbox'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Lease / retry time for the reminder worker (scripts/process_workflow_reminders.py)
+    op.add_column('workflow_reminders', sa.Column('next_attempt_at', sa.DateTime(), nullable=True))
+    # Due-reminder scans only look at unsent rows
+    op.create_index(
+        'ix_workflow_reminders_due',
+        'workflow_reminders',
+        ['reminder_date'],
+        postgresql_where=sa.text('is_sent = false')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_workflow_reminders_due', table_name='workflow_reminders')
+    op.drop_column('workflow_reminders', 'next_attempt_at')
@@ -0,0 +1,45 @@
+"""add_ticket_counters
+
+Revision ID: add_ticket_counters
+Revises: add_reminder_claims
+Create Date: 2026-10-17 09:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_ticket_counters'
+down_revision = 'add_reminder_claims'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Ticket number allocator (app/core/ticket_id_generator.py)
+    op.create_table(
+        'ticket_counters',
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('prefix', sa.String(length=20), primary_key=True),
+        sa.Column('year', sa.Integer(), primary_key=True),
+        sa.Column('last_value', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+    # Continue numbering after the highest assessment ticket already issued
+    op.execute("""
+        INSERT INTO ticket_counters (tenant_id, prefix, year, last_value, updated_at)
+        SELECT tenant_id,
+               'ASMT',
+               CAST(substr(workflow_ticket_id, 6, 4) AS INTEGER),
+               MAX(CAST(substr(workflow_ticket_id, 11) AS INTEGER)),
+               now()
+        FROM assessment_assignments
+        WHERE workflow_ticket_id ~ '^ASMT-[0-9]{4}-[0-9]+$'
+        GROUP BY tenant_id, substr(workflow_ticket_id, 6, 4)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('ticket_counters')
@@ -0,0 +1,26 @@
+"""add_webhook_delivery_leases
+
+Revision ID: add_webhook_delivery_leases
+Revises: add_ticket_counters
+Create Date: 2026-10-17 09:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_webhook_delivery_leases'
+down_revision = 'add_ticket_counters'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Set by each claim; a dispatcher only writes results while its token is still on the row
+    op.add_column('webhook_deliveries', sa.Column('lease_token', postgresql.UUID(as_uuid=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('webhook_deliveries', 'lease_token')
@@ -0,0 +1,39 @@
+"""add_webhook_outbox
+
+Revision ID: add_webhook_outbox
+Revises: add_analytics_cubes
+Create Date: 2026-10-17 03:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_webhook_outbox'
+down_revision = 'add_analytics_cubes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Deliveries become the outbound queue (drained by scripts/dispatch_webhooks.py)
+    op.add_column('webhook_deliveries', sa.Column('status', sa.String(length=20), nullable=False, server_default='pending'))
+    op.add_column('webhook_deliveries', sa.Column('attempt_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('webhook_deliveries', sa.Column('next_attempt_at', sa.DateTime(), nullable=True))
+
+    # Deliveries made before the outbox were sent inline, once
+    op.execute("""
+        UPDATE webhook_deliveries
+        SET status = CASE WHEN status_code BETWEEN 200 AND 299 THEN 'succeeded' ELSE 'failed' END,
+            attempt_count = 1
+    """)
+
+    op.create_index('ix_webhook_deliveries_status_next_attempt', 'webhook_deliveries', ['status', 'next_attempt_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_webhook_deliveries_status_next_attempt', table_name='webhook_deliveries')
+    op.drop_column('webhook_deliveries', 'next_attempt_at')
+    op.drop_column('webhook_deliveries', 'attempt_count')
+    op.drop_column('webhook_deliveries', 'status')
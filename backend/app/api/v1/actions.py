@@ -43,6 +43,7 @@ class InboxResponse(BaseModel):
     pending_count: int
     completed_count: int
     overdue_count: int
+    next_cursor: Optional[str] = None
 
 
 @router.get("/inbox", response_model=InboxResponse)
@@ -51,6 +52,7 @@ async def get_inbox(
     action_type: Optional[str] = Query(None, description="Filter by action type"),
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (takes precedence over offset)"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -74,7 +76,13 @@ async def get_inbox(
             action_type=action_type,
             limit=limit,
             offset=offset,
-            user_role=current_user.role.value if hasattr(current_user.role, 'value') else str(current_user.role)
+            user_role=current_user.role.value if hasattr(current_user.role, 'value') else str(current_user.role),
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
     except Exception as e:
         import logging
@@ -111,7 +119,8 @@ async def get_inbox(
         total=result["total"],
         pending_count=result["pending_count"],
         completed_count=result["completed_count"],
-        overdue_count=result["overdue_count"]
+        overdue_count=result["overdue_count"],
+        next_cursor=result.get("next_cursor")
     )
 
 
@@ -249,11 +258,9 @@ async def get_inbox_counts(
     
     try:
         service = ActionItemService(db)
-        result = service.get_user_inbox(
+        result = service.get_inbox_counts(
             user_id=UUID(str(current_user.id)),
             tenant_id=effective_tenant_id,
-            limit=1,
-            offset=0,
             user_role=current_user.role.value if hasattr(current_user.role, 'value') else str(current_user.role)
         )
         
@@ -9,9 +9,9 @@ from uuid import UUID
 from datetime import datetime
 from app.core.database import get_db
 from app.models.agent import Agent
-from app.models.user import User
 from app.models.adoption import AdoptionMetric, AdoptionEvent, AdoptionStatus
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_principal
+from app.core.principal_cache import Principal
 from app.core.audit import audit_service, AuditAction
 
 router = APIRouter(prefix="/adoption", tags=["adoption"])
@@ -48,7 +48,7 @@ class AdoptionEventCreate(BaseModel):
 @router.get("/agents/{agent_id}/metrics", response_model=AdoptionMetricResponse)
 async def get_agent_adoption_metrics(
     agent_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get adoption metrics for an agent"""
@@ -96,7 +96,7 @@ async def get_agent_adoption_metrics(
 @router.post("/events", status_code=status.HTTP_201_CREATED)
 async def create_adoption_event(
     event_data: AdoptionEventCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Create an adoption event"""
@@ -159,7 +159,7 @@ async def get_agent_adoption_events(
     agent_id: UUID,
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=100),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get adoption events for an agent"""
@@ -180,7 +180,7 @@ async def get_agent_adoption_events(
 
 @router.get("/dashboard")
 async def get_adoption_dashboard(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get adoption dashboard statistics"""
@@ -9,8 +9,8 @@ from uuid import UUID
 from app.core.database import get_db
 from app.models.agent import Agent
 from app.models.agent_connection import AgentConnection, ConnectionType, ConnectionProtocol
-from app.models.user import User
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_principal
+from app.core.principal_cache import Principal
 from app.services.connection_diagram_service import ConnectionDiagramService
 from app.services.connection_framework_matcher import ConnectionFrameworkMatcher
 import logging
@@ -109,7 +109,7 @@ class ConnectionResponse(BaseModel):
 async def create_connection(
     agent_id: UUID,
     connection_data: ConnectionCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Create a new connection for an agent"""
@@ -205,7 +205,7 @@ async def list_connections(
     agent_id: UUID,
     connection_type: Optional[str] = None,
     is_active: Optional[bool] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """List all connections for an agent"""
@@ -256,7 +256,7 @@ async def list_connections(
 @router.get("/connections/{connection_id}", response_model=ConnectionResponse)
 async def get_connection(
     connection_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get a specific connection"""
@@ -301,7 +301,7 @@ async def get_connection(
 async def update_connection(
     connection_id: UUID,
     connection_data: ConnectionUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Update a connection"""
@@ -390,7 +390,7 @@ async def update_connection(
 @router.delete("/connections/{connection_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_connection(
     connection_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Delete a connection"""
@@ -428,7 +428,7 @@ class DiagramRequest(BaseModel):
 @router.post("/generate-diagram")
 async def generate_connection_diagram(
     request: DiagramRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Generate a connection diagram from agent connections"""
@@ -476,7 +476,7 @@ class FrameworkRecommendationRequest(BaseModel):
 @router.post("/framework-recommendations")
 async def get_framework_recommendations(
     request: FrameworkRecommendationRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get compliance framework recommendations based on connections"""
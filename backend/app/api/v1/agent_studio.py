@@ -12,7 +12,8 @@ import logging
 
 from app.core.database import get_db
 from app.models.user import User
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_principal
+from app.core.principal_cache import Principal
 from app.services.ecosystem_entity_service import EcosystemEntityService, EntityType, EntityStatus
 from app.models.ecosystem_entity import EcosystemEntity, SharedGovernanceProfile, EntityLifecycleEvent
 
@@ -152,7 +153,7 @@ class StudioDashboardResponse(BaseModel):
 
 @router.get("/dashboard", response_model=StudioDashboardResponse)
 async def get_studio_dashboard(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get Agent Studio dashboard with governance metrics"""
@@ -275,7 +276,7 @@ async def get_studio_dashboard(
 @router.post("/entities", response_model=GovernanceEntityResponse, status_code=status.HTTP_201_CREATED)
 async def create_governance_entity(
     entity_data: GovernanceEntityCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Create a new governance entity (agent, product, or service)"""
@@ -385,7 +386,7 @@ async def list_governance_entities(
     department: Optional[str] = Query(None, description="Filter by department"),
     organization: Optional[str] = Query(None, description="Filter by organization"),
     search: Optional[str] = Query(None, description="Search term for name/description"),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """List governance entities with filtering"""
@@ -470,7 +471,7 @@ async def update_entity_status(
     status: EntityStatus,
     reason: Optional[str] = None,
     workflow_step: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Update entity status (governance workflow actions)"""
@@ -508,7 +509,7 @@ async def update_entity_status(
 @router.post("/profiles", response_model=GovernanceProfileResponse, status_code=status.HTTP_201_CREATED)
 async def create_governance_profile(
     profile_data: GovernanceProfileCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Create a shared governance profile"""
@@ -563,7 +564,7 @@ async def create_governance_profile(
 @router.get("/profiles", response_model=List[GovernanceProfileResponse])
 async def list_governance_profiles(
     profile_type: Optional[str] = Query(None, description="Filter by profile type"),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """List governance profiles for tenant"""
@@ -608,7 +609,7 @@ async def list_governance_profiles(
 async def apply_governance_profile(
     entity_id: UUID,
     profile_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Apply a governance profile to an entity"""
@@ -644,7 +645,7 @@ async def apply_governance_profile(
 @router.get("/entities/{entity_id}", response_model=GovernanceEntityResponse)
 async def get_governance_entity(
     entity_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get detailed information for a specific governance entity"""
@@ -743,7 +744,7 @@ async def get_governance_entity(
 async def update_governance_entity(
     entity_id: UUID,
     entity_data: GovernanceEntityUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Update a governance entity"""
@@ -836,7 +837,7 @@ async def update_governance_entity(
 async def get_entity_lifecycle_history(
     entity_id: UUID,
     limit: int = Query(50, ge=1, le=100, description="Maximum number of events to return"),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get lifecycle history for a governance entity"""
@@ -9,7 +9,8 @@ from pydantic import BaseModel, Field
 import logging
 
 from app.core.database import get_db
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_user, get_current_principal
+from app.core.principal_cache import Principal
 from app.models.user import User
 
 logger = logging.getLogger(__name__)
@@ -168,7 +169,7 @@ async def list_agentic_agents(
 @router.get("/{agent_id}", response_model=AgenticAgentResponse)
 async def get_agentic_agent(
     agent_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get agentic AI agent by ID"""
@@ -190,7 +191,7 @@ async def get_agentic_agent(
 async def execute_skill(
     agent_id: UUID,
     request: SkillExecutionRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Execute a skill on an agentic agent"""
@@ -255,7 +256,7 @@ async def execute_skill(
 async def create_session(
     agent_id: UUID,
     request: SessionCreateRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Create a new session for an agent"""
@@ -357,7 +358,7 @@ async def trigger_learning(
     learning_type: str,
     source_data: dict,
     source_id: Optional[UUID] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Trigger learning for an agent"""
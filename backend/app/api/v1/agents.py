@@ -13,7 +13,8 @@ from app.models.agent import Agent, AgentStatus, AgentMetadata, AgentArtifact, A
 from app.models.product import Product
 from app.models.vendor import Vendor
 from app.models.user import User
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_user, get_current_principal
+from app.core.principal_cache import Principal
 from app.core.security_middleware import validate_file_upload, sanitize_input
 from app.core.cache import cached, invalidate_cache
 from app.core.audit import audit_service, AuditAction
@@ -171,7 +172,7 @@ class AgentListResponse(BaseModel):
 async def create_agent(
     agent_data: AgentCreate,
     request: Request,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Create a new agent submission"""
@@ -1417,7 +1418,7 @@ async def submit_agent(
                                 assigned_user = background_db.query(User).filter(User.id == onboarding_request.assigned_to).first()
                                 if assigned_user:
                                     try:
-                                        await orchestration.send_stage_notifications(
+                                        orchestration.queue_stage_notifications(
                                             workflow_config=workflow_config,
                                             workflow_stage=workflow_stage,
                                             entity_type="agent",
@@ -1425,9 +1426,11 @@ async def submit_agent(
                                             entity_data=agent_data,
                                             user=assigned_user
                                         )
-                                        logger.info(f"✅ Stage notifications sent for agent {agent.id}")
+                                        background_db.commit()
+                                        logger.info(f"✅ Stage notifications queued for agent {agent.id}")
                                     except Exception as notif_error:
-                                        logger.warning(f"⚠️ Failed to send stage notifications for agent {agent.id}: {str(notif_error)}")
+                                        background_db.rollback()
+                                        logger.warning(f"⚠️ Failed to queue stage notifications for agent {agent.id}: {str(notif_error)}")
                                         # Don't fail if notifications fail
                         finally:
                             background_db.close()
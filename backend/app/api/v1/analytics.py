@@ -15,8 +15,10 @@ from app.models.user import User
 from app.models.policy import ComplianceCheck, ComplianceCheckStatus
 from app.models.agent_connection import AgentConnection
 from app.models.vendor import Vendor
-from app.models.prompt_usage import PromptUsage, CostAggregation
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_user, get_current_principal
+from app.core.principal_cache import Principal
+from app.services.analytics_cube import AnalyticsCubeService
+from bisect import bisect_right
 import logging
 
 logger = logging.getLogger(__name__)
@@ -89,8 +91,7 @@ async def get_dashboard_analytics(
     
     # Filter by tenant - ALL users must filter by tenant
     from app.models.vendor import Vendor
-    vendors = db.query(Vendor).filter(Vendor.tenant_id == effective_tenant_id).all()
-    vendor_ids = [v.id for v in vendors]
+    vendor_ids = [vendor_id for (vendor_id,) in db.query(Vendor.id).filter(Vendor.tenant_id == effective_tenant_id).all()]
     if vendor_ids:
         agent_query = agent_query.filter(Agent.vendor_id.in_(vendor_ids))
         review_query = review_query.join(Agent).filter(Agent.vendor_id.in_(vendor_ids))
@@ -246,8 +247,7 @@ async def get_agent_report(
     
     # Filter by tenant - ALL users must filter by tenant
     from app.models.vendor import Vendor
-    vendors = db.query(Vendor).filter(Vendor.tenant_id == effective_tenant_id).all()
-    vendor_ids = [v.id for v in vendors]
+    vendor_ids = [vendor_id for (vendor_id,) in db.query(Vendor.id).filter(Vendor.tenant_id == effective_tenant_id).all()]
     if vendor_ids:
         query = query.filter(Agent.vendor_id.in_(vendor_ids))
     else:
@@ -369,16 +369,9 @@ async def get_ai_posture_dashboard(
             detail="User must be assigned to a tenant to view AI posture dashboard"
         )
     
-    # Base query - filter by tenant
-    agent_query = db.query(Agent).join(AgentMetadata, Agent.id == AgentMetadata.agent_id)
-    vendor_query = db.query(Vendor)
-    
     # ALL users must filter by tenant
-    vendors = vendor_query.filter(Vendor.tenant_id == effective_tenant_id).all()
-    vendor_ids = [v.id for v in vendors]
-    if vendor_ids:
-        agent_query = agent_query.filter(Agent.vendor_id.in_(vendor_ids))
-    else:
+    vendor_ids = [vendor_id for (vendor_id,) in db.query(Vendor.id).filter(Vendor.tenant_id == effective_tenant_id).all()]
+    if not vendor_ids:
         # No vendors in tenant, return empty dashboard
         return AIPostureDashboardResponse(
             model_usage={},
@@ -407,8 +400,15 @@ async def get_ai_posture_dashboard(
             usage_by_department={}
         )
     
-    # Get all agents with metadata
-    agents_with_metadata = agent_query.all()
+    # Agents with their metadata in one query (agents without metadata are not part of the posture)
+    agents_with_metadata = []
+    metadata_by_agent = {}
+    for agent, metadata in db.query(Agent, AgentMetadata).join(
+        AgentMetadata, Agent.id == AgentMetadata.agent_id
+    ).filter(Agent.vendor_id.in_(vendor_ids)).all():
+        if agent.id not in metadata_by_agent:
+            metadata_by_agent[agent.id] = metadata
+            agents_with_metadata.append(agent)
     
     # 1. MODEL USAGE ANALYSIS
     model_usage = {}
@@ -419,7 +419,7 @@ async def get_ai_posture_dashboard(
     total_models = 0
     
     for agent in agents_with_metadata:
-        metadata = db.query(AgentMetadata).filter(AgentMetadata.agent_id == agent.id).first()
+        metadata = metadata_by_agent.get(agent.id)
         if not metadata or not metadata.llm_vendor:
             continue
         
@@ -506,7 +506,7 @@ async def get_ai_posture_dashboard(
         risk_distribution[risk_level] += 1
         
         if agent.risk_score >= 7:
-            metadata = db.query(AgentMetadata).filter(AgentMetadata.agent_id == agent.id).first()
+            metadata = metadata_by_agent.get(agent.id)
             high_risk_agents.append({
                 "id": str(agent.id),
                 "name": agent.name,
@@ -541,16 +541,14 @@ async def get_ai_posture_dashboard(
         compliance_distribution[compliance_level] += 1
     
     # Compliance checks summary - filter by tenant
-    compliance_checks_query = db.query(ComplianceCheck)
-    if vendor_ids:
-        compliance_checks_query = compliance_checks_query.join(Agent).filter(
-            Agent.vendor_id.in_(vendor_ids)
-        )
-    
-    compliance_checks_summary = {}
-    for status in ComplianceCheckStatus:
-        count = compliance_checks_query.filter(ComplianceCheck.status == status.value).count()
-        compliance_checks_summary[status.value] = count
+    compliance_checks_summary = {check_status.value: 0 for check_status in ComplianceCheckStatus}
+    for check_status, count in db.query(
+        ComplianceCheck.status, func.count(ComplianceCheck.id)
+    ).join(Agent).filter(
+        Agent.vendor_id.in_(vendor_ids)
+    ).group_by(ComplianceCheck.status).all():
+        if check_status in compliance_checks_summary:
+            compliance_checks_summary[check_status] = count
     
     # Active compliance frameworks (from ComplianceFramework model)
     try:
@@ -585,7 +583,7 @@ async def get_ai_posture_dashboard(
     deployment_distribution = {"cloud": 0, "on_premise": 0, "hybrid": 0, "unknown": 0}
     
     for agent in agents_with_metadata:
-        metadata = db.query(AgentMetadata).filter(AgentMetadata.agent_id == agent.id).first()
+        metadata = metadata_by_agent.get(agent.id)
         if not metadata or not metadata.deployment_type:
             deployment_distribution["unknown"] += 1
             continue
@@ -608,7 +606,7 @@ async def get_ai_posture_dashboard(
     data_classification_heatmap = []
     
     for agent in agents_with_metadata:
-        metadata = db.query(AgentMetadata).filter(AgentMetadata.agent_id == agent.id).first()
+        metadata = metadata_by_agent.get(agent.id)
         if not metadata or not metadata.data_sharing_scope:
             continue
         
@@ -646,44 +644,39 @@ async def get_ai_posture_dashboard(
                 data_classification_heatmap.append(heatmap_entry)
     
     # 6. INTEGRATION CONNECTIONS - filter by tenant
-    connections_query = db.query(AgentConnection)
-    if vendor_ids:
-        connections_query = connections_query.join(Agent).filter(
-            Agent.vendor_id.in_(vendor_ids)
-        )
-    
-    total_connections = connections_query.count()
     connection_types = {}
-    connection_type_counts = db.query(
+    encrypted_connections = 0
+    active_connections = 0
+    for conn_type, count, encrypted, active in db.query(
         AgentConnection.connection_type,
-        func.count(AgentConnection.id)
-    ).group_by(AgentConnection.connection_type).all()
-    
-    for conn_type, count in connection_type_counts:
+        func.count(AgentConnection.id),
+        func.count(case((AgentConnection.is_encrypted == True, 1))),
+        func.count(case((AgentConnection.is_active == True, 1)))
+    ).join(Agent, AgentConnection.agent_id == Agent.id).filter(
+        Agent.vendor_id.in_(vendor_ids)
+    ).group_by(AgentConnection.connection_type).all():
         connection_types[conn_type] = count
+        encrypted_connections += encrypted
+        active_connections += active
     
     integration_connections = {
-        "total_connections": total_connections,
+        "total_connections": sum(connection_types.values()),
         "by_type": connection_types,
-        "encrypted_connections": connections_query.filter(AgentConnection.is_encrypted == True).count(),
-        "active_connections": connections_query.filter(AgentConnection.is_active == True).count()
+        "encrypted_connections": encrypted_connections,
+        "active_connections": active_connections
     }
     
     # 7. AGENT STATUS AND CATEGORY BREAKDOWN
-    agents_by_status = {}
-    for status_val in AgentStatus:
-        count = agent_query.filter(Agent.status == status_val.value).count()
-        agents_by_status[status_val.value] = count
-    
+    agents_by_status = {status_val.value: 0 for status_val in AgentStatus}
     agents_by_category = {}
-    category_counts = db.query(Agent.category, func.count(Agent.id)).filter(
-        Agent.category.isnot(None)
-    ).group_by(Agent.category).all()
-    for category, count in category_counts:
-        agents_by_category[category or "uncategorized"] = count
+    for agent in agents_with_metadata:
+        if agent.status in agents_by_status:
+            agents_by_status[agent.status] += 1
+        if agent.category:
+            agents_by_category[agent.category] = agents_by_category.get(agent.category, 0) + 1
     
     # 8. OVERALL POSTURE METRICS
-    all_agents = agent_query.all()
+    all_agents = agents_with_metadata
     total_agents_count = len(all_agents)
     
     avg_risk = None
@@ -721,23 +714,31 @@ async def get_ai_posture_dashboard(
         )
     }
     
-    # Posture trends (last 30 days)
+    # Posture trends (last 30 days): running totals over agents ordered by creation time
     posture_trends = []
     end_date = datetime.utcnow()
+    dated_agents = sorted((a for a in all_agents if a.created_at), key=lambda a: a.created_at)
+    created_times = [a.created_at for a in dated_agents]
+    # (risk count, risk sum, compliance count, compliance sum) over the first n agents
+    running_totals = [(0, 0.0, 0, 0.0)]
+    for agent in dated_agents:
+        risk_n, risk_sum, compliance_n, compliance_sum = running_totals[-1]
+        if agent.risk_score is not None:
+            risk_n, risk_sum = risk_n + 1, risk_sum + agent.risk_score
+        if agent.compliance_score is not None:
+            compliance_n, compliance_sum = compliance_n + 1, compliance_sum + agent.compliance_score
+        running_totals.append((risk_n, risk_sum, compliance_n, compliance_sum))
+    
     for i in range(30, 0, -1):
         date = end_date - timedelta(days=i)
         next_date = date + timedelta(days=1)
         
-        day_agents = agent_query.filter(
-            and_(Agent.created_at <= next_date)
-        ).all()
+        day_agent_count = bisect_right(created_times, next_date)
         
-        if day_agents:
-            day_risk_scores = [a.risk_score for a in day_agents if a.risk_score is not None]
-            day_compliance_scores = [a.compliance_score for a in day_agents if a.compliance_score is not None]
-            
-            day_avg_risk = sum(day_risk_scores) / len(day_risk_scores) if day_risk_scores else None
-            day_avg_compliance = sum(day_compliance_scores) / len(day_compliance_scores) if day_compliance_scores else None
+        if day_agent_count:
+            risk_n, risk_sum, compliance_n, compliance_sum = running_totals[day_agent_count]
+            day_avg_risk = risk_sum / risk_n if risk_n else None
+            day_avg_compliance = compliance_sum / compliance_n if compliance_n else None
             
             day_posture = 0
             if day_avg_compliance:
@@ -750,7 +751,7 @@ async def get_ai_posture_dashboard(
                 "posture_score": round(day_posture, 2),
                 "avg_risk": round(day_avg_risk, 2) if day_avg_risk else None,
                 "avg_compliance": round(day_avg_compliance, 2) if day_avg_compliance else None,
-                "agent_count": len(day_agents)
+                "agent_count": day_agent_count
             })
     
     # 9. COST AND PROMPT ANALYTICS
@@ -774,138 +775,13 @@ async def get_ai_posture_dashboard(
     usage_by_role = {}
     usage_by_department = {}
     
-    # Query prompt usage if table exists - filter by tenant
+    # Prompt usage comes from the daily rollup cube plus a live tail since its last refresh
     try:
-        prompt_query = db.query(PromptUsage)
-        if effective_tenant_id:
-            prompt_query = prompt_query.filter(PromptUsage.tenant_id == effective_tenant_id)
-        
-        # Get last 30 days of usage
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        recent_prompts = prompt_query.filter(PromptUsage.created_at >= thirty_days_ago).all()
-        
-        # Calculate total cost
-        total_cost = sum(float(p.total_cost or 0) for p in recent_prompts)
-        cost_analytics["total_cost"] = round(total_cost, 2)
-        
-        # Cost by model
-        cost_by_model = {}
-        for prompt in recent_prompts:
-            model_key = f"{prompt.model_vendor}/{prompt.model_name}"
-            if model_key not in cost_by_model:
-                cost_by_model[model_key] = 0.0
-            cost_by_model[model_key] += float(prompt.total_cost or 0)
-        cost_analytics["cost_by_model"] = {k: round(v, 2) for k, v in cost_by_model.items()}
-        
-        # Cost by agent
-        cost_by_agent = {}
-        for prompt in recent_prompts:
-            agent_id = str(prompt.agent_id)
-            if agent_id not in cost_by_agent:
-                cost_by_agent[agent_id] = {"cost": 0.0, "requests": 0, "tokens": 0}
-            cost_by_agent[agent_id]["cost"] += float(prompt.total_cost or 0)
-            cost_by_agent[agent_id]["requests"] += 1
-            cost_by_agent[agent_id]["tokens"] += prompt.total_tokens or 0
-        
-        # Get agent names
-        agent_ids = [UUID(agent_id) for agent_id in cost_by_agent.keys()]
-        agents_map = {str(a.id): a.name for a in db.query(Agent).filter(Agent.id.in_(agent_ids)).all()}
-        cost_analytics["cost_by_agent"] = {
-            agents_map.get(agent_id, agent_id): {
-                "cost": round(data["cost"], 2),
-                "requests": data["requests"],
-                "tokens": data["tokens"]
-            }
-            for agent_id, data in cost_by_agent.items()
-        }
-        
-        # Cost trends (last 30 days)
-        cost_trends = []
-        for i in range(30, 0, -1):
-            date = datetime.utcnow() - timedelta(days=i)
-            next_date = date + timedelta(days=1)
-            day_prompts = [p for p in recent_prompts if date <= p.created_at < next_date]
-            day_cost = sum(float(p.total_cost or 0) for p in day_prompts)
-            cost_trends.append({
-                "date": date.date().isoformat(),
-                "cost": round(day_cost, 2),
-                "requests": len(day_prompts)
-            })
-        cost_analytics["cost_trends"] = cost_trends
-        
-        # Monthly and daily costs
-        today = datetime.utcnow().date()
-        today_prompts = [p for p in recent_prompts if p.created_at.date() == today]
-        cost_analytics["daily_cost"] = round(sum(float(p.total_cost or 0) for p in today_prompts), 2)
-        
-        this_month_start = datetime.utcnow().replace(day=1).date()
-        month_prompts = [p for p in recent_prompts if p.created_at.date() >= this_month_start]
-        cost_analytics["monthly_cost"] = round(sum(float(p.total_cost or 0) for p in month_prompts), 2)
-        
-        # Prompt usage statistics
-        prompt_usage_data["total_requests"] = len(recent_prompts)
-        prompt_usage_data["total_tokens"] = sum(p.total_tokens or 0 for p in recent_prompts)
-        
-        # Requests and tokens by model
-        requests_by_model = {}
-        tokens_by_model = {}
-        for prompt in recent_prompts:
-            model_key = f"{prompt.model_vendor}/{prompt.model_name}"
-            requests_by_model[model_key] = requests_by_model.get(model_key, 0) + 1
-            tokens_by_model[model_key] = tokens_by_model.get(model_key, 0) + (prompt.total_tokens or 0)
-        
-        prompt_usage_data["requests_by_model"] = requests_by_model
-        prompt_usage_data["tokens_by_model"] = tokens_by_model
-        
-        # Usage trends
-        usage_trends = []
-        for i in range(30, 0, -1):
-            date = datetime.utcnow() - timedelta(days=i)
-            next_date = date + timedelta(days=1)
-            day_prompts = [p for p in recent_prompts if date <= p.created_at < next_date]
-            usage_trends.append({
-                "date": date.date().isoformat(),
-                "requests": len(day_prompts),
-                "tokens": sum(p.total_tokens or 0 for p in day_prompts)
-            })
-        prompt_usage_data["usage_trends"] = usage_trends
-        
-        # Usage by role
-        role_usage = {}
-        for prompt in recent_prompts:
-            if prompt.user_id:
-                user = db.query(User).filter(User.id == prompt.user_id).first()
-                if user:
-                    role = user.role.value if hasattr(user.role, 'value') else str(user.role)
-                    if role not in role_usage:
-                        role_usage[role] = {"requests": 0, "cost": 0.0, "tokens": 0}
-                    role_usage[role]["requests"] += 1
-                    role_usage[role]["cost"] += float(prompt.total_cost or 0)
-                    role_usage[role]["tokens"] += prompt.total_tokens or 0
-        usage_by_role = {k: {**v, "cost": round(v["cost"], 2)} for k, v in role_usage.items()}
-        
-        # Usage by department
-        dept_usage = {}
-        for prompt in recent_prompts:
-            dept = prompt.department or "Unknown"
-            if dept not in dept_usage:
-                dept_usage[dept] = {"requests": 0, "cost": 0.0, "tokens": 0, "users": set()}
-            dept_usage[dept]["requests"] += 1
-            dept_usage[dept]["cost"] += float(prompt.total_cost or 0)
-            dept_usage[dept]["tokens"] += prompt.total_tokens or 0
-            if prompt.user_id:
-                dept_usage[dept]["users"].add(str(prompt.user_id))
-        
-        usage_by_department = {
-            k: {
-                "requests": v["requests"],
-                "cost": round(v["cost"], 2),
-                "tokens": v["tokens"],
-                "user_count": len(v["users"])
-            }
-            for k, v in dept_usage.items()
-        }
-        
+        usage = AnalyticsCubeService(db).prompt_usage_analytics(effective_tenant_id)
+        cost_analytics = usage["cost_analytics"]
+        prompt_usage_data = usage["prompt_usage"]
+        usage_by_role = usage["usage_by_role"]
+        usage_by_department = usage["usage_by_department"]
     except Exception as e:
         logger.warning(f"Error fetching prompt usage data: {str(e)}")
         # Tables might not exist yet, return empty data
@@ -965,7 +841,7 @@ async def get_ecosystem_map(
     filter_by: Optional[str] = Query(None, description="Filter by: customer, agent, vendor, llm_type, llm_vendor, department, category"),
     filter_value: Optional[str] = Query(None, description="Value to filter by (e.g., agent name, vendor name, LLM model)"),
     load_step: Optional[int] = Query(1, ge=1, le=5, description="Progressive loading step: 1=customer, 2=vendors, 3=agents, 4=llm, 5=systems"),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -1081,6 +957,21 @@ async def get_ecosystem_map(
                     vendor_assessments[vendor_id_str] = []
                 vendor_assessments[vendor_id_str].append(assignment)
         
+        # Security incident matches for all vendors, with their incidents, in one query
+        from app.models.security_incident import VendorSecurityTracking, SecurityIncident, IncidentType, IncidentSeverity
+        vendor_trackings_by_vendor = {}
+        if vendors:
+            # Ensure tenant_id is UUID for comparison
+            from uuid import UUID as UUIDType
+            tenant_uuid = tenant_id if isinstance(tenant_id, UUIDType) else UUIDType(str(tenant_id))
+            for tracking, incident in db.query(VendorSecurityTracking, SecurityIncident).join(
+                SecurityIncident, VendorSecurityTracking.incident_id == SecurityIncident.id
+            ).filter(
+                VendorSecurityTracking.vendor_id.in_([v.id for v in vendors]),
+                VendorSecurityTracking.tenant_id == tenant_uuid
+            ).all():
+                vendor_trackings_by_vendor.setdefault(tracking.vendor_id, []).append((tracking, incident))
+        
         for vendor in vendors:
             vendor_id_str = str(vendor.id)
             vendor_node_id = f"vendor_{vendor.id}"
@@ -1141,8 +1032,7 @@ async def get_ecosystem_map(
                         "completed_at": assignment.completed_at.isoformat() if assignment.completed_at else None
                     })
             
-            # Get security incidents/breaches for this vendor
-            from app.models.security_incident import VendorSecurityTracking, SecurityIncident, IncidentType, IncidentSeverity
+            # Security incidents/breaches for this vendor
             security_incidents = []
             breach_count = 0
             cve_count = 0
@@ -1152,19 +1042,7 @@ async def get_ecosystem_map(
             active_cve_count = 0
             latest_incident_date = None
             
-            # Query VendorSecurityTracking for this vendor
-            # Ensure tenant_id is UUID for comparison
-            from uuid import UUID as UUIDType
-            tenant_uuid = tenant_id if isinstance(tenant_id, UUIDType) else UUIDType(str(tenant_id))
-            vendor_trackings = db.query(VendorSecurityTracking).filter(
-                VendorSecurityTracking.vendor_id == vendor.id,
-                VendorSecurityTracking.tenant_id == tenant_uuid
-            ).all()
-            
-            for tracking in vendor_trackings:
-                incident = db.query(SecurityIncident).filter(
-                    SecurityIncident.id == tracking.incident_id
-                ).first()
+            for tracking, incident in vendor_trackings_by_vendor.get(vendor.id, []):
                 if incident:
                     if incident.incident_type == IncidentType.DATA_BREACH:
                         breach_count += 1
@@ -1237,19 +1115,13 @@ async def get_ecosystem_map(
         
         # Department filter - filter agents by users in that department
         if department_filter:
-            from app.models.user import User
-            # Get users in the department
-            dept_users = db.query(User).filter(
-                User.tenant_id == tenant_id,
-                User.department == department_filter,
-                User.is_active == True
-            ).all()
             # Note: In a full implementation, you'd link agents to users via ownership/requested_by
             # For now, we'll apply the filter if there's a way to link them
             # This is a placeholder - you may need to add an ownership field to agents
             pass  # Department filtering would require agent ownership tracking
         
         agents = agent_query.all()
+        agents_by_id = {a.id: a for a in agents}
         
         for agent in agents:
             # Add agent/bot node
@@ -1295,7 +1167,7 @@ async def get_ecosystem_map(
         agent_metadata_list = metadata_query.all()
         
         for metadata in agent_metadata_list:
-            agent = next((a for a in agents if a.id == metadata.agent_id), None)
+            agent = agents_by_id.get(metadata.agent_id)
             if not agent:
                 continue
                 
@@ -1338,7 +1210,7 @@ async def get_ecosystem_map(
         ).all()
         
         for connection in connections:
-            agent = next((a for a in agents if a.id == connection.agent_id), None)
+            agent = agents_by_id.get(connection.agent_id)
             if not agent:
                 continue
                 
@@ -12,7 +12,8 @@ from app.models.agent import Agent, AgentStatus
 from app.models.user import User, UserRole
 from app.models.review import Review
 from app.models.approval import ApprovalInstance, ApprovalStatus, ApprovalStep
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_principal
+from app.core.principal_cache import Principal
 from app.core.audit import audit_service, AuditAction
 
 router = APIRouter(prefix="/approvals", tags=["approvals"])
@@ -82,7 +83,7 @@ async def approve_agent(
     agent_id: UUID,
     approve_data: ApproveRequest,
     request: Request,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Approve an agent (requires approver role)"""
@@ -400,7 +401,7 @@ async def reject_agent(
     agent_id: UUID,
     reject_data: RejectRequest,
     request: Request,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Reject an agent (requires approver role)"""
@@ -518,7 +519,7 @@ async def reject_agent(
 @router.get("/agents/{agent_id}", response_model=ApprovalResponse)
 async def get_agent_approval(
     agent_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get approval status for an agent - checks both OnboardingRequest (workflow-based) and ApprovalInstance (legacy)"""
@@ -676,7 +677,7 @@ async def get_agent_approval(
 async def get_pending_approvals(
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get pending approvals for approver"""
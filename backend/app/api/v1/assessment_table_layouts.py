@@ -11,7 +11,8 @@ from datetime import datetime
 from app.core.database import get_db
 from app.models.assessment_table_layout import AssessmentTableLayout, TableViewType
 from app.models.user import User, UserRole
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_user, get_current_principal
+from app.core.principal_cache import Principal
 from app.core.audit import audit_service, AuditAction
 import logging
 
@@ -484,7 +485,7 @@ async def delete_table_layout(
 @router.get("/available-columns/{view_type}", response_model=List[Dict[str, Any]])
 async def get_available_columns(
     view_type: str,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get available columns for a view type"""
@@ -24,6 +24,7 @@ from app.services.assessment_service import AssessmentService
 from app.services.assessment_template_service import AssessmentTemplateService
 from app.models.assessment_template import AssessmentTemplate
 from app.services.compliance_calculation_service import ComplianceCalculationService
+from app.services.assessment_analytics import AssessmentAnalyticsService
 from app.core.audit import audit_service, AuditAction
 import logging
 import os
@@ -48,12 +49,14 @@ class ComplianceCalculationResponse(BaseModel):
 async def calculate_assignment_compliance(
     assignment_id: UUID,
     framework_id: Optional[UUID] = Query(None, description="Optional: Calculate for specific framework only"),
+    refresh: bool = Query(False, description="Recalculate from scratch instead of reading the stored snapshot"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
-    Calculate compliance scores for an assessment assignment
-    Real-time calculation based on question responses and pass/fail criteria
+    Get compliance scores for an assessment assignment
+    Read from the assignment's compliance snapshot, which is built on first read
+    and updated incrementally as responses are saved
     """
     from app.core.tenant_utils import get_effective_tenant_id
     effective_tenant_id = get_effective_tenant_id(current_user, db)
@@ -78,9 +81,10 @@ async def calculate_assignment_compliance(
     # Calculate compliance
     try:
         service = ComplianceCalculationService(db)
-        result = service.calculate_compliance_for_assignment(
+        result = service.get_compliance_snapshot(
             assignment_id=assignment_id,
-            framework_id=framework_id
+            framework_id=framework_id,
+            refresh=refresh
         )
         return result
     except Exception as e:
@@ -1746,12 +1750,14 @@ async def save_assessment_responses(
     from app.models.submission_requirement import SubmissionRequirementResponse
     
     # Save responses for all question types
+    changed_question_ids = []
     for question in questions:
         question_response = responses.get(str(question.id))
         
         # Skip if no response provided
         if question_response is None:
             continue
+        changed_question_ids.append(question.id)
         
         # Handle both simple and enhanced response formats
         if isinstance(question_response, dict):
@@ -1831,6 +1837,9 @@ async def save_assessment_responses(
                             "evaluated_at": datetime.utcnow().isoformat(),
                             "evaluated_by": "ai_system"
                         }
+                        if evaluation.get("matches"):
+                            # Keyword positions in the response, for highlighting
+                            ai_evaluation["matches"] = evaluation["matches"]
                 except Exception as e:
                     logger.warning(f"Error evaluating response for question {question.id}: {e}")
                     # Continue without evaluation - don't fail the save
@@ -1865,6 +1874,13 @@ async def save_assessment_responses(
         logger.warning(f"Error flushing responses before completion check: {e}", exc_info=True)
         # Continue anyway - responses might still be in session
     
+    # Apply the changed answers to the compliance snapshot (committed with the responses)
+    if changed_question_ids:
+        try:
+            ComplianceCalculationService(db).update_compliance_snapshot(assignment_id, changed_question_ids)
+        except Exception as e:
+            logger.warning(f"Error updating compliance snapshot for assignment {assignment_id}: {e}", exc_info=True)
+    
     # Check if all required questions are answered (only if not draft)
     if not is_draft:
         # Ensure assessment has questions
@@ -3548,12 +3564,14 @@ async def save_assessment_responses_draft(
     from app.models.submission_requirement import SubmissionRequirementResponse
 
     # Save responses for all question types
+    changed_question_ids = []
     for question in questions:
         question_response = responses.get(str(question.id))
 
         # Skip if no response provided
         if question_response is None:
             continue
+        changed_question_ids.append(question.id)
 
         # Handle both simple and enhanced response formats
         if isinstance(question_response, dict):
@@ -3621,6 +3639,14 @@ async def save_assessment_responses_draft(
             logger.error(f"Error saving question response for question {question.id}: {e}", exc_info=True)
             # Continue with other questions even if one fails
 
+    # Apply the changed answers to the compliance snapshot (committed with the responses)
+    if changed_question_ids:
+        try:
+            db.flush()
+            ComplianceCalculationService(db).update_compliance_snapshot(assignment_id, changed_question_ids)
+        except Exception as e:
+            logger.warning(f"Error updating compliance snapshot for assignment {assignment_id}: {e}", exc_info=True)
+
     try:
         db.commit()
     except Exception as e:
@@ -4003,12 +4029,12 @@ async def trigger_schedules(
     from app.services.assessment_scheduler import AssessmentScheduler
     
     scheduler = AssessmentScheduler(db)
-    assignments = scheduler.trigger_due_schedules()
+    assignments_created = scheduler.trigger_due_schedules()
     overdue_count = scheduler.check_overdue_assignments()
     
     return {
         "message": "Schedules processed",
-        "assignments_created": len(assignments),
+        "assignments_created": assignments_created,
         "overdue_marked": overdue_count,
     }
 
@@ -5732,321 +5758,11 @@ async def get_assessment_analytics(
             detail="Tenant access required"
         )
     
-    from app.models.vendor import Vendor
-    from app.models.agent import Agent
-    from datetime import datetime, timedelta
-    from collections import defaultdict
-    import calendar
-    
-    # Get all assessments for tenant
-    assessments_query = db.query(Assessment).filter(
-        Assessment.tenant_id == effective_tenant_id,
-        Assessment.is_active == True
-    )
-    
-    if assessment_type:
-        assessments_query = assessments_query.filter(Assessment.assessment_type == assessment_type)
-    
-    assessments = assessments_query.all()
-    assessment_ids = [a.id for a in assessments]
-    
-    # Get all assignments
-    assignments_query = db.query(AssessmentAssignment).filter(
-        AssessmentAssignment.tenant_id == effective_tenant_id,
-        AssessmentAssignment.assessment_id.in_(assessment_ids)
+    # Counts come from the assessment analytics rollup; results are cached briefly per filter
+    return AssessmentAnalyticsService(db, effective_tenant_id).get_dashboard(
+        quarter=quarter,
+        assessment_type=assessment_type
     )
-    
-    assignments = assignments_query.all()
-    
-    # Calculate quarterly progress
-    now = datetime.utcnow()
-    current_year = now.year
-    current_quarter = (now.month - 1) // 3 + 1
-    
-    quarterly_data = defaultdict(lambda: {
-        "total": 0,
-        "completed": 0,
-        "in_progress": 0,
-        "pending": 0,
-        "overdue": 0
-    })
-    
-    for assignment in assignments:
-        if assignment.completed_at:
-            completed_quarter = (assignment.completed_at.month - 1) // 3 + 1
-            quarter_key = f"{assignment.completed_at.year}-Q{completed_quarter}"
-        elif assignment.assigned_at:
-            assigned_quarter = (assignment.assigned_at.month - 1) // 3 + 1
-            quarter_key = f"{assignment.assigned_at.year}-Q{assigned_quarter}"
-        else:
-            continue
-        
-        if quarter and quarter_key != quarter:
-            continue
-        
-        quarterly_data[quarter_key]["total"] += 1
-        if assignment.status == "completed":
-            quarterly_data[quarter_key]["completed"] += 1
-        elif assignment.status == "in_progress":
-            quarterly_data[quarter_key]["in_progress"] += 1
-        elif assignment.status == "pending":
-            quarterly_data[quarter_key]["pending"] += 1
-        if assignment.due_date and assignment.due_date < now and assignment.status != "completed":
-            quarterly_data[quarter_key]["overdue"] += 1
-    
-    # Vendor-wise distribution by assessment type
-    vendor_distribution = defaultdict(lambda: {
-        "vendor_name": "",
-        "assessments": defaultdict(lambda: {
-            "total": 0,
-            "completed": 0,
-            "pending": 0,
-            "overdue": 0,
-            "risk_status": "green"  # green, yellow, red
-        })
-    })
-    
-    # Get vendor details
-    vendor_ids = [a.vendor_id for a in assignments if a.vendor_id]
-    vendors = {v.id: v for v in db.query(Vendor).filter(Vendor.id.in_(vendor_ids)).all()}
-    
-    for assignment in assignments:
-        if not assignment.vendor_id:
-            continue
-
-        vendor = vendors.get(assignment.vendor_id)
-        if not vendor:
-            continue
-
-        # Get the assessment for this assignment to get the assessment type
-        assessment = next((a for a in assessments if a.id == assignment.assessment_id), None)
-        if not assessment:
-            continue
-
-        assessment_type_key = assessment.assessment_type
-        vendor_distribution[str(assignment.vendor_id)]["vendor_name"] = vendor.name
-
-        vendor_distribution[str(assignment.vendor_id)]["assessments"][assessment_type_key]["total"] += 1
-        
-        if assignment.status == "completed":
-            vendor_distribution[str(assignment.vendor_id)]["assessments"][assessment_type_key]["completed"] += 1
-        elif assignment.status == "pending" or assignment.status == "in_progress":
-            vendor_distribution[str(assignment.vendor_id)]["assessments"][assessment_type_key]["pending"] += 1
-        
-        if assignment.due_date and assignment.due_date < now and assignment.status != "completed":
-            vendor_distribution[str(assignment.vendor_id)]["assessments"][assessment_type_key]["overdue"] += 1
-    
-    # Calculate risk status for each vendor
-    for vendor_key, vendor_data in vendor_distribution.items():
-        for assessment_type, data in vendor_data["assessments"].items():
-            total = data["total"]
-            completed = data["completed"]
-            overdue = data["overdue"]
-            
-            if total == 0:
-                data["risk_status"] = "green"
-            elif overdue > 0:
-                data["risk_status"] = "red"
-            elif completed / total < 0.5:  # Less than 50% completed
-                data["risk_status"] = "yellow"
-            elif completed / total < 0.8:  # Less than 80% completed
-                data["risk_status"] = "yellow"
-            else:
-                data["risk_status"] = "green"
-    
-    # Next assessment due dates
-    upcoming_assignments = db.query(AssessmentAssignment).filter(
-        AssessmentAssignment.tenant_id == effective_tenant_id,
-        AssessmentAssignment.assessment_id.in_(assessment_ids),
-        AssessmentAssignment.due_date.isnot(None),
-        AssessmentAssignment.due_date >= now,
-        AssessmentAssignment.status.in_(["pending", "in_progress"])
-    ).order_by(AssessmentAssignment.due_date).limit(20).all()
-    
-    next_due = []
-    for assignment in upcoming_assignments:
-        assessment = next((a for a in assessments if a.id == assignment.assessment_id), None)
-        vendor = vendors.get(assignment.vendor_id) if assignment.vendor_id else None
-        
-        next_due.append({
-            "assignment_id": str(assignment.id),
-            "assessment_name": assessment.name if assessment else "Unknown",
-            "assessment_type": assessment.assessment_type if assessment else "unknown",
-            "vendor_name": vendor.name if vendor else "Unknown",
-            "due_date": assignment.due_date.isoformat() if assignment.due_date else None,
-            "days_until_due": (assignment.due_date - now).days if assignment.due_date else None,
-            "status": assignment.status
-        })
-    
-    # Overall statistics
-    total_assessments = len(assessments)
-    total_assignments = len(assignments)
-    completed_assignments = len([a for a in assignments if a.status == "completed"])
-    pending_assignments = len([a for a in assignments if a.status in ["pending", "in_progress"]])
-    overdue_assignments = len([a for a in assignments if a.due_date and a.due_date < now and a.status != "completed"])
-    
-    # Assessment type distribution
-    type_distribution = defaultdict(int)
-    for assessment in assessments:
-        type_distribution[assessment.assessment_type] += 1
-    
-    # Vendor risk by Assessment Grading (accepted, denied, need_info)
-    from app.models.assessment_review import AssessmentReview
-    vendor_grading_heatmap = defaultdict(lambda: {
-        "vendor_name": "",
-        "grading": {
-            "accepted": 0,
-            "denied": 0,
-            "need_info": 0,
-            "pending": 0
-        }
-    })
-    
-    assignment_ids = [a.id for a in assignments]
-    reviews = db.query(AssessmentReview).filter(
-        AssessmentReview.assignment_id.in_(assignment_ids),
-        AssessmentReview.tenant_id == effective_tenant_id
-    ).all()
-    
-    for review in reviews:
-        assignment = next((a for a in assignments if a.id == review.assignment_id), None)
-        if not assignment or not assignment.vendor_id:
-            continue
-        
-        vendor = vendors.get(assignment.vendor_id)
-        if not vendor:
-            continue
-        
-        vendor_key = str(assignment.vendor_id)
-        vendor_grading_heatmap[vendor_key]["vendor_name"] = vendor.name
-        
-        # Map human_decision to grading categories
-        if review.human_decision:
-            if review.human_decision == "approved":
-                vendor_grading_heatmap[vendor_key]["grading"]["accepted"] += 1
-            elif review.human_decision == "rejected":
-                vendor_grading_heatmap[vendor_key]["grading"]["denied"] += 1
-            elif review.human_decision == "needs_revision":
-                vendor_grading_heatmap[vendor_key]["grading"]["need_info"] += 1
-        else:
-            vendor_grading_heatmap[vendor_key]["grading"]["pending"] += 1
-    
-    # Vendor risk by CVEs
-    vendor_cve_risk = defaultdict(lambda: {
-        "vendor_name": "",
-        "total_cves": 0,
-        "critical_cves": 0,
-        "high_cves": 0,
-        "medium_cves": 0,
-        "low_cves": 0,
-        "risk_score": 0.0
-    })
-    
-    try:
-        from app.models.security_incident import VendorSecurityTracking, SecurityIncident, IncidentSeverity
-        from app.core.feature_gating import FeatureGate
-        
-        # Check if CVE feature is enabled for tenant
-        feature_gate = FeatureGate(db)
-        if feature_gate.is_feature_enabled(str(effective_tenant_id), "cve_tracking") and vendor_ids:
-            # Get all CVE trackings for vendors in this tenant
-            trackings = db.query(VendorSecurityTracking).join(
-                SecurityIncident, VendorSecurityTracking.incident_id == SecurityIncident.id
-            ).filter(
-                VendorSecurityTracking.tenant_id == effective_tenant_id,
-                SecurityIncident.incident_type == "cve",
-                VendorSecurityTracking.vendor_id.in_(vendor_ids)
-            ).all()
-            
-            for tracking in trackings:
-                if not tracking.vendor_id:
-                    continue
-                
-                vendor = vendors.get(tracking.vendor_id)
-                if not vendor:
-                    continue
-                
-                vendor_key = str(tracking.vendor_id)
-                vendor_cve_risk[vendor_key]["vendor_name"] = vendor.name
-                vendor_cve_risk[vendor_key]["total_cves"] += 1
-                
-                # Get incident severity
-                incident = db.query(SecurityIncident).filter(
-                    SecurityIncident.id == tracking.incident_id
-                ).first()
-                
-                if incident and incident.severity:
-                    severity = incident.severity.value if hasattr(incident.severity, 'value') else str(incident.severity)
-                    if severity == "critical":
-                        vendor_cve_risk[vendor_key]["critical_cves"] += 1
-                        vendor_cve_risk[vendor_key]["risk_score"] += 10.0
-                    elif severity == "high":
-                        vendor_cve_risk[vendor_key]["high_cves"] += 1
-                        vendor_cve_risk[vendor_key]["risk_score"] += 7.0
-                    elif severity == "medium":
-                        vendor_cve_risk[vendor_key]["medium_cves"] += 1
-                        vendor_cve_risk[vendor_key]["risk_score"] += 4.0
-                    elif severity == "low":
-                        vendor_cve_risk[vendor_key]["low_cves"] += 1
-                        vendor_cve_risk[vendor_key]["risk_score"] += 1.0
-    except Exception as e:
-        logger.warning(f"Error fetching CVE data for analytics: {e}")
-        # Continue without CVE data if feature is not enabled or error occurs
-    
-    return {
-        "overview": {
-            "total_assessments": total_assessments,
-            "total_assignments": total_assignments,
-            "completed_assignments": completed_assignments,
-            "pending_assignments": pending_assignments,
-            "overdue_assignments": overdue_assignments,
-            "completion_rate": (completed_assignments / total_assignments * 100) if total_assignments > 0 else 0
-        },
-        "quarterly_progress": dict(quarterly_data),
-        "vendor_distribution": {
-            str(vendor_id): {
-                "vendor_name": data["vendor_name"],
-                "assessments": {
-                    atype: {
-                        "total": adata["total"],
-                        "completed": adata["completed"],
-                        "pending": adata["pending"],
-                        "overdue": adata["overdue"],
-                        "risk_status": adata["risk_status"]
-                    }
-                    for atype, adata in data["assessments"].items()
-                },
-                "overall_risk": "red" if any(
-                    adata["risk_status"] == "red" for adata in data["assessments"].values()
-                ) else ("yellow" if any(
-                    adata["risk_status"] == "yellow" for adata in data["assessments"].values()
-                ) else "green")
-            }
-            for vendor_id, data in vendor_distribution.items()
-        },
-        "vendor_grading_heatmap": {
-            str(vendor_id): {
-                "vendor_name": data["vendor_name"],
-                "grading": dict(data["grading"])
-            }
-            for vendor_id, data in vendor_grading_heatmap.items()
-        },
-        "vendor_cve_risk": {
-            str(vendor_id): {
-                "vendor_name": data["vendor_name"],
-                "total_cves": data["total_cves"],
-                "critical_cves": data["critical_cves"],
-                "high_cves": data["high_cves"],
-                "medium_cves": data["medium_cves"],
-                "low_cves": data["low_cves"],
-                "risk_score": round(data["risk_score"], 2)
-            }
-            for vendor_id, data in vendor_cve_risk.items()
-        },
-        "next_due_assessments": next_due,
-        "assessment_type_distribution": dict(type_distribution),
-        "current_quarter": f"{current_year}-Q{current_quarter}"
-    }
 
 
 @router.post("/assignments/{assignment_id}/decision", response_model=Dict[str, Any])
@@ -11,7 +11,8 @@ from datetime import datetime, timedelta
 from app.core.database import get_db
 from app.models.user import User
 from app.models.audit import AuditLog
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_user, get_current_principal
+from app.core.principal_cache import Principal
 from app.core.audit import audit_service
 import logging
 
@@ -135,7 +136,7 @@ async def get_resource_history(
     resource_type: str,
     resource_id: UUID,
     limit: int = Query(50, ge=1, le=500),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get history for a specific resource (Admin, Approver, and Reviewers only)"""
@@ -198,7 +199,7 @@ class PurgeAuditResponse(BaseModel):
 @router.delete("/purge", response_model=PurgeAuditResponse)
 async def purge_audit_data(
     request: PurgeAuditRequest = Body(...),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Purge old audit data (Platform Admin only)
@@ -10,6 +10,7 @@ from typing import Optional
 from app.core.database import get_db
 from app.core.security import verify_password, get_password_hash, create_access_token
 from app.core.security_middleware import sanitize_input
+from app.core.principal_cache import Principal, get_cached_principal, cache_principal, invalidate_principal
 from app.models.user import User, UserRole
 from datetime import timedelta
 from app.core.config import settings
@@ -133,11 +134,50 @@ def get_current_user_optional(
         return None
 
 
-def get_current_user(
+def _load_user_for_token(db: Session, email: str, token_tenant_id: Optional[str]) -> Optional[User]:
+    """Find the user a token's claims refer to"""
+    # Find user - if token has tenant_id, use it for additional security
+    if token_tenant_id:
+        from uuid import UUID
+        return db.query(User).filter(
+            User.email == email,
+            User.tenant_id == UUID(token_tenant_id)  # Validate tenant_id matches
+        ).first()
+    
+    # Fallback for old tokens without tenant_id (migration scenario)
+    user = db.query(User).filter(User.email == email).first()
+    # If user found but token doesn't have tenant_id, this is a security issue
+    # Log it but allow for backward compatibility
+    # Note: Platform admins may legitimately not have tenant_id, so don't warn for them
+    if user and user.tenant_id:
+        # Check role safely
+        role_str = None
+        try:
+            if isinstance(user.role, UserRole):
+                role_str = user.role.value
+            elif hasattr(user.role, 'value'):
+                role_str = user.role.value
+            else:
+                role_str = str(user.role)
+        except Exception:
+            role_str = str(user.role) if user.role else None
+        
+        if role_str != "platform_admin":
+            logger.warning(f"User {email} authenticated with token missing tenant_id")
+    return user
+
+
+def get_current_principal(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user with tenant validation"""
+) -> Principal:
+    """
+    Get a read-only snapshot of the authenticated user
+    
+    Use this instead of get_current_user in routes that only need identity
+    (id, email, role, tenant_id); repeat requests are served from the
+    principal cache without touching the database.
+    """
     from app.core.security import decode_access_token
     
     credentials_exception = HTTPException(
@@ -156,63 +196,44 @@ def get_current_user(
     if email is None:
         raise credentials_exception
     
-    # Find user - if token has tenant_id, use it for additional security
-    if token_tenant_id:
-        from uuid import UUID
-        user = db.query(User).filter(
-            User.email == email,
-            User.tenant_id == UUID(token_tenant_id)  # Validate tenant_id matches
-        ).first()
-    else:
-        # Fallback for old tokens without tenant_id (migration scenario)
-        user = db.query(User).filter(User.email == email).first()
-        # If user found but token doesn't have tenant_id, this is a security issue
-        # Log it but allow for backward compatibility
-        # Note: Platform admins may legitimately not have tenant_id, so don't warn for them
-        if user and user.tenant_id:
-            import logging
-            logger = logging.getLogger(__name__)
-            # Check role safely
-            role_str = None
-            try:
-                if isinstance(user.role, UserRole):
-                    role_str = user.role.value
-                elif hasattr(user.role, 'value'):
-                    role_str = user.role.value
-                else:
-                    role_str = str(user.role)
-            except Exception:
-                role_str = str(user.role) if user.role else None
-            
-            if role_str != "platform_admin":
-                logger.warning(f"User {email} authenticated with token missing tenant_id")
-    
-    if user is None:
-        raise credentials_exception
-    
-    # Ensure user is properly loaded with enum types
-    # Refresh to ensure all attributes are loaded correctly
-    try:
-        db.refresh(user)
-    except Exception:
-        # If refresh fails, user might already be fresh - continue
-        pass
-    
-    # Debug: Log user role information
-    import logging
-    import sys
-    logger = logging.getLogger(__name__)
-    logger.info(f"get_current_user - User: {user.email}, Role: {repr(user.role)}, Role type: {type(user.role).__name__}, Tenant ID: {user.tenant_id}")
-    print(f"[GET_CURRENT_USER] User: {user.email}, Role: {repr(user.role)}, Role type: {type(user.role).__name__}, Tenant ID: {user.tenant_id}", file=sys.stderr)
+    principal = get_cached_principal(email, token_tenant_id)
+    if principal is None:
+        user = _load_user_for_token(db, email, token_tenant_id)
+        if user is None:
+            raise credentials_exception
+        principal = Principal.from_user(user)
+        cache_principal(email, token_tenant_id, principal)
+        logger.debug(f"get_current_principal - loaded {principal.email}, Role: {principal.role!r}, Tenant ID: {principal.tenant_id}")
     
     # Additional validation: ensure user's tenant_id matches token's tenant_id
     # Skip this check for platform_admin users who may not have tenant_id
-    if token_tenant_id and user.tenant_id and str(user.tenant_id) != token_tenant_id:
+    if token_tenant_id and principal.tenant_id and str(principal.tenant_id) != token_tenant_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Tenant mismatch in authentication token"
         )
     
+    return principal
+
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> User:
+    """Get current authenticated user with tenant validation"""
+    principal = get_current_principal(token=token, db=db)
+    
+    # Primary key lookup; served from the identity map if the session already has the user
+    user = db.get(User, principal.id)
+    if user is None:
+        # Deleted since the principal was cached
+        invalidate_principal(principal.id)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
     return user
 
 
@@ -381,7 +402,7 @@ async def login(
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: Principal = Depends(get_current_principal)):
     """Get current user information"""
     return UserResponse(
         id=str(current_user.id),
@@ -19,6 +19,7 @@ from app.models.business_rule import BusinessRule
 from app.models.tenant import Tenant
 from app.api.v1.auth import get_current_user
 from app.core.audit import audit_service, AuditAction
+from app.services.business_rules_engine import invalidate_compiled_rules
 from sqlalchemy.exc import OperationalError, ProgrammingError
 import logging
 
@@ -424,6 +425,7 @@ async def create_business_rule(
         db.add(rule)
         db.commit()
         db.refresh(rule)
+        invalidate_compiled_rules(effective_tenant_id)
         
         # Audit log
         try:
@@ -526,6 +528,7 @@ async def update_business_rule(
     try:
         db.commit()
         db.refresh(rule)
+        invalidate_compiled_rules(effective_tenant_id)
         
         # Audit log
         try:
@@ -614,6 +617,7 @@ async def delete_business_rule(
     try:
         db.delete(rule)
         db.commit()
+        invalidate_compiled_rules(effective_tenant_id)
         
         # Audit log
         try:
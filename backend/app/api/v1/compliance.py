@@ -11,7 +11,8 @@ from app.core.database import get_db
 from app.models.agent import Agent
 from app.models.policy import Policy, ComplianceCheck, ComplianceCheckStatus
 from app.models.user import User
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_user, get_current_principal
+from app.core.principal_cache import Principal
 from app.services.compliance_service import compliance_service
 from app.core.feature_gating import FeatureGate
 
@@ -142,7 +143,7 @@ async def check_agent_compliance(
 @router.get("/agents/{agent_id}/checks")
 async def get_agent_compliance_checks(
     agent_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get compliance check history for an agent with full policy details"""
@@ -208,7 +209,7 @@ async def get_agent_compliance_checks(
 @router.post("/policies", response_model=PolicyResponse, status_code=status.HTTP_201_CREATED)
 async def create_policy(
     policy_data: PolicyCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Create a new policy (Admin only)"""
@@ -271,7 +272,7 @@ async def create_policy(
 @router.get("/policies", response_model=List[PolicyResponse])
 async def list_policies(
     category: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """List policies"""
@@ -317,7 +318,7 @@ async def list_policies(
 async def update_policy(
     policy_id: UUID,
     policy_data: PolicyUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Update a policy (Admin only)"""
@@ -374,7 +375,7 @@ async def update_policy(
 @router.get("/policies/{policy_id}/enforcement")
 async def get_policy_enforcement(
     policy_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get policy enforcement logic and measurement details"""
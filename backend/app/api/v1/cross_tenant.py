@@ -5,8 +5,8 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import Optional
 from app.core.database import get_db
-from app.models.user import User
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_principal
+from app.core.principal_cache import Principal
 from app.services.cross_tenant_learning import CrossTenantLearningService
 
 router = APIRouter(prefix="/cross-tenant", tags=["cross-tenant"])
@@ -14,7 +14,7 @@ router = APIRouter(prefix="/cross-tenant", tags=["cross-tenant"])
 
 @router.get("/approval-patterns")
 async def get_approval_patterns(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get aggregated approval patterns (anonymized)"""
@@ -34,7 +34,7 @@ async def get_approval_patterns(
 
 @router.get("/rejection-reasons")
 async def get_common_rejection_reasons(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get common rejection reasons (anonymized)"""
@@ -56,7 +56,7 @@ async def get_common_rejection_reasons(
 async def get_best_practices(
     category: Optional[str] = None,
     agent_type: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get best practices from successful agents (anonymized)"""
@@ -11,7 +11,8 @@ from pydantic import BaseModel, Field, model_validator
 from app.core.database import get_db
 from app.models.user import User, UserRole
 from app.models.entity_field import EntityFieldRegistry, EntityPermission, EntityFieldPermission
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_user, get_current_principal
+from app.core.principal_cache import Principal
 from app.services.entity_field_discovery import (
     discover_all_entities,
     sync_entity_fields,
@@ -254,7 +255,7 @@ async def discover_entities_endpoint(
 @router.get("/entity-fields/tree", response_model=List[EntityTreeResponse])
 async def get_entity_tree(
     category: Optional[str] = Query(None, description="Filter by category"),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get entity tree organized by category
@@ -309,7 +310,7 @@ async def list_entity_fields(
     is_enabled: Optional[bool] = Query(None, description="Filter by enabled status"),
     is_visible: Optional[bool] = Query(None, description="Filter by visibility in form designer"),
     is_system: Optional[bool] = Query(None, description="Filter by system fields"),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """List entity fields with optional filters
@@ -363,7 +364,7 @@ async def list_entity_fields(
 @router.get("/entity-fields/{entity_name}", response_model=List[EntityFieldResponse])
 async def get_entity_fields(
     entity_name: str,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get all fields for a specific entity"""
@@ -397,7 +398,7 @@ async def get_entity_fields(
 async def get_entity_field(
     entity_name: str,
     field_name: str,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get a specific entity field
@@ -503,7 +504,7 @@ async def update_entity_field(
 async def list_entity_permissions(
     entity_category: Optional[str] = Query(None, description="Filter by category"),
     is_active: Optional[bool] = Query(None, description="Filter by active status"),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """List entity permissions"""
@@ -527,7 +528,7 @@ async def list_entity_permissions(
 @router.get("/entity-permissions/{entity_name}", response_model=EntityPermissionResponse)
 async def get_entity_permission(
     entity_name: str,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get entity permission baseline"""
@@ -601,7 +602,7 @@ async def get_field_permissions(
     entity_name: str,
     field_name: str,
     include_inherited: bool = Query(False, description="Include inherited permissions from entity baseline"),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get field permission overrides with inheritance support
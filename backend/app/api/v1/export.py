@@ -16,7 +16,8 @@ from app.models.agent import Agent
 from app.models.audit import AuditLog
 from app.models.review import Review
 from app.models.policy import ComplianceCheck, Policy
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_user, get_current_principal
+from app.core.principal_cache import Principal
 
 router = APIRouter(prefix="/export", tags=["export"])
 
@@ -153,7 +154,7 @@ async def export_audit_logs(
     end_date: Optional[str] = None,
     action_filter: Optional[str] = None,
     resource_type: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Export audit logs"""
@@ -246,7 +247,7 @@ async def export_audit_logs(
 async def export_compliance_report(
     format: str = Query("csv", pattern="^(csv|json)$"),
     agent_id: Optional[UUID] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Export compliance report"""
@@ -339,7 +340,7 @@ async def export_flow_executions(
     status_filter: Optional[str] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Export flow execution history"""
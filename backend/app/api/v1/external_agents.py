@@ -8,7 +8,8 @@ from uuid import UUID
 from pydantic import BaseModel
 
 from app.core.database import get_db
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_user, get_current_principal
+from app.core.principal_cache import Principal
 from app.models.user import User
 from app.services.agentic.external_agent_service import ExternalAgentService
 from app.services.agentic.agent_registry import AgentRegistry
@@ -39,7 +40,7 @@ class ExternalAgentResponse(BaseModel):
 async def discover_external_agents(
     agent_type: Optional[str] = None,
     skill: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -13,8 +13,8 @@ import shutil
 
 from app.core.database import get_db
 from app.models.file import FileMetadata
-from app.api.v1.auth import get_current_user
-from app.models.user import User
+from app.api.v1.auth import get_current_principal
+from app.core.principal_cache import Principal
 
 router = APIRouter(prefix="/files", tags=["files"])
 
@@ -50,7 +50,7 @@ async def upload_file(
     context: str = Query(..., description="Context identifier (e.g., assessment_assignment_id)"),
     context_type: str = Query(..., description="Context type (e.g., assessment, questionnaire)"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Upload a file and store metadata in database
@@ -115,7 +115,7 @@ async def upload_file(
 async def download_file(
     file_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Download a file by its ID
@@ -150,7 +150,7 @@ async def download_file(
 async def delete_file(
     file_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Delete a file (soft delete - marks as deleted but keeps for cleanup)
@@ -183,7 +183,7 @@ async def list_files(
     context_id: Optional[str] = None,
     include_deleted: bool = False,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     List files with optional filtering by context
@@ -5,8 +5,8 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import Optional
 from app.core.database import get_db
-from app.models.user import User
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_principal
+from app.core.principal_cache import Principal
 from app.services.fine_tuning_service import FineTuningService
 
 router = APIRouter(prefix="/fine-tuning", tags=["fine-tuning"])
@@ -15,7 +15,7 @@ router = APIRouter(prefix="/fine-tuning", tags=["fine-tuning"])
 @router.get("/training-data")
 async def get_training_data(
     tenant_id: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get training data for fine-tuning (admin only)"""
@@ -32,7 +32,7 @@ async def get_training_data(
 
 @router.post("/compliance-model")
 async def fine_tune_compliance_model(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Fine-tune compliance checking model (admin only)"""
@@ -55,7 +55,7 @@ async def fine_tune_compliance_model(
 
 @router.post("/recommendation-model")
 async def fine_tune_recommendation_model(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Fine-tune recommendation model (admin only)"""
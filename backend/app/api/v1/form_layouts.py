@@ -6,7 +6,7 @@ IMPORTANT: Custom fields are stored ONLY in CustomFieldCatalog (Entity and Field
 FormLayout.custom_field_ids stores only references (UUIDs) to avoid duplication.
 Permissions come from Entity and Fields Catalog as the source of truth.
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Path
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Request
 from sqlalchemy.orm import Session
 from sqlalchemy.orm.attributes import flag_modified
 from pydantic import BaseModel, Field
@@ -20,8 +20,10 @@ from app.services.layout_type_mapper import get_layout_type_for_stage
 from app.models.user import User, UserRole
 from app.models.custom_field import CustomFieldCatalog
 from app.models.master_data_list import MasterDataList
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_user, get_current_principal
+from app.core.principal_cache import Principal
 from app.core.audit import audit_service, AuditAction
+from app.core.response_cache import cached_response, register_tagged_model, resource_tags, response_cache_key
 import logging
 
 logger = logging.getLogger(__name__)
@@ -133,6 +135,10 @@ def _get_active_layout_internal(
 
 router = APIRouter(prefix="/form-layouts", tags=["form-layouts"])
 
+register_tagged_model(FormLayout, "form_layouts")
+register_tagged_model(Form, "form_layouts")
+register_tagged_model(CustomFieldCatalog, "custom_fields")
+
 
 class SectionDefinition(BaseModel):
     """Section definition schema"""
@@ -675,6 +681,7 @@ async def create_layout(
 
 @router.get("", response_model=List[FormLayoutResponse])
 async def list_layouts(
+    request: Request,
     request_type: Optional[str] = Query(None),  # Validated dynamically against master data
     workflow_stage: Optional[str] = Query(None, pattern="^(new|in_progress|pending_approval|approved|rejected|closed|cancelled|pending_review|needs_revision)$"),
     agent_type: Optional[str] = None,
@@ -686,6 +693,31 @@ async def list_layouts(
     from app.core.tenant_utils import get_effective_tenant_id
     effective_tenant_id = get_effective_tenant_id(current_user, db)
     
+    return await cached_response(
+        request,
+        key=response_cache_key(
+            "form_layouts",
+            effective_tenant_id,
+            request_type=request_type,
+            workflow_stage=workflow_stage,
+            agent_type=agent_type,
+            is_active=is_active
+        ),
+        tags=resource_tags(effective_tenant_id, "form_layouts", "custom_fields", "master_data_lists"),
+        build=lambda: _list_layouts(db, current_user, effective_tenant_id, request_type, workflow_stage, agent_type, is_active)
+    )
+
+
+def _list_layouts(
+    db: Session,
+    current_user: User,
+    effective_tenant_id: UUID,
+    request_type: Optional[str],
+    workflow_stage: Optional[str],
+    agent_type: Optional[str],
+    is_active: Optional[bool]
+) -> List[FormLayoutResponse]:
+    """Non-template layouts of a tenant with custom fields resolved (uncached)"""
     # Validate request_type against master data if provided
     if request_type and not validate_workflow_type(db, effective_tenant_id, request_type):
         valid_types = get_workflow_types_from_master_data(db, effective_tenant_id)
@@ -1796,7 +1828,7 @@ async def create_layout_group(
 @router.get("/groups/{group_id}", response_model=WorkflowLayoutGroupResponse)
 async def get_layout_group(
     group_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get layout group by ID"""
@@ -1915,6 +1947,7 @@ async def delete_layout_group(
 
 @router.get("/library", response_model=List[FormLayoutResponse])
 async def get_form_library(
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -1922,6 +1955,20 @@ async def get_form_library(
     from app.core.tenant_utils import get_effective_tenant_id
     effective_tenant_id = get_effective_tenant_id(current_user, db)
     
+    if current_user.role.value == "platform_admin":
+        # Platform admins see every tenant's forms, which no single tag covers
+        return _form_library(db, current_user, effective_tenant_id)
+    
+    return await cached_response(
+        request,
+        key=response_cache_key("form_library", effective_tenant_id),
+        tags=resource_tags(effective_tenant_id, "form_layouts", "custom_fields"),
+        build=lambda: _form_library(db, current_user, effective_tenant_id)
+    )
+
+
+def _form_library(db: Session, current_user: User, effective_tenant_id: UUID) -> List[FormLayoutResponse]:
+    """Active forms in the library with custom fields resolved (uncached)"""
     # Load forms from the Forms entity (new table for forms, separate from processes)
     # Platform admins can access all forms regardless of tenant
     query = db.query(Form).filter(Form.is_active == True)
@@ -3055,7 +3102,7 @@ async def get_fields_with_access_for_role(
     user_role = role or (current_user.role.value if hasattr(current_user.role, 'value') else str(current_user.role))
     
     # Import permission resolution service
-    from app.services.permission_resolution import resolve_field_permissions
+    from app.services.permission_resolution import resolve_layout_permissions
     
     # Get active layout for this request type and workflow stage
     layout = _get_active_layout_internal(
@@ -3099,13 +3146,23 @@ async def get_fields_with_access_for_role(
     for access in access_list:
         access_records[access.field_name] = access
     
-    # Resolve permissions for each field in the layout
-    result = []
+    # Submission requirement field names are computed from the catalog, so load them once
+    from app.models.submission_requirement import SubmissionRequirement
+    requirement_field_names = set()
+    if len(access_records) < len(all_field_names):
+        requirement_field_names = {
+            req.field_name for req in db.query(SubmissionRequirement).filter(
+                SubmissionRequirement.tenant_id == effective_tenant_id,
+                SubmissionRequirement.is_active == True
+            ).all()
+        }
+    
+    # Determine entity_name and field_source for each field in the layout
+    field_specs = []
     for field_name in all_field_names:
         # Get FormFieldAccess record if exists
         access = access_records.get(field_name)
         
-        # Determine entity_name and field_source for permission resolution
         entity_name = None
         field_source = "agent"  # Default
         custom_field_id = None
@@ -3122,38 +3179,40 @@ async def get_fields_with_access_for_role(
                     custom_field_id = access.field_source_id
             elif access.field_source == "submission_requirement":
                 entity_name = "submission_requirements"
+        elif field_name in requirement_field_names:
+            # No FormFieldAccess record - it's a submission requirement field
+            field_source = "submission_requirement"
+            entity_name = "submission_requirements"
         else:
-            # No FormFieldAccess record - try to infer from field name
-            # Check if it's a submission requirement field
-            from app.models.submission_requirement import SubmissionRequirement
-            req = db.query(SubmissionRequirement).filter(
-                SubmissionRequirement.tenant_id == effective_tenant_id,
-                SubmissionRequirement.field_name == field_name,
-                SubmissionRequirement.is_active == True
-            ).first()
-            if req:
-                field_source = "submission_requirement"
-                entity_name = "submission_requirements"
-            else:
-                # Assume it's an agent field
-                entity_name = "agents"
+            # Assume it's an agent field
+            entity_name = "agents"
         
-        # Resolve permissions using hierarchical system
-        resolved_permissions = resolve_field_permissions(
-            db=db,
-            tenant_id=effective_tenant_id,
-            entity_name=entity_name,
-            field_name=field_name,
-            field_source=field_source,
-            custom_field_id=custom_field_id,
-            request_type=request_type,
-            workflow_stage=workflow_stage,
-            role=user_role
-        )
+        field_specs.append({
+            "field_name": field_name,
+            "entity_name": entity_name,
+            "field_source": field_source,
+            "custom_field_id": custom_field_id
+        })
+    
+    # Resolve permissions for the whole layout using the hierarchical system
+    resolved_matrix = resolve_layout_permissions(
+        db=db,
+        tenant_id=effective_tenant_id,
+        fields=field_specs,
+        request_type=request_type,
+        workflow_stage=workflow_stage,
+        role=user_role
+    )
+    
+    result = []
+    for spec in field_specs:
+        field_name = spec["field_name"]
+        field_source = spec["field_source"]
+        access = access_records.get(field_name)
         
         # Get permissions for this role (from resolved permissions)
         # Default to deny if no permissions defined (secure by default)
-        role_perm = resolved_permissions.get(user_role, {})
+        role_perm = resolved_matrix.get(field_name, {}).get(user_role, {})
         can_view = role_perm.get("view", False)
         can_edit = role_perm.get("edit", False)
         
@@ -11,7 +11,8 @@ from datetime import datetime
 from app.core.database import get_db
 from app.models.form_layout import FormType
 from app.models.user import User, UserRole
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_user, get_current_principal
+from app.core.principal_cache import Principal
 from app.core.audit import audit_service, AuditAction
 import logging
 
@@ -181,7 +182,7 @@ async def list_form_types(
 @router.get("/{form_type_id}", response_model=FormTypeResponse)
 async def get_form_type(
     form_type_id: str = Path(...),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get a specific form type"""
@@ -219,7 +220,7 @@ async def get_form_type(
 async def update_form_type(
     form_type_id: str = Path(...),
     form_type_data: FormTypeUpdate = ...,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Update a form type"""
@@ -301,7 +302,7 @@ async def update_form_type(
 @router.delete("/{form_type_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_form_type(
     form_type_id: str = Path(...),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Delete a form type"""
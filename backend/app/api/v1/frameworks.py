@@ -1,7 +1,7 @@
 """
 Compliance Framework API endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
@@ -12,8 +12,11 @@ from app.models.compliance_framework import (
     AgentFrameworkLink, RequirementResponse
 )
 from app.models.agent import Agent, AgentMetadata
+from app.models.tenant import Tenant
 from app.models.user import User
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_user, get_current_principal
+from app.core.principal_cache import Principal
+from app.core.response_cache import cached_response, register_tagged_model, resource_tags, response_cache_key
 from app.services.requirement_matching_service import requirement_matching_service
 import logging
 
@@ -21,6 +24,10 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/frameworks", tags=["compliance-frameworks"])
 
+register_tagged_model(ComplianceFramework, "frameworks")
+# The framework list is filtered by the tenant's industry
+register_tagged_model(Tenant, "tenant_profile", tenant_attr="id")
+
 
 # Request/Response Models
 class FrameworkCreate(BaseModel):
@@ -121,7 +128,7 @@ class RequirementResponseCreate(BaseModel):
 @router.post("", response_model=FrameworkResponse, status_code=status.HTTP_201_CREATED)
 async def create_framework(
     framework_data: FrameworkCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Create a new compliance framework"""
@@ -162,10 +169,25 @@ async def create_framework(
 
 @router.get("", response_model=List[FrameworkResponse])
 async def list_frameworks(
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """List all compliance frameworks, filtered by tenant industry"""
+    if current_user.role.value == "platform_admin":
+        # Platform admins see every tenant's frameworks, which no single tag covers
+        return _list_frameworks(db, current_user)
+    
+    return await cached_response(
+        request,
+        key=response_cache_key("frameworks", current_user.tenant_id),
+        tags=resource_tags(current_user.tenant_id, "frameworks", "tenant_profile"),
+        build=lambda: _list_frameworks(db, current_user)
+    )
+
+
+def _list_frameworks(db: Session, current_user: User) -> List[FrameworkResponse]:
+    """Active frameworks visible to a user, filtered by their tenant's industry (uncached)"""
     query = db.query(ComplianceFramework).filter(
         ComplianceFramework.is_active == True
     )
@@ -204,7 +226,6 @@ async def list_frameworks(
     
     # Filter by tenant industry
     if current_user.tenant_id:
-        from app.models.tenant import Tenant
         tenant = db.query(Tenant).filter(Tenant.id == current_user.tenant_id).first()
         # Safely get industry - handle case where column doesn't exist yet (before migration)
         tenant_industry = None
@@ -250,7 +271,7 @@ async def list_frameworks(
 @router.get("/agents/{agent_id}/requirements", response_model=List[RequirementTreeResponse])
 async def get_agent_requirements(
     agent_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get applicable requirements for an agent based on category and attributes"""
@@ -334,7 +355,7 @@ async def get_agent_requirements(
 async def submit_requirement_responses(
     agent_id: UUID,
     responses: List[RequirementResponseCreate],
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Submit responses to requirements for an agent"""
@@ -398,7 +419,7 @@ async def submit_requirement_responses(
 @router.get("/agents/{agent_id}/responses")
 async def get_requirement_responses(
     agent_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get requirement responses for an agent"""
@@ -7,9 +7,9 @@ from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any
 from uuid import UUID
 from app.core.database import get_db
-from app.models.user import User
 from app.models.integration import Integration, IntegrationType
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_principal
+from app.core.principal_cache import Principal
 from app.services.integration_service import IntegrationService
 
 router = APIRouter(prefix="/integration-config", tags=["integration-config"])
@@ -56,7 +56,7 @@ class SSOConfig(BaseModel):
 async def configure_servicenow(
     integration_id: UUID,
     config: ServiceNowConfig,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Configure ServiceNow integration"""
@@ -103,7 +103,7 @@ async def configure_servicenow(
 async def configure_jira(
     integration_id: UUID,
     config: JiraConfig,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Configure Jira integration"""
@@ -150,7 +150,7 @@ async def configure_jira(
 async def configure_slack(
     integration_id: UUID,
     config: SlackConfig,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Configure Slack integration"""
@@ -193,7 +193,7 @@ async def configure_slack(
 async def configure_teams(
     integration_id: UUID,
     config: TeamsConfig,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Configure Teams integration"""
@@ -235,7 +235,7 @@ async def configure_teams(
 async def configure_sso(
     integration_id: UUID,
     config: SSOConfig,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Configure SSO integration"""
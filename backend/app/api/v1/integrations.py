@@ -10,7 +10,8 @@ from datetime import datetime
 from app.core.database import get_db
 from app.models.user import User
 from app.models.integration import Integration, IntegrationType, IntegrationStatus, IntegrationEvent
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_principal
+from app.core.principal_cache import Principal
 from app.core.audit import audit_service, AuditAction
 
 router = APIRouter(prefix="/integrations", tags=["integrations"])
@@ -46,7 +47,7 @@ class IntegrationResponse(BaseModel):
 @router.post("", response_model=IntegrationResponse, status_code=status.HTTP_201_CREATED)
 async def create_integration(
     integration_data: IntegrationCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Create an integration (admin only)"""
@@ -103,7 +104,7 @@ async def create_integration(
 async def list_integrations(
     integration_type: Optional[str] = None,
     tenant_id: Optional[UUID] = Query(None, description="Filter by tenant_id (platform_admin only)"),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """List integrations (tenant-isolated, platform_admin can see all)"""
@@ -157,7 +158,7 @@ async def list_integrations(
 @router.get("/{integration_id}", response_model=IntegrationResponse)
 async def get_integration(
     integration_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get integration details (tenant-isolated, platform_admin can access all)"""
@@ -202,7 +203,7 @@ async def get_integration(
 async def update_integration(
     integration_id: UUID,
     integration_data: IntegrationCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Update an integration (admin only)"""
@@ -274,7 +275,7 @@ async def update_integration(
 @router.get("/{integration_id}/config", response_model=Dict[str, Any])
 async def get_integration_config(
     integration_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get integration configuration (admin only)"""
@@ -313,7 +314,7 @@ async def get_integration_config(
 @router.post("/{integration_id}/test")
 async def test_integration(
     integration_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Test integration connection (tenant-isolated, platform_admin can test all)"""
@@ -361,7 +362,7 @@ async def test_integration(
 @router.post("/{integration_id}/activate")
 async def activate_integration(
     integration_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Activate an integration"""
@@ -404,7 +405,7 @@ async def activate_integration(
 @router.post("/{integration_id}/deactivate")
 async def deactivate_integration(
     integration_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Deactivate an integration"""
@@ -448,7 +449,7 @@ async def get_integration_events(
     integration_id: UUID,
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=100),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get integration events/logs (tenant-isolated, platform_admin can see all logs)"""
@@ -2,14 +2,18 @@
 Knowledge base API endpoints for RAG
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
 from uuid import UUID
+import json
 from app.core.database import get_db
 from app.models.agent import Agent
 from app.models.user import User
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_user, get_current_principal
+from app.core.principal_cache import Principal
 from app.services.rag_service import rag_service
 
 router = APIRouter(prefix="/knowledge", tags=["knowledge"])
@@ -102,7 +106,7 @@ async def ingest_document(
 async def search_agent_knowledge(
     agent_id: UUID,
     search_query: SearchQuery,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Search the knowledge base for an agent"""
@@ -144,7 +148,7 @@ async def search_agent_knowledge(
 @router.get("/agents/{agent_id}/documents")
 async def get_agent_documents(
     agent_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get all documents for an agent"""
@@ -156,24 +160,44 @@ async def get_agent_documents(
             detail="Agent not found"
         )
     
-    try:
-        documents = await rag_service.get_agent_knowledge(str(agent_id))
+    if not rag_service.client:
         return {
             "agent_id": str(agent_id),
-            "documents": documents,
-            "total": len(documents)
+            "documents": [],
+            "total": 0
         }
+    
+    documents = rag_service.iter_agent_knowledge(str(agent_id))
+    try:
+        # Pull the first document before responding so Qdrant errors still map to a 500
+        first = await documents.__anext__()
+    except StopAsyncIteration:
+        first = None
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get documents: {str(e)}"
         )
+    
+    async def stream_documents():
+        # Same shape as a regular JSON response, written one scroll page at a time
+        yield f'{{"agent_id": {json.dumps(str(agent_id))}, "documents": ['
+        total = 0
+        if first is not None:
+            yield json.dumps(jsonable_encoder(first))
+            total = 1
+            async for document in documents:
+                yield ", " + json.dumps(jsonable_encoder(document))
+                total += 1
+        yield f'], "total": {total}}}'
+    
+    return StreamingResponse(stream_documents(), media_type="application/json")
 
 
 @router.delete("/agents/{agent_id}/documents")
 async def delete_agent_documents(
     agent_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Delete all documents for an agent"""
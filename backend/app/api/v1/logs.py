@@ -7,8 +7,8 @@ from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime, timedelta
 from app.core.database import get_db
-from app.models.user import User
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_principal
+from app.core.principal_cache import Principal
 import logging
 import os
 from pathlib import Path
@@ -64,7 +64,7 @@ async def get_application_logs(
     end_date: Optional[str] = Query(None, description="End date (ISO format)"),
     limit: int = Query(100, ge=1, le=1000),
     offset: int = Query(0, ge=0),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get application logs (Admin only)"""
@@ -176,7 +176,7 @@ class ClearLogsRequest(BaseModel):
 
 @router.get("/stats", response_model=LogStatsResponse)
 async def get_log_stats(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get log file statistics (Admin only)"""
@@ -239,7 +239,7 @@ async def clear_logs(
     older_than_days: Optional[int] = Query(None, description="Delete logs older than X days"),
     include_rotated: bool = Query(True, description="Include rotated backup files"),
     log_type: Optional[str] = Query(None, description="Log type: 'application', 'errors', or None for both"),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Clear application logs (Platform Admin only)
@@ -8,12 +8,12 @@ from pydantic import BaseModel, Field
 from typing import List, Optional
 from uuid import UUID
 from app.core.database import get_db
-from app.models.user import User
 from app.models.agent import Agent
 from app.models.vendor import Vendor
 from app.models.marketplace import VendorRating, VendorReview
 from sqlalchemy import Boolean
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_principal
+from app.core.principal_cache import Principal
 from app.core.audit import audit_service, AuditAction
 
 router = APIRouter(prefix="/marketplace", tags=["marketplace"])
@@ -43,7 +43,7 @@ class ReviewCreate(BaseModel):
 @router.post("/ratings", status_code=status.HTTP_201_CREATED)
 async def create_rating(
     rating_data: RatingCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Create a vendor rating"""
@@ -106,7 +106,7 @@ async def create_rating(
 @router.post("/reviews", status_code=status.HTTP_201_CREATED)
 async def create_review(
     review_data: ReviewCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Create a vendor review"""
@@ -156,7 +156,7 @@ async def get_agent_ratings(
     agent_id: UUID,
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get ratings for an agent"""
@@ -193,7 +193,7 @@ async def get_agent_reviews(
     agent_id: UUID,
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get reviews for an agent"""
@@ -219,7 +219,7 @@ async def get_agent_reviews(
 @router.get("/vendors/{vendor_id}/stats")
 async def get_vendor_stats(
     vendor_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get vendor statistics (ratings, reviews)"""
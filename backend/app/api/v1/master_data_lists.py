@@ -2,7 +2,7 @@
 Master Data Lists API endpoints
 Allows tenant admins to manage list-type attributes and their values
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
@@ -11,14 +11,18 @@ from datetime import datetime
 from app.core.database import get_db
 from app.models.master_data_list import MasterDataList
 from app.models.user import User
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_user, get_current_principal
+from app.core.principal_cache import Principal
 from app.core.audit import audit_service, AuditAction
+from app.core.response_cache import cached_response, register_tagged_model, resource_tags, response_cache_key
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/master-data-lists", tags=["master-data-lists"])
 
+register_tagged_model(MasterDataList, "master_data_lists")
+
 
 class MasterDataValue(BaseModel):
     """Individual value in a master data list"""
@@ -164,6 +168,7 @@ async def create_master_data_list(
 
 @router.get("", response_model=List[MasterDataListResponse])
 async def list_master_data_lists(
+    request: Request,
     list_type: Optional[str] = None,
     is_active: Optional[bool] = True,
     current_user: User = Depends(get_current_user),
@@ -175,6 +180,21 @@ async def list_master_data_lists(
     if not effective_tenant_id:
         return []
     
+    return await cached_response(
+        request,
+        key=response_cache_key("master_data_lists", effective_tenant_id, list_type=list_type, is_active=is_active),
+        tags=resource_tags(effective_tenant_id, "master_data_lists"),
+        build=lambda: _list_master_data_lists(db, effective_tenant_id, list_type, is_active)
+    )
+
+
+def _list_master_data_lists(
+    db: Session,
+    effective_tenant_id: UUID,
+    list_type: Optional[str],
+    is_active: Optional[bool]
+) -> List[MasterDataListResponse]:
+    """Master data lists for a tenant (uncached)"""
     query = db.query(MasterDataList).filter(
         MasterDataList.tenant_id == effective_tenant_id
     )
@@ -207,6 +227,7 @@ async def list_master_data_lists(
 
 @router.get("/by-type/{list_type}/values", response_model=List[Dict[str, Any]])
 async def get_values_by_type(
+    request: Request,
     list_type: str,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -217,6 +238,16 @@ async def get_values_by_type(
     if not effective_tenant_id:
         return []
     
+    return await cached_response(
+        request,
+        key=response_cache_key("master_data_values", effective_tenant_id, list_type=list_type),
+        tags=resource_tags(effective_tenant_id, "master_data_lists"),
+        build=lambda: _active_values_by_type(db, effective_tenant_id, list_type)
+    )
+
+
+def _active_values_by_type(db: Session, effective_tenant_id: UUID, list_type: str) -> List[Dict[str, Any]]:
+    """Active values of a tenant's list of the given type, sorted by order (uncached)"""
     master_list = db.query(MasterDataList).filter(
         MasterDataList.tenant_id == effective_tenant_id,
         MasterDataList.list_type == list_type,
@@ -239,7 +270,7 @@ async def get_values_by_type(
 @router.get("/{list_id}", response_model=MasterDataListResponse)
 async def get_master_data_list(
     list_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get a specific master data list"""
@@ -11,7 +11,8 @@ from app.core.database import get_db
 from app.models.user import User
 from app.models.message import Message, MessageType
 from app.models.agent import Agent
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_principal
+from app.core.principal_cache import Principal
 from app.core.audit import audit_service, AuditAction
 from fastapi import Request
 
@@ -54,7 +55,7 @@ MessageResponse.model_rebuild()
 async def create_message(
     message_data: MessageCreate,
     request: Request,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Create a message/comment"""
@@ -146,7 +147,7 @@ async def get_messages(
     resource_type: Optional[str] = None,
     resource_id: Optional[str] = None,  # Changed to str to accept both UUID and string identifiers
     unread_only: bool = Query(False),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get messages/comments"""
@@ -249,7 +250,7 @@ async def get_messages(
 
 @router.get("/unread-count")
 async def get_unread_count(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get unread message count"""
@@ -269,7 +270,7 @@ async def get_unread_count(
 @router.patch("/{message_id}/read")
 async def mark_as_read(
     message_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Mark message as read"""
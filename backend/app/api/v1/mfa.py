@@ -6,9 +6,9 @@ from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 from typing import Optional
 from app.core.database import get_db
-from app.models.user import User
 from app.models.mfa import MFAConfig, MFAMethod
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_principal
+from app.core.principal_cache import Principal
 from app.services.mfa_service import MFAService
 from app.core.audit import audit_service, AuditAction
 
@@ -38,7 +38,7 @@ class MFASetupResponse(BaseModel):
 async def setup_mfa(
     request_data: MFASetupRequest,
     request: Request,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Set up MFA for current user"""
@@ -80,7 +80,7 @@ async def setup_mfa(
 async def verify_mfa(
     request_data: MFAVerifyRequest,
     request: Request,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Verify MFA code"""
@@ -117,7 +117,7 @@ async def verify_mfa(
 @router.post("/enable")
 async def enable_mfa(
     request: Request,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Enable MFA for current user"""
@@ -148,7 +148,7 @@ async def enable_mfa(
 @router.post("/disable")
 async def disable_mfa(
     request: Request,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Disable MFA for current user"""
@@ -178,7 +178,7 @@ async def disable_mfa(
 
 @router.get("/status")
 async def get_mfa_status(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get MFA status for current user"""
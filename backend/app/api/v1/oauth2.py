@@ -15,7 +15,8 @@ import base64
 import json
 from app.core.database import get_db
 from app.models.user import User
-from app.api.v1.auth import get_current_user, create_access_token
+from app.api.v1.auth import create_access_token, get_current_principal
+from app.core.principal_cache import Principal
 from app.core.config import settings
 from app.core.cache import get_redis
 import logging
@@ -195,7 +196,7 @@ def revoke_refresh_token(refresh_token: str) -> None:
 @router.post("/register", response_model=OAuth2ClientResponse, status_code=status.HTTP_201_CREATED)
 async def register_oauth_client(
     client_data: OAuth2ClientCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -247,7 +248,7 @@ async def authorize(
     scope: Optional[str] = Query(None),
     state: Optional[str] = Query(None),
     nonce: Optional[str] = Query(None),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -532,7 +533,7 @@ async def token(
 
 @router.get("/userinfo")
 async def userinfo(
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     OAuth 2.0 UserInfo Endpoint (OpenID Connect)
@@ -9,9 +9,9 @@ from uuid import UUID
 from datetime import datetime, date
 from app.core.database import get_db
 from app.models.agent import Agent, AgentStatus
-from app.models.user import User
 from app.models.offboarding import OffboardingRequest, OffboardingStatus, OffboardingReason, KnowledgeExtraction
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_principal
+from app.core.principal_cache import Principal
 from app.core.audit import audit_service, AuditAction
 from app.services.rag_service import rag_service
 
@@ -74,7 +74,7 @@ class OffboardingListResponse(BaseModel):
 async def create_offboarding_request(
     request_data: OffboardingRequestCreate,
     request: Request,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Create an offboarding request"""
@@ -163,7 +163,7 @@ async def create_offboarding_request(
 @router.post("/requests/{request_id}/analyze")
 async def analyze_offboarding_impact(
     request_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Run impact analysis for offboarding request"""
@@ -200,7 +200,7 @@ async def analyze_offboarding_impact(
 @router.post("/requests/{request_id}/extract-knowledge")
 async def extract_knowledge(
     request_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Extract knowledge from agent using RAG"""
@@ -270,7 +270,7 @@ async def list_offboarding_requests(
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
     status_filter: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """List offboarding requests"""
@@ -354,7 +354,7 @@ async def list_offboarding_requests(
 @router.get("/requests/{request_id}", response_model=OffboardingRequestResponse)
 async def get_offboarding_request(
     request_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get offboarding request details"""
@@ -412,7 +412,7 @@ async def get_offboarding_request(
 @router.post("/requests/{request_id}/complete")
 async def complete_offboarding(
     request_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Complete offboarding request"""
@@ -9,9 +9,10 @@ from uuid import UUID
 from datetime import datetime
 from app.core.database import get_db
 from app.models.tenant import Tenant
-from app.models.user import User, UserRole
+from app.models.user import UserRole
 from app.models.vendor import Vendor
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_principal
+from app.core.principal_cache import Principal
 from app.core.feature_gating import FeatureGate
 
 router = APIRouter(prefix="/onboarding", tags=["onboarding"])
@@ -123,7 +124,7 @@ async def get_onboarding_status(
 @router.post("/{tenant_id}/setup")
 async def setup_tenant(
     tenant_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Complete tenant setup (after admin approval)"""
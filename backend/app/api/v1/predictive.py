@@ -5,9 +5,9 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from uuid import UUID
 from app.core.database import get_db
-from app.models.user import User
 from app.models.agent import Agent
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_principal
+from app.core.principal_cache import Principal
 from app.services.predictive_analytics import PredictiveAnalyticsService
 
 router = APIRouter(prefix="/predictive", tags=["predictive"])
@@ -16,7 +16,7 @@ router = APIRouter(prefix="/predictive", tags=["predictive"])
 @router.get("/agents/{agent_id}/success")
 async def predict_agent_success(
     agent_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Predict agent approval success"""
@@ -35,7 +35,7 @@ async def predict_agent_success(
 @router.get("/agents/{agent_id}/approval")
 async def predict_approval_likelihood(
     agent_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Predict approval likelihood"""
@@ -54,7 +54,7 @@ async def predict_approval_likelihood(
 @router.get("/agents/{agent_id}/risk")
 async def predict_risk_level(
     agent_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Predict risk level"""
@@ -2,7 +2,7 @@
 API endpoints for Question Library management
 Central repository for reusable questions across assessments
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy import func, cast, nullslast
@@ -20,12 +20,15 @@ from app.models.assessment import AssessmentType
 from app.api.v1.auth import get_current_user
 from app.api.v1.submission_requirements import require_requirement_management_permission
 from app.core.audit import audit_service, AuditAction
+from app.core.response_cache import cached_response, register_tagged_model, resource_tags, response_cache_key
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/question-library", tags=["question-library"])
 
+register_tagged_model(QuestionLibrary, "question_library")
+
 
 # Pydantic Schemas
 class QuestionLibraryCreate(BaseModel):
@@ -100,6 +103,7 @@ class QuestionLibraryResponse(BaseModel):
 
 @router.get("", response_model=List[QuestionLibraryResponse])
 async def list_questions(
+    request: Request,
     assessment_type: Optional[str] = Query(None, description="Filter by assessment type"),
     category: Optional[str] = Query(None, description="Filter by category"),
     industry: Optional[str] = Query(None, description="Filter by applicable industry"),
@@ -111,6 +115,30 @@ async def list_questions(
     from app.core.tenant_utils import get_effective_tenant_id
     effective_tenant_id = get_effective_tenant_id(current_user, db)
     
+    return await cached_response(
+        request,
+        key=response_cache_key(
+            "question_library",
+            effective_tenant_id,
+            assessment_type=assessment_type,
+            category=category,
+            industry=industry,
+            is_active=is_active
+        ),
+        tags=resource_tags(effective_tenant_id, "question_library"),
+        build=lambda: _list_questions(db, effective_tenant_id, assessment_type, category, industry, is_active)
+    )
+
+
+def _list_questions(
+    db: Session,
+    effective_tenant_id: Optional[UUID],
+    assessment_type: Optional[str],
+    category: Optional[str],
+    industry: Optional[str],
+    is_active: Optional[bool]
+) -> List[QuestionLibraryResponse]:
+    """Library questions visible to a tenant, filtered (uncached)"""
     logger.info(f"Listing questions with filters: assessment_type={assessment_type}, category={category}, industry={industry}, is_active={is_active}")
     
     # Include both tenant-specific questions and platform-wide questions (tenant_id IS NULL)
@@ -6,9 +6,9 @@ from sqlalchemy.orm import Session
 from typing import Optional
 from uuid import UUID
 from app.core.database import get_db
-from app.models.user import User
 from app.models.agent import Agent
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_principal
+from app.core.principal_cache import Principal
 from app.services.recommendation_service import RecommendationService
 
 router = APIRouter(prefix="/recommendations", tags=["recommendations"])
@@ -18,7 +18,7 @@ router = APIRouter(prefix="/recommendations", tags=["recommendations"])
 async def get_similar_agents(
     agent_id: UUID,
     limit: int = Query(5, ge=1, le=20),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get similar agents"""
@@ -51,7 +51,7 @@ async def get_similar_agents(
 async def get_historical_cases(
     agent_id: UUID,
     limit: int = Query(5, ge=1, le=20),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get historical cases"""
@@ -71,7 +71,7 @@ async def get_historical_cases(
 async def get_review_recommendations(
     agent_id: UUID,
     review_stage: str = Query(..., pattern="^(security|compliance|technical|business)$"),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get recommendations for a reviewer"""
@@ -93,7 +93,7 @@ async def get_review_recommendations(
 @router.get("/agents/{agent_id}/compliance")
 async def get_compliance_recommendations(
     agent_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get compliance-specific recommendations"""
@@ -11,7 +11,8 @@ from app.core.database import get_db
 from app.models.agent import Agent, AgentStatus
 from app.models.user import User, UserRole
 from app.models.review import Review, ReviewStage, ReviewStatus
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_user, get_current_principal
+from app.core.principal_cache import Principal
 from app.services.rag_service import rag_service
 from datetime import datetime
 
@@ -58,7 +59,7 @@ class ReviewListResponse(BaseModel):
 async def create_review(
     review_data: ReviewCreate,
     request: Request,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Create a review for an agent"""
@@ -238,7 +239,7 @@ async def get_agent_reviews(
     agent_id: UUID,
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get reviews for an agent"""
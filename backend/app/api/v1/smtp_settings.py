@@ -6,9 +6,9 @@ from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field, EmailStr
 from typing import Optional
 from app.core.database import get_db
-from app.models.user import User
 from app.models.integration import Integration, IntegrationType, IntegrationStatus
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_principal
+from app.core.principal_cache import Principal
 from app.services.email_service import email_service
 from app.core.audit import audit_service, AuditAction
 
@@ -40,7 +40,7 @@ class SMTPConfigResponse(BaseModel):
 
 @router.get("", response_model=SMTPConfigResponse)
 async def get_smtp_settings(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get SMTP settings (admin only)"""
@@ -87,7 +87,7 @@ async def get_smtp_settings(
 @router.post("", response_model=SMTPConfigResponse)
 async def update_smtp_settings(
     config: SMTPConfig,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Update SMTP settings (admin only)"""
@@ -164,7 +164,7 @@ async def update_smtp_settings(
 @router.post("/test")
 async def test_smtp_settings(
     config: Optional[SMTPConfig] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Test SMTP connection (admin only)"""
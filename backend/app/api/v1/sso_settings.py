@@ -7,9 +7,9 @@ from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any, List
 from uuid import UUID
 from app.core.database import get_db
-from app.models.user import User
 from app.models.integration import Integration, IntegrationType, IntegrationStatus
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_principal
+from app.core.principal_cache import Principal
 from app.core.audit import audit_service, AuditAction
 
 router = APIRouter(prefix="/sso-settings", tags=["sso-settings"])
@@ -82,7 +82,7 @@ class SSOConfigResponse(BaseModel):
 
 @router.get("", response_model=SSOConfigResponse)
 async def get_sso_settings(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get SSO settings (admin only)"""
@@ -140,7 +140,7 @@ async def get_sso_settings(
 @router.post("", response_model=SSOConfigResponse)
 async def update_sso_settings(
     config: SSOConfig,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Update SSO settings (admin only)"""
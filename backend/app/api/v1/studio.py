@@ -8,7 +8,8 @@ from uuid import UUID
 from pydantic import BaseModel, Field
 
 from app.core.database import get_db
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_user, get_current_principal
+from app.core.principal_cache import Principal
 from app.models.user import User
 from app.models.agentic_flow import (
     AgenticFlow, FlowExecution, FlowStatus, FlowExecutionStatus
@@ -439,7 +440,7 @@ async def list_flows(
 async def list_flow_templates(
     category: Optional[str] = None,
     search: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """List available flow templates"""
@@ -1588,7 +1589,7 @@ async def retry_execution(
 @router.patch("/flows/{flow_id}/activate")
 async def activate_flow(
     flow_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Activate a flow (change status to active)"""
@@ -13,7 +13,8 @@ from app.core.database import get_db
 from app.models.submission_requirement import SubmissionRequirement, SubmissionRequirementResponse, RequirementFieldType
 from app.models.user import User, UserRole
 from app.models.agent import Agent
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_user, get_current_principal
+from app.core.principal_cache import Principal
 from app.core.audit import audit_service, AuditAction
 from app.services.requirement_auto_generator import requirement_auto_generator
 from app.services.requirement_service import RequirementService
@@ -614,7 +615,7 @@ async def list_requirements(
 @router.get("/{requirement_id}", response_model=RequirementResponse)
 async def get_requirement(
     requirement_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get a specific submission requirement"""
@@ -790,7 +791,7 @@ async def delete_requirement(
 async def save_requirement_responses(
     agent_id: UUID,
     responses: Dict[str, Any],  # {requirement_id: value}
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Save requirement responses for an agent"""
@@ -870,7 +871,7 @@ async def save_requirement_responses(
 @router.get("/agents/{agent_id}/responses", response_model=List[RequirementResponseValue])
 async def get_agent_requirement_responses(
     agent_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get requirement responses for an agent"""
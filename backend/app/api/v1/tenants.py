@@ -14,7 +14,8 @@ import aiofiles
 from app.core.database import get_db
 from app.models.tenant import Tenant, TenantFeature
 from app.models.user import User, UserRole
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_user, get_current_principal
+from app.core.principal_cache import Principal
 from app.core.feature_gating import FeatureGate
 from app.core.config import settings
 from app.core.security_middleware import sanitize_input
@@ -358,7 +359,7 @@ async def list_tenants(
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
     status_filter: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """List all tenants (Platform Admin only) - Special exception: platform admins without tenant_id can view tenants to assign themselves"""
@@ -1012,7 +1013,7 @@ async def fetch_logo_from_website(
 
 @router.get("/me/debug")
 async def debug_my_tenant(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Debug endpoint to check user role and tenant access"""
@@ -1040,7 +1041,7 @@ async def debug_my_tenant(
 
 @router.get("/me/debug")
 async def debug_my_tenant(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Debug endpoint to check user role and tenant access"""
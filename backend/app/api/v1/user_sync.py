@@ -9,7 +9,8 @@ from uuid import UUID
 from app.core.database import get_db
 from app.models.user import User, UserRole
 from app.models.integration import Integration, IntegrationType
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_principal
+from app.core.principal_cache import Principal
 from app.core.audit import audit_service, AuditAction
 import logging
 
@@ -139,7 +140,7 @@ async def sync_users_from_okta(integration: Integration, db: Session) -> UserSyn
 async def sync_users(
     sync_request: UserSyncRequest,
     background_tasks: BackgroundTasks,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Sync users from identity provider (admin only)"""
@@ -200,7 +201,7 @@ async def sync_users(
 @router.get("/status/{integration_id}", response_model=Dict[str, Any])
 async def get_sync_status(
     integration_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get user sync status for an integration"""
@@ -15,7 +15,8 @@ from app.models.user import User, UserRole
 from app.models.vendor import Vendor
 from app.models.vendor_invitation import VendorInvitation, InvitationStatus
 from app.models.tenant import Tenant
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_user, get_current_principal
+from app.core.principal_cache import Principal
 from app.core.audit import audit_service, AuditAction
 from app.services.email_service import email_service
 
@@ -370,7 +371,7 @@ async def list_invitations(
 @router.get("/{invitation_id}", response_model=InvitationResponse)
 async def get_invitation(
     invitation_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get invitation details by token (for vendor registration)"""
@@ -10,7 +10,8 @@ from datetime import datetime
 from app.core.database import get_db
 from app.models.user import User
 from app.models.vendor import Vendor
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_user, get_current_principal
+from app.core.principal_cache import Principal
 from fastapi import Request
 from app.core.security_middleware import validate_file_upload, sanitize_input
 import os
@@ -285,7 +286,7 @@ async def create_vendor(
 
 @router.get("/me", response_model=VendorResponse)
 async def get_my_vendor(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get current user's vendor profile"""
@@ -321,7 +322,7 @@ async def get_my_vendor(
 @router.put("/me", response_model=VendorResponse)
 async def update_my_vendor(
     vendor_data: VendorUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Update current user's vendor profile"""
@@ -386,7 +387,7 @@ async def get_vendor_dashboard(
     category: Optional[str] = Query(None, description="Filter by agent category"),
     subcategory: Optional[str] = Query(None, description="Filter by agent subcategory"),
     ownership: Optional[str] = Query(None, description="Filter by ownership (vendor name or ID)"),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get vendor dashboard analytics"""
@@ -583,7 +584,7 @@ async def get_vendor_dashboard(
 @router.post("/me/logo", response_model=VendorResponse)
 async def upload_vendor_logo(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Upload vendor logo"""
@@ -667,7 +668,7 @@ async def upload_vendor_logo(
 @router.post("/me/fetch-logo", response_model=VendorResponse)
 async def fetch_vendor_logo_from_website(
     website: str = Query(..., description="Website URL to fetch logo from"),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Fetch logo from website and save it for current user's vendor (Vendor User only)"""
@@ -1041,7 +1042,7 @@ async def get_trust_center(
 @router.put("/me/trust-center", response_model=TrustCenterResponse)
 async def update_trust_center(
     update_data: TrustCenterUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Update vendor trust center settings (vendor admin only)"""
@@ -1187,7 +1188,7 @@ async def update_trust_center(
 
 @router.get("/me/trust-center", response_model=TrustCenterResponse)
 async def get_my_trust_center(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get current vendor's trust center data"""
@@ -1441,7 +1442,7 @@ async def unsubscribe_from_vendor(
 @router.post("/trust-center/{vendor_identifier}/follow", response_model=VendorFollowResponse)
 async def follow_vendor(
     vendor_identifier: str,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Follow a vendor (user-level)"""
@@ -1493,7 +1494,7 @@ async def follow_vendor(
 @router.delete("/trust-center/{vendor_identifier}/follow", response_model=VendorFollowResponse)
 async def unfollow_vendor(
     vendor_identifier: str,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Unfollow a vendor"""
@@ -1531,7 +1532,7 @@ async def unfollow_vendor(
 async def add_to_interest_list(
     vendor_identifier: str,
     notes: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Add vendor to user's interest list"""
@@ -1590,7 +1591,7 @@ async def add_to_interest_list(
 @router.delete("/trust-center/{vendor_identifier}/interest", response_model=VendorInterestResponse)
 async def remove_from_interest_list(
     vendor_identifier: str,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Remove vendor from user's interest list"""
@@ -1704,7 +1705,7 @@ async def get_vendor_status(
 
 @router.get("/me/interests", response_model=List[Dict[str, Any]])
 async def get_my_interest_list(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get current user's interest list"""
@@ -1733,7 +1734,7 @@ async def get_my_interest_list(
 
 @router.get("/me/following", response_model=List[Dict[str, Any]])
 async def get_my_following(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get vendors the current user is following"""
@@ -8,9 +8,9 @@ from typing import List, Optional
 from uuid import UUID
 from datetime import datetime
 from app.core.database import get_db
-from app.models.user import User
 from app.models.webhook import Webhook, WebhookDelivery, WebhookEvent, WebhookStatus
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_principal
+from app.core.principal_cache import Principal
 from app.core.audit import audit_service, AuditAction
 
 router = APIRouter(prefix="/webhooks", tags=["webhooks"])
@@ -50,7 +50,7 @@ class WebhookResponse(BaseModel):
 @router.post("", response_model=WebhookResponse, status_code=status.HTTP_201_CREATED)
 async def create_webhook(
     webhook_data: WebhookCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Create a webhook (admin only)"""
@@ -118,7 +118,7 @@ async def create_webhook(
 
 @router.get("", response_model=List[WebhookResponse])
 async def list_webhooks(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """List webhooks"""
@@ -159,7 +159,7 @@ async def list_webhooks(
 @router.get("/{webhook_id}", response_model=WebhookResponse)
 async def get_webhook(
     webhook_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get webhook details"""
@@ -200,7 +200,7 @@ async def get_webhook_deliveries(
     webhook_id: UUID,
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=100),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get webhook delivery history"""
@@ -227,6 +227,9 @@ async def get_webhook_deliveries(
         {
             "id": str(d.id),
             "event_type": d.event_type,
+            "status": d.status,
+            "attempt_count": d.attempt_count,
+            "next_attempt_at": d.next_attempt_at.isoformat() if d.next_attempt_at else None,
             "status_code": d.status_code,
             "error_message": d.error_message,
             "attempted_at": d.attempted_at.isoformat(),
@@ -240,7 +243,7 @@ async def get_webhook_deliveries(
 @router.post("/{webhook_id}/activate")
 async def activate_webhook(
     webhook_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Activate a webhook"""
@@ -269,7 +272,7 @@ async def activate_webhook(
 @router.post("/{webhook_id}/deactivate")
 async def deactivate_webhook(
     webhook_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Deactivate a webhook"""
@@ -298,7 +301,7 @@ async def deactivate_webhook(
 @router.delete("/{webhook_id}")
 async def delete_webhook(
     webhook_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Delete a webhook"""
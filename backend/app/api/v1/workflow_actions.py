@@ -11,7 +11,8 @@ from app.core.database import get_db
 from app.models.user import User
 from app.models.workflow_config import OnboardingRequest
 from app.models.workflow_stage import WorkflowStageAction, WorkflowActionType, WorkflowAuditTrail
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_principal
+from app.core.principal_cache import Principal
 from app.core.audit import audit_service, AuditAction
 import logging
 
@@ -50,7 +51,7 @@ class WorkflowActionResponse(BaseModel):
 async def forward_workflow(
     request_id: UUID,
     forward_data: ForwardRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
     http_request: Request = None
 ):
@@ -158,7 +159,7 @@ async def forward_workflow(
 async def add_workflow_comment(
     request_id: UUID,
     comment_data: CommentRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
     http_request: Request = None
 ):
@@ -239,7 +240,7 @@ async def add_workflow_comment(
 @router.get("/onboarding-requests/{request_id}/actions", response_model=list[WorkflowActionResponse])
 async def get_workflow_actions(
     request_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get all actions for a workflow"""
@@ -286,7 +287,7 @@ async def get_workflow_actions(
 @router.get("/onboarding-requests/{request_id}/audit-trail")
 async def get_workflow_audit_trail(
     request_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get comprehensive audit trail for a workflow"""
@@ -15,7 +15,8 @@ from app.models.workflow_config import (
     OnboardingRequest, ApproverGroup
 )
 from app.models.integration import Integration, IntegrationType
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_user, get_current_principal
+from app.core.principal_cache import Principal
 from app.core.audit import audit_service, AuditAction
 
 router = APIRouter(prefix="/workflow-config", tags=["workflow-config"])
@@ -481,7 +482,7 @@ async def list_workflow_configs(
 @router.post("/onboarding-requests", response_model=OnboardingRequestResponse, status_code=status.HTTP_201_CREATED)
 async def create_onboarding_request(
     request_data: OnboardingRequestCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Create an onboarding request for an agent"""
@@ -1599,7 +1600,7 @@ async def reorder_workflow_steps(
 
 @router.get("/health-check", response_model=Dict[str, Any])
 async def workflow_health_check(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Check workflow system health - tables and tenant workflows (Platform Admin only)"""
@@ -7,9 +7,9 @@ from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 from uuid import UUID
 from app.core.database import get_db
-from app.models.user import User
 from app.models.workflow_config import OnboardingRequest, WorkflowConfiguration
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_principal
+from app.core.principal_cache import Principal
 import logging
 
 logger = logging.getLogger(__name__)
@@ -30,7 +30,7 @@ class StageSettingsResponse(BaseModel):
 @router.get("/agent/{agent_id}", response_model=StageSettingsResponse)
 async def get_stage_settings_for_agent(
     agent_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get stage settings for the current workflow step of an agent"""
@@ -8,7 +8,8 @@ from typing import List, Optional, Dict, Any
 from uuid import UUID
 from app.core.database import get_db
 from app.models.user import User
-from app.api.v1.auth import get_current_user
+from app.api.v1.auth import get_current_user, get_current_principal
+from app.core.principal_cache import Principal
 from app.core.tenant_utils import get_effective_tenant_id
 from app.services.workflow_templates import WorkflowTemplatesService
 from app.models.workflow_config import WorkflowConfiguration
@@ -36,7 +37,7 @@ class WorkflowTemplateCreate(BaseModel):
 
 @router.get("", response_model=List[WorkflowTemplateResponse])
 async def list_workflow_templates(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """List all available workflow templates"""
@@ -0,0 +1,22 @@
+"""
+Retry backoff shared by the outbox workers (webhooks, email, reminders)
+"""
+import random
+
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+
+
+def retry_delay(attempt_count: int) -> float:
+    """
+    Seconds to wait before the next attempt
+    
+    Args:
+        attempt_count: Attempts made so far (1 after the first failure)
+    
+    Returns:
+        Exponential backoff from RETRY_BASE_SECONDS, capped at RETRY_MAX_SECONDS,
+        plus up to 10% jitter so retries from one outage don't arrive together
+    """
+    delay = min(RETRY_BASE_SECONDS * 2 ** max(attempt_count - 1, 0), RETRY_MAX_SECONDS)
+    return delay + random.uniform(0, delay * 0.1)
@@ -1,14 +1,94 @@
 """
 Caching utilities using Redis
+
+Three clients are available: get_redis() for synchronous code,
+get_async_redis() for the event loop (middleware, async routes), which shares
+one connection pool per process, and get_async_redis_binary(), its counterpart
+for raw bytes such as embeddings. All three are guarded by redis_breaker, so
+when Redis is down callers fall back immediately instead of waiting out a
+socket timeout on every request.
 """
 import json
 import logging
-from typing import Optional, Any
+import threading
+import time
+from datetime import date
+from enum import Enum
+from typing import Callable, Optional, Any
+from uuid import UUID
 from redis import Redis
+from redis.asyncio import ConnectionPool as AsyncConnectionPool, Redis as AsyncRedis
 from app.core.config import settings
 import functools
 
 logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Skips a failing dependency for a while instead of paying its timeout on every call
+    
+    The breaker opens after failure_threshold consecutive failures. While open,
+    allow() is False; once reset_timeout has passed, one trial call is let
+    through per period and its reported outcome closes the breaker or keeps it open.
+    
+    Args:
+        name: Dependency name, for logging
+        failure_threshold: Consecutive failures that open the breaker
+        reset_timeout: Seconds to skip the dependency once open
+    """
+    
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def is_open(self) -> bool:
+        """Whether calls are currently being skipped (without claiming a trial call)"""
+        with self._lock:
+            return self._opened_at is not None and time.monotonic() - self._opened_at < self.reset_timeout
+    
+    def allow(self) -> bool:
+        """Whether a call may go through; claims the trial call when the cool-down is over"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at < self.reset_timeout:
+                return False
+            # Half-open: this caller makes the trial call, everyone else keeps skipping
+            self._opened_at = now
+            return True
+    
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info(f"{self.name} is reachable again, closing circuit breaker")
+            self._failures = 0
+            self._opened_at = None
+    
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning(
+                        f"{self.name} failed {self._failures} times in a row, "
+                        f"skipping it for {self.reset_timeout}s"
+                    )
+                self._opened_at = time.monotonic()
+
+
+redis_breaker = CircuitBreaker(
+    "Redis",
+    failure_threshold=settings.REDIS_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=settings.REDIS_BREAKER_RESET_SECONDS
+)
+
 redis_client: Optional[Redis] = None
 
 
@@ -17,9 +97,11 @@ def get_redis() -> Optional[Redis]:
     Get Redis client with error handling
     
     Returns:
-        Redis client or None if connection fails
+        Redis client or None if connection fails or the Redis circuit is open
     """
     global redis_client
+    if redis_breaker.is_open:
+        return None
     if redis_client is None:
         try:
             redis_client = Redis.from_url(
@@ -32,16 +114,87 @@ def get_redis() -> Optional[Redis]:
             )
             # Test connection
             redis_client.ping()
+            redis_breaker.record_success()
         except Exception as e:
-            logger = logging.getLogger(__name__)
             logger.warning(f"Failed to connect to Redis: {e}. Rate limiting will use fallback.")
             redis_client = None
+            redis_breaker.record_failure()
     return redis_client
 
 
+async_redis_client: Optional[AsyncRedis] = None
+
+
+def get_async_redis() -> Optional[AsyncRedis]:
+    """
+    Get the shared asyncio Redis client
+    
+    The client connects lazily from a per-process connection pool. Callers
+    report the outcome of their commands to redis_breaker (record_success /
+    record_failure) so repeated failures open the circuit.
+    
+    Returns:
+        Async Redis client, or None while the Redis circuit is open
+    """
+    global async_redis_client
+    if not redis_breaker.allow():
+        return None
+    if async_redis_client is None:
+        async_redis_client = AsyncRedis(connection_pool=AsyncConnectionPool.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            socket_connect_timeout=2,
+            socket_timeout=2,
+            health_check_interval=30
+        ))
+    return async_redis_client
+
+
+async_redis_binary_client: Optional[AsyncRedis] = None
+
+
+def get_async_redis_binary() -> Optional[AsyncRedis]:
+    """
+    Get the shared asyncio Redis client that returns raw bytes (for binary payloads such as embeddings)
+    
+    Like get_async_redis(), it connects lazily from its own per-process pool and
+    callers report command outcomes to redis_breaker.
+    
+    Returns:
+        Async Redis client, or None while the Redis circuit is open
+    """
+    global async_redis_binary_client
+    if not redis_breaker.allow():
+        return None
+    if async_redis_binary_client is None:
+        async_redis_binary_client = AsyncRedis(connection_pool=AsyncConnectionPool.from_url(
+            settings.REDIS_URL,
+            decode_responses=False,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            socket_connect_timeout=2,
+            socket_timeout=2,
+            health_check_interval=30
+        ))
+    return async_redis_binary_client
+
+
+# Argument types that identify a value by their string form
+_KEY_SAFE_TYPES = (str, int, float, bool, UUID, Enum, date, type(None))
+
+
 def cache_key(prefix: str, *args, **kwargs) -> str:
-    """Generate cache key"""
+    """
+    Generate cache key
+    
+    Raises:
+        TypeError: If an argument isn't a plain value (a Session, a User, ...) whose
+            string form would not identify it
+    """
     key_parts = [prefix]
+    for value in list(args) + list(kwargs.values()):
+        if not isinstance(value, _KEY_SAFE_TYPES):
+            raise TypeError(f"Cannot build a cache key from {type(value).__name__}; pass a key_builder")
     if args:
         key_parts.extend(str(arg) for arg in args)
     if kwargs:
@@ -49,47 +202,59 @@ def cache_key(prefix: str, *args, **kwargs) -> str:
     return ":".join(key_parts)
 
 
-def cached(ttl: int = 300, key_prefix: str = None):
+def cached(ttl: int = 300, key_prefix: str = None, key_builder: Optional[Callable[..., str]] = None):
     """
     Decorator to cache function results
     
     Args:
         ttl: Time to live in seconds
         key_prefix: Prefix for cache key
+        key_builder: Builds the key suffix from the call's arguments. Required when the
+            function takes injected objects such as a Session or the current user;
+            without it only plain-valued arguments can be keyed and other calls are
+            not cached.
     """
     def decorator(func):
         @functools.wraps(func)
         async def wrapper(*args, **kwargs):
             # Generate cache key
             prefix = key_prefix or f"{func.__module__}.{func.__name__}"
-            cache_key_str = cache_key(prefix, *args, **kwargs)
+            try:
+                if key_builder:
+                    cache_key_str = f"{prefix}:{key_builder(*args, **kwargs)}"
+                else:
+                    cache_key_str = cache_key(prefix, *args, **kwargs)
+            except TypeError as e:
+                logger.debug(f"Not caching {prefix}: {e}")
+                return await func(*args, **kwargs)
             
             # Try to get from cache
-            try:
-                redis = get_redis()
-                if redis:
-                    cached_value = redis.get(cache_key_str)
+            redis = get_async_redis()
+            if redis:
+                try:
+                    cached_value = await redis.get(cache_key_str)
+                    redis_breaker.record_success()
                     if cached_value:
                         return json.loads(cached_value)
-            except Exception:
-                # If Redis fails, continue without cache
-                pass
+                except Exception:
+                    # If Redis fails, continue without cache
+                    redis_breaker.record_failure()
+                    redis = None
             
             # Execute function
             result = await func(*args, **kwargs)
             
             # Store in cache
-            try:
-                redis = get_redis()
-                if redis:
-                    redis.setex(
+            if redis:
+                try:
+                    await redis.setex(
                         cache_key_str,
                         ttl,
                         json.dumps(result, default=str)
                     )
-            except Exception:
-                # If Redis fails, continue without cache
-                pass
+                except Exception:
+                    # If Redis fails, continue without cache
+                    redis_breaker.record_failure()
             
             return result
         
@@ -97,14 +262,27 @@ def cached(ttl: int = 300, key_prefix: str = None):
     return decorator
 
 
+INVALIDATE_SCAN_BATCH_SIZE = 500
+
+
 def invalidate_cache(pattern: str):
-    """Invalidate cache entries matching pattern"""
+    """
+    Invalidate cache entries matching pattern
+    
+    Walks the keyspace incrementally with SCAN and unlinks matches in batches, so
+    it never blocks Redis the way KEYS does. For hot paths prefer tag-based
+    invalidation (see app.core.response_cache), which doesn't scan at all.
+    """
     try:
         redis = get_redis()
         if redis:
-            keys = redis.keys(pattern)
-            if keys:
-                redis.delete(*keys)
+            batch = []
+            for key in redis.scan_iter(match=pattern, count=INVALIDATE_SCAN_BATCH_SIZE):
+                batch.append(key)
+                if len(batch) >= INVALIDATE_SCAN_BATCH_SIZE:
+                    redis.unlink(*batch)
+                    batch = []
+            if batch:
+                redis.unlink(*batch)
     except Exception:
         pass
-
@@ -100,6 +100,21 @@ class Settings(BaseSettings):
     def REDIS_URL(self) -> str:
         return _get_config_value("REDIS_URL", os.getenv("REDIS_URL", "redis://localhost:6379"))
     
+    @property
+    def REDIS_MAX_CONNECTIONS(self) -> int:
+        """Size of the shared asyncio Redis connection pool (per process)"""
+        return int(_get_config_value("REDIS_MAX_CONNECTIONS", os.getenv("REDIS_MAX_CONNECTIONS", "50")))
+    
+    @property
+    def REDIS_BREAKER_FAILURE_THRESHOLD(self) -> int:
+        """Consecutive Redis failures after which Redis is skipped for a while"""
+        return int(_get_config_value("REDIS_BREAKER_FAILURE_THRESHOLD", os.getenv("REDIS_BREAKER_FAILURE_THRESHOLD", "5")))
+    
+    @property
+    def REDIS_BREAKER_RESET_SECONDS(self) -> int:
+        """How long Redis is skipped once the breaker opens before it is tried again"""
+        return int(_get_config_value("REDIS_BREAKER_RESET_SECONDS", os.getenv("REDIS_BREAKER_RESET_SECONDS", "30")))
+    
     # Qdrant (Vector DB)
     @property
     def QDRANT_URL(self) -> str:
@@ -109,6 +124,21 @@ class Settings(BaseSettings):
     def QDRANT_API_KEY(self) -> str:
         return _get_config_value("QDRANT_API_KEY", os.getenv("QDRANT_API_KEY", ""))
     
+    @property
+    def QDRANT_TIMEOUT_SECONDS(self) -> int:
+        """Timeout for a single Qdrant request"""
+        return int(_get_config_value("QDRANT_TIMEOUT_SECONDS", os.getenv("QDRANT_TIMEOUT_SECONDS", "10")))
+    
+    @property
+    def QDRANT_MAX_CONCURRENCY(self) -> int:
+        """Maximum in-flight Qdrant requests per worker process"""
+        return int(_get_config_value("QDRANT_MAX_CONCURRENCY", os.getenv("QDRANT_MAX_CONCURRENCY", "16")))
+    
+    @property
+    def QDRANT_PREFER_GRPC(self) -> bool:
+        """Talk to Qdrant over gRPC instead of REST"""
+        return str(_get_config_value("QDRANT_PREFER_GRPC", os.getenv("QDRANT_PREFER_GRPC", "false"))).lower() == "true"
+    
     # OpenAI
     @property
     def OPENAI_API_KEY(self) -> str:
@@ -127,6 +157,16 @@ class Settings(BaseSettings):
     def ACCESS_TOKEN_EXPIRE_MINUTES(self) -> int:
         return int(_get_config_value("ACCESS_TOKEN_EXPIRE_MINUTES", os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30")))
     
+    @property
+    def PRINCIPAL_CACHE_TTL_SECONDS(self) -> int:
+        """How long an authenticated user snapshot is reused before reloading it"""
+        return int(_get_config_value("PRINCIPAL_CACHE_TTL_SECONDS", os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30")))
+    
+    @property
+    def RESPONSE_CACHE_TTL_SECONDS(self) -> int:
+        """How long a cached catalog GET response is kept (tag invalidation usually drops it sooner)"""
+        return int(_get_config_value("RESPONSE_CACHE_TTL_SECONDS", os.getenv("RESPONSE_CACHE_TTL_SECONDS", "300")))
+    
     # File Storage
     @property
     def UPLOAD_DIR(self) -> str:
@@ -136,6 +176,48 @@ class Settings(BaseSettings):
     def MAX_UPLOAD_SIZE(self) -> int:
         return int(_get_config_value("MAX_UPLOAD_SIZE", os.getenv("MAX_UPLOAD_SIZE", str(50 * 1024 * 1024))))
     
+    # Flow Execution
+    @property
+    def FLOW_MAX_PARALLEL_NODES(self) -> int:
+        """Maximum number of flow nodes executed concurrently within one flow execution"""
+        return int(_get_config_value("FLOW_MAX_PARALLEL_NODES", os.getenv("FLOW_MAX_PARALLEL_NODES", "5")))
+    
+    # RAG / Embeddings
+    @property
+    def EMBEDDING_BATCH_SIZE(self) -> int:
+        """Number of texts encoded per embedding model call"""
+        return int(_get_config_value("EMBEDDING_BATCH_SIZE", os.getenv("EMBEDDING_BATCH_SIZE", "32")))
+    
+    @property
+    def RAG_UPSERT_BATCH_SIZE(self) -> int:
+        """Number of points sent per Qdrant upsert"""
+        return int(_get_config_value("RAG_UPSERT_BATCH_SIZE", os.getenv("RAG_UPSERT_BATCH_SIZE", "128")))
+    
+    @property
+    def RAG_SCROLL_PAGE_SIZE(self) -> int:
+        """Number of points fetched per Qdrant scroll page"""
+        return int(_get_config_value("RAG_SCROLL_PAGE_SIZE", os.getenv("RAG_SCROLL_PAGE_SIZE", "256")))
+    
+    @property
+    def EMBEDDING_WORKERS(self) -> int:
+        """Threads running embedding model inference off the event loop"""
+        return int(_get_config_value("EMBEDDING_WORKERS", os.getenv("EMBEDDING_WORKERS", "1")))
+    
+    @property
+    def EMBEDDING_BATCH_WINDOW_MS(self) -> float:
+        """How long single-text embedding requests wait to be micro-batched together"""
+        return float(_get_config_value("EMBEDDING_BATCH_WINDOW_MS", os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5")))
+    
+    @property
+    def EMBEDDING_CACHE_SIZE(self) -> int:
+        """Embeddings kept in the in-process LRU cache (0 disables it)"""
+        return int(_get_config_value("EMBEDDING_CACHE_SIZE", os.getenv("EMBEDDING_CACHE_SIZE", "10000")))
+    
+    @property
+    def EMBEDDING_CACHE_REDIS_TTL(self) -> int:
+        """TTL in seconds for embeddings in the shared Redis cache (0 disables the Redis tier)"""
+        return int(_get_config_value("EMBEDDING_CACHE_REDIS_TTL", os.getenv("EMBEDDING_CACHE_REDIS_TTL", str(7 * 24 * 3600))))
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
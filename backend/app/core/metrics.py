@@ -30,6 +30,26 @@ compliance_checks_total = Counter(
 rag_queries_total = Counter('rag_queries_total', 'Total RAG queries')
 rag_query_duration_seconds = Histogram('rag_query_duration_seconds', 'RAG query duration')
 
+# Embedding metrics
+embedding_queue_depth = Gauge(
+    'embedding_queue_depth',
+    'Texts waiting for or undergoing embedding inference'
+)
+embedding_batch_size = Histogram(
+    'embedding_batch_size',
+    'Texts per embedding model call',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+embedding_encode_duration_seconds = Histogram(
+    'embedding_encode_duration_seconds',
+    'Embedding model call duration'
+)
+embedding_cache_requests_total = Counter(
+    'embedding_cache_requests_total',
+    'Embedding cache lookups',
+    ['tier', 'result']
+)
+
 # Integration metrics
 integration_requests_total = Counter(
     'integration_requests_total',
@@ -0,0 +1,118 @@
+"""
+Authenticated principal cache
+
+Holds immutable snapshots of authenticated users keyed by the token's
+(sub, tenant_id) so repeated requests with the same token skip the user lookup.
+Commits that touch a User drop that user's snapshots in this process; the short
+TTL bounds staleness on other workers.
+"""
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.user import User, UserRole
+import threading
+import time
+
+PRINCIPAL_CACHE_MAX_ENTRIES = 10000
+
+_principal_cache: Dict[Tuple[str, Optional[str]], Tuple[float, "Principal"]] = {}
+_principal_lock = threading.Lock()
+
+
+class Principal:
+    """
+    Read-only snapshot of an authenticated user
+    
+    Exposes the same identity attributes as User (id, email, name, role,
+    tenant_id, ...) for routes that don't need a session-bound ORM object.
+    """
+    
+    __slots__ = ("id", "email", "name", "role", "tenant_id", "department", "organization", "is_active")
+    
+    def __init__(
+        self,
+        id: UUID,
+        email: str,
+        name: str,
+        role: UserRole,
+        tenant_id: Optional[UUID],
+        department: Optional[str] = None,
+        organization: Optional[str] = None,
+        is_active: bool = True
+    ):
+        for attr, value in (
+            ("id", id), ("email", email), ("name", name), ("role", role), ("tenant_id", tenant_id),
+            ("department", department), ("organization", organization), ("is_active", is_active)
+        ):
+            object.__setattr__(self, attr, value)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("Principal is read-only")
+    
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        """Snapshot a loaded User"""
+        return cls(
+            id=user.id,
+            email=user.email,
+            name=user.name,
+            role=user.role,
+            tenant_id=user.tenant_id,
+            department=user.department,
+            organization=user.organization,
+            is_active=user.is_active if user.is_active is not None else True
+        )
+
+
+def get_cached_principal(sub: str, tenant_id: Optional[str]) -> Optional[Principal]:
+    """Cached principal for a token's (sub, tenant_id), or None if missing or expired"""
+    with _principal_lock:
+        entry = _principal_cache.get((sub, tenant_id))
+    if entry and time.monotonic() - entry[0] < settings.PRINCIPAL_CACHE_TTL_SECONDS:
+        return entry[1]
+    return None
+
+
+def cache_principal(sub: str, tenant_id: Optional[str], principal: Principal) -> None:
+    """Store a principal for a token's (sub, tenant_id)"""
+    with _principal_lock:
+        if len(_principal_cache) >= PRINCIPAL_CACHE_MAX_ENTRIES:
+            _principal_cache.clear()
+        _principal_cache[(sub, tenant_id)] = (time.monotonic(), principal)
+
+
+def invalidate_principal(user_id: Optional[UUID] = None) -> None:
+    """
+    Drop cached principals
+    
+    Args:
+        user_id: User whose snapshots should be dropped; clears everything if None
+    """
+    with _principal_lock:
+        if user_id is None:
+            _principal_cache.clear()
+            return
+        for key in [key for key, (_, principal) in _principal_cache.items() if principal.id == user_id]:
+            del _principal_cache[key]
+
+
+@event.listens_for(Session, "after_flush")
+def _track_user_changes(session: Session, flush_context) -> None:
+    """Remember which users changed in this transaction"""
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            session.info.setdefault("principal_users_changed", set()).add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session: Session) -> None:
+    """Drop cached principals for users whose rows were committed"""
+    for user_id in session.info.pop("principal_users_changed", ()):
+        invalidate_principal(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_user_changes(session: Session) -> None:
+    session.info.pop("principal_users_changed", None)
@@ -0,0 +1,295 @@
+"""
+Response cache for read-heavy GET endpoints
+
+Catalog-style GETs (form layouts, frameworks, master data lists, the question
+library) are served cache-aside from Redis. Each entry is stored under an
+explicit key built by the endpoint and tagged with the resources it was built
+from, per tenant. Every tag has a version counter in Redis and the current
+versions are folded into the entry key, so invalidating a tag is a single INCR:
+entries built before it are never read again and age out with their TTL.
+Commits that touch a registered model bump its tag (see register_tagged_model).
+
+Concurrent misses for the same entry are collapsed: one request builds the
+response while the others wait for it. Responses carry an ETag, and a request
+whose If-None-Match matches gets a 304 without a body.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID, uuid4
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.core.cache import get_async_redis, get_redis, redis_breaker
+from app.core.config import settings
+import asyncio
+import hashlib
+import inspect
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_PREFIX = "response_cache"
+TAG_VERSION_PREFIX = "response_cache:tag"
+PLATFORM_SCOPE = "platform"
+
+# A request that misses holds the build lock this long at most; others poll for
+# the entry until the wait runs out and then build it themselves.
+SINGLE_FLIGHT_LOCK_SECONDS = 10
+SINGLE_FLIGHT_WAIT_SECONDS = 2.0
+SINGLE_FLIGHT_POLL_SECONDS = 0.05
+
+# Model -> (resource, attribute holding the owning tenant id)
+_tagged_models: Dict[type, Tuple[str, str]] = {}
+
+# Builds in flight in this process, by entry key; followers await the leader's result
+_inflight: Dict[str, "asyncio.Future"] = {}
+
+
+def register_tagged_model(model: type, resource: str, tenant_attr: str = "tenant_id") -> None:
+    """
+    Invalidate a resource's cached responses whenever rows of a model are committed
+    
+    Args:
+        model: SQLAlchemy model class
+        resource: Resource name used in tags (e.g. "form_layouts")
+        tenant_attr: Attribute holding the tenant the row belongs to; rows without
+            one are platform-wide and invalidate the resource for every tenant
+    """
+    _tagged_models[model] = (resource, tenant_attr)
+
+
+def resource_tag(resource: str, tenant_id: Optional[UUID] = None) -> str:
+    """Tag for a tenant's rows of a resource, or for its platform-wide rows"""
+    return f"{resource}:{tenant_id or PLATFORM_SCOPE}"
+
+
+def resource_tags(tenant_id: Optional[UUID], *resources: str) -> List[str]:
+    """Tags for resources as seen by a tenant: its own rows plus platform-wide rows"""
+    tags = []
+    for resource in resources:
+        if tenant_id:
+            tags.append(resource_tag(resource, tenant_id))
+        tags.append(resource_tag(resource))
+    return tags
+
+
+def response_cache_key(endpoint: str, tenant_id: Optional[UUID], **params: Any) -> str:
+    """
+    Build an entry key from the values a response depends on
+    
+    Args:
+        endpoint: Name of the cached endpoint
+        tenant_id: Tenant the response is scoped to
+        **params: Query parameters and caller attributes (e.g. role) that change the response
+    
+    Returns:
+        Cache key; parameter order doesn't matter
+    """
+    parts = [endpoint, str(tenant_id or PLATFORM_SCOPE)]
+    parts.extend(f"{name}={value}" for name, value in sorted(params.items()))
+    return ":".join(parts)
+
+
+def invalidate_tags(*tags: str) -> None:
+    """Bump tag versions so every cached response built from them is dropped"""
+    if not tags:
+        return
+    try:
+        redis = get_redis()
+        if redis:
+            pipe = redis.pipeline(transaction=False)
+            for tag in tags:
+                pipe.incr(f"{TAG_VERSION_PREFIX}:{tag}")
+            pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to bump response cache tags {tags}: {e}")
+
+
+def invalidate_resource(resource: str, tenant_id: Optional[UUID] = None) -> None:
+    """
+    Drop cached responses for a resource
+    
+    Args:
+        resource: Resource name
+        tenant_id: Tenant whose rows changed; None means platform-wide rows, which
+            every tenant sees
+    """
+    invalidate_tags(resource_tag(resource, tenant_id))
+
+
+def compute_etag(body: str) -> str:
+    """Strong ETag for a response body"""
+    return '"' + hashlib.sha1(body.encode("utf-8")).hexdigest() + '"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches an ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _respond(request: Request, etag: str, body: str) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def _entry_key(redis, key: str, tags: Iterable[str]) -> str:
+    """Entry key for the current versions of its tags"""
+    tags = sorted(set(tags))
+    versions = await redis.mget([f"{TAG_VERSION_PREFIX}:{tag}" for tag in tags]) if tags else []
+    stamp = ",".join(f"{tag}={version or 0}" for tag, version in zip(tags, versions))
+    return f"{RESPONSE_CACHE_PREFIX}:{key}:{hashlib.sha1(stamp.encode('utf-8')).hexdigest()[:16]}"
+
+
+def _decode_entry(value: Optional[str]) -> Optional[Tuple[str, str]]:
+    """(etag, body) from a stored entry"""
+    if not value:
+        return None
+    etag, _, body = value.partition("\n")
+    return etag, body
+
+
+async def _build_body(build: Callable[[], Any]) -> Tuple[str, str]:
+    """Run the endpoint's builder and serialize its result the way FastAPI would"""
+    result = build()
+    if inspect.isawaitable(result):
+        result = await result
+    body = json.dumps(
+        jsonable_encoder(result),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    )
+    return compute_etag(body), body
+
+
+async def _load_or_build(redis, entry_key: Optional[str], build: Callable[[], Any], ttl: int) -> Tuple[str, str]:
+    """Serve an entry from Redis, or build it while holding the entry's build lock"""
+    if redis is None or entry_key is None:
+        return await _build_body(build)
+    
+    lock_key = f"{entry_key}:lock"
+    token = str(uuid4())
+    try:
+        acquired = await redis.set(lock_key, token, nx=True, ex=SINGLE_FLIGHT_LOCK_SECONDS)
+        if not acquired:
+            # Another worker is building it; wait for its result rather than piling on
+            deadline = time.monotonic() + SINGLE_FLIGHT_WAIT_SECONDS
+            while time.monotonic() < deadline:
+                await asyncio.sleep(SINGLE_FLIGHT_POLL_SECONDS)
+                entry = _decode_entry(await redis.get(entry_key))
+                if entry:
+                    return entry
+    except Exception as e:
+        logger.debug(f"Response cache lock for {entry_key} failed: {e}")
+        redis_breaker.record_failure()
+        acquired = False
+    
+    try:
+        etag, body = await _build_body(build)
+        try:
+            await redis.setex(entry_key, ttl, f"{etag}\n{body}")
+        except Exception as e:
+            logger.debug(f"Failed to store response cache entry {entry_key}: {e}")
+            redis_breaker.record_failure()
+        return etag, body
+    finally:
+        if acquired:
+            try:
+                if await redis.get(lock_key) == token:
+                    await redis.delete(lock_key)
+            except Exception:
+                pass
+
+
+async def cached_response(
+    request: Request,
+    key: str,
+    tags: List[str],
+    build: Callable[[], Any],
+    ttl: Optional[int] = None
+) -> Response:
+    """
+    Serve a GET response cache-aside
+    
+    Args:
+        request: Incoming request (for If-None-Match)
+        key: Entry key from response_cache_key; must cover everything the response
+            depends on, including the tenant
+        tags: Resource tags the response is built from (see resource_tags)
+        build: Returns the response payload (sync or async); called on a miss.
+            Exceptions propagate and nothing is cached.
+        ttl: Entry lifetime in seconds (defaults to RESPONSE_CACHE_TTL_SECONDS)
+    
+    Returns:
+        JSON response with an ETag, or a 304 if the client's copy is current
+    """
+    ttl = ttl or settings.RESPONSE_CACHE_TTL_SECONDS
+    redis = get_async_redis()
+    entry_key = None
+    if redis:
+        try:
+            entry_key = await _entry_key(redis, key, tags)
+            entry = _decode_entry(await redis.get(entry_key))
+            redis_breaker.record_success()
+            if entry:
+                return _respond(request, *entry)
+        except Exception as e:
+            logger.debug(f"Response cache lookup for {key} failed: {e}")
+            redis_breaker.record_failure()
+            redis = entry_key = None
+    
+    flight_key = entry_key or key
+    leader = _inflight.get(flight_key)
+    if leader is not None:
+        entry = await asyncio.shield(leader)
+        if entry:
+            return _respond(request, *entry)
+        # The leader failed; build it ourselves so the error (if any) is ours
+        return _respond(request, *(await _build_body(build)))
+    
+    future = asyncio.get_running_loop().create_future()
+    _inflight[flight_key] = future
+    entry = None
+    try:
+        entry = await _load_or_build(redis, entry_key, build, ttl)
+    finally:
+        _inflight.pop(flight_key, None)
+        future.set_result(entry)
+    return _respond(request, *entry)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_tagged_changes(session: Session, flush_context) -> None:
+    """Remember which resource tags rows changed in this transaction"""
+    if not _tagged_models:
+        return
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        spec = _tagged_models.get(type(obj))
+        if spec:
+            resource, tenant_attr = spec
+            tag = resource_tag(resource, getattr(obj, tenant_attr, None))
+            session.info.setdefault("response_cache_tags_changed", set()).add(tag)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_tags(session: Session) -> None:
+    """Bump the tags of committed rows"""
+    tags = session.info.pop("response_cache_tags_changed", None)
+    if tags:
+        invalidate_tags(*sorted(tags))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_tagged_changes(session: Session) -> None:
+    session.info.pop("response_cache_tags_changed", None)
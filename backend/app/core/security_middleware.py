@@ -1,76 +1,58 @@
 """
 Security middleware and utilities
 """
-from fastapi import Request, HTTPException, status
+from fastapi import HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
 import time
 import logging
 from typing import Dict, Tuple, Optional
 from app.core.config import settings
-from app.core.cache import get_redis
+from app.core.cache import get_async_redis, redis_breaker
 
 logger = logging.getLogger(__name__)
 
 # Fallback in-memory rate limiting (used if Redis is unavailable)
 _fallback_rate_limit_store: Dict[str, Tuple[int, float]] = {}
 
+# INCR and the first-hit EXPIRE in one atomic round trip, so a crash between the
+# two can't leave a counter without a TTL
+_RATE_LIMIT_SCRIPT = """
+local count = redis.call('INCR', KEYS[1])
+if count == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return count
+"""
+_rate_limit_script = None
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """Add security headers to all responses"""
-    
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        
-        # Don't override CORS headers - check if they exist
-        cors_origin = response.headers.get("access-control-allow-origin")
-        
-        # Security headers (only add if they don't conflict with CORS)
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        
-        # Only add HSTS in production with HTTPS
-        if request.url.scheme == "https":
-            response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        
-        # Relax CSP for development to allow CORS
-        if settings.ENVIRONMENT == "development":
-            response.headers["Content-Security-Policy"] = "default-src 'self' 'unsafe-inline' 'unsafe-eval' http://localhost:* ws://localhost:*;"
-        else:
-            response.headers["Content-Security-Policy"] = "default-src 'self'"
-        
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        
-        return response
 
+def _get_rate_limit_script(redis):
+    """Rate limit script registered on the client (runs via EVALSHA, loading it on first use)"""
+    global _rate_limit_script
+    if _rate_limit_script is None or _rate_limit_script.registered_client is not redis:
+        _rate_limit_script = redis.register_script(_RATE_LIMIT_SCRIPT)
+    return _rate_limit_script
 
-def check_rate_limit_redis(client_ip: str, limit: int, window: int = 60) -> Tuple[bool, int]:
+
+async def check_rate_limit_redis(client_ip: str, limit: int, window: int = 60) -> Tuple[bool, int]:
     """
     Check rate limit using Redis (distributed rate limiting)
     
     Returns:
         Tuple of (is_allowed, current_count)
     """
+    redis = get_async_redis()
+    if not redis:
+        # Redis not available (or its circuit is open), use fallback
+        return check_rate_limit_fallback(client_ip, limit, window)
+    
     try:
-        redis = get_redis()
-        if not redis:
-            # Redis not available, use fallback
-            return check_rate_limit_fallback(client_ip, limit, window)
-        
         key = f"rate_limit:ip:{client_ip}"
-        
-        # Use Redis INCR with automatic expiration
-        # INCR returns the new count
-        count = redis.incr(key)
-        
-        # Set expiration on first request (count == 1)
-        if count == 1:
-            redis.expire(key, window)
-        
+        count = int(await _get_rate_limit_script(redis)(keys=[key], args=[window]))
+        redis_breaker.record_success()
         return count <= limit, count
     except Exception as e:
+        redis_breaker.record_failure()
         logger.warning(f"Redis rate limiting failed, falling back to in-memory: {e}")
         # Fallback to in-memory rate limiting
         return check_rate_limit_fallback(client_ip, limit, window)
@@ -103,71 +85,6 @@ def check_rate_limit_fallback(client_ip: str, limit: int, window: int = 60) -> T
     return count <= limit, count
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Rate limiting middleware with Redis support for clustering"""
-    
-    def __init__(self, app, requests_per_minute: int = 60):
-        super().__init__(app)
-        self.requests_per_minute = requests_per_minute
-    
-    async def dispatch(self, request: Request, call_next):
-        # Skip rate limiting in development for localhost
-        if settings.ENVIRONMENT == "development":
-            client_ip = request.client.host if request.client else "unknown"
-            # Allow unlimited requests from localhost in development
-            if client_ip in ["127.0.0.1", "localhost", "::1"] or "localhost" in str(client_ip):
-                response = await call_next(request)
-                response.headers["X-RateLimit-Limit"] = "unlimited"
-                response.headers["X-RateLimit-Remaining"] = "unlimited"
-                return response
-        
-        # Get client IP (consider X-Forwarded-For for load balancers)
-        client_ip = request.client.host if request.client else "unknown"
-        forwarded_for = request.headers.get("X-Forwarded-For")
-        if forwarded_for:
-            # Take the first IP in the chain (original client)
-            client_ip = forwarded_for.split(",")[0].strip()
-        
-        # Check rate limit using Redis (with fallback)
-        is_allowed, current_count = check_rate_limit_redis(
-            client_ip, 
-            self.requests_per_minute, 
-            window=60
-        )
-        
-        if not is_allowed:
-            # Get origin for CORS
-            origin = request.headers.get("origin")
-            allowed_origins = settings.cors_origins_list
-            
-            headers = {
-                "X-RateLimit-Limit": str(self.requests_per_minute),
-                "X-RateLimit-Remaining": "0",
-                "Retry-After": "60",
-            }
-            
-            # Add CORS headers if origin is allowed
-            if origin and origin in allowed_origins:
-                headers["Access-Control-Allow-Origin"] = origin
-                headers["Access-Control-Allow-Credentials"] = "true"
-                headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, PATCH, OPTIONS"
-                headers["Access-Control-Allow-Headers"] = "*"
-            
-            return Response(
-                content='{"detail":"Rate limit exceeded"}',
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                media_type="application/json",
-                headers=headers
-            )
-        
-        # Add rate limit headers
-        response = await call_next(request)
-        response.headers["X-RateLimit-Limit"] = str(self.requests_per_minute)
-        response.headers["X-RateLimit-Remaining"] = str(self.requests_per_minute - current_count)
-        
-        return response
-
-
 def validate_file_upload(file_size: int, allowed_types: list = None) -> None:
     """Validate file upload"""
     # Check file size
@@ -1,10 +1,137 @@
 """
 Utility for generating workflow ticket IDs for assessments
+
+Ticket numbers come from a ticket_counters row per (tenant, prefix, year). One
+upsert advances the counter and returns its new value, so allocating a number
+is a single-row statement however many tickets exist, and concurrent creators
+never get the same number. The upsert runs in its own short transaction, so the
+counter row is never locked for the length of the caller's transaction.
+
+Single IDs are handed out from a block of numbers cached in-process; bulk
+creators reserve exactly the block they need. Numbers left in a cached block
+when the process exits, or reserved by a transaction that rolls back, are not
+reused, so ticket numbers can have gaps.
 """
+from typing import Dict, List, Tuple
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 from uuid import UUID
 from datetime import datetime
-from app.models.assessment import AssessmentAssignment
+from app.models.ticket_counter import TicketCounter
+import threading
+
+# Numbers cached per (tenant, year) for single-ID callers
+TICKET_BLOCK_SIZE = 20
+
+
+def counter_upsert(tenant_id: UUID, prefix: str, year: int, count: int):
+    """Statement that advances a ticket counter by count and returns its new value"""
+    statement = insert(TicketCounter).values(
+        tenant_id=tenant_id,
+        prefix=prefix,
+        year=year,
+        last_value=count,
+        updated_at=datetime.utcnow()
+    )
+    return statement.on_conflict_do_update(
+        index_elements=[TicketCounter.tenant_id, TicketCounter.prefix, TicketCounter.year],
+        set_={
+            "last_value": TicketCounter.last_value + statement.excluded.last_value,
+            "updated_at": statement.excluded.updated_at,
+        }
+    ).returning(TicketCounter.last_value)
+
+
+class TicketNumberAllocator:
+    """
+    Allocates ticket IDs for one prefix (e.g., ASMT-2025-001)
+    
+    Args:
+        prefix: Ticket ID prefix
+        block_size: Numbers cached in-process per (tenant, year)
+    """
+    
+    def __init__(self, prefix: str, block_size: int = TICKET_BLOCK_SIZE):
+        self.prefix = prefix
+        self.block_size = block_size
+        # (tenant_id, year) -> (next number, last number) of the cached block
+        self._blocks: Dict[Tuple[UUID, int], Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+    
+    def format(self, year: int, number: int) -> str:
+        return f"{self.prefix}-{year}-{number:03d}"
+    
+    def allocate(self, db: Session, tenant_id: UUID, year: int, count: int) -> int:
+        """
+        Advance the tenant's counter for the year in a transaction of its own
+        
+        Args:
+            db: Database session (only its engine is used)
+            tenant_id: Tenant UUID
+            year: Ticket year
+            count: Numbers to allocate
+        
+        Returns:
+            The last number allocated; the block is (last - count + 1) to last
+        """
+        with db.get_bind().begin() as connection:
+            return connection.execute(counter_upsert(tenant_id, self.prefix, year, count)).scalar_one()
+    
+    def reserve(self, db: Session, tenant_id: UUID, count: int) -> List[str]:
+        """
+        Reserve a block of consecutive ticket IDs (for bulk creators)
+        
+        Args:
+            db: Database session
+            tenant_id: Tenant UUID
+            count: Number of ticket IDs to reserve
+        
+        Returns:
+            Ticket ID strings
+        """
+        if count <= 0:
+            return []
+        year = datetime.utcnow().year
+        last = self.allocate(db, tenant_id, year, count)
+        return [self.format(year, number) for number in range(last - count + 1, last + 1)]
+    
+    def next_id(self, db: Session, tenant_id: UUID) -> str:
+        """
+        Next ticket ID, from the in-process block (allocating a new block when it runs out)
+        
+        Args:
+            db: Database session
+            tenant_id: Tenant UUID
+        
+        Returns:
+            Ticket ID string
+        """
+        year = datetime.utcnow().year
+        key = (tenant_id, year)
+        with self._lock:
+            number, last = self._blocks.get(key, (1, 0))
+            if number > last:
+                last = self.allocate(db, tenant_id, year, self.block_size)
+                number = last - self.block_size + 1
+            self._blocks[key] = (number + 1, last)
+        return self.format(year, number)
+
+
+assessment_ticket_ids = TicketNumberAllocator("ASMT")
+
+
+def reserve_assessment_ticket_ids(db: Session, tenant_id: UUID, count: int) -> List[str]:
+    """Reserve a block of consecutive assessment workflow ticket IDs
+    
+    Args:
+        db: Database session
+        tenant_id: Tenant UUID
+        count: Number of ticket IDs to reserve
+    
+    Returns:
+        Ticket ID strings (e.g., ["ASMT-2025-001", "ASMT-2025-002"])
+    """
+    return assessment_ticket_ids.reserve(db, tenant_id, count)
 
 
 def generate_assessment_ticket_id(db: Session, tenant_id: UUID) -> str:
@@ -13,26 +140,8 @@ def generate_assessment_ticket_id(db: Session, tenant_id: UUID) -> str:
     Args:
         db: Database session
         tenant_id: Tenant UUID
-        
+    
     Returns:
         Unique ticket ID string (e.g., "ASMT-2025-001")
     """
-    year = datetime.utcnow().year
-    # Get the last ticket number for this year and tenant
-    last_assignment = db.query(AssessmentAssignment).filter(
-        AssessmentAssignment.tenant_id == tenant_id,
-        AssessmentAssignment.workflow_ticket_id.like(f"ASMT-{year}-%")
-    ).order_by(AssessmentAssignment.workflow_ticket_id.desc()).first()
-    
-    if last_assignment and last_assignment.workflow_ticket_id:
-        # Extract number and increment
-        try:
-            last_num = int(last_assignment.workflow_ticket_id.split('-')[-1])
-            next_num = last_num + 1
-        except (ValueError, IndexError):
-            next_num = 1
-    else:
-        next_num = 1
-    
-    return f"ASMT-{year}-{next_num:03d}"
-
+    return assessment_ticket_ids.next_id(db, tenant_id)
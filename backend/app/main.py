@@ -7,8 +7,7 @@ from fastapi.responses import JSONResponse, FileResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from app.core.config import settings
-from app.core.security_middleware import SecurityHeadersMiddleware, RateLimitMiddleware
-from app.middleware.metrics_middleware import MetricsMiddleware
+from app.middleware.request_pipeline import RequestPipelineMiddleware
 from app.core.logging_config import setup_logging
 import logging
 import os
@@ -35,15 +34,10 @@ app.add_middleware(
     expose_headers=["X-RateLimit-Limit", "X-RateLimit-Remaining"],
 )
 
-# Security headers middleware
-app.add_middleware(SecurityHeadersMiddleware)
-
-# Rate limiting middleware (higher limit in development)
+# Security headers, rate limiting and metrics in a single pure-ASGI pass
+# (higher rate limit in development)
 rate_limit = 300 if settings.ENVIRONMENT == "development" else 60
-app.add_middleware(RateLimitMiddleware, requests_per_minute=rate_limit)
-
-# Metrics middleware
-app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestPipelineMiddleware, requests_per_minute=rate_limit)
 
 # Create uploads directory if it doesn't exist
 uploads_dir = settings.UPLOAD_DIR
@@ -414,6 +408,12 @@ async def shutdown_event():
     logger.info("=" * 60)
     logger.info("VAKA Agent Platform API Shutting Down")
     logger.info("=" * 60)
+    
+    try:
+        from app.services.rag_service import rag_service
+        await rag_service.close()
+    except Exception as e:
+        logger.warning(f"Failed to close RAG service: {e}")
 
 
 if __name__ == "__main__":
@@ -1,38 +0,0 @@
-"""
-Metrics middleware for Prometheus
-"""
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
-import time
-from app.core.metrics import http_requests_total, http_request_duration_seconds
-
-
-class MetricsMiddleware(BaseHTTPMiddleware):
-    """Middleware to collect Prometheus metrics"""
-    
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        
-        response = await call_next(request)
-        
-        duration = time.time() - start_time
-        
-        # Record metrics
-        method = request.method
-        endpoint = request.url.path
-        status_code = response.status_code
-        
-        http_requests_total.labels(
-            method=method,
-            endpoint=endpoint,
-            status=status_code
-        ).inc()
-        
-        http_request_duration_seconds.labels(
-            method=method,
-            endpoint=endpoint
-        ).observe(duration)
-        
-        return response
-
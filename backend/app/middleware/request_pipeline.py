@@ -0,0 +1,146 @@
+"""
+Combined ASGI middleware for security headers, rate limiting and metrics
+
+Replaces the SecurityHeadersMiddleware / RateLimitMiddleware / MetricsMiddleware
+chain. Those were BaseHTTPMiddleware subclasses, so every request paid for three
+extra tasks and three re-wrapped response streams, and streaming responses were
+buffered through each layer. This middleware does all three in one pass and only
+touches the response start message.
+"""
+import time
+from typing import List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import http_requests_total, http_request_duration_seconds
+from app.core.security_middleware import check_rate_limit_redis
+
+# Clients that are never rate limited in development
+_LOCAL_CLIENTS = ("127.0.0.1", "localhost", "::1")
+
+_STATIC_SECURITY_HEADERS: List[Tuple[str, str]] = [
+    ("X-Content-Type-Options", "nosniff"),
+    ("X-Frame-Options", "DENY"),
+    ("X-XSS-Protection", "1; mode=block"),
+    ("Referrer-Policy", "strict-origin-when-cross-origin"),
+]
+_DEVELOPMENT_CSP = "default-src 'self' 'unsafe-inline' 'unsafe-eval' http://localhost:* ws://localhost:*;"
+_PRODUCTION_CSP = "default-src 'self'"
+_HSTS = "max-age=31536000; includeSubDomains"
+
+
+class RequestPipelineMiddleware:
+    """
+    Pure ASGI middleware applying security headers, rate limiting and metrics
+    
+    Args:
+        app: Wrapped ASGI application
+        requests_per_minute: Per-client request limit (fixed 60 second window)
+    """
+    
+    def __init__(self, app: ASGIApp, requests_per_minute: int = 60):
+        self.app = app
+        self.requests_per_minute = requests_per_minute
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start_time = time.perf_counter()
+        development = settings.ENVIRONMENT == "development"
+        request_headers = Headers(scope=scope)
+        client = scope.get("client")
+        client_host = client[0] if client else "unknown"
+        
+        # Rate limiting (localhost is unlimited in development)
+        if development and (client_host in _LOCAL_CLIENTS or "localhost" in client_host):
+            limit_header = remaining_header = "unlimited"
+        else:
+            # Consider X-Forwarded-For for load balancers (first IP is the original client)
+            forwarded_for = request_headers.get("x-forwarded-for")
+            client_ip = forwarded_for.split(",")[0].strip() if forwarded_for else client_host
+            is_allowed, current_count = await check_rate_limit_redis(
+                client_ip,
+                self.requests_per_minute,
+                window=60
+            )
+            limit_header = str(self.requests_per_minute)
+            remaining_header = str(max(0, self.requests_per_minute - current_count))
+            if not is_allowed:
+                await self._send_rate_limited(scope, request_headers, send, development)
+                self._record(scope, 429, start_time)
+                return
+        
+        status_code = 500
+        
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                self._apply_security_headers(scope, headers, development)
+                headers["X-RateLimit-Limit"] = limit_header
+                headers["X-RateLimit-Remaining"] = remaining_header
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self._record(scope, status_code, start_time)
+    
+    @staticmethod
+    def _apply_security_headers(scope: Scope, headers: MutableHeaders, development: bool):
+        """Set security headers on a response start message"""
+        for name, value in _STATIC_SECURITY_HEADERS:
+            headers[name] = value
+        # Only add HSTS with HTTPS
+        if scope.get("scheme") == "https":
+            headers["Strict-Transport-Security"] = _HSTS
+        # Relax CSP for development to allow CORS
+        headers["Content-Security-Policy"] = _DEVELOPMENT_CSP if development else _PRODUCTION_CSP
+    
+    async def _send_rate_limited(
+        self,
+        scope: Scope,
+        request_headers: Headers,
+        send: Send,
+        development: bool
+    ):
+        """Send a 429 response, with CORS headers for allowed origins"""
+        body = b'{"detail":"Rate limit exceeded"}'
+        headers = MutableHeaders(raw=[
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("latin-1")),
+        ])
+        headers["X-RateLimit-Limit"] = str(self.requests_per_minute)
+        headers["X-RateLimit-Remaining"] = "0"
+        headers["Retry-After"] = "60"
+        
+        origin: Optional[str] = request_headers.get("origin")
+        if origin and origin in settings.cors_origins_list:
+            headers["Access-Control-Allow-Origin"] = origin
+            headers["Access-Control-Allow-Credentials"] = "true"
+            headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, PATCH, OPTIONS"
+            headers["Access-Control-Allow-Headers"] = "*"
+        self._apply_security_headers(scope, headers, development)
+        
+        await send({"type": "http.response.start", "status": 429, "headers": headers.raw})
+        await send({"type": "http.response.body", "body": body})
+    
+    @staticmethod
+    def _record(scope: Scope, status_code: int, start_time: float):
+        """Record Prometheus request metrics"""
+        method = scope["method"]
+        endpoint = scope["path"]
+        http_requests_total.labels(
+            method=method,
+            endpoint=endpoint,
+            status=status_code
+        ).inc()
+        http_request_duration_seconds.labels(
+            method=method,
+            endpoint=endpoint
+        ).observe(time.perf_counter() - start_time)
@@ -12,6 +12,8 @@ from app.models.architecture import ArchitectureDocument
 from app.models.landscape import LandscapePosition
 from app.models.vendor_invitation import VendorInvitation
 from app.models.otp import OTPCode
+from app.models.email_outbox import EmailOutboxMessage, EmailOutboxStatus
+from app.models.ticket_counter import TicketCounter
 from app.models.platform_config import PlatformConfiguration
 from app.models.cluster_node import ClusterNode, ClusterHealthCheck
 from app.models.workflow_config import WorkflowConfiguration
@@ -94,6 +96,9 @@ __all__ = [
     "AgentArtifact",
     "VendorInvitation",
     "OTPCode",
+    "EmailOutboxMessage",
+    "EmailOutboxStatus",
+    "TicketCounter",
     "PlatformConfiguration",
     "ClusterNode",
     "ClusterHealthCheck",
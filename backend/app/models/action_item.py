@@ -1,7 +1,7 @@
 """
 Action Item model - Unified action items for user inbox
 """
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Boolean, JSON, Integer, Enum as SQLEnum
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Boolean, JSON, Integer, Index, UniqueConstraint, Enum as SQLEnum
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -86,3 +86,57 @@ class ActionItem(Base):
     # Relationships
     # assigned_user = relationship("User", foreign_keys=[assigned_to])
     # assigner = relationship("User", foreign_keys=[assigned_by])
+
+
+class InboxVisibility(str, enum.Enum):
+    """Who can see an inbox entry besides its assignee"""
+    ASSIGNEE = "assignee"  # Assignee, matching role and tenant admins
+    PRIVATE = "private"  # Assignee only (direct messages, vendor questionnaires)
+    TENANT = "tenant"  # Everyone in the tenant (unassigned requests, public comments)
+
+
+class ActionItemInboxEntry(Base):
+    """
+    Materialized inbox row, one per source record
+    
+    Maintained from approval steps, assessment action items, onboarding requests,
+    tickets and messages by app.services.action_item_projection, so the inbox is
+    a single indexed query instead of an aggregation over every source table.
+    """
+    __tablename__ = "action_item_inbox"
+    __table_args__ = (
+        UniqueConstraint("origin", "origin_id", name="uq_action_item_inbox_origin"),
+        Index("ix_action_item_inbox_tenant_assigned_to", "tenant_id", "assigned_to"),
+        Index("ix_action_item_inbox_tenant_completed_by", "tenant_id", "completed_by"),
+        Index("ix_action_item_inbox_tenant_role", "tenant_id", "assigned_role"),
+        Index("ix_action_item_inbox_tenant_order", "tenant_id", "assigned_at", "id"),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    
+    # Source record this entry is projected from (e.g. "approval_step", "action_item", "ticket")
+    origin = Column(String(50), nullable=False)
+    origin_id = Column(UUID(as_uuid=True), nullable=False)
+    
+    # Audience
+    assigned_to = Column(UUID(as_uuid=True), nullable=True)
+    assigned_role = Column(String(50), nullable=True)  # Role-based assignment when assigned_to is empty
+    completed_by = Column(UUID(as_uuid=True), nullable=True)  # Other participant (e.g. reviewer)
+    visibility = Column(String(20), nullable=False, default=InboxVisibility.ASSIGNEE.value)
+    
+    # Inbox item as returned by the API
+    item_type = Column(String(50), nullable=False)  # ActionItemType value
+    title = Column(String(255), nullable=False)
+    description = Column(Text, nullable=True)
+    status = Column(String(20), nullable=False)  # ActionItemStatus value
+    priority = Column(String(20), nullable=False, default=ActionItemPriority.MEDIUM.value)
+    due_date = Column(DateTime, nullable=True)
+    assigned_at = Column(DateTime, nullable=False)
+    completed_at = Column(DateTime, nullable=True)
+    source_type = Column(String(50), nullable=False)
+    source_id = Column(UUID(as_uuid=True), nullable=False)
+    action_url = Column(String(500), nullable=True)
+    item_metadata = Column(JSON, nullable=True)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -2,7 +2,7 @@
 Assessment/Evaluation models for managing vendor and agent assessments
 Supports TPRM, Vendor Qualification, Risk Assessment, AI-Vendor Qualification, etc.
 """
-from sqlalchemy import Column, String, DateTime, Text, Boolean, ForeignKey, JSON, Integer, UniqueConstraint
+from sqlalchemy import Column, String, DateTime, Text, Boolean, ForeignKey, JSON, Integer, UniqueConstraint, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -235,6 +235,11 @@ class AssessmentAssignment(Base):
     assessment = relationship("Assessment", back_populates="assignments")
     schedule = relationship("AssessmentSchedule", back_populates="assignments")
     question_responses = relationship("AssessmentQuestionResponse", back_populates="assignment", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Overdue and upcoming-due lookups on the analytics dashboard
+        Index("ix_assessment_assignments_tenant_due_date", "tenant_id", "due_date"),
+    )
 
 
 class AssessmentQuestionResponse(Base):
@@ -283,3 +288,55 @@ class AssessmentQuestionResponse(Base):
     __table_args__ = (
         UniqueConstraint('assignment_id', 'question_id', name='uq_assignment_question_response'),
     )
+
+
+class AssessmentComplianceSnapshot(Base):
+    """Materialized per-assignment compliance scores, updated incrementally as responses change"""
+    __tablename__ = "assessment_compliance_snapshots"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    assignment_id = Column(UUID(as_uuid=True), ForeignKey("assessment_assignments.id"), nullable=False, unique=True, index=True)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False, index=True)
+    
+    # Question -> framework mapping captured when the snapshot was built
+    # JSON structure: {question_id: [framework_id, ...]} (only questions mapped to a framework)
+    question_frameworks = Column(JSON, nullable=False, default=dict)
+    
+    # Latest evaluation per answered, framework-mapped question
+    # JSON structure: {question_id: {"status", "confidence", "reasoning", "question_title"}}
+    evaluations = Column(JSON, nullable=False, default=dict)
+    
+    # Scores per framework, in the /assignments/{id}/compliance response shape
+    framework_scores = Column(JSON, nullable=False, default=dict)
+    
+    calculated_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class AssessmentAnalyticsRollup(Base):
+    """Assignment counts per assessment, vendor, quarter and status for the analytics dashboard"""
+    __tablename__ = "assessment_analytics_rollups"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    assessment_id = Column(UUID(as_uuid=True), ForeignKey("assessments.id"), nullable=False, index=True)
+    vendor_id = Column(UUID(as_uuid=True), ForeignKey("vendors.id"), nullable=True)
+    
+    # Start of the quarter the assignment falls in (completed_at, else assigned_at); NULL if neither is set
+    period_start = Column(DateTime, nullable=True)
+    status = Column(String(50), nullable=False)
+    assignment_count = Column(Integer, nullable=False, default=0)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_assessment_analytics_rollups_tenant_period", "tenant_id", "period_start"),
+        Index("ix_assessment_analytics_rollups_tenant_vendor", "tenant_id", "vendor_id"),
+        # One row per rollup dimension (NULL vendor / period count as equal)
+        Index(
+            "uq_assessment_analytics_rollups_dimensions",
+            "assessment_id", "tenant_id", "vendor_id", "period_start", "status",
+            unique=True,
+            postgresql_nulls_not_distinct=True
+        ),
+    )
@@ -0,0 +1,47 @@
+"""
+Email outbox model
+"""
+from sqlalchemy import Column, String, DateTime, Text, Integer, JSON, Index
+from sqlalchemy.dialects.postgresql import UUID
+import uuid
+from datetime import datetime
+from app.core.database import Base
+import enum
+
+
+class EmailOutboxStatus(str, enum.Enum):
+    """Outbox message status"""
+    PENDING = "pending"  # Waiting for its next attempt
+    SENDING = "sending"  # Claimed by a worker; retried if its lease runs out
+    SENT = "sent"
+    FAILED = "failed"  # Rejected or out of attempts
+
+
+class EmailOutboxMessage(Base):
+    """Queued outbound email, sent by the email outbox worker"""
+    __tablename__ = "email_outbox"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), nullable=True, index=True)  # Selects the SMTP integration
+
+    # Message
+    to_email = Column(String(255), nullable=False)
+    cc = Column(JSON, nullable=True)
+    bcc = Column(JSON, nullable=True)
+    subject = Column(String(500), nullable=False)
+    html_body = Column(Text, nullable=False)
+    text_body = Column(Text, nullable=True)
+
+    # Queue state
+    status = Column(String(20), nullable=False, default=EmailOutboxStatus.PENDING.value)
+    attempt_count = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    lease_token = Column(UUID(as_uuid=True), nullable=True)  # Set per claim; results are only written while it matches
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
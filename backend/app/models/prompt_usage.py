@@ -1,7 +1,7 @@
 """
 Prompt usage and cost tracking models
 """
-from sqlalchemy import Column, String, DateTime, Text, Integer, ForeignKey, JSON, Numeric, Index
+from sqlalchemy import Column, String, DateTime, Text, Integer, ForeignKey, JSON, Numeric, Index, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -85,3 +85,45 @@ class CostAggregation(Base):
         Index('idx_cost_agg_agent_period', 'agent_id', 'aggregation_type', 'period_start'),
     )
 
+
+class PromptUsageDailyRollup(Base):
+    """Daily prompt usage per agent, model, department and user, folded in by the analytics cube refresh"""
+    __tablename__ = "prompt_usage_daily_rollups"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), nullable=False)
+    day = Column(DateTime, nullable=False)  # UTC midnight
+    
+    # Dimensions
+    agent_id = Column(UUID(as_uuid=True), ForeignKey("agents.id"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), nullable=True)
+    user_role = Column(String(50), nullable=True)  # Role of the user when the usage was rolled up
+    department = Column(String(100), nullable=True)
+    model_vendor = Column(String(100), nullable=False)
+    model_name = Column(String(100), nullable=False)
+    
+    # Measures
+    request_count = Column(Integer, nullable=False, default=0)
+    total_tokens = Column(Integer, nullable=False, default=0)
+    total_cost = Column(Numeric(14, 6), nullable=False, default=0)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('idx_prompt_usage_rollup_tenant_day', 'tenant_id', 'day'),
+    )
+
+
+class AnalyticsCubeWatermark(Base):
+    """How far a tenant's analytics cube has been aggregated; newer rows are computed live"""
+    __tablename__ = "analytics_cube_watermarks"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), nullable=False)
+    cube = Column(String(50), nullable=False)  # e.g. prompt_usage_daily
+    watermark = Column(DateTime, nullable=True)  # Source rows created at or before this are in the cube
+    refreshed_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        UniqueConstraint('tenant_id', 'cube', name='uq_analytics_cube_watermark'),
+    )
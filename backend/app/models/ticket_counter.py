@@ -0,0 +1,18 @@
+"""
+Ticket counter model
+"""
+from sqlalchemy import Column, String, DateTime, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+from app.core.database import Base
+
+
+class TicketCounter(Base):
+    """Last ticket number handed out per tenant, ticket prefix and year (e.g., ASMT-2026-NNN)"""
+    __tablename__ = "ticket_counters"
+
+    tenant_id = Column(UUID(as_uuid=True), primary_key=True)
+    prefix = Column(String(20), primary_key=True)  # "ASMT"
+    year = Column(Integer, primary_key=True)
+    last_value = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,7 +1,7 @@
 """
 Webhook models
 """
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Boolean, JSON, Integer
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Boolean, JSON, Integer, Index
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from datetime import datetime
@@ -16,6 +16,14 @@ class WebhookStatus(str, enum.Enum):
     ERROR = "error"
 
 
+class WebhookDeliveryStatus(str, enum.Enum):
+    """Webhook delivery status (deliveries double as the outbound queue)"""
+    PENDING = "pending"  # Waiting for its next attempt
+    DELIVERING = "delivering"  # Claimed by a dispatcher; retried if its lease runs out
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"  # Rejected by the endpoint or out of attempts
+
+
 class WebhookEvent(str, enum.Enum):
     """Webhook event types"""
     AGENT_CREATED = "agent.created"
@@ -75,6 +83,12 @@ class WebhookDelivery(Base):
     event_type = Column(String(100), nullable=False, index=True)
     payload = Column(JSON, nullable=False)
     
+    # Queue state (see app.services.webhook_dispatcher)
+    status = Column(String(20), nullable=False, default=WebhookDeliveryStatus.PENDING.value)
+    attempt_count = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=True)
+    lease_token = Column(UUID(as_uuid=True), nullable=True)  # Set per claim; results are only written while it matches
+    
     # Response
     status_code = Column(Integer, nullable=True)
     response_body = Column(Text, nullable=True)
@@ -85,6 +99,10 @@ class WebhookDelivery(Base):
     completed_at = Column(DateTime, nullable=True)
     duration_ms = Column(Integer, nullable=True)  # Duration in milliseconds
     
+    __table_args__ = (
+        Index("ix_webhook_deliveries_status_next_attempt", "status", "next_attempt_at"),
+    )
+    
     # Relationships
     # webhook = relationship("Webhook", back_populates="deliveries")
 
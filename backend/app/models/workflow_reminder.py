@@ -2,7 +2,7 @@
 Workflow Reminder Model
 Stores scheduled reminders for workflow stages
 """
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Boolean, JSON, Integer, Index
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Boolean, JSON, Integer, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -33,6 +33,7 @@ class WorkflowReminder(Base):
     sent_at = Column(DateTime, nullable=True)
     send_attempts = Column(Integer, default=0, nullable=False)  # Track retry attempts
     last_error = Column(Text, nullable=True)  # Last error message if send failed
+    next_attempt_at = Column(DateTime, nullable=True)  # Worker lease or retry backoff; unset = due at reminder_date
     
     # Metadata
     scheduled_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
@@ -42,6 +43,7 @@ class WorkflowReminder(Base):
     __table_args__ = (
         Index('idx_workflow_reminder_date_sent', 'reminder_date', 'is_sent'),
         Index('idx_workflow_reminder_entity', 'entity_type', 'entity_id', 'workflow_stage'),
+        Index('ix_workflow_reminders_due', 'reminder_date', postgresql_where=text('is_sent = false')),
         {'comment': 'Scheduled reminders for workflow stages'}
     )
 
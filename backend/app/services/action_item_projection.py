@@ -0,0 +1,624 @@
+"""
+Action item inbox projection
+
+Keeps action_item_inbox in step with the records the inbox is built from
+(approval steps, assessment action items, onboarding requests, tickets,
+messages and legacy assessment assignments). Session hooks collect the source
+rows touched by a transaction and re-project them just before it commits, so
+reading the inbox is one indexed query per page.
+"""
+from typing import Dict, Iterable, List, Optional, Set, Any
+from uuid import UUID
+import json
+import logging
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models.action_item import (
+    ActionItem,
+    ActionItemInboxEntry,
+    ActionItemPriority,
+    ActionItemStatus,
+    ActionItemType,
+    InboxVisibility,
+)
+from app.models.agent import Agent
+from app.models.approval import ApprovalInstance, ApprovalStep
+from app.models.assessment import Assessment, AssessmentAssignment
+from app.models.message import Message, MessageType
+from app.models.ticket import Ticket
+from app.models.user import User as UserModel
+from app.models.vendor import Vendor
+from app.models.workflow_config import OnboardingRequest, WorkflowConfiguration
+
+logger = logging.getLogger(__name__)
+
+# Origins: which table an inbox entry was projected from
+ORIGIN_APPROVAL_STEP = "approval_step"
+ORIGIN_ACTION_ITEM = "action_item"
+ORIGIN_ONBOARDING_REQUEST = "onboarding_request"
+ORIGIN_TICKET = "ticket"
+ORIGIN_MESSAGE = "message"
+ORIGIN_ASSESSMENT_ASSIGNMENT = "assessment_assignment"
+
+_ORIGIN_MODELS = {
+    ApprovalStep: ORIGIN_APPROVAL_STEP,
+    ActionItem: ORIGIN_ACTION_ITEM,
+    OnboardingRequest: ORIGIN_ONBOARDING_REQUEST,
+    Ticket: ORIGIN_TICKET,
+    Message: ORIGIN_MESSAGE,
+    AssessmentAssignment: ORIGIN_ASSESSMENT_ASSIGNMENT,
+}
+
+# ActionItem rows that belong in the inbox (the assessment workflow)
+ASSESSMENT_SOURCE_TYPES = ("assessment_assignment", "assessment_resubmission", "assessment_approval")
+# Resource types whose public comments show up in everyone's inbox
+PUBLIC_MESSAGE_RESOURCES = ("agent", "review", "policy")
+
+# Source rows re-projected per query
+PROJECTION_BATCH_SIZE = 500
+
+
+def _value(value: Any) -> Any:
+    """Enum value or the value itself"""
+    return value.value if hasattr(value, "value") else value
+
+
+def _workflow_stage(assignment_status: str) -> str:
+    """Map assessment assignment status to workflow stage"""
+    status_mapping = {
+        "pending": "new",
+        "in_progress": "in_progress",
+        "completed": "pending_approval",  # Vendor completed, waiting for approver
+        "approved": "approved",
+        "rejected": "rejected",
+        "needs_revision": "needs_revision",
+        "overdue": "in_progress",  # Still in progress but overdue
+        "cancelled": "cancelled"
+    }
+    return status_mapping.get(assignment_status, "new")
+
+
+def _workflow_step(workflow_config: Optional[WorkflowConfiguration], current_step: Optional[int]):
+    """Return (is_approval_step, step_name) for an onboarding request's current step"""
+    step_name = "Onboarding Request"
+    if not workflow_config or not workflow_config.workflow_steps or not current_step:
+        return False, step_name
+    
+    steps = workflow_config.workflow_steps
+    # Handle JSON string if needed
+    if isinstance(steps, str):
+        try:
+            steps = json.loads(steps)
+        except json.JSONDecodeError:
+            steps = []
+    if not isinstance(steps, list):
+        return False, step_name
+    
+    current_step_data = next((s for s in steps if s.get("step_number") == current_step), None)
+    if not current_step_data:
+        return False, step_name
+    return current_step_data.get("step_type", "") == "approval", current_step_data.get("step_name", step_name)
+
+
+def _chunks(ids: Iterable[UUID]) -> Iterable[List[UUID]]:
+    ids = list(ids)
+    for start in range(0, len(ids), PROJECTION_BATCH_SIZE):
+        yield ids[start:start + PROJECTION_BATCH_SIZE]
+
+
+class ActionItemProjector:
+    """Builds action_item_inbox rows from their source records"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+        self._builders = {
+            ORIGIN_APPROVAL_STEP: self._project_approval_steps,
+            ORIGIN_ACTION_ITEM: self._project_action_items,
+            ORIGIN_ONBOARDING_REQUEST: self._project_onboarding_requests,
+            ORIGIN_TICKET: self._project_tickets,
+            ORIGIN_MESSAGE: self._project_messages,
+            ORIGIN_ASSESSMENT_ASSIGNMENT: self._project_assessment_assignments,
+        }
+    
+    def apply_changes(self, changes: Dict[str, Set[UUID]]) -> None:
+        """
+        Re-project changed source rows
+        
+        Args:
+            changes: Source row IDs per origin
+        """
+        changes = {origin: set(ids) for origin, ids in changes.items()}
+        assignment_ids = changes.get(ORIGIN_ASSESSMENT_ASSIGNMENT)
+        if assignment_ids:
+            # Assessment action items show their assignment's status
+            for chunk in _chunks(assignment_ids):
+                changes.setdefault(ORIGIN_ACTION_ITEM, set()).update(
+                    item_id for (item_id,) in self.db.query(ActionItem.id).filter(
+                        ActionItem.source_id.in_(chunk)
+                    ).all()
+                )
+        
+        for origin, ids in changes.items():
+            for chunk in _chunks(ids):
+                self.refresh(origin, chunk)
+    
+    def refresh(self, origin: str, ids: List[UUID]) -> None:
+        """Upsert inbox entries for source rows, removing ones that no longer belong in the inbox"""
+        projected = self._builders[origin](ids)
+        existing = {
+            entry.origin_id: entry for entry in self.db.query(ActionItemInboxEntry).filter(
+                ActionItemInboxEntry.origin == origin,
+                ActionItemInboxEntry.origin_id.in_(ids)
+            ).all()
+        }
+        
+        for origin_id in ids:
+            values = projected.get(origin_id)
+            entry = existing.get(origin_id)
+            if values is None:
+                if entry is not None:
+                    self.db.delete(entry)
+                continue
+            if entry is None:
+                entry = ActionItemInboxEntry(origin=origin, origin_id=origin_id)
+                self.db.add(entry)
+            for column, value in values.items():
+                setattr(entry, column, value)
+    
+    def rebuild_tenant(self, tenant_id: UUID) -> int:
+        """
+        Rebuild every inbox entry for a tenant from its source tables
+        
+        Returns:
+            Number of entries written
+        """
+        self.db.query(ActionItemInboxEntry).filter(
+            ActionItemInboxEntry.tenant_id == tenant_id
+        ).delete(synchronize_session=False)
+        
+        sources = {
+            ORIGIN_APPROVAL_STEP: self.db.query(ApprovalStep.id).join(
+                ApprovalInstance, ApprovalStep.instance_id == ApprovalInstance.id
+            ).join(
+                Agent, ApprovalInstance.agent_id == Agent.id
+            ).join(
+                Vendor, Agent.vendor_id == Vendor.id
+            ).filter(Vendor.tenant_id == tenant_id),
+            ORIGIN_ACTION_ITEM: self.db.query(ActionItem.id).filter(ActionItem.tenant_id == tenant_id),
+            ORIGIN_ONBOARDING_REQUEST: self.db.query(OnboardingRequest.id).filter(OnboardingRequest.tenant_id == tenant_id),
+            ORIGIN_TICKET: self.db.query(Ticket.id).filter(Ticket.tenant_id == tenant_id),
+            ORIGIN_MESSAGE: self.db.query(Message.id).filter(Message.tenant_id == tenant_id),
+            ORIGIN_ASSESSMENT_ASSIGNMENT: self.db.query(AssessmentAssignment.id).filter(
+                AssessmentAssignment.tenant_id == tenant_id
+            ),
+        }
+        for origin, query in sources.items():
+            for chunk in _chunks(row_id for (row_id,) in query.all()):
+                self.refresh(origin, chunk)
+        
+        self.db.flush()
+        return self.db.query(ActionItemInboxEntry).filter(ActionItemInboxEntry.tenant_id == tenant_id).count()
+    
+    def _latest_onboarding_by_agent(self, agent_ids: List[UUID]) -> Dict[UUID, OnboardingRequest]:
+        """Open onboarding request per agent, falling back to the most recent one"""
+        requests: Dict[UUID, OnboardingRequest] = {}
+        if not agent_ids:
+            return requests
+        for request in self.db.query(OnboardingRequest).filter(
+            OnboardingRequest.agent_id.in_(agent_ids)
+        ).order_by(OnboardingRequest.created_at.desc()).all():
+            current = requests.get(request.agent_id)
+            if current is None or (current.status not in ("pending", "in_review") and request.status in ("pending", "in_review")):
+                requests[request.agent_id] = request
+        return requests
+    
+    def _project_approval_steps(self, ids: List[UUID]) -> Dict[UUID, Dict[str, Any]]:
+        # Tenant comes from ApprovalInstance -> Agent -> Vendor
+        rows = self.db.query(ApprovalStep, ApprovalInstance.agent_id, Vendor.tenant_id).join(
+            ApprovalInstance, ApprovalStep.instance_id == ApprovalInstance.id
+        ).join(
+            Agent, ApprovalInstance.agent_id == Agent.id
+        ).join(
+            Vendor, Agent.vendor_id == Vendor.id
+        ).filter(ApprovalStep.id.in_(ids)).all()
+        onboarding_requests = self._latest_onboarding_by_agent(list({agent_id for _, agent_id, _ in rows}))
+        
+        projected = {}
+        for step, agent_id, tenant_id in rows:
+            if step.status not in ("pending", "in_progress", "completed"):
+                continue
+            onboarding_request = onboarding_requests.get(agent_id)
+            metadata = {
+                "instance_id": str(step.instance_id),
+                "agent_id": str(agent_id) if agent_id else None,
+                "step_number": step.step_number,
+                "request_number": onboarding_request.request_number if onboarding_request else None,
+                "request_ticket_id": onboarding_request.external_workflow_id if onboarding_request else None
+            }
+            values = {
+                "tenant_id": tenant_id,
+                "assigned_to": step.assigned_to,
+                "assigned_role": None,
+                "completed_by": None,
+                "visibility": InboxVisibility.ASSIGNEE.value,
+                "item_type": ActionItemType.APPROVAL.value,
+                "description": f"Step {step.step_number}: {step.step_type}",
+                "priority": ActionItemPriority.MEDIUM.value,
+                "due_date": None,  # Approval steps don't have due dates by default
+                "assigned_at": step.created_at,
+                "source_type": "approval_step",
+                "source_id": step.id,
+                # ApprovalInterface expects agent_id, not instance_id
+                "action_url": f"/approvals/{agent_id}" if agent_id else f"/approvals/{step.instance_id}",
+                "item_metadata": metadata
+            }
+            if step.status == "completed":
+                values.update({
+                    "title": f"Approved: {step.step_name or 'Request'}",
+                    "status": ActionItemStatus.COMPLETED.value,
+                    "completed_at": step.completed_at
+                })
+            else:
+                metadata["step_type"] = step.step_type
+                values.update({
+                    # Steps without a direct assignee go to everyone with the step's role
+                    "assigned_role": step.assigned_role if not step.assigned_to else None,
+                    "title": f"Approve {step.step_name or 'Request'}",
+                    "status": ActionItemStatus.PENDING.value,
+                    "completed_at": None
+                })
+            projected[step.id] = values
+        return projected
+    
+    def _project_action_items(self, ids: List[UUID]) -> Dict[UUID, Dict[str, Any]]:
+        items = self.db.query(ActionItem).filter(
+            ActionItem.id.in_(ids),
+            ActionItem.action_type.in_([ActionItemType.ASSESSMENT, ActionItemType.APPROVAL]),
+            ActionItem.source_type.in_(ASSESSMENT_SOURCE_TYPES)
+        ).all()
+        assignment_ids = list({item.source_id for item in items})
+        assignments = {
+            a.id: a for a in self.db.query(AssessmentAssignment).filter(
+                AssessmentAssignment.id.in_(assignment_ids)
+            ).all()
+        } if assignment_ids else {}
+        assessment_ids = list({a.assessment_id for a in assignments.values() if a.assessment_id})
+        assessments = {
+            a.id: a for a in self.db.query(Assessment).filter(Assessment.id.in_(assessment_ids)).all()
+        } if assessment_ids else {}
+        
+        projected = {}
+        for item in items:
+            assignment = assignments.get(item.source_id)
+            # Skip items whose assignment is missing or in another tenant
+            if not assignment or assignment.tenant_id != item.tenant_id:
+                continue
+            # Approvers only see assessments the vendor has submitted and nobody has closed yet
+            if item.source_type == "assessment_approval" and assignment.status != "completed":
+                continue
+            
+            assessment = assessments.get(assignment.assessment_id)
+            base_metadata = item.item_metadata or {}
+            metadata = {
+                "assessment_id": str(assignment.assessment_id) if assignment.assessment_id else None,
+                "assessment_name": assessment.name if assessment else (item.title.replace("Approve Assessment: ", "") if item.title else None),
+                "assessment_type": assessment.assessment_type if assessment else None,
+                "assignment_id": str(assignment.id),
+                **base_metadata,
+                "assignment_status": assignment.status,
+                "workflow_stage": _workflow_stage(assignment.status),
+                "vendor_completed": assignment.status in ("completed", "approved", "rejected"),
+                "ready_for_approval": assignment.status == "completed"
+            }
+            if assignment.workflow_ticket_id:
+                metadata["workflow_ticket_id"] = assignment.workflow_ticket_id
+            
+            # The item's own status says whether this assignee is done; a closed assignment closes every item
+            status = _value(item.status)
+            completed_at = item.completed_at
+            if assignment.status in ("approved", "rejected"):
+                status = ActionItemStatus.COMPLETED.value
+                completed_at = completed_at or assignment.completed_at
+            
+            projected[item.id] = {
+                "tenant_id": item.tenant_id,
+                "assigned_to": item.assigned_to,
+                "assigned_role": None,
+                "completed_by": None,
+                # Vendor questionnaires are only for the vendor; approvals are also visible to admins
+                "visibility": (
+                    InboxVisibility.ASSIGNEE.value if item.source_type == "assessment_approval"
+                    else InboxVisibility.PRIVATE.value
+                ),
+                "item_type": _value(item.action_type),
+                "title": item.title,
+                "description": item.description,
+                "status": status,
+                "priority": _value(item.priority) or ActionItemPriority.MEDIUM.value,
+                "due_date": item.due_date,
+                "assigned_at": item.assigned_at or item.created_at,
+                "completed_at": completed_at,
+                "source_type": item.source_type,
+                "source_id": item.source_id,
+                "action_url": item.action_url or f"/assessments/review/{assignment.id}",
+                "item_metadata": metadata
+            }
+        return projected
+    
+    def _project_onboarding_requests(self, ids: List[UUID]) -> Dict[UUID, Dict[str, Any]]:
+        requests = self.db.query(OnboardingRequest).filter(
+            OnboardingRequest.id.in_(ids),
+            OnboardingRequest.status.in_(["pending", "in_review", "approved", "rejected"])
+        ).all()
+        requests = [r for r in requests if r.agent_id and r.tenant_id]
+        agent_ids = list({r.agent_id for r in requests})
+        workflow_ids = list({r.workflow_config_id for r in requests if r.workflow_config_id})
+        
+        agents = {a.id: a for a in self.db.query(Agent).filter(Agent.id.in_(agent_ids)).all()} if agent_ids else {}
+        workflow_configs = {
+            wc.id: wc for wc in self.db.query(WorkflowConfiguration).filter(
+                WorkflowConfiguration.id.in_(workflow_ids)
+            ).all()
+        } if workflow_ids else {}
+        tickets: Dict[UUID, Ticket] = {}
+        if agent_ids:
+            for ticket in self.db.query(Ticket).filter(Ticket.agent_id.in_(agent_ids)).all():
+                tickets.setdefault(ticket.agent_id, ticket)
+        
+        projected = {}
+        for request in requests:
+            agent = agents.get(request.agent_id)
+            agent_name = agent.name if agent else None
+            is_approval_step, step_name = _workflow_step(
+                workflow_configs.get(request.workflow_config_id), request.current_step
+            )
+            ticket = tickets.get(request.agent_id)
+            ticket_number = ticket.ticket_number if ticket else None
+            is_open = request.status in ("pending", "in_review")
+            
+            metadata = {
+                "agent_id": str(request.agent_id),
+                "agent_name": agent_name,
+                "request_number": request.request_number,
+                "request_ticket_id": request.external_workflow_id,
+                "current_step": request.current_step,
+                "step_type": "approval" if is_approval_step else "review"
+            }
+            if is_open:
+                metadata["ticket_number"] = ticket_number
+                metadata["workflow_ticket_id"] = ticket_number or request.external_workflow_id or request.request_number
+                title_prefix = "Approve" if is_approval_step else "Review Onboarding"
+            else:
+                metadata["status"] = request.status
+                title_prefix = "Approved" if request.status == "approved" else "Rejected"
+            
+            projected[request.id] = {
+                "tenant_id": request.tenant_id,
+                # Open requests go to their assignee (or everyone when unassigned); closed ones to who decided them
+                "assigned_to": request.assigned_to if is_open else request.approved_by,
+                "assigned_role": None,
+                "completed_by": None if is_open else request.reviewed_by,
+                "visibility": (
+                    InboxVisibility.TENANT.value if is_open and not request.assigned_to
+                    else InboxVisibility.ASSIGNEE.value
+                ),
+                "item_type": ActionItemType.APPROVAL.value if is_approval_step else ActionItemType.ONBOARDING_REVIEW.value,
+                "title": f"{title_prefix}: {agent_name or 'Agent'}",
+                "description": f"{step_name} - Request {request.request_number or ''}",
+                "status": ActionItemStatus.PENDING.value if is_open else ActionItemStatus.COMPLETED.value,
+                "priority": ActionItemPriority.MEDIUM.value,
+                "due_date": None,
+                "assigned_at": request.created_at,
+                "completed_at": None if is_open else (request.approved_at or request.reviewed_at),
+                "source_type": "onboarding_request",
+                "source_id": request.id,
+                "action_url": f"/approvals/{request.agent_id}" if is_approval_step else f"/agents/{request.agent_id}",
+                "item_metadata": metadata
+            }
+        return projected
+    
+    def _project_tickets(self, ids: List[UUID]) -> Dict[UUID, Dict[str, Any]]:
+        tickets = self.db.query(Ticket).filter(
+            Ticket.id.in_(ids),
+            Ticket.status.in_(["open", "in_progress"])
+        ).all()
+        
+        projected = {}
+        for ticket in tickets:
+            if not ticket.tenant_id:
+                continue
+            priority = getattr(ticket, "priority", None)
+            projected[ticket.id] = {
+                "tenant_id": ticket.tenant_id,
+                "assigned_to": ticket.assigned_to,
+                "assigned_role": None,
+                "completed_by": None,
+                "visibility": InboxVisibility.ASSIGNEE.value,
+                "item_type": ActionItemType.TICKET.value,
+                "title": f"Ticket: {ticket.title}"[:255],
+                "description": ticket.description,
+                "status": ActionItemStatus.PENDING.value if ticket.status == "open" else ActionItemStatus.IN_PROGRESS.value,
+                "priority": ActionItemPriority.HIGH.value if priority == "high" else ActionItemPriority.MEDIUM.value,
+                "due_date": None,
+                "assigned_at": ticket.submitted_at,
+                "completed_at": None,
+                "source_type": "ticket",
+                "source_id": ticket.id,
+                "action_url": f"/tickets/{ticket.id}",
+                "item_metadata": {
+                    "ticket_type": getattr(ticket, "ticket_type", None),
+                    "priority": priority,
+                    "ticket_number": ticket.ticket_number,
+                    "workflow_ticket_id": ticket.ticket_number  # Use ticket_number as workflow_ticket_id
+                }
+            }
+        return projected
+    
+    def _project_messages(self, ids: List[UUID]) -> Dict[UUID, Dict[str, Any]]:
+        messages = self.db.query(Message).filter(
+            Message.id.in_(ids),
+            Message.is_archived == False
+        ).all()
+        sender_ids = list({m.sender_id for m in messages})
+        senders = {
+            u.id: u.name for u in self.db.query(UserModel).filter(UserModel.id.in_(sender_ids)).all()
+        } if sender_ids else {}
+        
+        projected = {}
+        for message in messages:
+            if not message.tenant_id:
+                continue
+            if message.recipient_id:
+                visibility = InboxVisibility.PRIVATE.value
+            elif message.resource_type in PUBLIC_MESSAGE_RESOURCES:
+                visibility = InboxVisibility.TENANT.value
+            else:
+                continue
+            
+            sender_name = senders.get(message.sender_id) or "Unknown"
+            if message.message_type == MessageType.QUESTION.value:
+                item_type = ActionItemType.QUESTION.value
+                title = f"Answered: Question from {sender_name}" if message.is_read else f"Question from {sender_name}"
+            elif message.message_type == MessageType.REPLY.value:
+                item_type = ActionItemType.COMMENT.value
+                title = f"Read: Reply from {sender_name}" if message.is_read else f"Reply from {sender_name}"
+            else:
+                item_type = ActionItemType.MESSAGE.value
+                title = f"Read: Message from {sender_name}" if message.is_read else f"Message from {sender_name}"
+            
+            if message.resource_type == "agent":
+                action_url = f"/agents/{message.resource_id}?tab=messages"
+            elif message.resource_type == "review":
+                action_url = f"/reviews/{message.resource_id}?tab=messages"
+            elif message.resource_type == "policy":
+                action_url = f"/admin/policies/{message.resource_id}?tab=messages"
+            else:
+                action_url = f"/messages?resource_type={message.resource_type}&resource_id={message.resource_id}"
+            
+            projected[message.id] = {
+                "tenant_id": message.tenant_id,
+                "assigned_to": message.recipient_id,
+                "assigned_role": None,
+                "completed_by": None,
+                "visibility": visibility,
+                "item_type": item_type,
+                "title": title[:255],
+                "description": message.content[:200] + "..." if len(message.content) > 200 else message.content,
+                "status": ActionItemStatus.COMPLETED.value if message.is_read else ActionItemStatus.PENDING.value,
+                "priority": ActionItemPriority.MEDIUM.value,
+                "due_date": None,
+                "assigned_at": message.created_at,
+                "completed_at": message.updated_at if message.is_read else None,
+                "source_type": "message",
+                "source_id": message.id,
+                "action_url": action_url,
+                "item_metadata": {
+                    "message_type": message.message_type,
+                    "resource_type": message.resource_type,
+                    "resource_id": str(message.resource_id),
+                    "sender_id": str(message.sender_id),
+                    "sender_name": sender_name
+                }
+            }
+        return projected
+    
+    def _project_assessment_assignments(self, ids: List[UUID]) -> Dict[UUID, Dict[str, Any]]:
+        # Completed assignments created before assessment action items existed
+        assignments = self.db.query(AssessmentAssignment).filter(
+            AssessmentAssignment.id.in_(ids),
+            AssessmentAssignment.status.in_(["completed", "approved", "rejected"]),
+            AssessmentAssignment.assessment_id.isnot(None)
+        ).all()
+        if not assignments:
+            return {}
+        
+        assignment_ids = [a.id for a in assignments]
+        with_action_items = {
+            source_id for (source_id,) in self.db.query(ActionItem.source_id).filter(
+                ActionItem.source_id.in_(assignment_ids),
+                ActionItem.source_type.in_(ASSESSMENT_SOURCE_TYPES)
+            ).all()
+        }
+        assessments = {
+            a.id: a for a in self.db.query(Assessment).filter(
+                Assessment.id.in_([a.assessment_id for a in assignments])
+            ).all()
+        }
+        
+        projected = {}
+        for assignment in assignments:
+            if assignment.id in with_action_items:
+                continue
+            assessment = assessments.get(assignment.assessment_id)
+            projected[assignment.id] = {
+                "tenant_id": assignment.tenant_id,
+                "assigned_to": None,
+                "assigned_role": None,
+                "completed_by": None,
+                "visibility": InboxVisibility.ASSIGNEE.value,
+                "item_type": ActionItemType.ASSESSMENT.value,
+                "title": f"Completed: {assessment.name if assessment else 'Assessment'}"[:255],
+                "description": f"Completed the {assessment.assessment_type if assessment else 'assessment'} questionnaire",
+                "status": ActionItemStatus.COMPLETED.value,
+                "priority": ActionItemPriority.MEDIUM.value,
+                "due_date": assignment.due_date,
+                "assigned_at": assignment.assigned_at or assignment.created_at,
+                "completed_at": assignment.completed_at,
+                "source_type": "assessment_assignment",
+                "source_id": assignment.id,
+                "action_url": f"/assessments/{assignment.id}",
+                "item_metadata": {
+                    "assessment_id": str(assignment.assessment_id),
+                    "assessment_name": assessment.name if assessment else None,
+                    "workflow_ticket_id": assignment.workflow_ticket_id
+                }
+            }
+        return projected
+
+
+def track_inbox_sources(session: Session, origin: str, source_ids: Iterable[UUID]) -> None:
+    """
+    Re-project source rows when the session commits
+    
+    Flushed ORM changes are tracked automatically; call this for rows written
+    with bulk INSERT/UPDATE statements, which bypass the unit of work.
+    
+    Args:
+        session: Session that wrote the rows
+        origin: Source table (one of the ORIGIN_* constants)
+        source_ids: IDs of the changed source rows
+    """
+    session.info.setdefault("action_item_inbox_changes", {}).setdefault(origin, set()).update(source_ids)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_inbox_sources(session: Session, flush_context) -> None:
+    """Remember which inbox source rows changed in this transaction"""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        origin = _ORIGIN_MODELS.get(type(obj))
+        if origin and obj.id is not None:
+            track_inbox_sources(session, origin, (obj.id,))
+
+
+@event.listens_for(Session, "before_commit")
+def _project_inbox_changes(session: Session) -> None:
+    """Re-project changed source rows in the committing transaction"""
+    # before_commit runs ahead of commit's own flush; flush now so every change is tracked
+    if session.new or session.dirty or session.deleted:
+        session.flush()
+    changes = session.info.pop("action_item_inbox_changes", None)
+    if not changes:
+        return
+    try:
+        # Savepoint so a projection failure never takes the source change down with it
+        with session.begin_nested():
+            ActionItemProjector(session).apply_changes(changes)
+    except Exception as e:
+        logger.warning(f"Failed to update action item inbox for {sorted(changes)}: {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_inbox_changes(session: Session) -> None:
+    session.info.pop("action_item_inbox_changes", None)
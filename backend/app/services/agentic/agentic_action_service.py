@@ -542,13 +542,10 @@ class AgenticActionService:
             query = self._replace_variables(query, None, context)
         
         try:
-            from app.services.rag_service import RAGService
-            
-            # Try to create RAG service instance
-            try:
-                rag_service = RAGService()
-            except Exception as e:
-                logger.warning(f"RAG service not available: {e}")
+            # Reuse the shared service (and its pooled Qdrant connections)
+            from app.services.rag_service import rag_service
+            if not rag_service.client:
+                logger.warning("RAG service not available")
                 return None
             
             agent_id = context.get("agent_id") if context else None
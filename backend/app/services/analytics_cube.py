@@ -0,0 +1,321 @@
+"""
+Analytics Cube Service - Pre-aggregated prompt usage for the AI posture dashboard
+
+A refresh job (scripts/refresh_analytics_cubes.py) folds prompt_usage rows into
+prompt_usage_daily_rollups and advances a per-tenant watermark. Readers take
+the rollup up to the watermark and aggregate only the rows after it live, so a
+dashboard request never scans more than the usage since the last refresh.
+"""
+from typing import Dict, List, Any, Optional, Tuple
+from uuid import UUID
+from datetime import datetime, timedelta
+import logging
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.agent import Agent
+from app.models.prompt_usage import PromptUsage, PromptUsageDailyRollup, AnalyticsCubeWatermark
+from app.models.tenant import Tenant
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+PROMPT_USAGE_CUBE = "prompt_usage_daily"
+
+# Usage younger than this is left to the live tail, so rows from transactions
+# that are still committing are never skipped by the watermark
+CUBE_SETTLE_SECONDS = 120
+
+# Days shown in the cost and usage trends
+USAGE_WINDOW_DAYS = 30
+
+# (day, agent_id, user_id, user_role, department, model_vendor, model_name, requests, tokens, cost)
+UsageSlice = Tuple[datetime, UUID, Optional[UUID], Optional[str], Optional[str], str, str, int, int, float]
+
+
+def _value(value: Any) -> Any:
+    return value.value if hasattr(value, "value") else value
+
+
+class AnalyticsCubeService:
+    """Service for refreshing and reading analytics cubes"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def _aggregate_usage(
+        self,
+        tenant_id: UUID,
+        since: Optional[datetime] = None,
+        after: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> List[UsageSlice]:
+        """Group raw prompt usage by day and the cube dimensions"""
+        day = func.date_trunc("day", PromptUsage.created_at)
+        query = self.db.query(
+            day,
+            PromptUsage.agent_id,
+            PromptUsage.user_id,
+            User.role,
+            PromptUsage.department,
+            PromptUsage.model_vendor,
+            PromptUsage.model_name,
+            func.count(PromptUsage.id),
+            func.coalesce(func.sum(PromptUsage.total_tokens), 0),
+            func.coalesce(func.sum(PromptUsage.total_cost), 0)
+        ).outerjoin(
+            User, PromptUsage.user_id == User.id
+        ).filter(PromptUsage.tenant_id == tenant_id)
+        if since is not None:
+            query = query.filter(PromptUsage.created_at >= since)
+        if after is not None:
+            query = query.filter(PromptUsage.created_at > after)
+        if until is not None:
+            query = query.filter(PromptUsage.created_at <= until)
+        rows = query.group_by(
+            day,
+            PromptUsage.agent_id,
+            PromptUsage.user_id,
+            User.role,
+            PromptUsage.department,
+            PromptUsage.model_vendor,
+            PromptUsage.model_name
+        ).all()
+        return [
+            (row_day, agent_id, user_id, _value(role), department, vendor, model, int(requests), int(tokens), float(cost))
+            for row_day, agent_id, user_id, role, department, vendor, model, requests, tokens, cost in rows
+        ]
+    
+    def _lock_watermark(self, tenant_id: UUID, cube: str) -> AnalyticsCubeWatermark:
+        """Get a tenant's watermark row, locked so concurrent refreshes of the same cube serialize"""
+        watermark = self.db.query(AnalyticsCubeWatermark).filter(
+            AnalyticsCubeWatermark.tenant_id == tenant_id,
+            AnalyticsCubeWatermark.cube == cube
+        ).with_for_update().first()
+        if watermark is None:
+            watermark = AnalyticsCubeWatermark(tenant_id=tenant_id, cube=cube, watermark=None)
+            self.db.add(watermark)
+            self.db.flush()
+        return watermark
+    
+    def refresh_prompt_usage(self, tenant_id: UUID, now: Optional[datetime] = None) -> int:
+        """
+        Fold a tenant's prompt usage since its watermark into the daily rollup
+        
+        The caller commits; the watermark and rollup rows change in the same
+        transaction, so a failed refresh leaves both untouched.
+        
+        Args:
+            tenant_id: Tenant ID
+            now: Current time (defaults to utcnow)
+        
+        Returns:
+            Number of usage groups folded in
+        """
+        now = now or datetime.utcnow()
+        upper = now - timedelta(seconds=CUBE_SETTLE_SECONDS)
+        watermark = self._lock_watermark(tenant_id, PROMPT_USAGE_CUBE)
+        if watermark.watermark is not None and watermark.watermark >= upper:
+            return 0
+        
+        slices = self._aggregate_usage(tenant_id, after=watermark.watermark, until=upper)
+        if slices:
+            existing = {
+                (r.day, r.agent_id, r.user_id, r.user_role, r.department, r.model_vendor, r.model_name): r
+                for r in self.db.query(PromptUsageDailyRollup).filter(
+                    PromptUsageDailyRollup.tenant_id == tenant_id,
+                    PromptUsageDailyRollup.day.in_(list({s[0] for s in slices}))
+                ).all()
+            }
+            for usage_slice in slices:
+                key, (requests, tokens, cost) = usage_slice[:7], usage_slice[7:]
+                rollup = existing.get(key)
+                if rollup is None:
+                    day, agent_id, user_id, user_role, department, model_vendor, model_name = key
+                    rollup = PromptUsageDailyRollup(
+                        tenant_id=tenant_id,
+                        day=day,
+                        agent_id=agent_id,
+                        user_id=user_id,
+                        user_role=user_role,
+                        department=department,
+                        model_vendor=model_vendor,
+                        model_name=model_name,
+                        request_count=0,
+                        total_tokens=0,
+                        total_cost=0
+                    )
+                    self.db.add(rollup)
+                    existing[key] = rollup
+                rollup.request_count += requests
+                rollup.total_tokens += tokens
+                rollup.total_cost = float(rollup.total_cost or 0) + cost
+        
+        watermark.watermark = upper
+        watermark.refreshed_at = now
+        return len(slices)
+    
+    def refresh_all_tenants(self) -> Dict[str, Any]:
+        """
+        Refresh every tenant's cubes, committing per tenant
+        
+        Returns:
+            Usage groups folded in per tenant, and errors per tenant
+        """
+        results: Dict[str, Any] = {"refreshed": {}, "errors": {}}
+        for (tenant_id,) in self.db.query(Tenant.id).all():
+            try:
+                results["refreshed"][str(tenant_id)] = self.refresh_prompt_usage(tenant_id)
+                self.db.commit()
+            except Exception as e:
+                self.db.rollback()
+                logger.error(f"Error refreshing analytics cubes for tenant {tenant_id}: {e}", exc_info=True)
+                results["errors"][str(tenant_id)] = str(e)
+        return results
+    
+    def prompt_usage_slices(self, tenant_id: UUID, since: datetime) -> List[UsageSlice]:
+        """
+        Daily usage since a day boundary
+        
+        Rollup rows cover usage up to the tenant's watermark; anything newer
+        (or everything, before the first refresh) is aggregated live. A day can
+        appear in both, so callers should sum slices rather than overwrite.
+        """
+        watermark = self.db.query(AnalyticsCubeWatermark.watermark).filter(
+            AnalyticsCubeWatermark.tenant_id == tenant_id,
+            AnalyticsCubeWatermark.cube == PROMPT_USAGE_CUBE
+        ).scalar()
+        if watermark is None:
+            return self._aggregate_usage(tenant_id, since=since)
+        
+        rollups = self.db.query(
+            PromptUsageDailyRollup.day,
+            PromptUsageDailyRollup.agent_id,
+            PromptUsageDailyRollup.user_id,
+            PromptUsageDailyRollup.user_role,
+            PromptUsageDailyRollup.department,
+            PromptUsageDailyRollup.model_vendor,
+            PromptUsageDailyRollup.model_name,
+            PromptUsageDailyRollup.request_count,
+            PromptUsageDailyRollup.total_tokens,
+            PromptUsageDailyRollup.total_cost
+        ).filter(
+            PromptUsageDailyRollup.tenant_id == tenant_id,
+            PromptUsageDailyRollup.day >= since
+        ).all()
+        slices = [tuple(row[:9]) + (float(row[9] or 0),) for row in rollups]
+        return slices + self._aggregate_usage(tenant_id, since=since, after=watermark)
+    
+    def prompt_usage_analytics(self, tenant_id: UUID, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Cost and prompt usage sections of the AI posture dashboard
+        
+        Covers the last USAGE_WINDOW_DAYS calendar days (including today) plus
+        the current month for monthly_cost.
+        
+        Returns:
+            Dictionary with cost_analytics, prompt_usage, usage_by_role and
+            usage_by_department
+        """
+        now = now or datetime.utcnow()
+        today = datetime(now.year, now.month, now.day)
+        window_start = today - timedelta(days=USAGE_WINDOW_DAYS - 1)
+        month_start = today.replace(day=1)
+        
+        days = [window_start + timedelta(days=i) for i in range(USAGE_WINDOW_DAYS)]
+        trends = {day: {"cost": 0.0, "requests": 0, "tokens": 0} for day in days}
+        cost_by_model: Dict[str, float] = {}
+        requests_by_model: Dict[str, int] = {}
+        tokens_by_model: Dict[str, int] = {}
+        cost_by_agent: Dict[UUID, Dict[str, Any]] = {}
+        role_usage: Dict[str, Dict[str, Any]] = {}
+        dept_usage: Dict[str, Dict[str, Any]] = {}
+        total_cost = 0.0
+        total_requests = 0
+        total_tokens = 0
+        monthly_cost = 0.0
+        
+        for day, agent_id, user_id, role, department, vendor, model, requests, tokens, cost in \
+                self.prompt_usage_slices(tenant_id, min(window_start, month_start)):
+            if day >= month_start:
+                monthly_cost += cost
+            if day < window_start:
+                continue
+            
+            total_cost += cost
+            total_requests += requests
+            total_tokens += tokens
+            trend = trends.get(day)
+            if trend is not None:
+                trend["cost"] += cost
+                trend["requests"] += requests
+                trend["tokens"] += tokens
+            
+            model_key = f"{vendor}/{model}"
+            cost_by_model[model_key] = cost_by_model.get(model_key, 0.0) + cost
+            requests_by_model[model_key] = requests_by_model.get(model_key, 0) + requests
+            tokens_by_model[model_key] = tokens_by_model.get(model_key, 0) + tokens
+            
+            agent_usage = cost_by_agent.setdefault(agent_id, {"cost": 0.0, "requests": 0, "tokens": 0})
+            agent_usage["cost"] += cost
+            agent_usage["requests"] += requests
+            agent_usage["tokens"] += tokens
+            
+            if user_id and role:
+                usage = role_usage.setdefault(role, {"requests": 0, "cost": 0.0, "tokens": 0})
+                usage["requests"] += requests
+                usage["cost"] += cost
+                usage["tokens"] += tokens
+            
+            usage = dept_usage.setdefault(department or "Unknown", {"requests": 0, "cost": 0.0, "tokens": 0, "users": set()})
+            usage["requests"] += requests
+            usage["cost"] += cost
+            usage["tokens"] += tokens
+            if user_id:
+                usage["users"].add(user_id)
+        
+        agent_names = dict(
+            self.db.query(Agent.id, Agent.name).filter(Agent.id.in_(list(cost_by_agent))).all()
+        ) if cost_by_agent else {}
+        
+        return {
+            "cost_analytics": {
+                "total_cost": round(total_cost, 2),
+                "cost_by_model": {k: round(v, 2) for k, v in cost_by_model.items()},
+                "cost_by_agent": {
+                    agent_names.get(agent_id, str(agent_id)): {
+                        "cost": round(data["cost"], 2),
+                        "requests": data["requests"],
+                        "tokens": data["tokens"]
+                    }
+                    for agent_id, data in cost_by_agent.items()
+                },
+                "cost_trends": [
+                    {"date": day.date().isoformat(), "cost": round(trends[day]["cost"], 2), "requests": trends[day]["requests"]}
+                    for day in days
+                ],
+                "monthly_cost": round(monthly_cost, 2),
+                "daily_cost": round(trends[today]["cost"], 2)
+            },
+            "prompt_usage": {
+                "total_requests": total_requests,
+                "total_tokens": total_tokens,
+                "requests_by_model": requests_by_model,
+                "tokens_by_model": tokens_by_model,
+                "usage_trends": [
+                    {"date": day.date().isoformat(), "requests": trends[day]["requests"], "tokens": trends[day]["tokens"]}
+                    for day in days
+                ]
+            },
+            "usage_by_role": {k: {**v, "cost": round(v["cost"], 2)} for k, v in role_usage.items()},
+            "usage_by_department": {
+                k: {
+                    "requests": v["requests"],
+                    "cost": round(v["cost"], 2),
+                    "tokens": v["tokens"],
+                    "user_count": len(v["users"])
+                }
+                for k, v in dept_usage.items()
+            }
+        }
@@ -0,0 +1,477 @@
+"""
+Assessment Analytics Service - Aggregates for the assessment analytics dashboard
+
+Assignment counts come from assessment_analytics_rollups, which session hooks
+refresh per assessment whenever its assignments change. Time-dependent figures
+(overdue and upcoming due dates) are aggregated live from the due-date index.
+Dashboards are cached per (tenant, quarter, assessment type) for a short TTL.
+"""
+from typing import Dict, List, Any, Optional, Tuple
+from uuid import UUID
+from datetime import datetime
+import copy
+import logging
+import re
+import threading
+import time
+
+from sqlalchemy import event, func, inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from app.models.assessment import Assessment, AssessmentAssignment, AssessmentAnalyticsRollup
+from app.models.assessment_review import AssessmentReview
+from app.models.vendor import Vendor
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_CACHE_TTL_SECONDS = 60
+
+_dashboard_cache: Dict[Tuple[UUID, Optional[str], Optional[str]], Tuple[float, Dict[str, Any]]] = {}
+_dashboard_lock = threading.Lock()
+
+QUARTER_PATTERN = re.compile(r"^(\d{4})-Q([1-4])$")
+
+# human_decision -> grading bucket
+GRADING_BY_DECISION = {
+    "approved": "accepted",
+    "rejected": "denied",
+    "needs_revision": "need_info",
+}
+
+CVE_RISK_WEIGHTS = {"critical": 10.0, "high": 7.0, "medium": 4.0, "low": 1.0}
+
+
+def _value(value: Any) -> Any:
+    return value.value if hasattr(value, "value") else value
+
+
+def quarter_key(period_start: datetime) -> str:
+    """Dashboard key for a quarter start, e.g. 2024-Q1"""
+    return f"{period_start.year}-Q{(period_start.month - 1) // 3 + 1}"
+
+
+def parse_quarter(quarter: str) -> Optional[datetime]:
+    """Start of a quarter given as 2024-Q1, or None if the format is not recognised"""
+    match = QUARTER_PATTERN.match(quarter)
+    if not match:
+        return None
+    return datetime(int(match.group(1)), (int(match.group(2)) - 1) * 3 + 1, 1)
+
+
+def _risk_status(total: int, completed: int, overdue: int) -> str:
+    if total == 0:
+        return "green"
+    if overdue > 0:
+        return "red"
+    if completed / total < 0.8:
+        return "yellow"
+    return "green"
+
+
+def invalidate_assessment_dashboard(tenant_id: Optional[UUID] = None) -> None:
+    """
+    Drop cached dashboards
+    
+    Args:
+        tenant_id: Tenant whose assignments changed; clears every tenant if None
+    """
+    with _dashboard_lock:
+        if tenant_id is None:
+            _dashboard_cache.clear()
+            return
+        for key in [key for key in _dashboard_cache if key[0] == tenant_id]:
+            del _dashboard_cache[key]
+
+
+def refresh_assessment_rollups(db: Session, assessment_ids: List[UUID]) -> None:
+    """
+    Recompute rollup rows for the given assessments with one GROUP BY
+    
+    The assessments' rows are locked first, so concurrent refreshes of the same
+    assessment run one after the other: the second waits for the first to
+    commit, then recounts from a snapshot that includes it. Without the lock both
+    would count before either commits and the second DELETE would miss the
+    first's inserted rows.
+    
+    Args:
+        db: Database session
+        assessment_ids: Assessments whose assignments changed
+    """
+    if not assessment_ids:
+        return
+    # FOR NO KEY UPDATE (in id order) conflicts with other refreshes but not with the
+    # KEY SHARE locks that inserting assignments takes on the assessment row
+    db.query(Assessment.id).filter(
+        Assessment.id.in_(assessment_ids)
+    ).order_by(Assessment.id).with_for_update(key_share=True).all()
+    
+    period = func.date_trunc("quarter", func.coalesce(AssessmentAssignment.completed_at, AssessmentAssignment.assigned_at))
+    rows = db.query(
+        AssessmentAssignment.tenant_id,
+        AssessmentAssignment.assessment_id,
+        AssessmentAssignment.vendor_id,
+        period,
+        AssessmentAssignment.status,
+        func.count(AssessmentAssignment.id)
+    ).filter(
+        AssessmentAssignment.assessment_id.in_(assessment_ids)
+    ).group_by(
+        AssessmentAssignment.tenant_id,
+        AssessmentAssignment.assessment_id,
+        AssessmentAssignment.vendor_id,
+        period,
+        AssessmentAssignment.status
+    ).all()
+    
+    db.query(AssessmentAnalyticsRollup).filter(
+        AssessmentAnalyticsRollup.assessment_id.in_(assessment_ids)
+    ).delete(synchronize_session=False)
+    db.add_all([
+        AssessmentAnalyticsRollup(
+            tenant_id=tenant_id,
+            assessment_id=assessment_id,
+            vendor_id=vendor_id,
+            period_start=period_start,
+            status=status,
+            assignment_count=count
+        )
+        for tenant_id, assessment_id, vendor_id, period_start, status, count in rows
+    ])
+
+
+class AssessmentAnalyticsService:
+    """Service for the assessment analytics dashboard"""
+    
+    def __init__(self, db: Session, tenant_id: UUID):
+        self.db = db
+        self.tenant_id = tenant_id
+    
+    def get_dashboard(self, quarter: Optional[str] = None, assessment_type: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get dashboard data, served from the cache when fresh
+        
+        Args:
+            quarter: Only report quarterly progress for this quarter (e.g., 2024-Q1)
+            assessment_type: Only include assessments of this type
+        
+        Returns:
+            Dashboard payload (overview, quarterly progress, vendor distribution,
+            grading and CVE heatmaps, upcoming due dates, type distribution)
+        """
+        key = (self.tenant_id, quarter, assessment_type)
+        now = time.monotonic()
+        with _dashboard_lock:
+            entry = _dashboard_cache.get(key)
+        if entry and now - entry[0] < DASHBOARD_CACHE_TTL_SECONDS:
+            return copy.deepcopy(entry[1])
+        
+        dashboard = self.build_dashboard(quarter, assessment_type)
+        with _dashboard_lock:
+            _dashboard_cache[key] = (now, dashboard)
+        return copy.deepcopy(dashboard)
+    
+    def _assessment_filters(self, assessment_type: Optional[str]) -> list:
+        filters = [Assessment.tenant_id == self.tenant_id, Assessment.is_active == True]
+        if assessment_type:
+            filters.append(Assessment.assessment_type == assessment_type)
+        return filters
+    
+    def build_dashboard(self, quarter: Optional[str] = None, assessment_type: Optional[str] = None) -> Dict[str, Any]:
+        """Compute dashboard data with SQL aggregates (no caching)"""
+        now = datetime.utcnow()
+        assessment_filters = self._assessment_filters(assessment_type)
+        rollup = AssessmentAnalyticsRollup
+        
+        # Assignment counts by quarter, vendor, assessment type and status
+        count_rows = self.db.query(
+            rollup.period_start,
+            rollup.vendor_id,
+            Assessment.assessment_type,
+            rollup.status,
+            func.sum(rollup.assignment_count)
+        ).join(
+            Assessment, rollup.assessment_id == Assessment.id
+        ).filter(
+            rollup.tenant_id == self.tenant_id,
+            *assessment_filters
+        ).group_by(
+            rollup.period_start, rollup.vendor_id, Assessment.assessment_type, rollup.status
+        ).all()
+        
+        # Overdue assignments by the same dimensions (depends on the current time, so never rolled up)
+        overdue_period = func.date_trunc("quarter", func.coalesce(AssessmentAssignment.completed_at, AssessmentAssignment.assigned_at))
+        overdue_rows = self.db.query(
+            overdue_period,
+            AssessmentAssignment.vendor_id,
+            Assessment.assessment_type,
+            func.count(AssessmentAssignment.id)
+        ).join(
+            Assessment, AssessmentAssignment.assessment_id == Assessment.id
+        ).filter(
+            AssessmentAssignment.tenant_id == self.tenant_id,
+            AssessmentAssignment.due_date.isnot(None),
+            AssessmentAssignment.due_date < now,
+            AssessmentAssignment.status != "completed",
+            *assessment_filters
+        ).group_by(
+            overdue_period, AssessmentAssignment.vendor_id, Assessment.assessment_type
+        ).all()
+        
+        quarter_start = parse_quarter(quarter) if quarter else None
+        quarterly_data: Dict[str, Dict[str, int]] = {}
+        vendor_counts: Dict[UUID, Dict[str, Dict[str, int]]] = {}
+        overview = {"total": 0, "completed": 0, "pending": 0, "overdue": 0}
+        
+        def quarter_bucket(period_start):
+            # Assignments without a date, or outside the requested quarter, are left out of quarterly progress
+            if period_start is None or (quarter and period_start != quarter_start):
+                return None
+            return quarterly_data.setdefault(quarter_key(period_start), {
+                "total": 0, "completed": 0, "in_progress": 0, "pending": 0, "overdue": 0
+            })
+        
+        def vendor_bucket(vendor_id, atype):
+            if not vendor_id:
+                return None
+            return vendor_counts.setdefault(vendor_id, {}).setdefault(atype, {
+                "total": 0, "completed": 0, "pending": 0, "overdue": 0
+            })
+        
+        for period_start, vendor_id, atype, status, count in count_rows:
+            count = int(count or 0)
+            overview["total"] += count
+            if status == "completed":
+                overview["completed"] += count
+            elif status in ("pending", "in_progress"):
+                overview["pending"] += count
+            
+            bucket = quarter_bucket(period_start)
+            if bucket is not None:
+                bucket["total"] += count
+                if status in ("completed", "in_progress", "pending"):
+                    bucket[status] += count
+            
+            bucket = vendor_bucket(vendor_id, atype)
+            if bucket is not None:
+                bucket["total"] += count
+                if status == "completed":
+                    bucket["completed"] += count
+                elif status in ("pending", "in_progress"):
+                    bucket["pending"] += count
+        
+        for period_start, vendor_id, atype, count in overdue_rows:
+            overview["overdue"] += count
+            bucket = quarter_bucket(period_start)
+            if bucket is not None:
+                bucket["overdue"] += count
+            bucket = vendor_bucket(vendor_id, atype)
+            if bucket is not None:
+                bucket["overdue"] += count
+        
+        vendor_names = dict(
+            self.db.query(Vendor.id, Vendor.name).filter(Vendor.id.in_(list(vendor_counts))).all()
+        ) if vendor_counts else {}
+        
+        vendor_distribution = {}
+        for vendor_id, by_type in vendor_counts.items():
+            # Assignments pointing at a deleted vendor are left out
+            if vendor_id not in vendor_names:
+                continue
+            assessments = {
+                atype: {**data, "risk_status": _risk_status(data["total"], data["completed"], data["overdue"])}
+                for atype, data in by_type.items()
+            }
+            risk_statuses = {data["risk_status"] for data in assessments.values()}
+            vendor_distribution[str(vendor_id)] = {
+                "vendor_name": vendor_names[vendor_id],
+                "assessments": assessments,
+                "overall_risk": "red" if "red" in risk_statuses else ("yellow" if "yellow" in risk_statuses else "green")
+            }
+        
+        type_distribution = {
+            atype: count for atype, count in self.db.query(
+                Assessment.assessment_type, func.count(Assessment.id)
+            ).filter(*assessment_filters).group_by(Assessment.assessment_type).all()
+        }
+        total_assessments = sum(type_distribution.values())
+        
+        current_quarter = quarter_key(now)
+        return {
+            "overview": {
+                "total_assessments": total_assessments,
+                "total_assignments": overview["total"],
+                "completed_assignments": overview["completed"],
+                "pending_assignments": overview["pending"],
+                "overdue_assignments": overview["overdue"],
+                "completion_rate": (overview["completed"] / overview["total"] * 100) if overview["total"] > 0 else 0
+            },
+            "quarterly_progress": quarterly_data,
+            "vendor_distribution": vendor_distribution,
+            "vendor_grading_heatmap": self._grading_heatmap(assessment_filters),
+            "vendor_cve_risk": self._cve_risk(vendor_names),
+            "next_due_assessments": self._next_due(assessment_filters, now),
+            "assessment_type_distribution": type_distribution,
+            "current_quarter": current_quarter
+        }
+    
+    def _grading_heatmap(self, assessment_filters: list) -> Dict[str, Any]:
+        """Review decisions per vendor"""
+        rows = self.db.query(
+            AssessmentAssignment.vendor_id,
+            Vendor.name,
+            AssessmentReview.human_decision,
+            func.count(AssessmentReview.id)
+        ).join(
+            AssessmentAssignment, AssessmentReview.assignment_id == AssessmentAssignment.id
+        ).join(
+            Assessment, AssessmentAssignment.assessment_id == Assessment.id
+        ).join(
+            Vendor, AssessmentAssignment.vendor_id == Vendor.id
+        ).filter(
+            AssessmentReview.tenant_id == self.tenant_id,
+            AssessmentAssignment.tenant_id == self.tenant_id,
+            *assessment_filters
+        ).group_by(
+            AssessmentAssignment.vendor_id, Vendor.name, AssessmentReview.human_decision
+        ).all()
+        
+        heatmap: Dict[str, Any] = {}
+        for vendor_id, vendor_name, decision, count in rows:
+            entry = heatmap.setdefault(str(vendor_id), {
+                "vendor_name": vendor_name,
+                "grading": {"accepted": 0, "denied": 0, "need_info": 0, "pending": 0}
+            })
+            grading = GRADING_BY_DECISION.get(decision) if decision else "pending"
+            if grading:
+                entry["grading"][grading] += count
+        return heatmap
+    
+    def _cve_risk(self, vendor_names: Dict[UUID, str]) -> Dict[str, Any]:
+        """CVE counts and risk score per assessed vendor (when CVE tracking is enabled)"""
+        cve_risk: Dict[str, Any] = {}
+        if not vendor_names:
+            return cve_risk
+        try:
+            from app.models.security_incident import VendorSecurityTracking, SecurityIncident
+            from app.core.feature_gating import FeatureGate
+            
+            if not FeatureGate(self.db).is_feature_enabled(str(self.tenant_id), "cve_tracking"):
+                return cve_risk
+            
+            rows = self.db.query(
+                VendorSecurityTracking.vendor_id,
+                SecurityIncident.severity,
+                func.count(VendorSecurityTracking.id)
+            ).join(
+                SecurityIncident, VendorSecurityTracking.incident_id == SecurityIncident.id
+            ).filter(
+                VendorSecurityTracking.tenant_id == self.tenant_id,
+                SecurityIncident.incident_type == "cve",
+                VendorSecurityTracking.vendor_id.in_(list(vendor_names))
+            ).group_by(
+                VendorSecurityTracking.vendor_id, SecurityIncident.severity
+            ).all()
+            
+            for vendor_id, severity, count in rows:
+                entry = cve_risk.setdefault(str(vendor_id), {
+                    "vendor_name": vendor_names[vendor_id],
+                    "total_cves": 0,
+                    "critical_cves": 0,
+                    "high_cves": 0,
+                    "medium_cves": 0,
+                    "low_cves": 0,
+                    "risk_score": 0.0
+                })
+                entry["total_cves"] += count
+                severity = _value(severity)
+                if severity in CVE_RISK_WEIGHTS:
+                    entry[f"{severity}_cves"] += count
+                    entry["risk_score"] = round(entry["risk_score"] + CVE_RISK_WEIGHTS[severity] * count, 2)
+        except Exception as e:
+            logger.warning(f"Error fetching CVE data for analytics: {e}")
+            # Continue without CVE data if feature is not enabled or error occurs
+        return cve_risk
+    
+    def _next_due(self, assessment_filters: list, now: datetime) -> List[Dict[str, Any]]:
+        """Next 20 open assignments by due date"""
+        rows = self.db.query(
+            AssessmentAssignment, Assessment.name, Assessment.assessment_type, Vendor.name
+        ).join(
+            Assessment, AssessmentAssignment.assessment_id == Assessment.id
+        ).outerjoin(
+            Vendor, AssessmentAssignment.vendor_id == Vendor.id
+        ).filter(
+            AssessmentAssignment.tenant_id == self.tenant_id,
+            AssessmentAssignment.due_date.isnot(None),
+            AssessmentAssignment.due_date >= now,
+            AssessmentAssignment.status.in_(["pending", "in_progress"]),
+            *assessment_filters
+        ).order_by(AssessmentAssignment.due_date).limit(20).all()
+        
+        return [
+            {
+                "assignment_id": str(assignment.id),
+                "assessment_name": assessment_name,
+                "assessment_type": atype,
+                "vendor_name": vendor_name or "Unknown",
+                "due_date": assignment.due_date.isoformat(),
+                "days_until_due": (assignment.due_date - now).days,
+                "status": assignment.status
+            }
+            for assignment, assessment_name, atype, vendor_name in rows
+        ]
+
+
+def track_assignment_changes(session: Session, assessment_id: UUID, tenant_id: UUID) -> None:
+    """
+    Refresh an assessment's rollup when the session commits
+    
+    Flushed ORM changes are tracked automatically; call this for assignments
+    written with bulk INSERT/UPDATE statements, which bypass the unit of work.
+    """
+    session.info.setdefault("assessment_rollups_changed", {})[assessment_id] = tenant_id
+
+
+@event.listens_for(Session, "after_flush")
+def _track_assignment_changes(session: Session, flush_context) -> None:
+    """Remember which assessments' assignments changed in this transaction"""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, AssessmentAssignment):
+            continue
+        if obj.assessment_id is not None:
+            track_assignment_changes(session, obj.assessment_id, obj.tenant_id)
+        # An assignment moved to another assessment also changes the old one's counts
+        for previous_id in sa_inspect(obj).attrs.assessment_id.history.deleted or ():
+            if previous_id is not None:
+                track_assignment_changes(session, previous_id, obj.tenant_id)
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_changed_rollups(session: Session) -> None:
+    """Refresh rollups for changed assessments in the committing transaction"""
+    # before_commit runs ahead of commit's own flush; flush now so every change is tracked
+    if session.new or session.dirty or session.deleted:
+        session.flush()
+    changed = session.info.pop("assessment_rollups_changed", None)
+    if not changed:
+        return
+    try:
+        # Savepoint so a rollup failure never takes the assignment change down with it
+        with session.begin_nested():
+            refresh_assessment_rollups(session, list(changed))
+        session.info.setdefault("assessment_dashboard_tenants_changed", set()).update(changed.values())
+    except Exception as e:
+        logger.warning(f"Failed to refresh assessment analytics rollups for {len(changed)} assessments: {e}")
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_dashboards(session: Session) -> None:
+    """Drop cached dashboards for tenants whose rollups were committed"""
+    for tenant_id in session.info.pop("assessment_dashboard_tenants_changed", ()):
+        invalidate_assessment_dashboard(tenant_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_assignment_changes(session: Session) -> None:
+    session.info.pop("assessment_rollups_changed", None)
+    session.info.pop("assessment_dashboard_tenants_changed", None)
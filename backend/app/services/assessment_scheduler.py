@@ -1,97 +1,312 @@
 """
 Background scheduler service for auto-triggering assessment schedules
+
+Due schedules are fanned out by a few worker threads, each with its own
+session. A worker claims one schedule at a time with FOR UPDATE SKIP LOCKED,
+so workers (and other scheduler processes) never trigger the same schedule
+twice, and fans it out in bulk: vendors are matched once, a block of ticket
+IDs is reserved, vendor users are resolved from one query, and assignments,
+their action items and audit entries are written with multi-row INSERTs.
+Everything a schedule creates commits in one transaction together with the
+schedule's status change.
 """
-from typing import List
+from typing import Callable, Dict, List, Optional, Set
+from uuid import UUID, uuid4
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
+from app.core.database import SessionLocal
+from app.core.ticket_id_generator import reserve_assessment_ticket_ids
+from app.models.action_item import ActionItem, ActionItemType, ActionItemStatus, ActionItemPriority
 from app.models.assessment import Assessment, AssessmentSchedule, AssessmentAssignment
+from app.models.audit import AuditLog, AuditAction
+from app.models.user import User, UserRole
+from app.models.vendor import Vendor
+from app.services.action_item_projection import ORIGIN_ACTION_ITEM, ORIGIN_ASSESSMENT_ASSIGNMENT, track_inbox_sources
+from app.services.assessment_analytics import track_assignment_changes
 from app.services.assessment_service import AssessmentService
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
+# Schedules fanned out at the same time
+FANOUT_WORKERS = 4
+# Rows per multi-row INSERT
+FANOUT_INSERT_BATCH_SIZE = 1000
+
+
+def _chunks(rows: List[Dict], size: int = FANOUT_INSERT_BATCH_SIZE):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+class VendorUserResolver:
+    """
+    Vendor users to give assessment tasks to, from one query of a tenant's active users
+    
+    Uses the same strategies as AssessmentService.create_assignment: users whose
+    email matches the vendor's contact email, else users whose email contains
+    it, else every vendor user in the tenant.
+    """
+    
+    __slots__ = ("users", "by_email", "vendor_users")
+    
+    def __init__(self, users: List[User]):
+        self.users = [user for user in users if user.email]
+        self.by_email: Dict[str, List[User]] = {}
+        for user in self.users:
+            self.by_email.setdefault(user.email.lower(), []).append(user)
+        self.vendor_users = [
+            user for user in users if getattr(user.role, "value", user.role) == UserRole.VENDOR_USER.value
+        ]
+    
+    def users_for(self, vendor: Vendor) -> List[User]:
+        """Users to assign the vendor's assessment to (empty if the vendor has no contact email)"""
+        if not vendor.contact_email:
+            return []
+        contact_email = vendor.contact_email.lower()
+        return (
+            self.by_email.get(contact_email)
+            or [user for user in self.users if contact_email in user.email.lower()]
+            or self.vendor_users
+        )
+
 
 class AssessmentScheduler:
-    """Service for auto-triggering scheduled assessments"""
+    """
+    Service for auto-triggering scheduled assessments
     
-    def __init__(self, db: Session):
+    Args:
+        db: Database session (used for overdue checks)
+        session_factory: Creates the sessions schedules are fanned out in
+        workers: Schedules fanned out at the same time
+    """
+    
+    def __init__(self, db: Session, session_factory: Callable[[], Session] = SessionLocal, workers: int = FANOUT_WORKERS):
         self.db = db
         self.service = AssessmentService(db)
+        self.session_factory = session_factory
+        self.workers = workers
     
-    def trigger_due_schedules(self) -> List[AssessmentAssignment]:
-        """Trigger all assessment schedules that are due
+    def claim_due_schedule(self, db: Session, now: datetime, skip_ids: Set[UUID]) -> Optional[AssessmentSchedule]:
+        """
+        Lock the next due schedule that no other transaction is triggering
+        
+        Args:
+            db: Database session (the row lock is held until it commits)
+            now: Current time
+            skip_ids: Schedules that already failed in this run
         
         Returns:
-            List of created AssessmentAssignment instances
+            The claimed schedule, or None if none are due
         """
-        now = datetime.utcnow()
-        
-        # Find schedules that are due (scheduled_date <= now and status is pending/scheduled)
-        due_schedules = self.db.query(AssessmentSchedule).join(Assessment).filter(
+        query = db.query(AssessmentSchedule).join(Assessment).filter(
             AssessmentSchedule.scheduled_date <= now,
             AssessmentSchedule.status.in_(['pending', 'scheduled']),
             Assessment.is_active == True
-        ).all()
+        )
+        if skip_ids:
+            query = query.filter(AssessmentSchedule.id.notin_(skip_ids))
+        return query.order_by(
+            AssessmentSchedule.scheduled_date
+        ).with_for_update(skip_locked=True, of=AssessmentSchedule).first()
+    
+    def fan_out_schedule(self, db: Session, schedule: AssessmentSchedule, now: datetime) -> int:
+        """
+        Create a schedule's assignments and mark it triggered (not committed)
         
-        assignments = []
-        for schedule in due_schedules:
-            try:
-                # Get vendors from schedule or from last schedule
-                vendors = self.service.get_vendors_matching_rules(
-                    schedule.assessment,
-                    last_schedule_id=schedule.id
-                )
-                
-                # Create assignments for each vendor
-                for vendor in vendors:
-                    assignment_data = {
-                        'assignment_type': 'scheduled',
-                        'status': 'pending',
-                        'vendor_id': vendor.id,
-                        'due_date': schedule.due_date,
-                    }
-                    
-                    assignment = self.service.create_assignment(
-                        assessment_id=schedule.assessment_id,
-                        assignment_data=assignment_data,
-                        tenant_id=schedule.tenant_id,
-                        assigned_by=schedule.assessment.owner_id,
-                        schedule_id=schedule.id
-                    )
-                    assignments.append(assignment)
-                
-                # Update schedule status
-                schedule.status = 'triggered'
-                schedule.triggered_at = now
+        Args:
+            db: Database session
+            schedule: Claimed schedule
+            now: Current time
+        
+        Returns:
+            Number of assignments created
+        """
+        service = AssessmentService(db)
+        assessment = schedule.assessment
+        tenant_id = schedule.tenant_id
+        assigned_by = assessment.owner_id
+        
+        # Get vendors from schedule or from last schedule
+        vendors = service.get_vendors_matching_rules(assessment, last_schedule_id=schedule.id)
+        
+        if vendors:
+            ticket_ids = reserve_assessment_ticket_ids(db, tenant_id, len(vendors))
+            resolver = VendorUserResolver(db.query(User).filter(
+                User.tenant_id == tenant_id,
+                User.is_active == True
+            ).all())
+            
+            due_date = schedule.due_date
+            priority = (
+                ActionItemPriority.HIGH.value if due_date and due_date < now + timedelta(days=7)
+                else ActionItemPriority.MEDIUM.value
+            )
+            description = "Assessment has been assigned to you. Please complete all questions by the due date." + (
+                f" Due: {due_date.strftime('%Y-%m-%d')}" if due_date else ""
+            )
+            
+            assignment_rows, action_item_rows, audit_rows = [], [], []
+            unassigned = 0
+            for vendor, ticket_id in zip(vendors, ticket_ids):
+                assignment_id = uuid4()
+                assignment_rows.append({
+                    "id": assignment_id,
+                    "assessment_id": schedule.assessment_id,
+                    "schedule_id": schedule.id,
+                    "tenant_id": tenant_id,
+                    "vendor_id": vendor.id,
+                    "assignment_type": "scheduled",
+                    "assigned_by": assigned_by,
+                    "status": "pending",
+                    "assigned_at": now,
+                    "due_date": due_date,
+                    "workflow_ticket_id": ticket_id,
+                    "created_at": now,
+                    "updated_at": now,
+                })
                 
-                # Calculate next scheduled date if recurring
-                if schedule.frequency != 'one_time':
-                    next_date = self.service.calculate_next_scheduled_date(
-                        schedule.scheduled_date,
-                        schedule.frequency,
-                        schedule.assessment.schedule_interval_months
-                    )
-                    # Create new schedule for next occurrence
-                    new_schedule = AssessmentSchedule(
-                        assessment_id=schedule.assessment_id,
-                        tenant_id=schedule.tenant_id,
-                        created_by=schedule.created_by,
-                        scheduled_date=next_date,
-                        due_date=schedule.due_date + timedelta(days=(next_date - schedule.scheduled_date).days) if schedule.due_date else None,
-                        frequency=schedule.frequency,
-                        selected_vendor_ids=schedule.selected_vendor_ids,
-                        status='scheduled'
-                    )
-                    self.db.add(new_schedule)
+                vendor_users = resolver.users_for(vendor)
+                if not vendor_users:
+                    unassigned += 1
+                for vendor_user in vendor_users:
+                    action_item_rows.append({
+                        "id": uuid4(),
+                        "tenant_id": tenant_id,
+                        "assigned_to": vendor_user.id,
+                        "assigned_by": assigned_by,
+                        "assigned_at": now,
+                        "action_type": ActionItemType.ASSESSMENT.value,
+                        "title": f"Complete Assessment: {assessment.name}",
+                        "description": description,
+                        "status": ActionItemStatus.PENDING.value,
+                        "priority": priority,
+                        "due_date": due_date,
+                        "source_type": "assessment_assignment",
+                        "source_id": assignment_id,
+                        "action_url": f"/assessments/{assignment_id}",
+                        "item_metadata": {
+                            "assessment_id": str(schedule.assessment_id),
+                            "assessment_name": assessment.name,
+                            "assessment_type": assessment.assessment_type,
+                            "assignment_id": str(assignment_id),
+                            "vendor_id": str(vendor.id),
+                            "agent_id": None,
+                            "assignment_type": "scheduled",
+                            "workflow_type": "assessment_assignment",
+                            "workflow_ticket_id": ticket_id
+                        },
+                        "is_read": False,
+                        "created_at": now,
+                        "updated_at": now,
+                    })
                 
-                self.db.commit()
-                logger.info(f"Triggered schedule {schedule.id} for assessment {schedule.assessment_id}, created {len(vendors)} assignments")
+                audit_rows.append({
+                    "id": uuid4(),
+                    "tenant_id": tenant_id,
+                    "user_id": assigned_by,
+                    "action": AuditAction.CREATE.value,
+                    "resource_type": "assessment_assignment",
+                    "resource_id": assignment_id,
+                    "details": {
+                        "assessment_id": str(schedule.assessment_id),
+                        "vendor_id": str(vendor.id),
+                        "agent_id": None,
+                        "assignment_type": "scheduled"
+                    },
+                    "created_at": now,
+                })
+            
+            for table, rows in (
+                (AssessmentAssignment, assignment_rows),
+                (ActionItem, action_item_rows),
+                (AuditLog, audit_rows),
+            ):
+                for chunk in _chunks(rows):
+                    db.execute(insert(table), chunk)
+            
+            # Bulk INSERTs bypass the unit of work, so register them with the rollup and inbox hooks
+            track_assignment_changes(db, schedule.assessment_id, tenant_id)
+            track_inbox_sources(db, ORIGIN_ASSESSMENT_ASSIGNMENT, [row["id"] for row in assignment_rows])
+            track_inbox_sources(db, ORIGIN_ACTION_ITEM, [row["id"] for row in action_item_rows])
+            
+            if unassigned:
+                logger.warning(
+                    f"No vendor users found for {unassigned} of {len(vendors)} vendors in schedule {schedule.id}; "
+                    f"their assignments have no action items"
+                )
+        
+        # Update schedule status
+        schedule.status = 'triggered'
+        schedule.triggered_at = now
+        
+        # Calculate next scheduled date if recurring
+        if schedule.frequency != 'one_time':
+            next_date = service.calculate_next_scheduled_date(
+                schedule.scheduled_date,
+                schedule.frequency,
+                assessment.schedule_interval_months
+            )
+            # Create new schedule for next occurrence
+            new_schedule = AssessmentSchedule(
+                assessment_id=schedule.assessment_id,
+                tenant_id=tenant_id,
+                created_by=schedule.created_by,
+                scheduled_date=next_date,
+                due_date=schedule.due_date + timedelta(days=(next_date - schedule.scheduled_date).days) if schedule.due_date else None,
+                frequency=schedule.frequency,
+                selected_vendor_ids=schedule.selected_vendor_ids,
+                status='scheduled'
+            )
+            db.add(new_schedule)
+        
+        return len(vendors)
+    
+    def _trigger_in_session(self, now: datetime, failed_ids: Set[UUID], lock: threading.Lock) -> int:
+        """Claim and fan out due schedules one at a time until none are left"""
+        db = self.session_factory()
+        created = 0
+        try:
+            while True:
+                with lock:
+                    skip_ids = set(failed_ids)
+                schedule = self.claim_due_schedule(db, now, skip_ids)
+                if schedule is None:
+                    db.rollback()
+                    return created
                 
-            except Exception as e:
-                self.db.rollback()
-                logger.error(f"Error triggering schedule {schedule.id}: {e}", exc_info=True)
+                schedule_id = schedule.id
+                try:
+                    count = self.fan_out_schedule(db, schedule, now)
+                    db.commit()
+                    created += count
+                    logger.info(f"Triggered schedule {schedule_id} for assessment {schedule.assessment_id}, created {count} assignments")
+                except Exception as e:
+                    db.rollback()
+                    # Left due; it is retried on the next run
+                    with lock:
+                        failed_ids.add(schedule_id)
+                    logger.error(f"Error triggering schedule {schedule_id}: {e}", exc_info=True)
+        finally:
+            db.close()
+    
+    def trigger_due_schedules(self) -> int:
+        """Trigger all assessment schedules that are due
+        
+        Returns:
+            Number of assignments created
+        """
+        now = datetime.utcnow()
+        failed_ids: Set[UUID] = set()
+        lock = threading.Lock()
         
-        return assignments
+        workers = max(1, self.workers)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self._trigger_in_session, now, failed_ids, lock) for _ in range(workers)]
+            return sum(future.result() for future in futures)
     
     def check_overdue_assignments(self) -> int:
         """Mark assignments as overdue if past due date
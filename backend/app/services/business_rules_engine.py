@@ -1,10 +1,15 @@
 """
 Business Rules Engine - Evaluates and executes business rules
 """
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Callable, Iterable
 from uuid import UUID
+import ast
+import functools
+import itertools
 import logging
 import re
+import threading
+import time
 from datetime import datetime
 
 from app.models.business_rule import BusinessRule
@@ -12,6 +17,354 @@ from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
 
+# Operators are matched in this order (first with surrounding spaces, then without);
+# "not in" must precede "in" so it is not split as "<left> not" in "<right>"
+CONDITION_OPERATORS = ['>=', '<=', '!=', '==', '>', '<', '=', 'not in', 'in', 'contains']
+
+# Compiled rule sets are cached per tenant and keyed by (entity_type, screen, rule_type).
+# CRUD endpoints invalidate the local process; the TTL bounds staleness on other workers.
+COMPILED_RULES_TTL_SECONDS = 300
+
+_compiled_rules_cache: Dict[UUID, Dict[Tuple[str, Optional[str], Optional[str]], Tuple[float, List["CompiledRule"]]]] = {}
+_compiled_rules_lock = threading.Lock()
+
+
+def invalidate_compiled_rules(tenant_id: Optional[UUID] = None) -> None:
+    """
+    Drop cached compiled rules
+    
+    Args:
+        tenant_id: Tenant whose rules changed; clears every tenant if None
+    """
+    with _compiled_rules_lock:
+        if tenant_id is None:
+            _compiled_rules_cache.clear()
+        else:
+            _compiled_rules_cache.pop(tenant_id, None)
+
+
+def _compare_numeric(left: Any, right: Any, operator: str) -> bool:
+    """Compare numeric values"""
+    try:
+        left_num = float(left) if not isinstance(left, (int, float)) else left
+        right_num = float(right) if not isinstance(right, (int, float)) else right
+        
+        if operator == '>':
+            return left_num > right_num
+        elif operator == '<':
+            return left_num < right_num
+        elif operator == '>=':
+            return left_num >= right_num
+        elif operator == '<=':
+            return left_num <= right_num
+    except (ValueError, TypeError):
+        return False
+    return False
+
+
+def _op_in(left: Any, right: Any) -> bool:
+    # Right side should be a list
+    if isinstance(right, list):
+        return left in right
+    return False
+
+
+def _op_not_in(left: Any, right: Any) -> bool:
+    if isinstance(right, list):
+        return left not in right
+    return True
+
+
+def _op_contains(left: Any, right: Any) -> bool:
+    # Check if left value contains right value
+    if isinstance(left, str) and isinstance(right, str):
+        return right.lower() in left.lower()
+    elif isinstance(left, list):
+        return right in left
+    return False
+
+
+_OPERATOR_FUNCTIONS: Dict[str, Callable[[Any, Any], bool]] = {
+    '=': lambda left, right: left == right,
+    '==': lambda left, right: left == right,
+    '!=': lambda left, right: left != right,
+    '>': lambda left, right: _compare_numeric(left, right, '>'),
+    '<': lambda left, right: _compare_numeric(left, right, '<'),
+    '>=': lambda left, right: _compare_numeric(left, right, '>='),
+    '<=': lambda left, right: _compare_numeric(left, right, '<='),
+    'in': _op_in,
+    'not in': _op_not_in,
+    'contains': _op_contains,
+}
+
+_NO_LITERAL = object()
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_literal(expression: str) -> Any:
+    """Parse a literal value, returning _NO_LITERAL for context references"""
+    # String literal (quoted)
+    if expression.startswith('"') and expression.endswith('"'):
+        return expression[1:-1]
+    if expression.startswith("'") and expression.endswith("'"):
+        return expression[1:-1]
+    
+    # Boolean literal
+    if expression.lower() == 'true':
+        return True
+    if expression.lower() == 'false':
+        return False
+    
+    # Numeric literal
+    try:
+        if '.' in expression:
+            return float(expression)
+        return int(expression)
+    except ValueError:
+        pass
+    
+    # List literal (e.g., ['value1', 'value2'])
+    if expression.startswith('[') and expression.endswith(']'):
+        try:
+            return ast.literal_eval(expression)
+        except Exception:
+            pass
+    
+    return _NO_LITERAL
+
+
+@functools.lru_cache(maxsize=4096)
+def _compile_operand(expression: str) -> Callable[[Dict[str, Any]], Any]:
+    """
+    Compile a value expression (literal or "entity.attribute" reference) into a resolver
+    
+    Literals are parsed once here; references are resolved against the context on each call.
+    """
+    expression = expression.strip()
+    
+    literal = _parse_literal(expression)
+    if literal is not _NO_LITERAL:
+        if isinstance(literal, list):
+            # Hand out copies so callers cannot mutate the cached literal
+            return lambda context: list(literal)
+        return lambda context: literal
+    
+    entity_name = None
+    attribute_name = None
+    if '.' in expression:
+        parts = expression.split('.', 1)
+        entity_name = parts[0].strip()
+        attribute_name = parts[1].strip()
+    
+    def resolve(context: Dict[str, Any]) -> Any:
+        # Entity attribute reference (e.g., "user.department")
+        if entity_name is not None and entity_name in context:
+            entity = context[entity_name]
+            if isinstance(entity, dict):
+                return entity.get(attribute_name)
+            elif hasattr(entity, attribute_name):
+                return getattr(entity, attribute_name)
+        
+        # Direct context key
+        if expression in context:
+            return context[expression]
+        
+        # Return as string if nothing matches
+        return expression
+    
+    return resolve
+
+
+class CompiledCondition:
+    """A parsed condition expression, callable as a predicate over a context"""
+    
+    __slots__ = ("expression", "compare", "left", "right", "resolve_left", "resolve_right", "constant")
+    
+    def __init__(
+        self,
+        expression: str,
+        compare: Optional[Callable[[Any, Any], bool]] = None,
+        left: Optional[str] = None,
+        right: Optional[str] = None,
+        constant: bool = False
+    ):
+        self.expression = expression
+        self.compare = compare
+        self.left = left
+        self.right = right
+        self.resolve_left = _compile_operand(left) if compare else None
+        self.resolve_right = _compile_operand(right) if compare else None
+        self.constant = constant
+    
+    def __call__(self, context: Dict[str, Any]) -> bool:
+        if self.compare is None:
+            return self.constant
+        try:
+            return bool(self.compare(self.resolve_left(context), self.resolve_right(context)))
+        except Exception as e:
+            logger.error(f"Error evaluating condition '{self.expression}': {e}", exc_info=True)
+            return False
+    
+    def evaluate_columns(self, columns: "ContextColumns") -> List[bool]:
+        """Evaluate the condition for every context in a batch, reusing resolved operand columns"""
+        if self.compare is None:
+            return [self.constant] * len(columns)
+        
+        results = []
+        for left_value, right_value in zip(columns.get(self.left), columns.get(self.right)):
+            try:
+                results.append(bool(self.compare(left_value, right_value)))
+            except Exception as e:
+                logger.error(f"Error evaluating condition '{self.expression}': {e}", exc_info=True)
+                results.append(False)
+        return results
+
+
+class ContextColumns:
+    """
+    Operand values for a batch of contexts
+    
+    Each operand expression (e.g. "agent.risk_score") is resolved across all contexts
+    once and shared by every rule that references it.
+    """
+    
+    def __init__(self, contexts: List[Dict[str, Any]]):
+        self.contexts = contexts
+        self._columns: Dict[str, List[Any]] = {}
+    
+    def __len__(self) -> int:
+        return len(self.contexts)
+    
+    def get(self, expression: str) -> Iterable[Any]:
+        """Get the values of an operand expression across all contexts"""
+        literal = _parse_literal(expression)
+        if literal is not _NO_LITERAL:
+            return itertools.repeat(literal, len(self.contexts))
+        
+        column = self._columns.get(expression)
+        if column is None:
+            resolve = _compile_operand(expression)
+            column = [resolve(context) for context in self.contexts]
+            self._columns[expression] = column
+        return column
+
+
+@functools.lru_cache(maxsize=4096)
+def _compile_condition(condition_expression: str) -> CompiledCondition:
+    """
+    Compile a condition expression into a predicate over the context
+    
+    Supports:
+    - Simple comparisons: "user.department = Agent.department"
+    - Numeric comparisons: "agent.risk_score > 50"
+    - Boolean checks: "user.is_admin = true"
+    - Contains checks: "agent.category in ['Security', 'Compliance']"
+    """
+    expression = condition_expression.strip()
+    
+    # Simple boolean check
+    if expression.lower() in ['true', 'false']:
+        return CompiledCondition(expression, constant=expression.lower() == 'true')
+    
+    # Find operator
+    operator = None
+    operator_pos = -1
+    for op in CONDITION_OPERATORS:
+        pos = expression.find(f' {op} ')
+        if pos != -1:
+            operator = op
+            operator_pos = pos + 1  # Skip the leading space
+            break
+    
+    if not operator:
+        # Try without spaces
+        for op in CONDITION_OPERATORS:
+            if op in expression:
+                operator = op
+                operator_pos = expression.find(op)
+                break
+    
+    if not operator:
+        logger.warning(f"Could not parse condition: {expression}")
+        return CompiledCondition(expression, constant=False)
+    
+    # Split into left and right parts
+    return CompiledCondition(
+        expression,
+        compare=_OPERATOR_FUNCTIONS[operator],
+        left=expression[:operator_pos].strip(),
+        right=expression[operator_pos + len(operator):].strip()
+    )
+
+
+def _compile_action(
+    action_expression: str,
+    rule_action_type: Optional[str]
+) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Compile an action expression into a function building the action dictionary
+    
+    Supports formats like:
+    - "assign_to:user.department_manager"
+    - "step:approval_required"
+    - "notify:user.email"
+    - "validate:agent.compliance_score > 80"
+    """
+    action_expression = action_expression.strip()
+    
+    # Check for action prefix (e.g., "assign_to:", "step:", "notify:")
+    if ':' in action_expression:
+        action_type, action_value = action_expression.split(':', 1)
+        action_type = action_type.strip()
+        resolve_value = _compile_operand(action_value.strip())
+        
+        return lambda context: {
+            "type": action_type,
+            "value": resolve_value(context),
+            "original_expression": action_expression
+        }
+    
+    # No prefix - use action_type from rule, else default to "execute"
+    static_type = rule_action_type or "execute"
+    return lambda context: {
+        "type": static_type,
+        "value": action_expression,
+        "original_expression": action_expression
+    }
+
+
+class CompiledRule:
+    """A business rule compiled into closures and detached from the DB session"""
+    
+    __slots__ = (
+        "rule_id", "name", "rule_type", "action_type", "action_config",
+        "priority", "is_automatic", "condition", "action"
+    )
+    
+    def __init__(self, rule: BusinessRule):
+        self.rule_id = rule.rule_id
+        self.name = rule.name
+        self.rule_type = rule.rule_type
+        self.action_type = rule.action_type
+        self.action_config = rule.action_config
+        self.priority = rule.priority
+        self.is_automatic = rule.is_automatic
+        self.condition = _compile_condition(rule.condition_expression or "")
+        self.action = _compile_action(rule.action_expression or "", rule.action_type)
+    
+    def to_result(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the evaluation result for a matched context"""
+        return {
+            "rule_id": self.rule_id,
+            "rule_name": self.name,
+            "rule_type": self.rule_type,
+            "action_type": self.action_type,
+            "action": self.action(context),
+            "action_config": dict(self.action_config) if isinstance(self.action_config, dict) else self.action_config,
+            "priority": self.priority,
+            "is_automatic": self.is_automatic
+        }
+
 
 class BusinessRulesEngine:
     """Engine for evaluating and executing business rules"""
@@ -46,36 +399,14 @@ class BusinessRulesEngine:
         Returns:
             List of rule evaluation results with actions to execute
         """
-        # Get applicable rules
-        rules = self._get_applicable_rules(entity_type, screen, rule_type)
+        compiled_rules = self._get_compiled_rules(entity_type, screen, rule_type)
         
         results = []
-        for rule in rules:
+        for rule in compiled_rules:
             try:
-                # Evaluate condition
-                condition_result = self._evaluate_condition(
-                    rule.condition_expression,
-                    context
-                )
-                
-                if condition_result:
+                if rule.condition(context):
                     # Condition matched - prepare action
-                    action_result = self._parse_action(
-                        rule.action_expression,
-                        context,
-                        rule
-                    )
-                    
-                    results.append({
-                        "rule_id": rule.rule_id,
-                        "rule_name": rule.name,
-                        "rule_type": rule.rule_type,
-                        "action_type": rule.action_type,
-                        "action": action_result,
-                        "action_config": rule.action_config,
-                        "priority": rule.priority,
-                        "is_automatic": rule.is_automatic
-                    })
+                    results.append(rule.to_result(context))
             except Exception as e:
                 logger.error(f"Error evaluating rule {rule.rule_id}: {e}", exc_info=True)
                 # Continue with other rules even if one fails
@@ -85,6 +416,56 @@ class BusinessRulesEngine:
         
         return results
     
+    def evaluate_rules_bulk(
+        self,
+        contexts: List[Dict[str, Any]],
+        entity_type: str,
+        screen: Optional[str] = None,
+        rule_type: Optional[str] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Evaluate one rule set against many contexts in a single pass
+        
+        Rules are fetched once, and each attribute referenced by a condition is
+        resolved across all contexts once and reused by every rule.
+        
+        Args:
+            contexts: Context data per entity (same shape as evaluate_rules)
+            entity_type: Entity type (e.g., "agent", "assessment", "workflow", "user")
+            screen: Optional screen name
+            rule_type: Optional rule type filter
+        
+        Returns:
+            One list of rule evaluation results per context, in input order
+        """
+        results: List[List[Dict[str, Any]]] = [[] for _ in contexts]
+        if not contexts:
+            return results
+        
+        compiled_rules = self._get_compiled_rules(entity_type, screen, rule_type)
+        columns = ContextColumns(contexts)
+        
+        for rule in compiled_rules:
+            try:
+                matches = rule.condition.evaluate_columns(columns)
+            except Exception as e:
+                logger.error(f"Error evaluating rule {rule.rule_id}: {e}", exc_info=True)
+                continue
+            
+            for index, matched in enumerate(matches):
+                if not matched:
+                    continue
+                try:
+                    results[index].append(rule.to_result(contexts[index]))
+                except Exception as e:
+                    logger.error(f"Error evaluating rule {rule.rule_id}: {e}", exc_info=True)
+        
+        # Compiled rules are already in priority order; keep the same contract as evaluate_rules
+        for context_results in results:
+            context_results.sort(key=lambda x: x["priority"])
+        
+        return results
+    
     def execute_actions(
         self,
         rule_results: List[Dict[str, Any]],
@@ -145,6 +526,31 @@ class BusinessRulesEngine:
             "suggested": suggested_actions
         }
     
+    def _get_compiled_rules(
+        self,
+        entity_type: str,
+        screen: Optional[str] = None,
+        rule_type: Optional[str] = None
+    ) -> List[CompiledRule]:
+        """Get compiled rules for entity type and screen, loading and compiling them on a cache miss"""
+        key = (entity_type, screen, rule_type)
+        now = time.monotonic()
+        
+        with _compiled_rules_lock:
+            entry = _compiled_rules_cache.get(self.tenant_id, {}).get(key)
+        if entry and now - entry[0] < COMPILED_RULES_TTL_SECONDS:
+            return entry[1]
+        
+        compiled_rules = [
+            CompiledRule(rule)
+            for rule in self._get_applicable_rules(entity_type, screen, rule_type)
+        ]
+        
+        with _compiled_rules_lock:
+            _compiled_rules_cache.setdefault(self.tenant_id, {})[key] = (now, compiled_rules)
+        
+        return compiled_rules
+    
     def _get_applicable_rules(
         self,
         entity_type: str,
@@ -210,96 +616,8 @@ class BusinessRulesEngine:
         condition_expression: str,
         context: Dict[str, Any]
     ) -> bool:
-        """
-        Evaluate a condition expression
-        
-        Supports:
-        - Simple comparisons: "user.department = Agent.department"
-        - Numeric comparisons: "agent.risk_score > 50"
-        - Boolean checks: "user.is_admin = true"
-        - Contains checks: "agent.category in ['Security', 'Compliance']"
-        """
-        try:
-            # Parse the condition expression
-            # Format: "entity.attribute operator value" or "entity1.attribute1 operator entity2.attribute2"
-            
-            # Handle boolean values
-            condition_expression = condition_expression.strip()
-            
-            # Simple boolean check
-            if condition_expression.lower() in ['true', 'false']:
-                return condition_expression.lower() == 'true'
-            
-            # Parse comparison operators
-            operators = ['>=', '<=', '!=', '==', '>', '<', '=', 'in', 'contains', 'not in']
-            
-            # Find operator
-            operator = None
-            operator_pos = -1
-            for op in operators:
-                pos = condition_expression.find(f' {op} ')
-                if pos != -1:
-                    operator = op
-                    operator_pos = pos
-                    break
-            
-            if not operator:
-                # Try without spaces
-                for op in operators:
-                    if op in condition_expression:
-                        operator = op
-                        operator_pos = condition_expression.find(op)
-                        break
-            
-            if not operator:
-                logger.warning(f"Could not parse condition: {condition_expression}")
-                return False
-            
-            # Split into left and right parts
-            left_expr = condition_expression[:operator_pos].strip()
-            right_expr = condition_expression[operator_pos + len(operator):].strip()
-            
-            # Evaluate left side
-            left_value = self._resolve_value(left_expr, context)
-            
-            # Evaluate right side
-            right_value = self._resolve_value(right_expr, context)
-            
-            # Perform comparison
-            if operator in ['=', '==']:
-                return left_value == right_value
-            elif operator == '!=':
-                return left_value != right_value
-            elif operator == '>':
-                return self._compare_numeric(left_value, right_value, '>')
-            elif operator == '<':
-                return self._compare_numeric(left_value, right_value, '<')
-            elif operator == '>=':
-                return self._compare_numeric(left_value, right_value, '>=')
-            elif operator == '<=':
-                return self._compare_numeric(left_value, right_value, '<=')
-            elif operator == 'in':
-                # Right side should be a list
-                if isinstance(right_value, list):
-                    return left_value in right_value
-                return False
-            elif operator == 'not in':
-                if isinstance(right_value, list):
-                    return left_value not in right_value
-                return True
-            elif operator == 'contains':
-                # Check if left_value contains right_value
-                if isinstance(left_value, str) and isinstance(right_value, str):
-                    return right_value.lower() in left_value.lower()
-                elif isinstance(left_value, list):
-                    return right_value in left_value
-                return False
-            
-            return False
-            
-        except Exception as e:
-            logger.error(f"Error evaluating condition '{condition_expression}': {e}", exc_info=True)
-            return False
+        """Evaluate a condition expression (see _compile_condition for the supported syntax)"""
+        return _compile_condition(condition_expression)(context)
     
     def _resolve_value(
         self,
@@ -307,74 +625,11 @@ class BusinessRulesEngine:
         context: Dict[str, Any]
     ) -> Any:
         """Resolve a value from expression (e.g., "user.department" or literal value)"""
-        expression = expression.strip()
-        
-        # Check if it's a literal value
-        # String literal (quoted)
-        if expression.startswith('"') and expression.endswith('"'):
-            return expression[1:-1]
-        if expression.startswith("'") and expression.endswith("'"):
-            return expression[1:-1]
-        
-        # Boolean literal
-        if expression.lower() == 'true':
-            return True
-        if expression.lower() == 'false':
-            return False
-        
-        # Numeric literal
-        try:
-            if '.' in expression:
-                return float(expression)
-            return int(expression)
-        except ValueError:
-            pass
-        
-        # List literal (e.g., ['value1', 'value2'])
-        if expression.startswith('[') and expression.endswith(']'):
-            try:
-                import ast
-                return ast.literal_eval(expression)
-            except:
-                pass
-        
-        # Entity attribute reference (e.g., "user.department")
-        if '.' in expression:
-            parts = expression.split('.', 1)
-            entity_name = parts[0].strip()
-            attribute_name = parts[1].strip()
-            
-            if entity_name in context:
-                entity = context[entity_name]
-                if isinstance(entity, dict):
-                    return entity.get(attribute_name)
-                elif hasattr(entity, attribute_name):
-                    return getattr(entity, attribute_name)
-        
-        # Direct context key
-        if expression in context:
-            return context[expression]
-        
-        # Return as string if nothing matches
-        return expression
+        return _compile_operand(expression)(context)
     
     def _compare_numeric(self, left: Any, right: Any, operator: str) -> bool:
         """Compare numeric values"""
-        try:
-            left_num = float(left) if not isinstance(left, (int, float)) else left
-            right_num = float(right) if not isinstance(right, (int, float)) else right
-            
-            if operator == '>':
-                return left_num > right_num
-            elif operator == '<':
-                return left_num < right_num
-            elif operator == '>=':
-                return left_num >= right_num
-            elif operator == '<=':
-                return left_num <= right_num
-        except (ValueError, TypeError):
-            return False
-        return False
+        return _compare_numeric(left, right, operator)
     
     def _parse_action(
         self,
@@ -382,46 +637,8 @@ class BusinessRulesEngine:
         context: Dict[str, Any],
         rule: BusinessRule
     ) -> Dict[str, Any]:
-        """
-        Parse action expression into action dictionary
-        
-        Supports formats like:
-        - "assign_to:user.department_manager"
-        - "step:approval_required"
-        - "notify:user.email"
-        - "validate:agent.compliance_score > 80"
-        """
-        action_expression = action_expression.strip()
-        
-        # Check for action prefix (e.g., "assign_to:", "step:", "notify:")
-        if ':' in action_expression:
-            action_type, action_value = action_expression.split(':', 1)
-            action_type = action_type.strip()
-            action_value = action_value.strip()
-            
-            # Resolve action value from context
-            resolved_value = self._resolve_value(action_value, context)
-            
-            return {
-                "type": action_type,
-                "value": resolved_value,
-                "original_expression": action_expression
-            }
-        
-        # No prefix - use action_type from rule
-        if rule.action_type:
-            return {
-                "type": rule.action_type,
-                "value": action_expression,
-                "original_expression": action_expression
-            }
-        
-        # Default: return as-is
-        return {
-            "type": "execute",
-            "value": action_expression,
-            "original_expression": action_expression
-        }
+        """Parse action expression into action dictionary (see _compile_action)"""
+        return _compile_action(action_expression, rule.action_type)(context)
     
     def _execute_action(
         self,
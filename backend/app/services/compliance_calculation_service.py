@@ -16,13 +16,16 @@ from app.models.compliance_framework import ComplianceFramework
 from app.models.assessment import (
     AssessmentQuestion,
     AssessmentAssignment,
-    AssessmentQuestionResponse
+    AssessmentQuestionResponse,
+    AssessmentComplianceSnapshot
 )
 from app.models.user import User
 from datetime import datetime
+from functools import lru_cache
 import uuid
 import logging
 import json
+import re
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 
@@ -32,6 +35,89 @@ logger = logging.getLogger(__name__)
 _executor = ThreadPoolExecutor(max_workers=5)
 
 
+class KeywordMatcher:
+    """
+    Case-insensitive multi-keyword matcher compiled into a single regex
+    
+    The pattern is a zero-width lookahead over all keywords (longest first), so
+    one scan of the text reports every keyword at every position, including
+    keywords that overlap or are prefixes of one another. It runs with
+    re.IGNORECASE over the original text rather than a lowercased copy, because
+    lowercasing can change the length of the text (e.g. "İ") and the reported
+    positions must index the text as given.
+    """
+    
+    __slots__ = ("_pattern", "_keywords", "_lengths", "_prefixes", "_always")
+    
+    def __init__(self, keywords: Tuple[str, ...]):
+        # Lowercased keyword -> the first spelling given, which is what gets matched
+        spellings: Dict[str, str] = {}
+        for keyword in keywords:
+            spellings.setdefault(keyword.lower(), keyword)
+        # An empty keyword is a substring of everything
+        self._always = "" in spellings
+        spellings.pop("", None)
+        
+        ordered = sorted(spellings, key=lambda keyword: len(spellings[keyword]), reverse=True)
+        self._keywords = ordered
+        # One capture group per keyword; match.lastindex says which one matched
+        self._pattern = re.compile(
+            "(?=(?:" + "|".join(f"({re.escape(spellings[keyword])})" for keyword in ordered) + "))",
+            re.IGNORECASE
+        ) if ordered else None
+        self._lengths = {keyword: len(spellings[keyword]) for keyword in ordered}
+        # The longest keyword matched at a position implies its keyword prefixes matched there too
+        self._prefixes = {
+            keyword: [other for other in ordered if keyword.startswith(other)]
+            for keyword in ordered
+        }
+    
+    def find(self, text: str) -> Dict[str, List[Tuple[int, int]]]:
+        """
+        Find all keyword occurrences in one pass
+        
+        Args:
+            text: Text to scan (matched case-insensitively)
+        
+        Returns:
+            Lowercased keyword -> list of (start, end) positions in the text
+        """
+        found: Dict[str, List[Tuple[int, int]]] = {"": []} if self._always else {}
+        if self._pattern is None:
+            return found
+        
+        for match in self._pattern.finditer(text):
+            start = match.start()
+            for keyword in self._prefixes[self._keywords[match.lastindex - 1]]:
+                found.setdefault(keyword, []).append((start, start + self._lengths[keyword]))
+        return found
+
+
+@lru_cache(maxsize=2048)
+def compile_keyword_matcher(keywords: Tuple[str, ...]) -> KeywordMatcher:
+    """
+    Get the compiled matcher for a set of criteria keywords
+    
+    Cached by the keywords themselves, so edits to a question's criteria get a
+    new matcher without explicit invalidation.
+    """
+    return KeywordMatcher(keywords)
+
+
+def _keyword_hits(keywords: List[Any], found: Dict[str, List[Tuple[int, int]]]) -> List[Any]:
+    """Keywords (in criteria order, original casing) that occur in the matcher results"""
+    return [keyword for keyword in keywords if str(keyword).lower() in found]
+
+
+def _keyword_matches(keywords: List[Any], found: Dict[str, List[Tuple[int, int]]]) -> List[Dict[str, Any]]:
+    """Match positions of keywords, for highlighting"""
+    return [
+        {"keyword": keyword, "start": start, "end": end}
+        for keyword in dict.fromkeys(keywords)
+        for start, end in found.get(str(keyword).lower(), [])
+    ]
+
+
 class ComplianceCalculationService:
     """Service for calculating compliance scores based on question responses"""
     
@@ -46,6 +132,10 @@ class ComplianceCalculationService:
         """
         Calculate compliance scores for an assessment assignment
         
+        Loads the question -> framework mapping in one query and scores all
+        frameworks in a single pass over the questions, so the query count does
+        not grow with the number of questions or frameworks.
+        
         Args:
             assignment_id: Assessment assignment ID
             framework_id: Optional framework ID to calculate for specific framework
@@ -53,97 +143,285 @@ class ComplianceCalculationService:
         Returns:
             Dictionary with compliance scores per framework
         """
-        # Get assignment
+        assignment = self._get_assignment(assignment_id)
+        _, _, framework_scores = self._build_scores(assignment)
+        return self._format_result(assignment_id, datetime.utcnow(), framework_scores, framework_id)
+    
+    def get_compliance_snapshot(
+        self,
+        assignment_id: uuid.UUID,
+        framework_id: Optional[uuid.UUID] = None,
+        refresh: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Get compliance scores from the assignment's materialized snapshot
+        
+        The snapshot is built on first read (or when refresh is requested) and
+        kept current by update_compliance_snapshot as responses are saved.
+        
+        Args:
+            assignment_id: Assessment assignment ID
+            framework_id: Optional framework ID to return a specific framework only
+            refresh: Rebuild the snapshot from scratch (e.g. after question library changes)
+        
+        Returns:
+            Dictionary with compliance scores per framework
+        """
+        snapshot = self.db.query(AssessmentComplianceSnapshot).filter(
+            AssessmentComplianceSnapshot.assignment_id == assignment_id
+        ).first()
+        
+        if not snapshot or refresh:
+            snapshot = self._rebuild_snapshot(self._get_assignment(assignment_id), snapshot)
+            self.db.commit()
+        
+        return self._format_result(
+            assignment_id,
+            snapshot.updated_at or snapshot.calculated_at,
+            snapshot.framework_scores or {},
+            framework_id
+        )
+    
+    def update_compliance_snapshot(
+        self,
+        assignment_id: uuid.UUID,
+        question_ids: List[uuid.UUID]
+    ) -> Optional[AssessmentComplianceSnapshot]:
+        """
+        Apply changed answers to an existing compliance snapshot
+        
+        Only the changed questions are re-evaluated; framework scores are then
+        re-aggregated from the stored evaluations. Does nothing if the assignment
+        has no snapshot yet (it is built on first read). Falls back to a full
+        rebuild if a changed question is mapped to frameworks the snapshot does
+        not know about. The caller commits.
+        
+        Args:
+            assignment_id: Assessment assignment ID
+            question_ids: Assessment question IDs whose responses changed
+        
+        Returns:
+            The updated snapshot, or None if there is none
+        """
+        snapshot = self.db.query(AssessmentComplianceSnapshot).filter(
+            AssessmentComplianceSnapshot.assignment_id == assignment_id
+        ).first()
+        if not snapshot or not question_ids:
+            return snapshot
+        
+        questions = self.db.query(AssessmentQuestion).filter(
+            AssessmentQuestion.id.in_(question_ids)
+        ).all()
+        qlib_map = self._load_library_questions(questions)
+        responses = self.db.query(AssessmentQuestionResponse).filter(
+            AssessmentQuestionResponse.assignment_id == assignment_id,
+            AssessmentQuestionResponse.question_id.in_(question_ids)
+        ).all()
+        response_map = {str(r.question_id): r for r in responses}
+        
+        question_frameworks = snapshot.question_frameworks or {}
+        evaluations = dict(snapshot.evaluations or {})
+        for question in questions:
+            question_id = str(question.id)
+            qlib_question = qlib_map.get(str(question.reusable_question_id)) if question.reusable_question_id else None
+            framework_ids = (qlib_question.compliance_framework_ids or []) if qlib_question else []
+            if sorted(framework_ids) != sorted(question_frameworks.get(question_id, [])):
+                # Mapping changed since the snapshot was built - rebuild everything
+                return self._rebuild_snapshot(self._get_assignment(assignment_id), snapshot)
+            if not framework_ids:
+                continue
+            
+            evaluation = self._evaluate_answer(question, qlib_question, response_map.get(question_id))
+            if evaluation:
+                evaluations[question_id] = evaluation
+            else:
+                evaluations.pop(question_id, None)
+        
+        framework_meta = {
+            fid: (scores.get("framework_name"), scores.get("framework_code"))
+            for fid, scores in (snapshot.framework_scores or {}).items()
+        }
+        snapshot.evaluations = evaluations
+        snapshot.framework_scores = self._score_frameworks(framework_meta, question_frameworks, evaluations)
+        snapshot.updated_at = datetime.utcnow()
+        return snapshot
+    
+    def _get_assignment(self, assignment_id: uuid.UUID) -> AssessmentAssignment:
+        """Get an assignment or raise ValueError"""
         assignment = self.db.query(AssessmentAssignment).filter(
             AssessmentAssignment.id == assignment_id
         ).first()
         
         if not assignment:
             raise ValueError(f"Assignment {assignment_id} not found")
+        return assignment
+    
+    def _rebuild_snapshot(
+        self,
+        assignment: AssessmentAssignment,
+        snapshot: Optional[AssessmentComplianceSnapshot] = None
+    ) -> AssessmentComplianceSnapshot:
+        """Recalculate an assignment's snapshot from scratch (the caller commits)"""
+        question_frameworks, evaluations, framework_scores = self._build_scores(assignment)
+        
+        if not snapshot:
+            snapshot = AssessmentComplianceSnapshot(
+                assignment_id=assignment.id,
+                tenant_id=assignment.tenant_id
+            )
+            self.db.add(snapshot)
+        
+        now = datetime.utcnow()
+        snapshot.question_frameworks = question_frameworks
+        snapshot.evaluations = evaluations
+        snapshot.framework_scores = framework_scores
+        snapshot.calculated_at = now
+        snapshot.updated_at = now
+        self.db.flush()
+        return snapshot
+    
+    def _load_library_questions(self, questions: List[AssessmentQuestion]) -> Dict[str, QuestionLibrary]:
+        """Load the library questions behind reusable assessment questions in one query"""
+        reusable_ids = {q.reusable_question_id for q in questions if q.reusable_question_id}
+        if not reusable_ids:
+            return {}
+        
+        qlib_questions = self.db.query(QuestionLibrary).filter(
+            QuestionLibrary.id.in_(reusable_ids)
+        ).all()
+        return {str(q.id): q for q in qlib_questions}
+    
+    def _build_scores(
+        self,
+        assignment: AssessmentAssignment
+    ) -> Tuple[Dict[str, List[str]], Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+        """
+        Evaluate every framework-mapped question of an assignment once
         
-        # Get all questions for this assessment
+        Returns:
+            Tuple of (question -> framework IDs, question -> evaluation, framework scores)
+        """
         questions = self.db.query(AssessmentQuestion).filter(
             AssessmentQuestion.assessment_id == assignment.assessment_id
         ).all()
-        
-        # Get all responses
         responses = self.db.query(AssessmentQuestionResponse).filter(
-            AssessmentQuestionResponse.assignment_id == assignment_id
+            AssessmentQuestionResponse.assignment_id == assignment.id
         ).all()
-        
-        # Create response map
         response_map = {str(r.question_id): r for r in responses}
+        qlib_map = self._load_library_questions(questions)
         
-        # Get frameworks to calculate
-        if framework_id:
-            frameworks = [self.db.query(ComplianceFramework).filter(
-                ComplianceFramework.id == framework_id
-            ).first()]
-        else:
-            # Get all frameworks referenced by questions
-            framework_ids = set()
-            for question in questions:
-                # Get question library question if it's a reusable question
-                if question.reusable_question_id:
-                    qlib_question = self.db.query(QuestionLibrary).filter(
-                        QuestionLibrary.id == question.reusable_question_id
-                    ).first()
-                    if qlib_question:
-                        if qlib_question.compliance_framework_ids:
-                            framework_ids.update(qlib_question.compliance_framework_ids)
+        question_frameworks: Dict[str, List[str]] = {}
+        evaluations: Dict[str, Dict[str, Any]] = {}
+        for question in questions:
+            if not question.reusable_question_id:
+                continue
+            qlib_question = qlib_map.get(str(question.reusable_question_id))
+            if not qlib_question or not qlib_question.compliance_framework_ids:
+                continue
             
+            question_id = str(question.id)
+            question_frameworks[question_id] = list(qlib_question.compliance_framework_ids)
+            evaluation = self._evaluate_answer(question, qlib_question, response_map.get(question_id))
+            if evaluation:
+                evaluations[question_id] = evaluation
+        
+        framework_ids = {fid for fids in question_frameworks.values() for fid in fids}
+        framework_meta = {}
+        if framework_ids:
             frameworks = self.db.query(ComplianceFramework).filter(
                 ComplianceFramework.id.in_([uuid.UUID(fid) for fid in framework_ids])
             ).all()
+            framework_meta = {str(f.id): (f.name, f.code) for f in frameworks}
+        
+        return question_frameworks, evaluations, self._score_frameworks(framework_meta, question_frameworks, evaluations)
+    
+    def _evaluate_answer(
+        self,
+        question: AssessmentQuestion,
+        qlib_question: QuestionLibrary,
+        response: Optional[AssessmentQuestionResponse]
+    ) -> Optional[Dict[str, Any]]:
+        """Evaluate one answer, or None if the question is unanswered"""
+        if not response or not response.value:
+            return None
+        
+        evaluation = self._evaluate_question_response(qlib_question, response, question)
+        return {
+            "status": evaluation["status"],
+            "confidence": evaluation.get("confidence", 0.0),
+            "reasoning": evaluation.get("reasoning", ""),
+            "question_title": question.title or qlib_question.title
+        }
+    
+    @staticmethod
+    def _score_frameworks(
+        framework_meta: Dict[str, Tuple[Optional[str], Optional[str]]],
+        question_frameworks: Dict[str, List[str]],
+        evaluations: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Aggregate per-question evaluations into per-framework scores in one pass
+        
+        Args:
+            framework_meta: Framework ID -> (name, code) for frameworks to score
+            question_frameworks: Question ID -> mapped framework IDs
+            evaluations: Question ID -> evaluation for answered questions
+        
+        Returns:
+            Framework ID -> score data
+        """
+        counts = {
+            fid: {"total": 0, "passed": 0, "failed": 0, "review": 0, "evaluations": []}
+            for fid in framework_meta
+        }
+        
+        for question_id, framework_ids in question_frameworks.items():
+            evaluation = evaluations.get(question_id)
+            for fid in framework_ids:
+                framework_counts = counts.get(fid)
+                if framework_counts is None:
+                    continue
+                framework_counts["total"] += 1
+                if not evaluation:
+                    continue
+                if evaluation["status"] in ("passed", "failed"):
+                    framework_counts[evaluation["status"]] += 1
+                else:
+                    framework_counts["review"] += 1
+                framework_counts["evaluations"].append({
+                    "question_id": question_id,
+                    "question_title": evaluation.get("question_title"),
+                    "evaluation": evaluation["status"],
+                    "confidence": evaluation.get("confidence", 0.0),
+                    "reasoning": evaluation.get("reasoning", "")
+                })
         
-        # Calculate compliance per framework
         results = {}
-        for framework in frameworks:
-            if not framework:
-                continue
+        for fid, (name, code) in framework_meta.items():
+            framework_counts = counts[fid]
+            passed = framework_counts["passed"]
+            failed = framework_counts["failed"]
+            review = framework_counts["review"]
             
-            score_data = self._calculate_framework_compliance(
-                framework,
-                questions,
-                response_map,
-                assignment
+            score_data = ComplianceCalculationService._framework_score(
+                framework_counts["total"], passed, failed, review
             )
-            results[str(framework.id)] = {
-                "framework_id": str(framework.id),
-                "framework_name": framework.name,
-                "framework_code": framework.code,
+            if framework_counts["total"]:
+                score_data["evaluations"] = framework_counts["evaluations"]
+            
+            results[fid] = {
+                "framework_id": fid,
+                "framework_name": name,
+                "framework_code": code,
                 **score_data
             }
         
-        return {
-            "assignment_id": str(assignment_id),
-            "calculated_at": datetime.utcnow().isoformat(),
-            "frameworks": results
-        }
+        return results
     
-    def _calculate_framework_compliance(
-        self,
-        framework: ComplianceFramework,
-        questions: List[AssessmentQuestion],
-        response_map: Dict[str, AssessmentQuestionResponse],
-        assignment: AssessmentAssignment
-    ) -> Dict[str, Any]:
-        """Calculate compliance for a specific framework"""
-        
-        # Get questions mapped to this framework
-        framework_questions = []
-        for question in questions:
-            # Check if question is mapped to this framework
-            if question.reusable_question_id:
-                qlib_question = self.db.query(QuestionLibrary).filter(
-                    QuestionLibrary.id == question.reusable_question_id
-                ).first()
-                if qlib_question:
-                    framework_ids = qlib_question.compliance_framework_ids or []
-                    if str(framework.id) in framework_ids:
-                        framework_questions.append((question, qlib_question))
-        
-        if not framework_questions:
+    @staticmethod
+    def _framework_score(total: int, passed: int, failed: int, review: int) -> Dict[str, Any]:
+        """Compute the score and status for one framework from its counts"""
+        if not total:
             return {
                 "total_questions": 0,
                 "answered_questions": 0,
@@ -155,44 +433,6 @@ class ComplianceCalculationService:
                 "status": "not_applicable"
             }
         
-        # Evaluate each question
-        passed = 0
-        failed = 0
-        review = 0
-        answered = 0
-        
-        evaluation_results = []
-        
-        for question, qlib_question in framework_questions:
-            response = response_map.get(str(question.id))
-            
-            if not response or not response.value:
-                continue  # Skip unanswered questions
-            
-            answered += 1
-            
-            # Evaluate pass/fail
-            evaluation = self._evaluate_question_response(
-                qlib_question,
-                response,
-                question
-            )
-            
-            evaluation_results.append({
-                "question_id": str(question.id),
-                "question_title": question.title or qlib_question.title,
-                "evaluation": evaluation["status"],
-                "confidence": evaluation.get("confidence", 0.0),
-                "reasoning": evaluation.get("reasoning", "")
-            })
-            
-            if evaluation["status"] == "passed":
-                passed += 1
-            elif evaluation["status"] == "failed":
-                failed += 1
-            else:
-                review += 1
-        
         # Calculate compliance score
         total_evaluated = passed + failed + review
         if total_evaluated == 0:
@@ -212,15 +452,46 @@ class ComplianceCalculationService:
             status = "non_compliant"
         
         return {
-            "total_questions": len(framework_questions),
-            "answered_questions": answered,
+            "total_questions": total,
+            "answered_questions": total_evaluated,
             "passed_questions": passed,
             "failed_questions": failed,
             "review_questions": review,
             "compliance_score": int(compliance_percentage),
             "compliance_percentage": round(compliance_percentage, 2),
-            "status": status,
-            "evaluations": evaluation_results
+            "status": status
+        }
+    
+    def _format_result(
+        self,
+        assignment_id: uuid.UUID,
+        calculated_at: Optional[datetime],
+        framework_scores: Dict[str, Dict[str, Any]],
+        framework_id: Optional[uuid.UUID] = None
+    ) -> Dict[str, Any]:
+        """Shape framework scores as the compliance response, optionally for one framework"""
+        if framework_id:
+            scores = framework_scores.get(str(framework_id))
+            if scores is None:
+                # Framework not referenced by any question of this assessment
+                framework = self.db.query(ComplianceFramework).filter(
+                    ComplianceFramework.id == framework_id
+                ).first()
+                framework_scores = {}
+                if framework:
+                    framework_scores[str(framework.id)] = {
+                        "framework_id": str(framework.id),
+                        "framework_name": framework.name,
+                        "framework_code": framework.code,
+                        **self._framework_score(0, 0, 0, 0)
+                    }
+            else:
+                framework_scores = {str(framework_id): scores}
+        
+        return {
+            "assignment_id": str(assignment_id),
+            "calculated_at": (calculated_at or datetime.utcnow()).isoformat(),
+            "frameworks": framework_scores
         }
     
     def _evaluate_question_response(
@@ -500,7 +771,7 @@ class ComplianceCalculationService:
         Uses async processing for cost optimization
         """
         evaluation_prompt = criteria.get("evaluation_prompt", "")
-        pass_keywords = criteria.get("pass_keywords", [])
+        pass_keywords = criteria.get("pass_keywords") or []
         min_length = criteria.get("min_length", 0)
         
         if not evaluation_prompt:
@@ -521,17 +792,15 @@ class ComplianceCalculationService:
         
         # Check for pass keywords
         if pass_keywords:
-            found_keywords = []
-            response_lower = response_str.lower()
-            for keyword in pass_keywords:
-                if keyword.lower() in response_lower:
-                    found_keywords.append(keyword)
+            found = compile_keyword_matcher(tuple(str(k) for k in pass_keywords)).find(response_str)
+            found_keywords = _keyword_hits(pass_keywords, found)
             
             if found_keywords:
                 return {
                     "status": "passed",
                     "confidence": min(0.9, 0.5 + (len(found_keywords) / len(pass_keywords)) * 0.4),
-                    "reasoning": f"Response contains relevant keywords: {', '.join(found_keywords)}"
+                    "reasoning": f"Response contains relevant keywords: {', '.join(map(str, found_keywords))}",
+                    "matches": _keyword_matches(found_keywords, found)
                 }
         
         # Default to review for AI evaluation (human review needed)
@@ -547,12 +816,11 @@ class ComplianceCalculationService:
         response_value: Any
     ) -> Dict[str, Any]:
         """Keyword-based evaluation (fallback for AI)"""
-        pass_keywords = criteria.get("pass_keywords", [])
-        fail_keywords = criteria.get("fail_keywords", [])
+        pass_keywords = criteria.get("pass_keywords") or []
+        fail_keywords = criteria.get("fail_keywords") or []
         min_length = criteria.get("min_length", 0)
         
         response_str = str(response_value) if response_value else ""
-        response_lower = response_str.lower()
         
         # Check minimum length
         if min_length > 0 and len(response_str) < min_length:
@@ -562,28 +830,33 @@ class ComplianceCalculationService:
                 "reasoning": f"Response too short (minimum {min_length} characters required)"
             }
         
+        # One pass over the response for both keyword lists
+        found = {}
+        if fail_keywords or pass_keywords:
+            found = compile_keyword_matcher(
+                tuple(str(k) for k in list(fail_keywords) + list(pass_keywords))
+            ).find(response_str)
+        
         # Check for fail keywords first
-        if fail_keywords:
-            for keyword in fail_keywords:
-                if keyword.lower() in response_lower:
-                    return {
-                        "status": "failed",
-                        "confidence": 0.9,
-                        "reasoning": f"Response contains fail keyword: {keyword}"
-                    }
+        fail_hits = _keyword_hits(fail_keywords, found)
+        if fail_hits:
+            return {
+                "status": "failed",
+                "confidence": 0.9,
+                "reasoning": f"Response contains fail keyword: {fail_hits[0]}",
+                "matches": _keyword_matches(fail_hits[:1], found)
+            }
         
         # Check for pass keywords
         if pass_keywords:
-            found_keywords = []
-            for keyword in pass_keywords:
-                if keyword.lower() in response_lower:
-                    found_keywords.append(keyword)
+            found_keywords = _keyword_hits(pass_keywords, found)
             
             if found_keywords:
                 return {
                     "status": "passed",
                     "confidence": min(0.9, 0.5 + (len(found_keywords) / len(pass_keywords)) * 0.4),
-                    "reasoning": f"Response contains relevant keywords: {', '.join(found_keywords)}"
+                    "reasoning": f"Response contains relevant keywords: {', '.join(map(str, found_keywords))}",
+                    "matches": _keyword_matches(found_keywords, found)
                 }
         
         return {
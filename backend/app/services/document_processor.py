@@ -6,6 +6,7 @@ import mimetypes
 from typing import List, Dict, Optional
 from pathlib import Path
 import logging
+from app.core.config import settings
 from app.services.rag_service import rag_service
 
 logger = logging.getLogger(__name__)
@@ -166,23 +167,28 @@ class DocumentProcessor:
             # Process file into chunks
             chunks = await self.process_file(file_path, agent_id, document_type, metadata)
             
-            # Ingest each chunk
+            # Embed and upsert chunks in bulk batches instead of one round trip per chunk
+            batch_size = max(1, settings.RAG_UPSERT_BATCH_SIZE)
             ingested_count = 0
-            for i, chunk in enumerate(chunks):
-                chunk_metadata = {
-                    **(metadata or {}),
-                    "artifact_id": artifact_id,
-                    "chunk_index": i,
-                    "total_chunks": len(chunks)
-                }
+            for batch_start in range(0, len(chunks), batch_size):
+                batch = chunks[batch_start:batch_start + batch_size]
+                batch_metadata = [
+                    {
+                        **(metadata or {}),
+                        "artifact_id": artifact_id,
+                        "chunk_index": batch_start + offset,
+                        "total_chunks": len(chunks)
+                    }
+                    for offset in range(len(batch))
+                ]
                 
-                await rag_service.ingest_document(
+                await rag_service.ingest_documents(
                     agent_id=agent_id,
                     document_type=document_type,
-                    content=chunk,
-                    metadata=chunk_metadata
+                    contents=batch,
+                    metadatas=batch_metadata
                 )
-                ingested_count += 1
+                ingested_count += len(batch)
             
             logger.info(f"Ingested {ingested_count} chunks from {file_path}")
             return ingested_count
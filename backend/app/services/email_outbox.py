@@ -0,0 +1,288 @@
+"""
+Email outbox worker
+
+Sends email_outbox rows queued by EmailService.queue_email. Like the webhook
+dispatcher, each pass claims a batch of due messages with FOR UPDATE SKIP LOCKED
+and leases them (status "sending", next_attempt_at pushed out and a fresh lease
+token), so several workers can run side by side and messages held by a worker
+that died are sent again once the lease runs out.
+
+Claimed messages are grouped by tenant and each group is sent over one pooled
+SMTP session using the tenant's (cached) SMTP integration. A pass only claims as
+many messages per tenant as one session can send within the lease, and messages
+that could no longer be sent before the lease runs out are handed back unsent.
+Results are written back in one transaction per batch, and only to rows whose
+lease token is unchanged; a message another worker has since re-claimed is left
+to that worker. Failed sends are retried with exponential backoff; permanent
+(5xx) rejections fail straight away.
+"""
+from typing import Callable, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from uuid import UUID, uuid4
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from app.core.backoff import retry_delay
+from app.core.database import SessionLocal
+from app.models.email_outbox import EmailOutboxMessage, EmailOutboxStatus
+from app.services.email_service import (
+    MESSAGE_SEND_SECONDS,
+    EmailService,
+    SendDeferred,
+    SMTPConnectionPool,
+    SMTPSettings,
+    build_message,
+    get_smtp_integration_config,
+    is_permanent_smtp_error,
+    send_messages,
+    smtp_pool,
+)
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = 200
+OUTBOX_POLL_SECONDS = 5.0
+
+# A claimed message is sent again by another worker after this long
+SEND_LEASE_SECONDS = 600
+# Part of the lease kept free for claiming and writing results back
+LEASE_MARGIN_SECONDS = 60
+# A tenant's messages go out one after another over one session, so a pass claims
+# no more of them than fit in the lease (less the margin)
+TENANT_CLAIM_LIMIT = max((SEND_LEASE_SECONDS - LEASE_MARGIN_SECONDS) // MESSAGE_SEND_SECONDS, 1)
+
+MAX_SEND_ATTEMPTS = 5
+# Tenant SMTP sessions used at the same time by one worker
+SEND_CONCURRENCY = 8
+LAST_ERROR_LIMIT = 1000
+
+
+class EmailOutboxWorker:
+    """
+    Sends queued outbox messages
+    
+    Args:
+        session_factory: Creates database sessions
+        batch_size: Messages claimed per pass
+        pool: SMTP connection pool (defaults to the shared one)
+        concurrency: Tenants sent to at the same time
+    """
+    
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        pool: Optional[SMTPConnectionPool] = None,
+        concurrency: int = SEND_CONCURRENCY
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.pool = pool or smtp_pool
+        self.concurrency = concurrency
+        # Environment configuration, used where no SMTP integration applies
+        self.default_settings = EmailService().smtp_settings()
+    
+    def claim_batch(self, db: Session, now: datetime) -> List[EmailOutboxMessage]:
+        """
+        Claim due messages and lease them to this worker
+        
+        Messages beyond a tenant's TENANT_CLAIM_LIMIT are left for a later pass.
+        
+        Args:
+            db: Database session (committed, so the row locks are held only briefly)
+            now: Current time
+        
+        Returns:
+            Claimed messages, detached from the session
+        """
+        messages = db.query(EmailOutboxMessage).filter(
+            EmailOutboxMessage.status.in_([EmailOutboxStatus.PENDING.value, EmailOutboxStatus.SENDING.value]),
+            EmailOutboxMessage.next_attempt_at <= now
+        ).order_by(
+            EmailOutboxMessage.next_attempt_at
+        ).limit(self.batch_size).with_for_update(skip_locked=True).all()
+        
+        lease_until = now + timedelta(seconds=SEND_LEASE_SECONDS)
+        lease_token = uuid4()
+        claimed = []
+        per_tenant: Dict[Optional[UUID], int] = {}
+        for message in messages:
+            taken = per_tenant.get(message.tenant_id, 0)
+            if taken >= TENANT_CLAIM_LIMIT:
+                continue
+            per_tenant[message.tenant_id] = taken + 1
+            message.status = EmailOutboxStatus.SENDING.value
+            message.next_attempt_at = lease_until
+            message.lease_token = lease_token
+            claimed.append(message)
+        db.commit()
+        # Results are written with guarded UPDATEs, never by flushing these objects
+        db.expunge_all()
+        return claimed
+    
+    def settings_for(self, db: Session, tenant_id: Optional[UUID]) -> SMTPSettings:
+        """SMTP settings for a tenant's messages"""
+        resolved = get_smtp_integration_config(db, tenant_id)
+        if resolved is None:
+            return self.default_settings
+        return self.default_settings.with_config(resolved[1])
+    
+    def send(
+        self,
+        db: Session,
+        messages: List[EmailOutboxMessage],
+        deadline: Optional[float] = None
+    ) -> List[Optional[Exception]]:
+        """
+        Send claimed messages, one SMTP session per tenant
+        
+        Tenants are sent to concurrently, up to self.concurrency at a time.
+        
+        Args:
+            db: Database session
+            messages: Claimed messages
+            deadline: time.monotonic() value by which sending must be done (the
+                lease less its margin); later messages get SendDeferred unsent
+        
+        Returns:
+            The error for each message, None if it was sent
+        """
+        by_tenant: Dict[Optional[UUID], List[int]] = {}
+        for index, message in enumerate(messages):
+            by_tenant.setdefault(message.tenant_id, []).append(index)
+        
+        # Resolve settings and build messages up front; only the sends run in threads
+        groups = []
+        for tenant_id, indexes in by_tenant.items():
+            settings = self.settings_for(db, tenant_id)
+            batch = []
+            for index in indexes:
+                message = messages[index]
+                mime = build_message(
+                    settings, message.to_email, message.subject, message.html_body, message.text_body, message.cc
+                )
+                batch.append((mime, [message.to_email] + (message.cc or []) + (message.bcc or [])))
+            groups.append((indexes, settings, batch))
+        
+        errors: List[Optional[Exception]] = [None] * len(messages)
+        with ThreadPoolExecutor(max_workers=max(1, min(self.concurrency, len(groups)))) as executor:
+            futures = [
+                (indexes, executor.submit(send_messages, settings, batch, self.pool, deadline))
+                for indexes, settings, batch in groups
+            ]
+            for indexes, future in futures:
+                for index, error in zip(indexes, future.result()):
+                    errors[index] = error
+        return errors
+    
+    def record_results(
+        self,
+        db: Session,
+        messages: List[EmailOutboxMessage],
+        errors: List[Optional[Exception]],
+        now: datetime
+    ) -> Dict[str, int]:
+        """
+        Write send outcomes back in one transaction
+        
+        Each message is only updated while it still carries the lease token it
+        was claimed with; if the lease ran out and another worker re-claimed it,
+        its outcome is left to that worker.
+        
+        Returns:
+            Counts of sent, retrying, failed, deferred and lost (re-claimed) messages
+        """
+        counts = {"sent": 0, "retrying": 0, "failed": 0, "deferred": 0, "lost": 0}
+        for message, error in zip(messages, errors):
+            if isinstance(error, SendDeferred):
+                # Not sent: hand it straight back without using up an attempt
+                values = {
+                    EmailOutboxMessage.status: EmailOutboxStatus.PENDING.value,
+                    EmailOutboxMessage.next_attempt_at: now,
+                    EmailOutboxMessage.lease_token: None,
+                }
+                outcome = "deferred"
+            else:
+                attempt_count = (message.attempt_count or 0) + 1
+                values = {
+                    EmailOutboxMessage.attempt_count: attempt_count,
+                    EmailOutboxMessage.lease_token: None,
+                }
+                if error is None:
+                    values[EmailOutboxMessage.status] = EmailOutboxStatus.SENT.value
+                    values[EmailOutboxMessage.next_attempt_at] = None
+                    values[EmailOutboxMessage.last_error] = None
+                    values[EmailOutboxMessage.sent_at] = now
+                    outcome = "sent"
+                else:
+                    values[EmailOutboxMessage.last_error] = (str(error) or type(error).__name__)[:LAST_ERROR_LIMIT]
+                    if not is_permanent_smtp_error(error) and attempt_count < MAX_SEND_ATTEMPTS:
+                        values[EmailOutboxMessage.status] = EmailOutboxStatus.PENDING.value
+                        values[EmailOutboxMessage.next_attempt_at] = now + timedelta(seconds=retry_delay(attempt_count))
+                        outcome = "retrying"
+                    else:
+                        values[EmailOutboxMessage.status] = EmailOutboxStatus.FAILED.value
+                        values[EmailOutboxMessage.next_attempt_at] = None
+                        outcome = "failed"
+            
+            updated = db.query(EmailOutboxMessage).filter(
+                EmailOutboxMessage.id == message.id,
+                EmailOutboxMessage.lease_token == message.lease_token
+            ).update(values, synchronize_session=False)
+            if not updated:
+                logger.warning(f"Lease on outbox email {message.id} expired; leaving it to the worker that re-claimed it")
+                counts["lost"] += 1
+                continue
+            for column, value in values.items():
+                setattr(message, column.key, value)
+            counts[outcome] += 1
+        
+        db.commit()
+        return counts
+    
+    def run_once(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Claim, send and record one batch
+        
+        Returns:
+            Counts of claimed, sent, retrying, failed, deferred and lost messages
+        """
+        db = self.session_factory()
+        try:
+            messages = self.claim_batch(db, now or datetime.utcnow())
+            if not messages:
+                return {"claimed": 0, "sent": 0, "retrying": 0, "failed": 0, "deferred": 0, "lost": 0}
+            
+            deadline = time.monotonic() + SEND_LEASE_SECONDS - LEASE_MARGIN_SECONDS
+            errors = self.send(db, messages, deadline)
+            counts = self.record_results(db, messages, errors, datetime.utcnow())
+            counts["claimed"] = len(messages)
+            logger.info(
+                f"Sent {counts['sent']} of {len(messages)} queued emails: "
+                f"{counts['retrying']} will be retried, {counts['failed']} failed, "
+                f"{counts['deferred']} deferred, {counts['lost']} lost to an expired lease"
+            )
+            return counts
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
+    def run(self, stop: Optional[threading.Event] = None, poll_interval: float = OUTBOX_POLL_SECONDS) -> None:
+        """Send until stopped, sleeping between passes once a pass finds nothing to send"""
+        stop = stop or threading.Event()
+        try:
+            while not stop.is_set():
+                try:
+                    counts = self.run_once()
+                except Exception as e:
+                    logger.error(f"Email outbox pass failed: {e}", exc_info=True)
+                    counts = {"claimed": 0}
+                # Per-tenant limits can leave due messages behind in a partial batch
+                if counts["claimed"] == 0:
+                    stop.wait(poll_interval)
+        finally:
+            self.pool.close_all()
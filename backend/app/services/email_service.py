@@ -1,15 +1,348 @@
 """
 Email notification service
+
+Mail goes out through a shared SMTPConnectionPool, which keeps authenticated
+sessions open per server and credentials instead of connecting, running STARTTLS
+and logging in for every message. smtplib blocks, so send_email runs it in a
+worker thread. Notifications to many recipients should be queued with
+queue_email instead; the email outbox worker (app.services.email_outbox) sends
+those in batches, one SMTP session per tenant configuration.
 """
 import smtplib
+from contextlib import contextmanager
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from typing import List, Optional, Dict, Any, Tuple
+from uuid import UUID
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.models.integration import Integration, IntegrationType, IntegrationStatus
+from app.models.email_outbox import EmailOutboxMessage, EmailOutboxStatus
+import asyncio
 import logging
 import os
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+SMTP_TIMEOUT_SECONDS = 10
+# Time allowed per message when sending against a deadline: opening a session and
+# the send itself, each bounded by SMTP_TIMEOUT_SECONDS
+MESSAGE_SEND_SECONDS = 2 * SMTP_TIMEOUT_SECONDS
+
+# Idle pooled sessions are checked with NOOP before reuse once they have sat for
+# SMTP_POOL_CHECK_AFTER_SECONDS, and closed after SMTP_POOL_IDLE_TIMEOUT_SECONDS
+# (servers drop idle clients without telling them)
+SMTP_POOL_MAX_IDLE_PER_SERVER = 4
+SMTP_POOL_CHECK_AFTER_SECONDS = 5
+SMTP_POOL_IDLE_TIMEOUT_SECONDS = 60
+
+# SMTP integrations are cached per tenant. Commits that touch an SMTP integration
+# invalidate the local process; the TTL bounds staleness on other workers.
+SMTP_CONFIG_TTL_SECONDS = 300
+
+_smtp_config_cache: Dict[Optional[UUID], Tuple[float, Optional[Tuple[UUID, Dict[str, Any]]]]] = {}
+_smtp_config_lock = threading.Lock()
+
+# Rejections that leave the SMTP session usable (smtplib resets it)
+_MESSAGE_REJECTIONS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+
+class SendDeferred(Exception):
+    """The message was not sent: it might not have finished before the deadline"""
+
+
+class SMTPSettings:
+    """Server, credentials and sender of one SMTP configuration"""
+    
+    __slots__ = ("host", "port", "user", "password", "use_tls", "from_email", "from_name")
+    
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str = "",
+        password: str = "",
+        use_tls: bool = True,
+        from_email: str = "noreply@vaka.ai",
+        from_name: str = "VAKA Platform"
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.from_email = from_email
+        self.from_name = from_name
+    
+    @property
+    def pool_key(self) -> Tuple:
+        """Sessions are shared between settings with the same server and credentials"""
+        return (self.host, self.port, self.user, self.password, self.use_tls)
+    
+    def with_config(self, config: Dict[str, Any]) -> "SMTPSettings":
+        """Copy overridden by an SMTP integration's config"""
+        return SMTPSettings(
+            host=config.get("smtp_host", self.host),
+            port=int(config.get("smtp_port", self.port)),
+            user=config.get("smtp_user", self.user),
+            password=config.get("smtp_password", self.password),
+            use_tls=config.get("smtp_use_tls", self.use_tls),
+            from_email=config.get("from_email", self.from_email),
+            from_name=config.get("from_name", self.from_name)
+        )
+
+
+def _close_quietly(server: smtplib.SMTP) -> None:
+    try:
+        server.quit()
+    except Exception:
+        server.close()
+
+
+class SMTPConnectionPool:
+    """
+    Authenticated SMTP sessions kept open for reuse, per server and credentials
+    
+    Thread-safe; a session is used by one thread at a time between acquire and
+    release.
+    
+    Args:
+        max_idle_per_server: Idle sessions kept per server and credentials
+        check_after: Idle seconds after which a session is checked with NOOP before reuse
+        idle_timeout: Idle seconds after which a session is closed instead of reused
+    """
+    
+    def __init__(
+        self,
+        max_idle_per_server: int = SMTP_POOL_MAX_IDLE_PER_SERVER,
+        check_after: float = SMTP_POOL_CHECK_AFTER_SECONDS,
+        idle_timeout: float = SMTP_POOL_IDLE_TIMEOUT_SECONDS
+    ):
+        self.max_idle_per_server = max_idle_per_server
+        self.check_after = check_after
+        self.idle_timeout = idle_timeout
+        self._idle: Dict[Tuple, List[Tuple[float, smtplib.SMTP]]] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def connect(settings: SMTPSettings) -> smtplib.SMTP:
+        """Open a new session (STARTTLS and login as configured)"""
+        server = smtplib.SMTP(settings.host, settings.port, timeout=SMTP_TIMEOUT_SECONDS)
+        try:
+            if settings.use_tls:
+                server.starttls()
+            if settings.user and settings.password:
+                server.login(settings.user, settings.password)
+        except Exception:
+            _close_quietly(server)
+            raise
+        return server
+    
+    def acquire(self, settings: SMTPSettings) -> smtplib.SMTP:
+        """An idle session that still answers, or a new one"""
+        key = settings.pool_key
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                if not idle:
+                    break
+                released_at, server = idle.pop()
+            idle_for = time.monotonic() - released_at
+            if idle_for > self.idle_timeout:
+                _close_quietly(server)
+                continue
+            if idle_for > self.check_after:
+                try:
+                    alive = server.noop()[0] == 250
+                except Exception:
+                    alive = False
+                if not alive:
+                    server.close()
+                    continue
+            return server
+        return self.connect(settings)
+    
+    def release(self, settings: SMTPSettings, server: smtplib.SMTP) -> None:
+        """Return a healthy session for reuse"""
+        with self._lock:
+            idle = self._idle.setdefault(settings.pool_key, [])
+            if len(idle) < self.max_idle_per_server:
+                idle.append((time.monotonic(), server))
+                return
+        _close_quietly(server)
+    
+    def discard(self, server: smtplib.SMTP) -> None:
+        """Close a session that failed mid-conversation"""
+        server.close()
+    
+    @contextmanager
+    def session(self, settings: SMTPSettings):
+        """Use a pooled session; it is discarded if the block raises"""
+        server = self.acquire(settings)
+        try:
+            yield server
+        except BaseException:
+            self.discard(server)
+            raise
+        self.release(settings, server)
+    
+    def close_all(self) -> None:
+        """Close every idle session"""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for sessions in idle.values():
+            for _, server in sessions:
+                _close_quietly(server)
+
+
+smtp_pool = SMTPConnectionPool()
+
+
+def build_message(
+    settings: SMTPSettings,
+    to_email: str,
+    subject: str,
+    html_body: str,
+    text_body: Optional[str] = None,
+    cc: Optional[List[str]] = None
+) -> MIMEMultipart:
+    """Build a multipart (text and HTML) message"""
+    msg = MIMEMultipart('alternative')
+    msg['From'] = f"{settings.from_name} <{settings.from_email}>"
+    msg['To'] = to_email
+    msg['Subject'] = subject
+    
+    if cc:
+        msg['Cc'] = ', '.join(cc)
+    
+    # Add text and HTML parts
+    if text_body:
+        msg.attach(MIMEText(text_body, 'plain'))
+    msg.attach(MIMEText(html_body, 'html'))
+    return msg
+
+
+def send_messages(
+    settings: SMTPSettings,
+    messages: List[Tuple[MIMEMultipart, List[str]]],
+    pool: Optional[SMTPConnectionPool] = None,
+    deadline: Optional[float] = None
+) -> List[Optional[Exception]]:
+    """
+    Send messages over one pooled SMTP session (blocking)
+    
+    A message rejected by the server doesn't end the session. If the server drops
+    the session, the message is retried once on a new one; if no session can be
+    opened, the remaining messages fail with that error.
+    
+    Args:
+        settings: SMTP settings to send with
+        messages: (message, envelope recipients) pairs
+        pool: Connection pool (defaults to the shared one)
+        deadline: time.monotonic() value by which sending must be done; messages
+            that might not finish by then get SendDeferred and are not sent
+    
+    Returns:
+        The error for each message, None if it was sent
+    """
+    pool = pool or smtp_pool
+    errors: List[Optional[Exception]] = []
+    server = None
+    try:
+        for msg, recipients in messages:
+            if deadline is not None and time.monotonic() + MESSAGE_SEND_SECONDS > deadline:
+                return errors + [SendDeferred()] * (len(messages) - len(errors))
+            error = None
+            for attempt in range(2):
+                if server is None:
+                    try:
+                        server = pool.acquire(settings)
+                    except Exception as e:
+                        return errors + [e] * (len(messages) - len(errors))
+                try:
+                    server.send_message(msg, from_addr=settings.from_email, to_addrs=recipients)
+                    error = None
+                    break
+                except _MESSAGE_REJECTIONS as e:
+                    error = e
+                    break
+                except Exception as e:
+                    pool.discard(server)
+                    server = None
+                    error = e
+                    if not isinstance(e, smtplib.SMTPServerDisconnected):
+                        break
+            errors.append(error)
+    finally:
+        if server is not None:
+            pool.release(settings, server)
+    return errors
+
+
+def is_permanent_smtp_error(error: Exception) -> bool:
+    """Whether the server rejected the message for good (5xx) rather than for now"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, (smtplib.SMTPSenderRefused, smtplib.SMTPDataError)):
+        return error.smtp_code >= 500
+    return False
+
+
+def invalidate_smtp_config(tenant_id: Optional[UUID] = None) -> None:
+    """
+    Drop cached SMTP integrations
+    
+    Args:
+        tenant_id: Tenant whose integration changed; clears every tenant if None
+    """
+    with _smtp_config_lock:
+        if tenant_id is None:
+            _smtp_config_cache.clear()
+        else:
+            _smtp_config_cache.pop(tenant_id, None)
+
+
+def get_smtp_integration_config(db: Session, tenant_id: Optional[UUID] = None) -> Optional[Tuple[UUID, Dict[str, Any]]]:
+    """
+    The active SMTP integration that applies to a tenant, cached
+    
+    Priority: 1) Tenant-specific active integration, 2) Platform-wide active integration
+    
+    Returns:
+        (integration id, config), or None if there is no active SMTP integration
+    """
+    now = time.monotonic()
+    with _smtp_config_lock:
+        entry = _smtp_config_cache.get(tenant_id)
+    if entry is not None and now - entry[0] < SMTP_CONFIG_TTL_SECONDS:
+        return entry[1]
+    
+    integration = None
+    if tenant_id:
+        integration = db.query(Integration).filter(
+            Integration.integration_type == IntegrationType.SMTP.value,
+            Integration.is_active == True,
+            Integration.status == IntegrationStatus.ACTIVE.value,
+            Integration.tenant_id == tenant_id
+        ).first()
+    
+    # If no tenant-specific integration, try platform-wide (tenant_id is None)
+    if not integration:
+        integration = db.query(Integration).filter(
+            Integration.integration_type == IntegrationType.SMTP.value,
+            Integration.is_active == True,
+            Integration.status == IntegrationStatus.ACTIVE.value,
+            Integration.tenant_id.is_(None)
+        ).first()
+    
+    resolved = (integration.id, dict(integration.config)) if integration and integration.config else None
+    with _smtp_config_lock:
+        _smtp_config_cache[tenant_id] = (now, resolved)
+    return resolved
+
 
 class EmailService:
     """Service for sending email notifications"""
@@ -38,55 +371,46 @@ class EmailService:
         else:
             logger.warning(f"Email service not fully configured: Host={self.smtp_host}, Port={self.smtp_port}, User={'***' if self.smtp_user else 'NOT SET'}, Password={'***' if self.smtp_password else 'NOT SET'}")
     
+    def smtp_settings(self) -> SMTPSettings:
+        """Snapshot of the current configuration"""
+        return SMTPSettings(
+            host=self.smtp_host,
+            port=self.smtp_port,
+            user=self.smtp_user,
+            password=self.smtp_password,
+            use_tls=self.smtp_use_tls,
+            from_email=self.from_email,
+            from_name=self.from_name
+        )
+    
     def load_config_from_db(self, db, tenant_id: Optional[str] = None):
         """Load SMTP configuration from database integration (overrides env vars)
         
         Always uses integration from /integrations page, never falls back to env vars
-        if integration exists.
+        if integration exists. The integration is cached per tenant (see
+        get_smtp_integration_config).
         """
         try:
-            from app.models.integration import Integration, IntegrationType, IntegrationStatus
-            from uuid import UUID
-            
             # Check if db has query method (SQLAlchemy session)
             if not hasattr(db, 'query'):
                 logger.warning("Invalid database session provided to load_config_from_db")
                 return False
             
-            # Query for SMTP integration
-            # Priority: 1) Tenant-specific active integration, 2) Platform-wide active integration
-            integration = None
-            
-            if tenant_id:
-                # First try tenant-specific integration
-                tenant_uuid = UUID(tenant_id) if isinstance(tenant_id, str) else tenant_id
-                integration = db.query(Integration).filter(
-                    Integration.integration_type == IntegrationType.SMTP.value,
-                    Integration.is_active == True,
-                    Integration.status == IntegrationStatus.ACTIVE.value,
-                    Integration.tenant_id == tenant_uuid
-                ).first()
-            
-            # If no tenant-specific integration, try platform-wide (tenant_id is None)
-            if not integration:
-                integration = db.query(Integration).filter(
-                    Integration.integration_type == IntegrationType.SMTP.value,
-                    Integration.is_active == True,
-                    Integration.status == IntegrationStatus.ACTIVE.value,
-                    Integration.tenant_id.is_(None)
-                ).first()
+            tenant_uuid = UUID(tenant_id) if isinstance(tenant_id, str) else tenant_id
+            resolved = get_smtp_integration_config(db, tenant_uuid)
             
-            if integration and integration.config:
-                config = integration.config
-                self.smtp_host = config.get("smtp_host", self.smtp_host)
-                self.smtp_port = int(config.get("smtp_port", self.smtp_port))
-                self.smtp_user = config.get("smtp_user", self.smtp_user)
-                self.smtp_password = config.get("smtp_password", self.smtp_password)
-                self.smtp_use_tls = config.get("smtp_use_tls", self.smtp_use_tls)
-                self.from_email = config.get("from_email", self.from_email)
-                self.from_name = config.get("from_name", self.from_name)
+            if resolved:
+                integration_id, config = resolved
+                settings = self.smtp_settings().with_config(config)
+                self.smtp_host = settings.host
+                self.smtp_port = settings.port
+                self.smtp_user = settings.user
+                self.smtp_password = settings.password
+                self.smtp_use_tls = settings.use_tls
+                self.from_email = settings.from_email
+                self.from_name = settings.from_name
                 
-                logger.info(f"Email service loaded config from database integration: Host={self.smtp_host}, User={self.smtp_user}, From={self.from_email}, Integration ID={integration.id}")
+                logger.info(f"Email service loaded config from database integration: Host={self.smtp_host}, User={self.smtp_user}, From={self.from_email}, Integration ID={integration_id}")
                 return True
             else:
                 logger.warning(f"No active SMTP integration found in database for tenant {tenant_id}. Please configure SMTP in /integrations page.")
@@ -96,18 +420,58 @@ class EmailService:
             return False
     
     def _get_smtp_connection(self):
-        """Get SMTP connection"""
+        """Get a new (unpooled) SMTP connection"""
         try:
-            server = smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=10)
-            if self.smtp_use_tls:
-                server.starttls()
-            if self.smtp_user and self.smtp_password:
-                server.login(self.smtp_user, self.smtp_password)
-            return server
+            return SMTPConnectionPool.connect(self.smtp_settings())
         except Exception as e:
             logger.error(f"Failed to connect to SMTP server {self.smtp_host}:{self.smtp_port}: {e}")
             raise
     
+    @staticmethod
+    def queue_email(
+        db: Session,
+        to_email: str,
+        subject: str,
+        html_body: str,
+        text_body: Optional[str] = None,
+        cc: Optional[List[str]] = None,
+        bcc: Optional[List[str]] = None,
+        tenant_id: Optional[UUID] = None
+    ) -> EmailOutboxMessage:
+        """
+        Queue an email in the outbox for the email outbox worker
+        
+        The message is added to the session but not committed, so it is sent only
+        if the caller's transaction commits.
+        
+        Args:
+            db: Database session
+            to_email: Recipient email address
+            subject: Email subject
+            html_body: HTML email body
+            text_body: Plain text email body (optional)
+            cc: CC recipients (optional)
+            bcc: BCC recipients (optional)
+            tenant_id: Tenant whose SMTP integration sends it (platform-wide if None)
+        
+        Returns:
+            Queued outbox message
+        """
+        message = EmailOutboxMessage(
+            tenant_id=tenant_id,
+            to_email=to_email,
+            cc=cc or None,
+            bcc=bcc or None,
+            subject=subject,
+            html_body=html_body,
+            text_body=text_body,
+            status=EmailOutboxStatus.PENDING.value,
+            attempt_count=0,
+            next_attempt_at=datetime.utcnow()
+        )
+        db.add(message)
+        return message
+    
     async def send_email(
         self,
         to_email: str,
@@ -132,33 +496,18 @@ class EmailService:
             Tuple of (success: bool, error_message: Optional[str])
         """
         try:
-            # Create message
-            msg = MIMEMultipart('alternative')
-            msg['From'] = f"{self.from_name} <{self.from_email}>"
-            msg['To'] = to_email
-            msg['Subject'] = subject
-            
-            if cc:
-                msg['Cc'] = ', '.join(cc)
-            
-            # Add text and HTML parts
-            if text_body:
-                text_part = MIMEText(text_body, 'plain')
-                msg.attach(text_part)
-            
-            html_part = MIMEText(html_body, 'html')
-            msg.attach(html_part)
-            
-            # Send email
-            server = self._get_smtp_connection()
+            settings = self.smtp_settings()
+            msg = build_message(settings, to_email, subject, html_body, text_body, cc)
             recipients = [to_email]
             if cc:
                 recipients.extend(cc)
             if bcc:
                 recipients.extend(bcc)
             
-            server.send_message(msg, from_addr=self.from_email, to_addrs=recipients)
-            server.quit()
+            # Send over a pooled session, off the event loop
+            [error] = await asyncio.to_thread(send_messages, settings, [(msg, recipients)])
+            if error is not None:
+                raise error
             
             logger.info(f"Email sent to {to_email}: {subject}")
             return True, None
@@ -519,3 +868,30 @@ class EmailService:
 
 # Global email service instance
 email_service = EmailService()
+
+
+@event.listens_for(Session, "after_flush")
+def _track_smtp_config_changes(session: Session, flush_context) -> None:
+    """Remember which tenants' SMTP integrations changed in this transaction"""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Integration) and obj.integration_type == IntegrationType.SMTP.value:
+            session.info.setdefault("smtp_config_tenants_changed", set()).add(obj.tenant_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_smtp_configs(session: Session) -> None:
+    """Invalidate cached SMTP integrations for tenants whose integration was committed"""
+    tenant_ids = session.info.pop("smtp_config_tenants_changed", None)
+    if not tenant_ids:
+        return
+    if None in tenant_ids:
+        # The platform-wide integration is the fallback for every tenant
+        invalidate_smtp_config(None)
+    else:
+        for tenant_id in tenant_ids:
+            invalidate_smtp_config(tenant_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_smtp_config_changes(session: Session) -> None:
+    session.info.pop("smtp_config_tenants_changed", None)
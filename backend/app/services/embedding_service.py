@@ -1,20 +1,177 @@
 """
 Production embedding service
 """
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import hashlib
 import logging
 import os
+import struct
+import threading
+import time
+
+from app.core.cache import get_async_redis_binary, redis_breaker
+from app.core.config import settings
+from app.core.metrics import (
+    embedding_queue_depth,
+    embedding_batch_size,
+    embedding_encode_duration_seconds,
+    embedding_cache_requests_total,
+)
 
 logger = logging.getLogger(__name__)
 
 
+class EmbeddingCache:
+    """
+    Two-tier embedding cache keyed by (model name, SHA-256 of the text)
+    
+    Tier 1 is an in-process LRU (EMBEDDING_CACHE_SIZE entries). Tier 2 is an
+    optional shared Redis cache (EMBEDDING_CACHE_REDIS_TTL) storing vectors as
+    little-endian float32 bytes, reached through the async client so lookups
+    don't block the event loop. Redis failures degrade to a cache miss and are
+    reported to redis_breaker, so an unreachable Redis is skipped outright.
+    """
+    
+    REDIS_KEY_PREFIX = "embedding"
+    
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._entries: "OrderedDict[str, Tuple[float, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(text.encode()).hexdigest()
+    
+    def _redis_key(self, key: str) -> str:
+        return f"{self.REDIS_KEY_PREFIX}:{self.model_name}:{key}"
+    
+    @staticmethod
+    def _encode_vector(embedding: List[float]) -> bytes:
+        return struct.pack(f"<{len(embedding)}f", *embedding)
+    
+    @staticmethod
+    def _decode_vector(data: bytes) -> List[float]:
+        return list(struct.unpack(f"<{len(data) // 4}f", data))
+    
+    def _get_redis(self):
+        if settings.EMBEDDING_CACHE_REDIS_TTL <= 0:
+            return None
+        return get_async_redis_binary()
+    
+    def _remember(self, key: str, embedding: List[float]):
+        max_size = settings.EMBEDDING_CACHE_SIZE
+        if max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = tuple(embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+    
+    async def get_many(self, texts: List[str]) -> Dict[str, List[float]]:
+        """
+        Look up embeddings for texts
+        
+        Returns:
+            Mapping of text to embedding for every text found in either tier
+        """
+        found: Dict[str, List[float]] = {}
+        missing: Dict[str, str] = {}
+        
+        with self._lock:
+            for text in texts:
+                key = self._key(text)
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    found[text] = list(entry)
+                else:
+                    missing[key] = text
+        
+        hits = len(texts) - len(missing)
+        if hits:
+            embedding_cache_requests_total.labels(tier="memory", result="hit").inc(hits)
+        if not missing:
+            return found
+        embedding_cache_requests_total.labels(tier="memory", result="miss").inc(len(missing))
+        
+        redis = self._get_redis()
+        if not redis:
+            return found
+        
+        try:
+            keys = list(missing)
+            values = await redis.mget([self._redis_key(key) for key in keys])
+            redis_breaker.record_success()
+        except Exception as e:
+            redis_breaker.record_failure()
+            logger.warning(f"Embedding cache Redis lookup failed: {e}")
+            return found
+        
+        redis_hits = 0
+        for key, value in zip(keys, values):
+            if value:
+                embedding = self._decode_vector(value)
+                found[missing[key]] = embedding
+                self._remember(key, embedding)
+                redis_hits += 1
+        
+        if redis_hits:
+            embedding_cache_requests_total.labels(tier="redis", result="hit").inc(redis_hits)
+        if len(keys) - redis_hits:
+            embedding_cache_requests_total.labels(tier="redis", result="miss").inc(len(keys) - redis_hits)
+        return found
+    
+    async def set_many(self, embeddings: Dict[str, List[float]]):
+        """Store embeddings for texts in both tiers"""
+        if not embeddings:
+            return
+        
+        keyed = {self._key(text): embedding for text, embedding in embeddings.items()}
+        for key, embedding in keyed.items():
+            self._remember(key, embedding)
+        
+        redis = self._get_redis()
+        if not redis:
+            return
+        
+        try:
+            ttl = settings.EMBEDDING_CACHE_REDIS_TTL
+            pipe = redis.pipeline(transaction=False)
+            for key, embedding in keyed.items():
+                pipe.setex(self._redis_key(key), ttl, self._encode_vector(embedding))
+            await pipe.execute()
+            redis_breaker.record_success()
+        except Exception as e:
+            redis_breaker.record_failure()
+            logger.warning(f"Embedding cache Redis write failed: {e}")
+
+
 class EmbeddingService:
-    """Service for generating embeddings using production models"""
+    """
+    Service for generating embeddings using production models
+    
+    Model inference is CPU-bound, so it runs on a bounded thread pool
+    (EMBEDDING_WORKERS) instead of the event loop. Single-text requests that
+    arrive within EMBEDDING_BATCH_WINDOW_MS of each other are micro-batched
+    into one encode call of up to EMBEDDING_BATCH_SIZE texts. Results are
+    cached in an EmbeddingCache so repeated texts skip the model.
+    """
     
     def __init__(self):
         """Initialize embedding service"""
         self.model_name = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
         self.model = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Micro-batching state, bound to the event loop that created it
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self.cache = EmbeddingCache(self.model_name)
         self._load_model()
     
     def _load_model(self):
@@ -32,6 +189,15 @@ class EmbeddingService:
             logger.error(f"Failed to load embedding model: {e}")
             self.model = None
     
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Get the inference thread pool, creating it on first use"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(1, settings.EMBEDDING_WORKERS),
+                thread_name_prefix="embedding"
+            )
+        return self._executor
+    
     async def generate_embedding(self, text: str) -> List[float]:
         """
         Generate embedding for text
@@ -44,9 +210,12 @@ class EmbeddingService:
         """
         if self.model:
             try:
-                # Use sentence-transformers
-                embedding = self.model.encode(text, normalize_embeddings=True)
-                return embedding.tolist()
+                cached = await self.cache.get_many([text])
+                if text in cached:
+                    return cached[text]
+                embedding = await self._enqueue(text)
+                await self.cache.set_many({text: embedding})
+                return embedding
             except Exception as e:
                 logger.error(f"Embedding generation failed: {e}")
                 # Fallback to placeholder
@@ -55,6 +224,73 @@ class EmbeddingService:
             # Fallback to placeholder
             return await self._generate_placeholder_embedding(text)
     
+    async def _enqueue(self, text: str) -> List[float]:
+        """Queue a single text for the next micro-batch and wait for its embedding"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First use (or a new event loop) - start with fresh batching state
+            self._loop = loop
+            self._pending = []
+            self._flush_handle = None
+        
+        future = loop.create_future()
+        self._pending.append((text, future))
+        embedding_queue_depth.inc()
+        
+        if len(self._pending) >= max(1, settings.EMBEDDING_BATCH_SIZE):
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(
+                settings.EMBEDDING_BATCH_WINDOW_MS / 1000.0,
+                self._flush
+            )
+        
+        return await future
+    
+    def _flush(self):
+        """Hand the pending micro-batch to the inference pool"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        
+        batch, self._pending = self._pending, []
+        if batch:
+            self._loop.create_task(self._encode_pending(batch))
+    
+    async def _encode_pending(self, batch: List[Tuple[str, asyncio.Future]]):
+        """Encode a micro-batch and resolve the waiting futures"""
+        try:
+            embeddings = await self._encode([text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), embedding in zip(batch, embeddings):
+            if not future.done():
+                future.set_result(embedding)
+    
+    async def _encode(self, texts: List[str]) -> List[List[float]]:
+        """
+        Run the model on the inference pool
+        
+        Callers increment embedding_queue_depth for the texts; it is released here.
+        """
+        loop = asyncio.get_running_loop()
+        start_time = time.perf_counter()
+        try:
+            embeddings = await loop.run_in_executor(
+                self._get_executor(),
+                functools.partial(self.model.encode, texts, normalize_embeddings=True)
+            )
+        finally:
+            embedding_queue_depth.dec(len(texts))
+        
+        embedding_batch_size.observe(len(texts))
+        embedding_encode_duration_seconds.observe(time.perf_counter() - start_time)
+        return embeddings.tolist()
+    
     async def _generate_placeholder_embedding(self, text: str) -> List[float]:
         """Generate placeholder embedding (fallback)"""
         import hashlib
@@ -79,10 +315,19 @@ class EmbeddingService:
         Returns:
             List of embedding vectors
         """
+        if not texts:
+            return []
+        
         if self.model:
             try:
-                embeddings = self.model.encode(texts, normalize_embeddings=True)
-                return embeddings.tolist()
+                cached = await self.cache.get_many(texts)
+                missing = list(dict.fromkeys(text for text in texts if text not in cached))
+                if missing:
+                    embedding_queue_depth.inc(len(missing))
+                    computed = dict(zip(missing, await self._encode(missing)))
+                    await self.cache.set_many(computed)
+                    cached.update(computed)
+                return [cached[text] for text in texts]
             except Exception as e:
                 logger.error(f"Batch embedding generation failed: {e}")
                 # Fallback
@@ -93,4 +338,3 @@ class EmbeddingService:
 
 # Global instance
 embedding_service = EmbeddingService()
-
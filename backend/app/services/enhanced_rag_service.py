@@ -11,6 +11,9 @@ logger = logging.getLogger(__name__)
 class EnhancedRAGService:
     """Enhanced RAG service with advanced features"""
     
+    # Reciprocal-rank fusion constant (dampens the weight of top ranks)
+    RRF_K = 60
+    
     def __init__(self, base_rag_service: RAGService = None):
         """Initialize enhanced RAG service"""
         self.rag_service = base_rag_service or rag_service
@@ -50,6 +53,36 @@ class EnhancedRAGService:
         
         return expanded[:5]  # Limit to 5 queries
     
+    def fuse_results(self, per_query_results: List[List[Dict]]) -> List[Dict]:
+        """
+        Merge per-query result lists with reciprocal-rank fusion
+        
+        Each document scores sum(1 / (RRF_K + rank)) over the lists it appears in.
+        Duplicates are collapsed by document ID, keeping the best similarity score.
+        
+        Args:
+            per_query_results: Ranked results for each expanded query
+        
+        Returns:
+            Deduplicated results ordered by fused score, with "rrf_score" set
+        """
+        fused: Dict[str, Dict] = {}
+        for results in per_query_results:
+            for rank, result in enumerate(results, 1):
+                doc_id = result.get("id")
+                if not doc_id:
+                    continue
+                contribution = 1.0 / (self.RRF_K + rank)
+                existing = fused.get(doc_id)
+                if existing is None:
+                    fused[doc_id] = {**result, "rrf_score": contribution}
+                else:
+                    existing["rrf_score"] += contribution
+                    if result.get("score", 0.0) > existing.get("score", 0.0):
+                        existing["score"] = result["score"]
+        
+        return sorted(fused.values(), key=lambda x: x["rrf_score"], reverse=True)
+    
     def rerank_results(
         self,
         results: List[Dict],
@@ -169,37 +202,24 @@ class EnhancedRAGService:
             expanded = self.expand_query(query)
             queries = expanded[:3]  # Use top 3 expanded queries
         
-        # Step 2: Multi-query search
-        all_results = []
-        seen_ids = set()
-        
-        for q in queries:
-            try:
-                results = await self.rag_service.search(
-                    query=q,
-                    agent_id=agent_id,
-                    limit=limit * 2,  # Get more results for reranking
-                    score_threshold=score_threshold
-                )
-                
-                # Deduplicate by document ID
-                for result in results:
-                    doc_id = result.get("id")
-                    if doc_id and doc_id not in seen_ids:
-                        seen_ids.add(doc_id)
-                        all_results.append(result)
-            except Exception as e:
-                logger.error(f"Error in query expansion search: {e}")
-                # Fallback to original query
-                if q == query:
-                    results = await self.rag_service.search(
-                        query=query,
-                        agent_id=agent_id,
-                        limit=limit,
-                        score_threshold=score_threshold
-                    )
-                    all_results = results
-                    break
+        # Step 2: Multi-query search (one embedding batch, one Qdrant batch search)
+        try:
+            per_query_results = await self.rag_service.search_many(
+                queries=queries,
+                agent_id=agent_id,
+                limit=limit * 2,  # Get more results for reranking
+                score_threshold=score_threshold
+            )
+            all_results = self.fuse_results(per_query_results)
+        except Exception as e:
+            logger.error(f"Error in query expansion search: {e}")
+            # Fallback to original query
+            all_results = await self.rag_service.search(
+                query=query,
+                agent_id=agent_id,
+                limit=limit,
+                score_threshold=score_threshold
+            )
         
         # Step 3: Reranking
         if use_reranking and all_results:
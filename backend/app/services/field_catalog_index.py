@@ -0,0 +1,192 @@
+"""
+Field catalog index - field metadata for layout rendering
+
+Merges the entity field registry, submission requirements and custom fields
+into one lookup keyed by (entity_name, field_name), so view generation can
+resolve a whole layout's field metadata from three queries.
+"""
+from typing import Dict, Optional, Any, Tuple
+from uuid import UUID
+from sqlalchemy import or_, event
+from sqlalchemy.orm import Session
+from app.models.entity_field import EntityFieldRegistry
+from app.models.submission_requirement import SubmissionRequirement
+from app.models.custom_field import CustomFieldCatalog
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Pseudo entity names for fields that don't come from the entity registry
+SUBMISSION_REQUIREMENTS_ENTITY = "submission_requirements"
+CUSTOM_FIELDS_ENTITY = "custom_fields"
+
+# Indexes are cached per tenant and entity. Commits that touch a catalog table
+# invalidate the local process; the TTL bounds staleness on other workers.
+FIELD_CATALOG_TTL_SECONDS = 300
+
+_field_catalog_cache: Dict[Optional[UUID], Dict[str, Tuple[float, "FieldCatalogIndex"]]] = {}
+_field_catalog_lock = threading.Lock()
+
+_CATALOG_MODELS = (EntityFieldRegistry, SubmissionRequirement, CustomFieldCatalog)
+
+
+class FieldCatalogIndex:
+    """
+    Field metadata for one tenant and entity, keyed by (entity_name, field_name)
+    
+    Entries are dicts with label, field_type, is_required, field_source and
+    custom_field_id.
+    """
+    
+    __slots__ = ("entity_name", "fields")
+    
+    def __init__(self, entity_name: str, fields: Dict[Tuple[str, str], Dict[str, Any]]):
+        self.entity_name = entity_name
+        self.fields = fields
+    
+    def get(self, entity_name: str, field_name: str) -> Optional[Dict[str, Any]]:
+        """Metadata for a field in a specific source, or None"""
+        return self.fields.get((entity_name, field_name))
+    
+    def lookup(self, field_name: str) -> Dict[str, Any]:
+        """
+        Metadata for a layout field
+        
+        Entity registry fields win over submission requirements, which win over
+        custom fields. Unknown fields fall back to a text entity field.
+        
+        Returns:
+            A copy of the field's metadata
+        """
+        for entity_name in (self.entity_name, SUBMISSION_REQUIREMENTS_ENTITY, CUSTOM_FIELDS_ENTITY):
+            metadata = self.fields.get((entity_name, field_name))
+            if metadata is not None:
+                return dict(metadata)
+        return {
+            "label": field_name.replace("_", " ").title(),
+            "field_type": "text",
+            "is_required": False,
+            "field_source": "entity",
+            "custom_field_id": None
+        }
+
+
+def invalidate_field_catalog(tenant_id: Optional[UUID] = None) -> None:
+    """
+    Drop cached field catalog indexes
+    
+    Args:
+        tenant_id: Tenant whose catalog changed; clears every tenant if None
+    """
+    with _field_catalog_lock:
+        if tenant_id is None:
+            _field_catalog_cache.clear()
+        else:
+            _field_catalog_cache.pop(tenant_id, None)
+
+
+def build_field_catalog_index(db: Session, tenant_id: UUID, entity_name: str) -> FieldCatalogIndex:
+    """Load the field catalog for a tenant and entity (three queries)"""
+    fields: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    
+    # Entity registry (tenant-specific rows win over platform-wide ones)
+    registry_rows = db.query(EntityFieldRegistry).filter(
+        or_(
+            EntityFieldRegistry.tenant_id == tenant_id,
+            EntityFieldRegistry.tenant_id.is_(None)
+        ),
+        EntityFieldRegistry.entity_name == entity_name,
+        EntityFieldRegistry.is_enabled == True
+    ).all()
+    for row in sorted(registry_rows, key=lambda r: r.tenant_id is not None):
+        fields[(entity_name, row.field_name)] = {
+            "label": row.field_label,
+            "field_type": row.field_type_display or "text",
+            "is_required": row.is_required or False,
+            "field_source": "entity",
+            "custom_field_id": None
+        }
+    
+    # Submission requirements (field_name is computed from catalog_id)
+    requirements = db.query(SubmissionRequirement).filter(
+        SubmissionRequirement.tenant_id == tenant_id,
+        SubmissionRequirement.is_active == True,
+        SubmissionRequirement.is_enabled == True
+    ).all()
+    for req in requirements:
+        fields.setdefault((SUBMISSION_REQUIREMENTS_ENTITY, req.field_name), {
+            "label": req.label,
+            "field_type": req.field_type or "text",
+            "is_required": req.is_required or False,
+            "field_source": "submission_requirement",
+            "custom_field_id": None
+        })
+    
+    # Custom fields
+    custom_fields = db.query(CustomFieldCatalog).filter(
+        CustomFieldCatalog.tenant_id == tenant_id,
+        CustomFieldCatalog.is_enabled == True
+    ).all()
+    for custom_field in custom_fields:
+        fields.setdefault((CUSTOM_FIELDS_ENTITY, custom_field.field_name), {
+            "label": custom_field.field_label or custom_field.field_name.replace("_", " ").title(),
+            "field_type": custom_field.field_type or "text",
+            "is_required": custom_field.is_required or False,
+            "field_source": "custom_field",
+            "custom_field_id": custom_field.id
+        })
+    
+    return FieldCatalogIndex(entity_name, fields)
+
+
+def get_field_catalog_index(db: Session, tenant_id: UUID, entity_name: str) -> FieldCatalogIndex:
+    """
+    Get the field catalog index for a tenant and entity, building it on a cache miss
+    
+    Args:
+        db: Database session
+        tenant_id: Tenant ID
+        entity_name: Entity whose registry fields the layout uses (e.g., "agents")
+    
+    Returns:
+        FieldCatalogIndex (shared; treat as read-only)
+    """
+    now = time.time()
+    with _field_catalog_lock:
+        entry = _field_catalog_cache.get(tenant_id, {}).get(entity_name)
+    if entry and now - entry[0] < FIELD_CATALOG_TTL_SECONDS:
+        return entry[1]
+    
+    index = build_field_catalog_index(db, tenant_id, entity_name)
+    with _field_catalog_lock:
+        _field_catalog_cache.setdefault(tenant_id, {})[entity_name] = (now, index)
+    return index
+
+
+@event.listens_for(Session, "after_flush")
+def _track_catalog_changes(session: Session, flush_context) -> None:
+    """Remember which tenants' field catalog rows changed in this transaction"""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, _CATALOG_MODELS):
+            session.info.setdefault("field_catalog_tenants_changed", set()).add(getattr(obj, "tenant_id", None))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_catalogs(session: Session) -> None:
+    """Invalidate cached indexes for tenants whose catalog rows were committed"""
+    tenant_ids = session.info.pop("field_catalog_tenants_changed", None)
+    if not tenant_ids:
+        return
+    if None in tenant_ids:
+        # Platform-wide registry rows apply to every tenant
+        invalidate_field_catalog(None)
+    else:
+        for tenant_id in tenant_ids:
+            invalidate_field_catalog(tenant_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_catalog_changes(session: Session) -> None:
+    session.info.pop("field_catalog_tenants_changed", None)
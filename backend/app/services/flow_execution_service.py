@@ -1,11 +1,12 @@
 """
 Flow Execution Service - Executes agentic AI flows
 """
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from uuid import UUID, uuid4
 import logging
 import time
 import asyncio
+from collections import deque
 from datetime import datetime, timedelta
 
 from app.models.agentic_flow import (
@@ -17,6 +18,8 @@ from app.services.studio_service import StudioService
 from app.services.agent_selection_expander import AgentSelectionExpander
 from app.services.business_rules_engine import BusinessRulesEngine
 from app.core.audit import audit_service, AuditAction
+from app.core.config import settings
+from app.core.database import SessionLocal
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +38,16 @@ class FlowExecutionService:
         self.registry = AgentRegistry(db_session)
         self.studio_service = StudioService(db_session)
     
+    def _node_service(self) -> "FlowExecutionService":
+        """
+        Service bound to a new session on the same database, for running one node
+        
+        Nodes of a flow run concurrently and each commits (and on failure rolls
+        back) as it goes, so they must not share this service's session.
+        The caller closes the returned service's session.
+        """
+        return FlowExecutionService(SessionLocal(bind=self.db.get_bind()))
+    
     async def execute_flow(
         self,
         flow_id: UUID,
@@ -269,72 +282,139 @@ class FlowExecutionService:
         
         return execution
     
+    def _build_flow_graph(
+        self,
+        nodes: List[Dict[str, Any]],
+        edges: List[Dict[str, Any]]
+    ) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, List[Dict[str, Any]]], Dict[str, int]]:
+        """
+        Build node map, outgoing adjacency and in-degree for a flow definition
+        
+        Raises:
+            ValueError: If an edge references an unknown node, there are no start
+                nodes, or the graph contains a cycle
+        """
+        node_map = {node["id"]: node for node in nodes}
+        outgoing: Dict[str, List[Dict[str, Any]]] = {node_id: [] for node_id in node_map}
+        in_degree: Dict[str, int] = {node_id: 0 for node_id in node_map}
+        
+        for edge in edges:
+            source, target = edge.get("from"), edge.get("to")
+            if source not in node_map or target not in node_map:
+                raise ValueError(f"Edge {source} -> {target} references an unknown node")
+            outgoing[source].append(edge)
+            in_degree[target] += 1
+        
+        start_nodes = [node_id for node_id, degree in in_degree.items() if degree == 0]
+        if not start_nodes:
+            raise ValueError("No start nodes found in flow")
+        
+        # Kahn's algorithm: every node must be reachable in topological order
+        remaining = dict(in_degree)
+        queue = deque(start_nodes)
+        ordered = 0
+        while queue:
+            node_id = queue.popleft()
+            ordered += 1
+            for edge in outgoing[node_id]:
+                remaining[edge["to"]] -= 1
+                if remaining[edge["to"]] == 0:
+                    queue.append(edge["to"])
+        
+        if ordered != len(node_map):
+            cyclic = sorted(node_id for node_id, degree in remaining.items() if degree > 0)
+            raise ValueError(f"Flow contains a cycle involving nodes: {cyclic}")
+        
+        return node_map, outgoing, in_degree
+    
     async def _execute_flow_nodes(
         self,
         execution: FlowExecution,
         flow: AgenticFlow
     ):
-        """Execute flow nodes"""
+        """
+        Execute flow nodes as a DAG
+        
+        A node becomes ready once all of its predecessors have finished. It runs if at
+        least one incoming edge is active (predecessor ran and the edge condition, if
+        any, held); otherwise it is skipped and its own outgoing edges are inactive.
+        Independent branches run concurrently, bounded by FLOW_MAX_PARALLEL_NODES
+        (overridable per flow with "max_parallel_nodes" in the flow definition).
+        Each node runs on its own session (see _node_service); this service's
+        session is only written by the scheduler itself.
+        """
         # Status already set to RUNNING in execute_flow
         # Just ensure started_at is set
         if not execution.started_at:
             execution.started_at = datetime.utcnow()
-            self.db.commit()
         
         flow_def = flow.flow_definition
         nodes = flow_def.get("nodes", [])
         edges = flow_def.get("edges", [])
         
-        # Build node map
-        node_map = {node["id"]: node for node in nodes}
-        
-        # Find start nodes (nodes with no incoming edges)
-        start_nodes = [
-            node_id for node_id in node_map.keys()
-            if not any(edge["to"] == node_id for edge in edges)
-        ]
+        node_map, outgoing, in_degree = self._build_flow_graph(nodes, edges)
         
-        if not start_nodes:
-            raise ValueError("No start nodes found in flow")
+        max_parallel = flow_def.get("max_parallel_nodes") or settings.FLOW_MAX_PARALLEL_NODES
+        semaphore = asyncio.Semaphore(max(1, int(max_parallel)))
         
-        # Execute nodes (simple sequential execution for now)
-        # In production, implement proper graph traversal with parallel execution
         execution_data = {}
+        remaining = dict(in_degree)
+        activated = {node_id for node_id, degree in in_degree.items() if degree == 0}
+        ready = deque(activated)
+        running: Dict[asyncio.Task, str] = {}
         
-        # Track visited nodes to prevent infinite loops
-        visited_nodes = set()
-        current_nodes = start_nodes
-        
-        while current_nodes:
-            next_nodes = []
-            
-            for node_id in current_nodes:
-                # Update current node being executed
+        async def run_node(node_id: str) -> FlowNodeExecution:
+            async with semaphore:
                 execution.current_node_id = node_id
-                self.db.commit()
-                
-                node = node_map[node_id]
-                node_execution = await self._execute_node(
-                    execution, node, execution_data, flow
-                )
+                node_service = self._node_service()
+                try:
+                    return await node_service._execute_node(
+                        execution, node_map[node_id], execution_data, flow
+                    )
+                finally:
+                    node_service.db.close()
+        
+        def release_successors(node_id: str, ran: bool):
+            for edge in outgoing[node_id]:
+                target = edge["to"]
+                if ran and (
+                    not edge.get("condition")
+                    or self._evaluate_condition(edge["condition"], execution_data)
+                ):
+                    activated.add(target)
+                remaining[target] -= 1
+                if remaining[target] == 0:
+                    ready.append(target)
+        
+        try:
+            while ready or running:
+                while ready:
+                    node_id = ready.popleft()
+                    if node_id in activated:
+                        running[asyncio.create_task(run_node(node_id))] = node_id
+                    else:
+                        # No active incoming edge - skip and propagate
+                        release_successors(node_id, ran=False)
                 
-                # Update execution data with node output
-                if node_execution.output_data:
-                    execution_data[node_id] = node_execution.output_data
+                if not running:
+                    break
                 
-                # Find next nodes
-                for edge in edges:
-                    if edge["from"] == node_id:
-                        # Check condition if present
-                        if edge.get("condition"):
-                            if self._evaluate_condition(
-                                edge["condition"], execution_data
-                            ):
-                                next_nodes.append(edge["to"])
-                        else:
-                            next_nodes.append(edge["to"])
-            
-            current_nodes = list(set(next_nodes))  # Remove duplicates
+                done, _ = await asyncio.wait(running.keys(), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    node_id = running.pop(task)
+                    node_execution = task.result()
+                    
+                    # Update execution data with node output
+                    if node_execution.output_data:
+                        execution_data[node_id] = node_execution.output_data
+                    
+                    release_successors(node_id, ran=True)
+        finally:
+            # A node failed or the flow timed out - stop the remaining branches
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running.keys(), return_exceptions=True)
         
         # Flow completed (status will be set in execute_flow, but set execution_data here)
         execution.execution_data = execution_data
@@ -368,32 +448,26 @@ class FlowExecutionService:
         # Retry loop
         for attempt in range(retry_count + 1):
             try:
-                # Create node execution record (or reuse on retry)
+                # Create node execution record (or reuse on retry) directly in RUNNING
+                # state so each attempt costs a single commit
                 if node_execution is None:
                     node_execution = FlowNodeExecution(
                         id=uuid4(),
                         execution_id=execution.id,
                         node_id=node["id"],
-                        status=FlowExecutionStatus.PENDING.value,
+                        status=FlowExecutionStatus.RUNNING.value,
                         input_data=self._resolve_node_input(node, execution_data, execution),
-                        retry_attempt=attempt
+                        retry_attempt=attempt,
+                        started_at=datetime.utcnow()
                     )
                     self.db.add(node_execution)
-                    self.db.commit()
-                    self.db.refresh(node_execution)
                 else:
                     # On retry, update status and add retry info
-                    node_execution.status = FlowExecutionStatus.PENDING.value
+                    node_execution.status = FlowExecutionStatus.RUNNING.value
                     node_execution.retry_attempt = attempt
                     if not node_execution.error_message:
                         node_execution.error_message = ""
                     node_execution.error_message += f"\n[Retry {attempt}/{retry_count}]"
-                    self.db.commit()
-                
-                # Execute node
-                node_execution.status = FlowExecutionStatus.RUNNING.value
-                if attempt == 0:
-                    node_execution.started_at = datetime.utcnow()
                 self.db.commit()
                 
                 # Log audit: Node execution started
@@ -5,148 +5,380 @@ Resolves field permissions using hierarchical inheritance:
 2. Field-level permissions (override)
 3. Layout-specific permissions (override for workflows)
 """
-from typing import Dict, Optional, Any
+from typing import Dict, Optional, Any, List, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import or_, event
 from uuid import UUID
+from app.core.cache import get_redis
 from app.models.entity_field import EntityPermission, EntityFieldPermission
 from app.models.custom_field import CustomFieldCatalog
 from app.models.form_layout import FormFieldAccess
 from app.models.role_permission import RolePermission
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+# Resolved role x field matrices, per tenant. Entries are tagged with the permission
+# versions they were built at; a version bump (see invalidate_permission_matrix)
+# or the TTL makes them stale.
+PERMISSION_MATRIX_TTL_SECONDS = 300
+PERMISSION_MATRIX_MAX_ENTRIES_PER_TENANT = 512
+PERMISSION_VERSION_KEY_PREFIX = "permission_matrix:version"
 
-def resolve_field_permissions(
+# A field spec: (field_name, entity_name, field_source, custom_field_id)
+FieldSpec = Tuple[str, Optional[str], Optional[str], Optional[str]]
+PermissionMatrix = Dict[str, Dict[str, Dict[str, bool]]]
+
+_permission_matrix_cache: Dict[Optional[str], Dict[Tuple, Tuple[float, Tuple, PermissionMatrix]]] = {}
+_local_permission_versions: Dict[Optional[str], int] = {}
+_permission_matrix_lock = threading.Lock()
+
+# Models whose rows feed field permission resolution
+_PERMISSION_MODELS = (RolePermission, EntityPermission, EntityFieldPermission, FormFieldAccess, CustomFieldCatalog)
+
+
+def invalidate_permission_matrix(tenant_id: Optional[UUID] = None) -> None:
+    """
+    Bump the permission version for a tenant (or for everyone, if tenant_id is None)
+    
+    The version lives in Redis when available so every worker process drops its
+    cached matrices; the local version covers this process when Redis is down.
+    """
+    key = str(tenant_id) if tenant_id else None
+    with _permission_matrix_lock:
+        _local_permission_versions[key] = _local_permission_versions.get(key, 0) + 1
+        if key is None:
+            _permission_matrix_cache.clear()
+        else:
+            _permission_matrix_cache.pop(key, None)
+    
+    try:
+        redis = get_redis()
+        if redis:
+            redis.incr(f"{PERMISSION_VERSION_KEY_PREFIX}:{key or 'global'}")
+    except Exception as e:
+        logger.warning(f"Failed to bump permission version in Redis: {e}")
+
+
+def _permission_versions(tenant_key: Optional[str]) -> Tuple:
+    """Current (local, shared) permission versions for a tenant plus the global scope"""
+    with _permission_matrix_lock:
+        local = (_local_permission_versions.get(None, 0), _local_permission_versions.get(tenant_key, 0))
+    
+    shared: Tuple = ()
+    try:
+        redis = get_redis()
+        if redis:
+            shared = tuple(redis.mget([
+                f"{PERMISSION_VERSION_KEY_PREFIX}:global",
+                f"{PERMISSION_VERSION_KEY_PREFIX}:{tenant_key}"
+            ]))
+    except Exception as e:
+        logger.debug(f"Permission version lookup in Redis failed: {e}")
+    return local + shared
+
+
+@event.listens_for(Session, "after_flush")
+def _track_permission_changes(session: Session, flush_context) -> None:
+    """Remember which tenants' permission rows changed in this transaction"""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, _PERMISSION_MODELS):
+            session.info.setdefault("permission_tenants_changed", set()).add(getattr(obj, "tenant_id", None))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_permissions(session: Session) -> None:
+    """Invalidate cached matrices for tenants whose permission rows were committed"""
+    tenant_ids = session.info.pop("permission_tenants_changed", None)
+    if not tenant_ids:
+        return
+    if None in tenant_ids:
+        # Platform-wide rows apply to every tenant
+        invalidate_permission_matrix(None)
+    else:
+        for tenant_id in tenant_ids:
+            invalidate_permission_matrix(tenant_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_permission_changes(session: Session) -> None:
+    session.info.pop("permission_tenants_changed", None)
+
+
+def _field_permission_prefix(request_type: Optional[str]) -> str:
+    """RolePermission key prefix for fields, based on the request type"""
+    # Default to submission if not specified
+    if request_type and ("approval" in request_type.lower() or "review" in request_type.lower()):
+        return "approval.field"
+    return "submission.field"
+
+
+def _apply_role_permissions(target: Dict[str, Dict[str, bool]], role_permissions: Optional[Dict]) -> None:
+    """Overlay a {role: {"view": bool, "edit": bool}} mapping onto resolved permissions"""
+    if not role_permissions:
+        return
+    for role, perms in role_permissions.items():
+        if role not in target:
+            target[role] = {}
+        target[role].update(perms)
+
+
+def _build_permission_matrix(
     db: Session,
     tenant_id: UUID,
-    entity_name: Optional[str] = None,
-    field_name: Optional[str] = None,
-    field_source: Optional[str] = None,  # "entity", "custom_field", "submission_requirement"
-    custom_field_id: Optional[UUID] = None,
-    request_type: Optional[str] = None,
-    workflow_stage: Optional[str] = None,
-    role: Optional[str] = None
-) -> Dict[str, Dict[str, bool]]:
+    specs: List[FieldSpec],
+    request_type: Optional[str],
+    workflow_stage: Optional[str]
+) -> PermissionMatrix:
     """
-    Resolve field permissions using hierarchical inheritance.
+    Resolve permissions for all fields with one query per permission source
     
-    Hierarchy:
-    1. Entity-level permissions (baseline)
-    2. Field-level permissions (override)
-    3. Layout-specific permissions (override for workflows)
-    
-    Returns:
-        Dict of role permissions: {"role": {"view": bool, "edit": bool}}
+    Applies the same hierarchy as resolve_field_permissions used to apply per field:
+    RolePermission baseline, entity baseline, field override, layout override.
     """
-    resolved_permissions: Dict[str, Dict[str, bool]] = {}
-    
-    # Step 0: Get RolePermission baseline (category: forms_and_data_fields)
-    # This serves as the system-wide baseline for specific field keys managed in the permission tree
-    if field_name:
-        # Determine likely permission key prefix based on request_type/stage
-        # Default to submission if not specified
-        prefix = "submission.field"
-        if request_type and ("approval" in request_type.lower() or "review" in request_type.lower()):
-            prefix = "approval.field"
-        
-        perm_key = f"{prefix}.{field_name}"
-        
-        # Query both tenant-specific and platform-wide permissions
+    field_names = {spec[0] for spec in specs if spec[0]}
+    entity_names = {spec[1] for spec in specs if spec[1]}
+    custom_field_ids = {
+        UUID(spec[3]) for spec in specs
+        if spec[2] == "custom_field" and spec[3]
+    }
+    entity_field_names = {
+        spec[0] for spec in specs
+        if spec[2] == "entity" and spec[1] and spec[0]
+    }
+    
+    # Step 0: RolePermission baseline (category: forms_and_data_fields), keyed by field name.
+    # A key matches a field if it is "<prefix>.field.<name>" for any prefix.
+    role_perms_by_field: Dict[str, List[RolePermission]] = {}
+    if field_names:
         role_perms = db.query(RolePermission).filter(
             or_(
                 RolePermission.tenant_id == tenant_id,
                 RolePermission.tenant_id.is_(None)
             ),
             RolePermission.category == "forms_and_data_fields",
-            or_(
-                RolePermission.permission_key == perm_key,
-                RolePermission.permission_key.like(f"%.field.{field_name}") # Fallback for other prefixes
-            )
-        ).order_by(RolePermission.tenant_id.desc()).all() # Tenant-specific first
-        
-        # Deduplicate and apply
-        seen_roles = set()
+            RolePermission.permission_key.like("%.field.%")
+        ).all()
         for rp in role_perms:
-            if rp.role not in seen_roles:
-                if rp.role not in resolved_permissions:
-                    resolved_permissions[rp.role] = {}
-                # RolePermission is a single toggle, so we map it to both view and edit
-                # as it represents "access" to that field in the system defaults
-                resolved_permissions[rp.role]["view"] = rp.is_enabled
-                resolved_permissions[rp.role]["edit"] = rp.is_enabled
-                seen_roles.add(rp.role)
-
-    # Step 1: Get entity-level baseline permissions
-    if entity_name:
-        entity_permission = db.query(EntityPermission).filter(
+            key = rp.permission_key
+            start = key.find(".field.")
+            while start != -1:
+                suffix = key[start + len(".field."):]
+                if suffix in field_names:
+                    role_perms_by_field.setdefault(suffix, []).append(rp)
+                start = key.find(".field.", start + 1)
+    
+    # Step 1: Entity-level baselines (tenant-specific wins over platform-wide)
+    entity_permissions: Dict[str, EntityPermission] = {}
+    if entity_names:
+        for ep in db.query(EntityPermission).filter(
             or_(
                 EntityPermission.tenant_id == tenant_id,
                 EntityPermission.tenant_id.is_(None)
             ),
-            EntityPermission.entity_name == entity_name,
+            EntityPermission.entity_name.in_(entity_names),
             EntityPermission.is_active == True
-        ).first()
-        
-        if entity_permission and entity_permission.role_permissions:
-            for role, perms in entity_permission.role_permissions.items():
-                if role not in resolved_permissions:
-                    resolved_permissions[role] = {}
-                resolved_permissions[role].update(perms)
-    
-    # Step 2: Get field-level overrides
-    if field_source == "custom_field" and custom_field_id:
-        custom_field = db.query(CustomFieldCatalog).filter(
-            CustomFieldCatalog.id == custom_field_id,
-            CustomFieldCatalog.tenant_id == tenant_id,
-            CustomFieldCatalog.is_enabled == True
-        ).first()
-        
-        if custom_field and custom_field.role_permissions:
-            for role, perms in custom_field.role_permissions.items():
-                if role not in resolved_permissions:
-                    resolved_permissions[role] = {}
-                resolved_permissions[role].update(perms)
-    
-    elif field_source == "entity" and entity_name and field_name:
-        field_permission = db.query(EntityFieldPermission).filter(
+        ).all():
+            current = entity_permissions.get(ep.entity_name)
+            if current is None or (current.tenant_id is None and ep.tenant_id is not None):
+                entity_permissions[ep.entity_name] = ep
+    
+    # Step 2: Field-level overrides
+    custom_fields: Dict[str, CustomFieldCatalog] = {}
+    if custom_field_ids:
+        custom_fields = {
+            str(cf.id): cf for cf in db.query(CustomFieldCatalog).filter(
+                CustomFieldCatalog.id.in_(custom_field_ids),
+                CustomFieldCatalog.tenant_id == tenant_id,
+                CustomFieldCatalog.is_enabled == True
+            ).all()
+        }
+    
+    field_permissions: Dict[Tuple[str, str], EntityFieldPermission] = {}
+    if entity_field_names:
+        for fp in db.query(EntityFieldPermission).filter(
             or_(
                 EntityFieldPermission.tenant_id == tenant_id,
                 EntityFieldPermission.tenant_id.is_(None)
             ),
-            EntityFieldPermission.entity_name == entity_name,
-            EntityFieldPermission.field_name == field_name,
+            EntityFieldPermission.entity_name.in_(entity_names),
+            EntityFieldPermission.field_name.in_(entity_field_names),
             EntityFieldPermission.is_active == True
-        ).first()
-        
-        if field_permission and field_permission.role_permissions:
-            for role, perms in field_permission.role_permissions.items():
-                if role not in resolved_permissions:
-                    resolved_permissions[role] = {}
-                resolved_permissions[role].update(perms)
-    
-    # Step 3: Get layout-specific overrides (highest precedence)
-    if request_type and workflow_stage and field_name:
-        layout_access = db.query(FormFieldAccess).filter(
+        ).all():
+            key = (fp.entity_name, fp.field_name)
+            current = field_permissions.get(key)
+            if current is None or (current.tenant_id is None and fp.tenant_id is not None):
+                field_permissions[key] = fp
+    
+    # Step 3: Layout-specific overrides (highest precedence)
+    layout_access: Dict[str, FormFieldAccess] = {}
+    if request_type and workflow_stage and field_names:
+        for access in db.query(FormFieldAccess).filter(
             FormFieldAccess.tenant_id == tenant_id,
-            FormFieldAccess.field_name == field_name,
+            FormFieldAccess.field_name.in_(field_names),
             FormFieldAccess.request_type == request_type,
             FormFieldAccess.workflow_stage == workflow_stage,
             FormFieldAccess.is_active == True
-        ).first()
+        ).all():
+            layout_access.setdefault(access.field_name, access)
+    
+    exact_prefix = _field_permission_prefix(request_type)
+    matrix: PermissionMatrix = {}
+    for field_name, entity_name, field_source, custom_field_id in specs:
+        resolved: Dict[str, Dict[str, bool]] = {}
+        
+        if field_name:
+            # Tenant-specific before platform-wide, exact key before other prefixes
+            candidates = sorted(
+                role_perms_by_field.get(field_name, []),
+                key=lambda rp: (rp.tenant_id is None, rp.permission_key != f"{exact_prefix}.{field_name}")
+            )
+            for rp in candidates:
+                if rp.role not in resolved:
+                    # RolePermission is a single toggle, so we map it to both view and edit
+                    resolved[rp.role] = {"view": rp.is_enabled, "edit": rp.is_enabled}
+        
+        if entity_name and entity_name in entity_permissions:
+            _apply_role_permissions(resolved, entity_permissions[entity_name].role_permissions)
         
-        if layout_access and layout_access.role_permissions:
-            for role, perms in layout_access.role_permissions.items():
-                if role not in resolved_permissions:
-                    resolved_permissions[role] = {}
-                resolved_permissions[role].update(perms)
+        if field_source == "custom_field" and custom_field_id:
+            custom_field = custom_fields.get(custom_field_id)
+            if custom_field:
+                _apply_role_permissions(resolved, custom_field.role_permissions)
+        elif field_source == "entity" and entity_name and field_name:
+            field_permission = field_permissions.get((entity_name, field_name))
+            if field_permission:
+                _apply_role_permissions(resolved, field_permission.role_permissions)
+        
+        if request_type and workflow_stage and field_name and field_name in layout_access:
+            _apply_role_permissions(resolved, layout_access[field_name].role_permissions)
+        
+        matrix[field_name] = resolved
+    
+    return matrix
+
+
+def resolve_layout_permissions(
+    db: Session,
+    tenant_id: UUID,
+    fields: List[Dict[str, Any]],
+    request_type: Optional[str] = None,
+    workflow_stage: Optional[str] = None,
+    role: Optional[str] = None
+) -> PermissionMatrix:
+    """
+    Resolve field permissions for a whole layout in a constant number of queries.
+    
+    Builds the role x field view/edit matrix for all fields at once and caches it
+    per tenant until the tenant's permission rows change.
+    
+    Args:
+        db: Database session
+        tenant_id: Tenant ID
+        fields: Field specs with "field_name" and optional "entity_name",
+            "field_source" and "custom_field_id"
+        request_type: Request type (for layout overrides and the RolePermission prefix)
+        workflow_stage: Workflow stage (for layout overrides)
+        role: If given, only this role's permissions are returned per field
+    
+    Returns:
+        Dict of field permissions: {"field_name": {"role": {"view": bool, "edit": bool}}}
+    """
+    specs: List[FieldSpec] = list(dict.fromkeys(
+        (
+            field["field_name"],
+            field.get("entity_name"),
+            field.get("field_source"),
+            str(field["custom_field_id"]) if field.get("custom_field_id") else None
+        )
+        for field in fields
+    ))
     
-    # Filter by role if specified
+    tenant_key = str(tenant_id) if tenant_id else None
+    cache_key = (request_type, workflow_stage, tuple(specs))
+    versions = _permission_versions(tenant_key)
+    now = time.time()
+    
+    with _permission_matrix_lock:
+        entry = _permission_matrix_cache.get(tenant_key, {}).get(cache_key)
+    if entry and entry[1] == versions and now - entry[0] < PERMISSION_MATRIX_TTL_SECONDS:
+        matrix = entry[2]
+    else:
+        matrix = _build_permission_matrix(db, tenant_id, specs, request_type, workflow_stage)
+        with _permission_matrix_lock:
+            tenant_cache = _permission_matrix_cache.setdefault(tenant_key, {})
+            if len(tenant_cache) >= PERMISSION_MATRIX_MAX_ENTRIES_PER_TENANT:
+                tenant_cache.clear()
+            tenant_cache[cache_key] = (now, versions, matrix)
+    
+    # Copy so callers can't mutate the cached matrix
     if role:
-        return {role: resolved_permissions.get(role, {})}
+        return {
+            field_name: {role: dict(permissions.get(role, {}))}
+            for field_name, permissions in matrix.items()
+        }
+    return {
+        field_name: {r: dict(perms) for r, perms in permissions.items()}
+        for field_name, permissions in matrix.items()
+    }
+
+
+def resolve_field_permissions(
+    db: Session,
+    tenant_id: UUID,
+    entity_name: Optional[str] = None,
+    field_name: Optional[str] = None,
+    field_source: Optional[str] = None,  # "entity", "custom_field", "submission_requirement"
+    custom_field_id: Optional[UUID] = None,
+    request_type: Optional[str] = None,
+    workflow_stage: Optional[str] = None,
+    role: Optional[str] = None
+) -> Dict[str, Dict[str, bool]]:
+    """
+    Resolve field permissions using hierarchical inheritance.
+    
+    Hierarchy:
+    1. Entity-level permissions (baseline)
+    2. Field-level permissions (override)
+    3. Layout-specific permissions (override for workflows)
+    
+    Returns:
+        Dict of role permissions: {"role": {"view": bool, "edit": bool}}
+    """
+    if not field_name:
+        # Entity-level resolution only - not cached per layout
+        resolved_permissions: Dict[str, Dict[str, bool]] = {}
+        if entity_name:
+            entity_permission = db.query(EntityPermission).filter(
+                or_(
+                    EntityPermission.tenant_id == tenant_id,
+                    EntityPermission.tenant_id.is_(None)
+                ),
+                EntityPermission.entity_name == entity_name,
+                EntityPermission.is_active == True
+            ).order_by(EntityPermission.tenant_id.is_(None)).first()
+            if entity_permission:
+                _apply_role_permissions(resolved_permissions, entity_permission.role_permissions)
+        if role:
+            return {role: resolved_permissions.get(role, {})}
+        return resolved_permissions
     
-    return resolved_permissions
+    matrix = resolve_layout_permissions(
+        db=db,
+        tenant_id=tenant_id,
+        fields=[{
+            "field_name": field_name,
+            "entity_name": entity_name,
+            "field_source": field_source,
+            "custom_field_id": custom_field_id
+        }],
+        request_type=request_type,
+        workflow_stage=workflow_stage,
+        role=role
+    )
+    return matrix.get(field_name, {role: {}} if role else {})
 
 
 def get_effective_permission(
@@ -1,9 +1,13 @@
 """
 RAG (Retrieval-Augmented Generation) service for agent knowledge base
 """
-from typing import List, Dict, Optional
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from typing import AsyncIterator, List, Dict, Optional, Tuple
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import (
+    Distance, VectorParams, PointStruct, SearchRequest, Filter, FieldCondition, MatchValue,
+    FilterSelector
+)
+import asyncio
 import hashlib
 import json
 from app.core.config import settings
@@ -13,34 +17,83 @@ logger = logging.getLogger(__name__)
 
 
 class RAGService:
-    """Service for RAG operations with Qdrant"""
+    """
+    Service for RAG operations with Qdrant
     
-    def __init__(self):
-        """Initialize Qdrant client"""
+    Uses the async Qdrant client so searches and upserts never block the event
+    loop. The client's HTTP/gRPC connections are reused across requests, every
+    call is bounded by QDRANT_TIMEOUT_SECONDS, and at most QDRANT_MAX_CONCURRENCY
+    calls are in flight per worker process.
+    """
+    
+    def __init__(self, client: Optional[AsyncQdrantClient] = None):
+        """
+        Initialize Qdrant client
+        
+        Args:
+            client: Pre-built async client (e.g. AsyncQdrantClient(location=":memory:") in tests)
+        """
+        self.collection_name = "agent_knowledge_base"
+        self._collection_ready = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
         try:
-            self.client = QdrantClient(
+            self.client = client or AsyncQdrantClient(
                 url=settings.QDRANT_URL,
                 api_key=settings.QDRANT_API_KEY if settings.QDRANT_API_KEY else None,
+                timeout=settings.QDRANT_TIMEOUT_SECONDS,
+                prefer_grpc=settings.QDRANT_PREFER_GRPC,
             )
-            self.collection_name = "agent_knowledge_base"
-            self._ensure_collection_exists()
             logger.info("RAG service initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize RAG service: {e}")
             self.client = None
     
-    def _ensure_collection_exists(self):
+    async def _call(self, method: str, **kwargs):
+        """
+        Call an async Qdrant client method under the concurrency limit and timeout
+        
+        The collection is ensured on first use, since the async client cannot
+        create it at import time.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Semaphores are bound to an event loop - start fresh for a new loop
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(max(1, settings.QDRANT_MAX_CONCURRENCY))
+        
+        if not self._collection_ready:
+            await self._ensure_collection_exists()
+        
+        async with self._semaphore:
+            return await asyncio.wait_for(
+                getattr(self.client, method)(**kwargs),
+                timeout=settings.QDRANT_TIMEOUT_SECONDS
+            )
+    
+    async def close(self):
+        """Close the pooled Qdrant connections"""
+        if self.client:
+            try:
+                await self.client.close()
+            except Exception as e:
+                logger.warning(f"Error closing Qdrant client: {e}")
+    
+    async def _ensure_collection_exists(self):
         """Ensure the collection exists in Qdrant"""
         if not self.client:
             return
         
+        # Mark ready first so the calls below (and concurrent first requests) don't recurse
+        self._collection_ready = True
         try:
-            collections = self.client.get_collections().collections
+            collections = (await self._call("get_collections")).collections
             collection_names = [col.name for col in collections]
             
             if self.collection_name not in collection_names:
                 # Create collection with 384-dimensional vectors (sentence-transformers default)
-                self.client.create_collection(
+                await self._call(
+                    "create_collection",
                     collection_name=self.collection_name,
                     vectors_config=VectorParams(
                         size=384,  # Default for all-MiniLM-L6-v2
@@ -50,68 +103,61 @@ class RAGService:
                 logger.info(f"Created collection: {self.collection_name}")
         except Exception as e:
             logger.error(f"Error ensuring collection exists: {e}")
+            self._collection_ready = False
+    
+    @staticmethod
+    def _agent_filter(agent_id: str) -> Filter:
+        """Filter matching points that belong to an agent"""
+        return Filter(
+            must=[FieldCondition(key="agent_id", match=MatchValue(value=agent_id))]
+        )
     
     def _generate_document_id(self, agent_id: str, document_type: str, content_hash: str) -> str:
         """Generate a unique document ID"""
         combined = f"{agent_id}:{document_type}:{content_hash}"
         return hashlib.sha256(combined.encode()).hexdigest()
     
-    async def ingest_document(
+    @staticmethod
+    def _sanitize_metadata(value):
+        """Convert metadata values to Qdrant-compatible types (str, int, float, bool, list, dict)"""
+        from datetime import datetime, date
+        import uuid
+        
+        if value is None:
+            return None
+        elif isinstance(value, (str, int, float, bool)):
+            return value
+        elif isinstance(value, (datetime, date)):
+            # Convert datetime/date to ISO format string
+            return value.isoformat() if isinstance(value, datetime) else str(value)
+        elif isinstance(value, uuid.UUID):
+            return str(value)
+        elif isinstance(value, (list, tuple)):
+            return [RAGService._sanitize_metadata(item) for item in value]
+        elif isinstance(value, dict):
+            return {k: RAGService._sanitize_metadata(v) for k, v in value.items()}
+        else:
+            # Convert other types to string
+            return str(value)
+    
+    def _build_points(
         self,
         agent_id: str,
         document_type: str,
         content: str,
-        metadata: Optional[Dict] = None,
-        embedding: Optional[List[float]] = None
-    ) -> str:
+        metadata: Optional[Dict],
+        embedding: List[float]
+    ) -> Tuple[str, PointStruct, PointStruct]:
         """
-        Ingest a document into the knowledge base
-        
-        Args:
-            agent_id: ID of the agent
-            document_type: Type of document (e.g., 'description', 'documentation', 'code')
-            content: Text content of the document
-            metadata: Additional metadata
-            embedding: Pre-computed embedding (if None, will be generated)
+        Build the Qdrant point for a document
         
         Returns:
-            Document ID
+            Tuple of (document ID, point with full metadata, point with minimal metadata)
         """
-        if not self.client:
-            raise Exception("RAG service not initialized")
-        
         # Generate content hash
         content_hash = hashlib.md5(content.encode()).hexdigest()
         doc_id = self._generate_document_id(agent_id, document_type, content_hash)
         
-        # Generate embedding if not provided
-        if embedding is None:
-            embedding = await self._generate_embedding(content)
-        
-        # Prepare metadata - Qdrant only supports specific types
-        # Convert all values to Qdrant-compatible types (str, int, float, bool, list, dict)
-        def sanitize_metadata(value):
-            """Convert metadata values to Qdrant-compatible types"""
-            from datetime import datetime, date
-            import uuid
-            
-            if value is None:
-                return None
-            elif isinstance(value, (str, int, float, bool)):
-                return value
-            elif isinstance(value, (datetime, date)):
-                # Convert datetime/date to ISO format string
-                return value.isoformat() if isinstance(value, datetime) else str(value)
-            elif isinstance(value, uuid.UUID):
-                return str(value)
-            elif isinstance(value, (list, tuple)):
-                return [sanitize_metadata(item) for item in value]
-            elif isinstance(value, dict):
-                return {k: sanitize_metadata(v) for k, v in value.items()}
-            else:
-                # Convert other types to string
-                return str(value)
-        
         base_metadata = {
             "agent_id": str(agent_id),
             "document_type": str(document_type),
@@ -123,52 +169,146 @@ class RAGService:
         additional_metadata = {}
         if metadata:
             for key, value in metadata.items():
-                sanitized_value = sanitize_metadata(value)
+                sanitized_value = self._sanitize_metadata(value)
                 if sanitized_value is not None:
                     additional_metadata[str(key)] = sanitized_value
         
-        doc_metadata = {**base_metadata, **additional_metadata}
+        minimal_metadata = {
+            "agent_id": str(agent_id),
+            "document_type": str(document_type),
+            "content_hash": str(content_hash),
+        }
         
-        # Upsert point
+        return (
+            doc_id,
+            PointStruct(id=doc_id, vector=embedding, payload={**base_metadata, **additional_metadata}),
+            PointStruct(id=doc_id, vector=embedding, payload=minimal_metadata)
+        )
+    
+    async def _upsert_points(
+        self,
+        points: List[PointStruct],
+        minimal_points: List[PointStruct],
+        agent_id: str,
+        document_type: str
+    ):
+        """Upsert points, retrying with minimal metadata if the full payload is rejected"""
         try:
-            point = PointStruct(
-                id=doc_id,
-                vector=embedding,
-                payload=doc_metadata
-            )
-            
-            self.client.upsert(
+            await self._call(
+                "upsert",
                 collection_name=self.collection_name,
-                points=[point]
+                points=points
             )
         except Exception as e:
             logger.error(
                 f"Qdrant upsert error: {e} - "
                 f"Agent ID: {agent_id} - Document Type: {document_type} - "
-                f"Metadata keys: {list(doc_metadata.keys())} - "
-                f"Content length: {len(content)}",
+                f"Points: {len(points)} - "
+                f"Metadata keys: {sorted({key for point in points for key in point.payload})}",
                 exc_info=True  # Include full traceback
             )
             # Try with minimal metadata if full metadata fails
-            minimal_metadata = {
-                "agent_id": str(agent_id),
-                "document_type": str(document_type),
-                "content_hash": str(content_hash),
-            }
-            point = PointStruct(
-                id=doc_id,
-                vector=embedding,
-                payload=minimal_metadata
-            )
-            self.client.upsert(
+            await self._call(
+                "upsert",
                 collection_name=self.collection_name,
-                points=[point]
+                points=minimal_points
             )
-            logger.warning(f"Ingested with minimal metadata due to error")
+            logger.warning(f"Ingested {len(minimal_points)} points with minimal metadata due to error")
+    
+    async def ingest_document(
+        self,
+        agent_id: str,
+        document_type: str,
+        content: str,
+        metadata: Optional[Dict] = None,
+        embedding: Optional[List[float]] = None
+    ) -> str:
+        """
+        Ingest a document into the knowledge base
+        
+        Args:
+            agent_id: ID of the agent
+            document_type: Type of document (e.g., 'description', 'documentation', 'code')
+            content: Text content of the document
+            metadata: Additional metadata
+            embedding: Pre-computed embedding (if None, will be generated)
+        
+        Returns:
+            Document ID
+        """
+        if not self.client:
+            raise Exception("RAG service not initialized")
+        
+        # Generate embedding if not provided
+        if embedding is None:
+            embedding = await self._generate_embedding(content)
+        
+        doc_id, point, minimal_point = self._build_points(
+            agent_id, document_type, content, metadata, embedding
+        )
+        await self._upsert_points([point], [minimal_point], agent_id, document_type)
         
         logger.info(f"Ingested document {doc_id} for agent {agent_id}")
         return doc_id
     
+    async def ingest_documents(
+        self,
+        agent_id: str,
+        document_type: str,
+        contents: List[str],
+        metadatas: Optional[List[Optional[Dict]]] = None,
+        embeddings: Optional[List[List[float]]] = None
+    ) -> List[str]:
+        """
+        Ingest many documents with batched embedding and bulk upserts
+        
+        Embeddings are generated in batches of EMBEDDING_BATCH_SIZE and points are
+        upserted in batches of RAG_UPSERT_BATCH_SIZE.
+        
+        Args:
+            agent_id: ID of the agent
+            document_type: Type of document
+            contents: Text content per document
+            metadatas: Additional metadata per document (same length as contents)
+            embeddings: Pre-computed embeddings (if None, will be generated)
+        
+        Returns:
+            Document IDs in input order
+        """
+        if not self.client:
+            raise Exception("RAG service not initialized")
+        
+        if metadatas is not None and len(metadatas) != len(contents):
+            raise ValueError("metadatas must have the same length as contents")
+        if embeddings is not None and len(embeddings) != len(contents):
+            raise ValueError("embeddings must have the same length as contents")
+        
+        upsert_batch_size = max(1, settings.RAG_UPSERT_BATCH_SIZE)
+        doc_ids: List[str] = []
+        
+        for batch_start in range(0, len(contents), upsert_batch_size):
+            batch_contents = contents[batch_start:batch_start + upsert_batch_size]
+            if embeddings is not None:
+                batch_embeddings = embeddings[batch_start:batch_start + upsert_batch_size]
+            else:
+                batch_embeddings = await self._generate_embeddings(batch_contents)
+            
+            points = []
+            minimal_points = []
+            for offset, (content, embedding) in enumerate(zip(batch_contents, batch_embeddings)):
+                metadata = metadatas[batch_start + offset] if metadatas is not None else None
+                doc_id, point, minimal_point = self._build_points(
+                    agent_id, document_type, content, metadata, embedding
+                )
+                doc_ids.append(doc_id)
+                points.append(point)
+                minimal_points.append(minimal_point)
+            
+            await self._upsert_points(points, minimal_points, agent_id, document_type)
+        
+        logger.info(f"Ingested {len(doc_ids)} documents for agent {agent_id}")
+        return doc_ids
+    
     async def _generate_embedding(self, text: str) -> List[float]:
         """
         Generate embedding for text using production embedding service
@@ -176,6 +316,19 @@ class RAGService:
         from app.services.embedding_service import embedding_service
         return await embedding_service.generate_embedding(text)
     
+    async def _generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for many texts in batches of EMBEDDING_BATCH_SIZE
+        """
+        from app.services.embedding_service import embedding_service
+        batch_size = max(1, settings.EMBEDDING_BATCH_SIZE)
+        embeddings: List[List[float]] = []
+        for batch_start in range(0, len(texts), batch_size):
+            embeddings.extend(
+                await embedding_service.generate_batch_embeddings(texts[batch_start:batch_start + batch_size])
+            )
+        return embeddings
+    
     async def search(
         self,
         query: str,
@@ -201,20 +354,12 @@ class RAGService:
         # Generate query embedding
         query_embedding = await self._generate_embedding(query)
         
-        # Build filter
-        filter_condition = None
-        if agent_id:
-            filter_condition = {
-                "must": [
-                    {"key": "agent_id", "match": {"value": agent_id}}
-                ]
-            }
-        
         # Search
-        results = self.client.search(
+        results = await self._call(
+            "search",
             collection_name=self.collection_name,
             query_vector=query_embedding,
-            query_filter=filter_condition,
+            query_filter=self._agent_filter(agent_id) if agent_id else None,
             limit=limit,
             score_threshold=score_threshold
         )
@@ -231,31 +376,108 @@ class RAGService:
         
         return formatted_results
     
-    async def get_agent_knowledge(self, agent_id: str) -> List[Dict]:
-        """Get all knowledge for a specific agent"""
+    async def search_many(
+        self,
+        queries: List[str],
+        agent_id: Optional[str] = None,
+        limit: int = 5,
+        score_threshold: float = 0.7
+    ) -> List[List[Dict]]:
+        """
+        Search the knowledge base for several queries in one round trip
+        
+        Query embeddings are generated in a single batch and sent to Qdrant as
+        one batch search.
+        
+        Args:
+            queries: Search queries
+            agent_id: Filter by agent ID (optional)
+            limit: Maximum number of results per query
+            score_threshold: Minimum similarity score
+        
+        Returns:
+            One list of matching documents with scores per query, in input order
+        """
         if not self.client:
+            raise Exception("RAG service not initialized")
+        
+        if not queries:
             return []
         
-        try:
-            # Scroll through all points for this agent
-            results = self.client.scroll(
+        query_embeddings = await self._generate_embeddings(queries)
+        
+        batch_results = await self._call(
+            "search_batch",
+            collection_name=self.collection_name,
+            requests=[
+                SearchRequest(
+                    vector=embedding,
+                    filter=self._agent_filter(agent_id) if agent_id else None,
+                    limit=limit,
+                    score_threshold=score_threshold,
+                    with_payload=True
+                )
+                for embedding in query_embeddings
+            ]
+        )
+        
+        return [
+            [
+                {
+                    "id": result.id,
+                    "score": result.score,
+                    "metadata": result.payload,
+                    "content": result.payload.get("content", "")
+                }
+                for result in results
+            ]
+            for results in batch_results
+        ]
+    
+    async def iter_agent_knowledge(self, agent_id: str) -> AsyncIterator[Dict]:
+        """
+        Stream all knowledge for a specific agent
+        
+        Follows Qdrant's next_page_offset one page (RAG_SCROLL_PAGE_SIZE points)
+        at a time, so memory stays bounded however many chunks the agent has.
+        Errors are raised to the caller.
+        
+        Args:
+            agent_id: ID of the agent
+        
+        Yields:
+            Documents with ID, metadata and content
+        """
+        if not self.client:
+            return
+        
+        offset = None
+        while True:
+            points, offset = await self._call(
+                "scroll",
                 collection_name=self.collection_name,
-                scroll_filter={
-                    "must": [
-                        {"key": "agent_id", "match": {"value": agent_id}}
-                    ]
-                },
-                limit=100
+                scroll_filter=self._agent_filter(agent_id),
+                limit=max(1, settings.RAG_SCROLL_PAGE_SIZE),
+                offset=offset,
+                with_payload=True,
+                with_vectors=False
             )
-            
-            return [
-                {
+            for point in points:
+                yield {
                     "id": point.id,
                     "metadata": point.payload,
                     "content": point.payload.get("content", "")
                 }
-                for point in results[0]
-            ]
+            if offset is None:
+                break
+    
+    async def get_agent_knowledge(self, agent_id: str) -> List[Dict]:
+        """Get all knowledge for a specific agent"""
+        if not self.client:
+            return []
+        
+        try:
+            return [document async for document in self.iter_agent_knowledge(agent_id)]
         except Exception as e:
             logger.error(f"Error getting agent knowledge: {e}")
             return []
@@ -266,25 +488,13 @@ class RAGService:
             return False
         
         try:
-            # Get all points for this agent
-            results = self.client.scroll(
+            # Filter-based delete runs server-side, whatever the number of points
+            await self._call(
+                "delete",
                 collection_name=self.collection_name,
-                scroll_filter={
-                    "must": [
-                        {"key": "agent_id", "match": {"value": agent_id}}
-                    ]
-                },
-                limit=1000
+                points_selector=FilterSelector(filter=self._agent_filter(agent_id))
             )
-            
-            if results[0]:
-                point_ids = [point.id for point in results[0]]
-                self.client.delete(
-                    collection_name=self.collection_name,
-                    points_selector=point_ids
-                )
-                logger.info(f"Deleted {len(point_ids)} documents for agent {agent_id}")
-            
+            logger.info(f"Deleted documents for agent {agent_id}")
             return True
         except Exception as e:
             logger.error(f"Error deleting agent knowledge: {e}")
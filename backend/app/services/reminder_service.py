@@ -114,13 +114,13 @@ class ReminderService:
         reminder: WorkflowReminder
     ) -> Dict[str, Any]:
         """
-        Send a reminder email
+        Queue a reminder email in the email outbox
         
         Args:
             reminder: WorkflowReminder to send
         
         Returns:
-            Send result
+            Notification result ("queued" is False with a "reason" or "error" on failure)
         """
         try:
             # Get entity data (this would need to be implemented per entity type)
@@ -131,7 +131,7 @@ class ReminderService:
                 reminder.is_sent = True
                 reminder.last_error = "Entity not found"
                 self.db.commit()
-                return {"sent": False, "error": "Entity not found"}
+                return {"queued": False, "error": "Entity not found"}
             
             # Get workflow configuration
             workflow_config = self.orchestration.get_workflow_for_entity(
@@ -145,7 +145,7 @@ class ReminderService:
                 reminder.is_sent = True
                 reminder.last_error = "Workflow configuration not found"
                 self.db.commit()
-                return {"sent": False, "error": "Workflow configuration not found"}
+                return {"queued": False, "error": "Workflow configuration not found"}
             
             # Get user who scheduled the reminder (or use system user)
             user = None
@@ -164,10 +164,10 @@ class ReminderService:
                 reminder.is_sent = True
                 reminder.last_error = "No user found"
                 self.db.commit()
-                return {"sent": False, "error": "No user found"}
+                return {"queued": False, "error": "No user found"}
             
-            # Send notification using orchestration service
-            notification_result = await self.orchestration.send_stage_notifications(
+            # Queue notification emails (committed below with the reminder status)
+            notification_result = self.orchestration.queue_stage_notifications(
                 workflow_config=workflow_config,
                 workflow_stage=reminder.workflow_stage,
                 entity_type=reminder.entity_type,
@@ -178,7 +178,7 @@ class ReminderService:
             )
             
             # Update reminder status
-            if notification_result.get("sent", False):
+            if notification_result.get("queued", False):
                 reminder.is_sent = True
                 reminder.sent_at = datetime.utcnow()
                 reminder.last_error = None
@@ -188,7 +188,7 @@ class ReminderService:
             
             self.db.commit()
             
-            logger.info(f"Reminder {reminder.id} sent: {notification_result.get('sent', False)}")
+            logger.info(f"Reminder {reminder.id} queued: {notification_result.get('queued', False)}")
             
             return notification_result
             
@@ -197,14 +197,17 @@ class ReminderService:
             reminder.send_attempts += 1
             reminder.last_error = str(e)
             self.db.commit()
-            return {"sent": False, "error": str(e)}
+            return {"queued": False, "error": str(e)}
     
     async def process_due_reminders(
         self,
         limit: int = 100
     ) -> Dict[str, Any]:
         """
-        Process all due reminders
+        Process this tenant's due reminders
+        
+        Reminders are claimed and sent as per-recipient digests by ReminderWorker,
+        so this is safe to run alongside the reminder worker.
         
         Args:
             limit: Maximum number of reminders to process
@@ -212,31 +215,8 @@ class ReminderService:
         Returns:
             Processing results
         """
-        due_reminders = self.get_due_reminders(limit)
-        
-        results = {
-            "processed": 0,
-            "sent": 0,
-            "failed": 0,
-            "errors": []
-        }
-        
-        for reminder in due_reminders:
-            result = await self.send_reminder(reminder)
-            results["processed"] += 1
-            
-            if result.get("sent", False):
-                results["sent"] += 1
-            else:
-                results["failed"] += 1
-                results["errors"].append({
-                    "reminder_id": str(reminder.id),
-                    "error": result.get("error", "Unknown error")
-                })
-        
-        logger.info(f"Processed {results['processed']} reminders: {results['sent']} sent, {results['failed']} failed")
-        
-        return results
+        from app.services.reminder_worker import ReminderWorker
+        return ReminderWorker(batch_size=limit).process_batch(self.db, tenant_id=self.tenant_id)
     
     async def _get_entity_data(
         self,
@@ -247,32 +227,10 @@ class ReminderService:
         Get entity data for reminder
         
         This needs to be implemented per entity type.
-        For now, we'll support agents.
+        For now, we'll support agents and vendors (see reminder_worker.load_entity_data).
         """
-        if entity_type == "agent":
-            from app.models.agent import Agent
-            agent = self.db.query(Agent).filter(Agent.id == entity_id).first()
-            if agent:
-                return {
-                    "id": str(agent.id),
-                    "name": agent.name,
-                    "type": agent.type,
-                    "category": agent.category,
-                    "status": agent.status,
-                }
-        elif entity_type == "vendor":
-            from app.models.vendor import Vendor
-            vendor = self.db.query(Vendor).filter(Vendor.id == entity_id).first()
-            if vendor:
-                return {
-                    "id": str(vendor.id),
-                    "name": vendor.name,
-                    "type": vendor.type,
-                    "status": vendor.status,
-                }
-        # Add more entity types as needed
-        
-        return None
+        from app.services.reminder_worker import load_entity_data
+        return load_entity_data(self.db, entity_type, [entity_id]).get(entity_id)
     
     def cancel_reminders(
         self,
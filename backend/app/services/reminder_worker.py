@@ -0,0 +1,354 @@
+"""
+Reminder worker
+
+Sends due workflow reminders for every tenant. Each pass claims a batch of due
+reminders with FOR UPDATE SKIP LOCKED and leases them (next_attempt_at pushed
+out), so several replicas can run it at once and reminders held by one that
+died are picked up again once the lease runs out.
+
+A batch is resolved in bulk: entities per entity type, the active workflows of
+the batch's tenants, the users who scheduled the reminders and the recipient
+users per role. Reminders are then grouped by (tenant, workflow, stage,
+recipient) so each recipient gets one digest email per workflow stage rather
+than one email per reminder. Digests are queued in the email outbox in the same
+transaction that marks the reminders sent; the email outbox worker delivers
+them.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+from datetime import datetime, timedelta
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.core.backoff import retry_delay
+from app.core.database import SessionLocal
+from app.models.workflow_config import WorkflowConfiguration
+from app.models.workflow_reminder import WorkflowReminder
+from app.models.user import User
+from app.services.email_service import EmailService
+from app.services.workflow_orchestration import WorkflowOrchestrationService
+import html
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+REMINDER_BATCH_SIZE = 500
+REMINDER_POLL_SECONDS = 60.0
+
+# A claimed reminder is picked up by another worker after this long
+REMINDER_LEASE_SECONDS = 600
+
+MAX_REMINDER_ATTEMPTS = 5
+
+
+def load_entity_data(db: Session, entity_type: str, entity_ids: List[UUID]) -> Dict[UUID, Dict[str, Any]]:
+    """
+    Entity data for reminders, one query per entity type
+    
+    Supports agents and vendors; other entity types have no data.
+    
+    Returns:
+        Entity data by entity ID
+    """
+    if entity_type == "agent":
+        from app.models.agent import Agent
+        return {
+            agent.id: {
+                "id": str(agent.id),
+                "name": agent.name,
+                "type": agent.type,
+                "category": agent.category,
+                "status": agent.status,
+            }
+            for agent in db.query(Agent).filter(Agent.id.in_(entity_ids)).all()
+        }
+    if entity_type == "vendor":
+        from app.models.vendor import Vendor
+        return {
+            vendor.id: {
+                "id": str(vendor.id),
+                "name": vendor.name,
+                "type": vendor.type,
+                "status": vendor.status,
+            }
+            for vendor in db.query(Vendor).filter(Vendor.id.in_(entity_ids)).all()
+        }
+    # Add more entity types as needed
+    return {}
+
+
+def _role_name(user: User) -> str:
+    return getattr(user.role, "value", user.role)
+
+
+class ReminderBatchContext:
+    """Entities, workflows and users for a claimed batch, loaded in bulk"""
+    
+    __slots__ = ("entities", "workflows", "users", "users_by_role")
+    
+    def __init__(self, db: Session, reminders: List[WorkflowReminder]):
+        tenant_ids = {reminder.tenant_id for reminder in reminders}
+        
+        ids_by_type: Dict[str, set] = {}
+        for reminder in reminders:
+            ids_by_type.setdefault(reminder.entity_type, set()).add(reminder.entity_id)
+        # (entity_type, entity_id) -> entity data
+        self.entities: Dict[Tuple[str, UUID], Dict[str, Any]] = {}
+        for entity_type, entity_ids in ids_by_type.items():
+            for entity_id, data in load_entity_data(db, entity_type, list(entity_ids)).items():
+                self.entities[(entity_type, entity_id)] = data
+        
+        # tenant_id -> active workflows
+        self.workflows: Dict[UUID, List[WorkflowConfiguration]] = {}
+        for workflow in db.query(WorkflowConfiguration).filter(
+            WorkflowConfiguration.tenant_id.in_(tenant_ids),
+            WorkflowConfiguration.status == "active"
+        ).all():
+            self.workflows.setdefault(workflow.tenant_id, []).append(workflow)
+        
+        scheduler_ids = {reminder.scheduled_by for reminder in reminders if reminder.scheduled_by}
+        self.users: Dict[UUID, User] = {
+            user.id: user for user in db.query(User).filter(User.id.in_(scheduler_ids)).all()
+        } if scheduler_ids else {}
+        
+        # Roles named in recipient configs, plus tenant_admin (fallback sender and next_approver)
+        roles = {"tenant_admin"}
+        for reminder in reminders:
+            for recipient in reminder.recipients or []:
+                if recipient not in ("user", "vendor", "next_approver") and "@" not in recipient:
+                    roles.add(recipient)
+        # (tenant_id, role) -> users
+        self.users_by_role: Dict[Tuple[UUID, str], List[User]] = {}
+        for user in db.query(User).filter(User.tenant_id.in_(tenant_ids), User.role.in_(sorted(roles))).all():
+            self.users_by_role.setdefault((user.tenant_id, _role_name(user)), []).append(user)
+    
+    def role_lookup(self, tenant_id: UUID) -> Callable[[str], List[User]]:
+        """Users with a role in a tenant, for WorkflowOrchestrationService.build_stage_notification"""
+        return lambda role: self.users_by_role.get((tenant_id, role), [])
+    
+    def sender_for(self, reminder: WorkflowReminder) -> Optional[User]:
+        """User who scheduled the reminder, or the tenant admin as fallback"""
+        user = self.users.get(reminder.scheduled_by) if reminder.scheduled_by else None
+        return user or next(iter(self.users_by_role.get((reminder.tenant_id, "tenant_admin"), [])), None)
+
+
+def build_digest(workflow_stage: str, notifications: List[Tuple[WorkflowReminder, Dict[str, Any], Dict[str, Any]]]) -> Tuple[str, str]:
+    """
+    Subject and HTML body of one recipient's reminders for a workflow stage
+    
+    Args:
+        workflow_stage: Workflow stage
+        notifications: (reminder, entity data, stage notification) for each reminder
+    
+    Returns:
+        The stage notification itself for a single reminder, else a digest listing the entities
+    """
+    if len(notifications) == 1:
+        notification = notifications[0][2]
+        return notification["subject"], notification["html_body"]
+    
+    stage_title = workflow_stage.replace('_', ' ').title()
+    items = "".join(
+        f"<li>{html.escape(reminder.entity_type.title())}: <strong>{html.escape(str(entity_data.get('name', 'Entity')))}</strong></li>"
+        for reminder, entity_data, _ in notifications
+    )
+    subject = f"Reminder: {len(notifications)} items awaiting {stage_title}"
+    body = f"""
+            <html>
+            <body>
+                <h2>{stage_title} - {len(notifications)} items awaiting action</h2>
+                <ul>{items}</ul>
+                <p>Please review and take appropriate action.</p>
+            </body>
+            </html>
+            """
+    return subject, body
+
+
+class ReminderWorker:
+    """
+    Sends due workflow reminders as per-recipient digests
+    
+    Args:
+        session_factory: Creates database sessions
+        batch_size: Reminders claimed per pass
+    """
+    
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal, batch_size: int = REMINDER_BATCH_SIZE):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+    
+    def claim_batch(self, db: Session, now: datetime, tenant_id: Optional[UUID] = None) -> List[WorkflowReminder]:
+        """
+        Claim due reminders and lease them to this worker
+        
+        Args:
+            db: Database session (committed, so the row locks are held only briefly)
+            now: Current time
+            tenant_id: Only claim this tenant's reminders
+        
+        Returns:
+            Claimed reminders
+        """
+        query = db.query(WorkflowReminder).filter(
+            WorkflowReminder.is_sent == False,
+            WorkflowReminder.reminder_date <= now,
+            or_(WorkflowReminder.next_attempt_at.is_(None), WorkflowReminder.next_attempt_at <= now)
+        )
+        if tenant_id:
+            query = query.filter(WorkflowReminder.tenant_id == tenant_id)
+        reminders = query.order_by(
+            WorkflowReminder.reminder_date
+        ).limit(self.batch_size).with_for_update(skip_locked=True).all()
+        
+        lease_until = now + timedelta(seconds=REMINDER_LEASE_SECONDS)
+        for reminder in reminders:
+            reminder.next_attempt_at = lease_until
+        db.commit()
+        return reminders
+    
+    def queue_digests(
+        self,
+        db: Session,
+        reminders: List[WorkflowReminder],
+        context: ReminderBatchContext
+    ) -> Tuple[Dict[UUID, Optional[str]], Dict[UUID, bool], int]:
+        """
+        Queue digest emails for claimed reminders (not committed)
+        
+        Returns:
+            Tuple of (error by reminder ID, None if queued; whether the error is
+            final by reminder ID; number of emails queued)
+        """
+        errors: Dict[UUID, Optional[str]] = {}
+        final: Dict[UUID, bool] = {}
+        orchestrations: Dict[UUID, WorkflowOrchestrationService] = {}
+        # (tenant_id, workflow_id, stage, email) -> [(reminder, entity data, notification)]
+        digests: Dict[Tuple[UUID, UUID, str, str], List[Tuple[WorkflowReminder, Dict[str, Any], Dict[str, Any]]]] = {}
+        
+        for reminder in reminders:
+            entity_data = context.entities.get((reminder.entity_type, reminder.entity_id))
+            if not entity_data:
+                errors[reminder.id], final[reminder.id] = "Entity not found", True
+                continue
+            
+            workflow = WorkflowOrchestrationService.select_workflow(
+                context.workflows.get(reminder.tenant_id, []), reminder.entity_type, entity_data
+            )
+            if not workflow:
+                errors[reminder.id], final[reminder.id] = "Workflow configuration not found", True
+                continue
+            
+            user = context.sender_for(reminder)
+            if not user:
+                errors[reminder.id], final[reminder.id] = "No user found", True
+                continue
+            
+            orchestration = orchestrations.get(reminder.tenant_id)
+            if orchestration is None:
+                orchestration = orchestrations[reminder.tenant_id] = WorkflowOrchestrationService(db, reminder.tenant_id)
+            notification, reason = orchestration.build_stage_notification(
+                workflow,
+                reminder.workflow_stage,
+                reminder.entity_type,
+                reminder.entity_id,
+                entity_data,
+                user,
+                recipients_config={"recipients": reminder.recipients},
+                users_by_role=context.role_lookup(reminder.tenant_id)
+            )
+            if notification is None:
+                errors[reminder.id], final[reminder.id] = reason, False
+                continue
+            
+            errors[reminder.id] = None
+            for recipient in notification["recipients"]:
+                key = (reminder.tenant_id, workflow.id, reminder.workflow_stage, recipient["email"])
+                digests.setdefault(key, []).append((reminder, entity_data, notification))
+        
+        for (tenant_id, _, workflow_stage, email), notifications in digests.items():
+            subject, html_body = build_digest(workflow_stage, notifications)
+            EmailService.queue_email(
+                db,
+                to_email=email,
+                subject=subject,
+                html_body=html_body,
+                text_body=html_body.replace("<br>", "\n").replace("<p>", "").replace("</p>", "\n"),
+                tenant_id=tenant_id
+            )
+        return errors, final, len(digests)
+    
+    def process_batch(self, db: Session, now: Optional[datetime] = None, tenant_id: Optional[UUID] = None) -> Dict[str, Any]:
+        """
+        Claim due reminders, queue their digests and record the outcome in one transaction
+        
+        Args:
+            db: Database session
+            now: Current time
+            tenant_id: Only process this tenant's reminders
+        
+        Returns:
+            Counts of processed, sent and failed reminders, emails queued, and errors
+        """
+        now = now or datetime.utcnow()
+        results = {"processed": 0, "sent": 0, "failed": 0, "emails_queued": 0, "errors": []}
+        reminders = self.claim_batch(db, now, tenant_id)
+        if not reminders:
+            return results
+        
+        try:
+            context = ReminderBatchContext(db, reminders)
+            errors, final, results["emails_queued"] = self.queue_digests(db, reminders, context)
+        except Exception:
+            # Leave the reminders leased; they are retried once the lease runs out
+            db.rollback()
+            raise
+        
+        for reminder in reminders:
+            results["processed"] += 1
+            error = errors[reminder.id]
+            if error is None:
+                reminder.is_sent = True
+                reminder.sent_at = now
+                reminder.last_error = None
+                reminder.next_attempt_at = None
+                results["sent"] += 1
+                continue
+            
+            reminder.send_attempts = (reminder.send_attempts or 0) + 1
+            reminder.last_error = error
+            if final[reminder.id] or reminder.send_attempts >= MAX_REMINDER_ATTEMPTS:
+                # Not retried (matches how missing entities were always handled)
+                reminder.is_sent = True
+                reminder.next_attempt_at = None
+            else:
+                reminder.next_attempt_at = now + timedelta(seconds=retry_delay(reminder.send_attempts))
+            results["failed"] += 1
+            results["errors"].append({"reminder_id": str(reminder.id), "error": error})
+        
+        db.commit()
+        logger.info(
+            f"Processed {results['processed']} reminders: {results['sent']} sent in "
+            f"{results['emails_queued']} emails, {results['failed']} failed"
+        )
+        return results
+    
+    def run_once(self) -> Dict[str, Any]:
+        """Process one batch in a new session"""
+        db = self.session_factory()
+        try:
+            return self.process_batch(db)
+        finally:
+            db.close()
+    
+    def run(self, stop: Optional[threading.Event] = None, poll_interval: float = REMINDER_POLL_SECONDS) -> None:
+        """Process reminders until stopped, sleeping between passes once none are due"""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                results = self.run_once()
+            except Exception as e:
+                logger.error(f"Reminder pass failed: {e}", exc_info=True)
+                results = {"processed": 0}
+            if results["processed"] < self.batch_size:
+                stop.wait(poll_interval)
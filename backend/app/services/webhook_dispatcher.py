@@ -0,0 +1,395 @@
+"""
+Webhook dispatcher
+
+Drains the webhook outbox: webhook_deliveries rows queued as pending by
+WebhookService. Each pass claims a batch of due deliveries with
+FOR UPDATE SKIP LOCKED, so several dispatchers can run side by side, and leases
+them (status "delivering", next_attempt_at pushed out and a fresh lease token)
+so deliveries held by a dispatcher that died are picked up again once the lease
+runs out.
+
+Claimed deliveries are sent concurrently through one pooled HTTP client per
+host, with a cap on concurrent requests per webhook. A pass only claims as many
+deliveries per webhook as that cap can send within the lease, and a delivery
+whose lease would run out before its request could finish is handed back
+unsent. Results and the webhooks' counters are written back in one transaction
+per batch, and only to rows whose lease token is unchanged; a delivery another
+dispatcher has since re-claimed is left to that dispatcher. Failed attempts are
+retried with exponential backoff; 4xx responses other than 408/425/429 are final.
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.core.backoff import retry_delay
+from app.core.database import SessionLocal
+from app.models.webhook import Webhook, WebhookDelivery, WebhookDeliveryStatus, WebhookStatus
+from app.services.webhook_service import WebhookService
+import asyncio
+import httpx
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+DISPATCH_BATCH_SIZE = 100
+DISPATCH_POLL_SECONDS = 5.0
+
+# A claimed delivery is retried by another dispatcher after this long
+DELIVERY_LEASE_SECONDS = 300
+# Part of the lease kept free for claiming and writing results back
+LEASE_MARGIN_SECONDS = 60
+# Upper bound on a webhook's configured timeout (covers the whole request, including waiting for a connection)
+MAX_REQUEST_TIMEOUT_SECONDS = 60
+DEFAULT_REQUEST_TIMEOUT_SECONDS = 30
+
+MAX_DELIVERY_ATTEMPTS = 6
+
+PER_HOST_MAX_CONNECTIONS = 10
+PER_WEBHOOK_CONCURRENCY = 4
+RESPONSE_BODY_LIMIT = 1000
+
+# Client errors worth retrying; other 4xx responses mean the request itself is rejected
+RETRYABLE_CLIENT_ERRORS = {408, 425, 429}
+
+
+def request_timeout(webhook: Webhook) -> int:
+    """Seconds a request to the webhook may take"""
+    return min(webhook.timeout or DEFAULT_REQUEST_TIMEOUT_SECONDS, MAX_REQUEST_TIMEOUT_SECONDS)
+
+
+def claim_limit(webhook: Optional[Webhook]) -> Optional[int]:
+    """
+    Deliveries of one webhook a pass may claim
+    
+    Requests to a webhook run PER_WEBHOOK_CONCURRENCY at a time, so a pass can
+    send that many per request timeout before the lease (less the margin) runs out.
+    
+    Returns:
+        The limit, or None for a missing webhook (nothing is sent to it)
+    """
+    if webhook is None:
+        return None
+    rounds = max((DELIVERY_LEASE_SECONDS - LEASE_MARGIN_SECONDS) // request_timeout(webhook), 1)
+    return PER_WEBHOOK_CONCURRENCY * rounds
+
+
+class DeliveryResult:
+    """Outcome of one delivery attempt (deferred: not sent, lease too short)"""
+    
+    __slots__ = ("status_code", "response_body", "error", "duration_ms", "completed_at", "retryable", "deferred")
+    
+    def __init__(
+        self,
+        status_code: Optional[int] = None,
+        response_body: Optional[str] = None,
+        error: Optional[str] = None,
+        duration_ms: Optional[int] = None,
+        completed_at: Optional[datetime] = None,
+        retryable: bool = False,
+        deferred: bool = False
+    ):
+        self.status_code = status_code
+        self.response_body = response_body
+        self.error = error
+        self.duration_ms = duration_ms
+        self.completed_at = completed_at or datetime.utcnow()
+        self.retryable = retryable
+        self.deferred = deferred
+    
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+class WebhookDispatcher:
+    """
+    Sends queued webhook deliveries
+    
+    Args:
+        session_factory: Creates database sessions
+        batch_size: Deliveries claimed per pass
+    """
+    
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal, batch_size: int = DISPATCH_BATCH_SIZE):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._webhook_limits: Dict[UUID, asyncio.Semaphore] = {}
+    
+    def claim_batch(self, db: Session, now: datetime) -> List[Tuple[WebhookDelivery, Optional[Webhook]]]:
+        """
+        Claim due deliveries and lease them to this dispatcher
+        
+        Deliveries beyond a webhook's claim_limit are left for a later pass.
+        
+        Args:
+            db: Database session (committed, so the row locks are held only briefly)
+            now: Current time
+        
+        Returns:
+            (delivery, webhook) pairs, detached from the session; webhook is None
+            if it no longer exists
+        """
+        deliveries = db.query(WebhookDelivery).filter(
+            WebhookDelivery.status.in_([WebhookDeliveryStatus.PENDING.value, WebhookDeliveryStatus.DELIVERING.value]),
+            WebhookDelivery.next_attempt_at <= now
+        ).order_by(
+            WebhookDelivery.next_attempt_at
+        ).limit(self.batch_size).with_for_update(skip_locked=True).all()
+        if not deliveries:
+            db.commit()
+            return []
+        
+        webhook_ids = {delivery.webhook_id for delivery in deliveries}
+        webhooks = {webhook.id: webhook for webhook in db.query(Webhook).filter(Webhook.id.in_(webhook_ids)).all()}
+        
+        lease_until = now + timedelta(seconds=DELIVERY_LEASE_SECONDS)
+        lease_token = uuid4()
+        claimed = []
+        per_webhook: Dict[UUID, int] = {}
+        for delivery in deliveries:
+            webhook = webhooks.get(delivery.webhook_id)
+            limit = claim_limit(webhook)
+            taken = per_webhook.get(delivery.webhook_id, 0)
+            if limit is not None and taken >= limit:
+                continue
+            per_webhook[delivery.webhook_id] = taken + 1
+            delivery.status = WebhookDeliveryStatus.DELIVERING.value
+            delivery.next_attempt_at = lease_until
+            delivery.lease_token = lease_token
+            claimed.append((delivery, webhook))
+        db.commit()
+        # Results are written with guarded UPDATEs, never by flushing these objects
+        db.expunge_all()
+        return claimed
+    
+    def _client_for(self, url: str) -> httpx.AsyncClient:
+        """Pooled client for the URL's scheme, host and port"""
+        parsed = httpx.URL(url)
+        key = f"{parsed.scheme}://{parsed.host}:{parsed.port}"
+        client = self._clients.get(key)
+        if client is None:
+            client = httpx.AsyncClient(limits=httpx.Limits(
+                max_connections=PER_HOST_MAX_CONNECTIONS,
+                max_keepalive_connections=PER_HOST_MAX_CONNECTIONS
+            ))
+            self._clients[key] = client
+        return client
+    
+    def _webhook_limit(self, webhook_id: UUID) -> asyncio.Semaphore:
+        limit = self._webhook_limits.get(webhook_id)
+        if limit is None:
+            limit = self._webhook_limits[webhook_id] = asyncio.Semaphore(PER_WEBHOOK_CONCURRENCY)
+        return limit
+    
+    async def deliver(
+        self,
+        delivery: WebhookDelivery,
+        webhook: Optional[Webhook],
+        deadline: Optional[float] = None
+    ) -> DeliveryResult:
+        """
+        Make one delivery attempt (no database access)
+        
+        Args:
+            delivery: Claimed delivery
+            webhook: Its webhook, or None if it no longer exists
+            deadline: time.monotonic() value by which the request must be done
+                (the lease less its margin); later requests are deferred unsent
+        """
+        if webhook is None or webhook.status != WebhookStatus.ACTIVE.value or not webhook.is_active:
+            return DeliveryResult(error="Webhook is no longer active")
+        
+        payload_json = json.dumps(delivery.payload)
+        headers = WebhookService.build_headers(webhook, delivery.event_type, payload_json)
+        timeout = request_timeout(webhook)
+        
+        async with self._webhook_limit(webhook.id):
+            if deadline is not None and time.monotonic() + timeout > deadline:
+                return DeliveryResult(deferred=True)
+            start = time.perf_counter()
+            try:
+                # wait_for bounds the whole request; httpx timeouts apply per phase
+                response = await asyncio.wait_for(
+                    self._client_for(webhook.url).post(
+                        webhook.url,
+                        content=payload_json.encode("utf-8"),
+                        headers=headers,
+                        timeout=timeout
+                    ),
+                    timeout
+                )
+            except (httpx.TimeoutException, asyncio.TimeoutError):
+                return DeliveryResult(
+                    status_code=408,
+                    error="Request timeout",
+                    duration_ms=int((time.perf_counter() - start) * 1000),
+                    retryable=True
+                )
+            except Exception as e:
+                return DeliveryResult(
+                    status_code=500,
+                    error=str(e) or type(e).__name__,
+                    duration_ms=int((time.perf_counter() - start) * 1000),
+                    retryable=True
+                )
+        
+        duration_ms = int((time.perf_counter() - start) * 1000)
+        body = response.text[:RESPONSE_BODY_LIMIT]
+        if 200 <= response.status_code < 300:
+            return DeliveryResult(status_code=response.status_code, response_body=body, duration_ms=duration_ms)
+        return DeliveryResult(
+            status_code=response.status_code,
+            response_body=body,
+            error=f"HTTP {response.status_code}",
+            duration_ms=duration_ms,
+            retryable=response.status_code >= 500 or response.status_code in RETRYABLE_CLIENT_ERRORS
+        )
+    
+    def record_results(
+        self,
+        db: Session,
+        claimed: List[Tuple[WebhookDelivery, Optional[Webhook]]],
+        results: List[DeliveryResult],
+        now: datetime
+    ) -> Dict[str, int]:
+        """
+        Write attempt outcomes and webhook counters back in one transaction
+        
+        Each delivery is only updated while it still carries the lease token it
+        was claimed with; if the lease ran out and another dispatcher re-claimed
+        it, its outcome is left to that dispatcher.
+        
+        Returns:
+            Counts of succeeded, retrying, failed, deferred and lost (re-claimed) deliveries
+        """
+        counts = {"succeeded": 0, "retrying": 0, "failed": 0, "deferred": 0, "lost": 0}
+        # webhook_id -> [successes, failures, last success time, last error]
+        stats: Dict[UUID, list] = {}
+        
+        for (delivery, webhook), result in zip(claimed, results):
+            if result.deferred:
+                # Not sent: hand it straight back without using up an attempt
+                values = {
+                    WebhookDelivery.status: WebhookDeliveryStatus.PENDING.value,
+                    WebhookDelivery.next_attempt_at: now,
+                    WebhookDelivery.lease_token: None,
+                }
+                outcome = "deferred"
+            else:
+                attempt_count = (delivery.attempt_count or 0) + 1
+                values = {
+                    WebhookDelivery.attempt_count: attempt_count,
+                    WebhookDelivery.attempted_at: now,
+                    WebhookDelivery.status_code: result.status_code,
+                    WebhookDelivery.response_body: result.response_body,
+                    WebhookDelivery.error_message: result.error,
+                    WebhookDelivery.duration_ms: result.duration_ms,
+                    WebhookDelivery.completed_at: result.completed_at,
+                    WebhookDelivery.lease_token: None,
+                }
+                if result.succeeded:
+                    values[WebhookDelivery.status] = WebhookDeliveryStatus.SUCCEEDED.value
+                    values[WebhookDelivery.next_attempt_at] = None
+                    outcome = "succeeded"
+                elif result.retryable and attempt_count < MAX_DELIVERY_ATTEMPTS:
+                    values[WebhookDelivery.status] = WebhookDeliveryStatus.PENDING.value
+                    values[WebhookDelivery.next_attempt_at] = now + timedelta(seconds=retry_delay(attempt_count))
+                    outcome = "retrying"
+                else:
+                    values[WebhookDelivery.status] = WebhookDeliveryStatus.FAILED.value
+                    values[WebhookDelivery.next_attempt_at] = None
+                    outcome = "failed"
+            
+            updated = db.query(WebhookDelivery).filter(
+                WebhookDelivery.id == delivery.id,
+                WebhookDelivery.lease_token == delivery.lease_token
+            ).update(values, synchronize_session=False)
+            if not updated:
+                logger.warning(f"Lease on webhook delivery {delivery.id} expired; leaving it to the dispatcher that re-claimed it")
+                counts["lost"] += 1
+                continue
+            for column, value in values.items():
+                setattr(delivery, column.key, value)
+            counts[outcome] += 1
+            
+            if webhook is None or result.deferred:
+                continue
+            webhook_stats = stats.setdefault(webhook.id, [0, 0, None, None])
+            if result.succeeded:
+                webhook_stats[0] += 1
+                webhook_stats[2] = result.completed_at
+            else:
+                webhook_stats[1] += 1
+                webhook_stats[3] = f"{result.error}: {result.response_body[:200]}" if result.response_body else result.error
+        
+        # Increment in SQL so concurrent dispatchers don't overwrite each other's counts
+        for webhook_id, (successes, failures, last_success_at, last_error) in stats.items():
+            values = {
+                Webhook.success_count: func.coalesce(Webhook.success_count, 0) + successes,
+                Webhook.failure_count: func.coalesce(Webhook.failure_count, 0) + failures,
+            }
+            if last_success_at:
+                values[Webhook.last_triggered_at] = last_success_at
+            if last_error:
+                values[Webhook.last_error] = last_error
+            db.query(Webhook).filter(Webhook.id == webhook_id).update(values, synchronize_session=False)
+        
+        db.commit()
+        return counts
+    
+    async def run_once(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Claim, send and record one batch
+        
+        Returns:
+            Counts of claimed, succeeded, retrying, failed, deferred and lost deliveries
+        """
+        db = self.session_factory()
+        try:
+            claimed = self.claim_batch(db, now or datetime.utcnow())
+            if not claimed:
+                return {"claimed": 0, "succeeded": 0, "retrying": 0, "failed": 0, "deferred": 0, "lost": 0}
+            
+            deadline = time.monotonic() + DELIVERY_LEASE_SECONDS - LEASE_MARGIN_SECONDS
+            results = await asyncio.gather(*(self.deliver(delivery, webhook, deadline) for delivery, webhook in claimed))
+            counts = self.record_results(db, claimed, list(results), datetime.utcnow())
+            counts["claimed"] = len(claimed)
+            logger.info(
+                f"Dispatched {len(claimed)} webhook deliveries: {counts['succeeded']} succeeded, "
+                f"{counts['retrying']} will be retried, {counts['failed']} failed, "
+                f"{counts['deferred']} deferred, {counts['lost']} lost to an expired lease"
+            )
+            return counts
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
+    async def run(self, stop: Optional[asyncio.Event] = None, poll_interval: float = DISPATCH_POLL_SECONDS) -> None:
+        """Dispatch until stopped, sleeping between passes once the outbox is drained"""
+        stop = stop or asyncio.Event()
+        try:
+            while not stop.is_set():
+                try:
+                    counts = await self.run_once()
+                except Exception as e:
+                    logger.error(f"Webhook dispatch pass failed: {e}", exc_info=True)
+                    counts = {"claimed": 0}
+                if counts["claimed"] < self.batch_size:
+                    try:
+                        await asyncio.wait_for(stop.wait(), timeout=poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            await self.close()
+    
+    async def close(self) -> None:
+        """Close the pooled HTTP clients"""
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            await client.aclose()
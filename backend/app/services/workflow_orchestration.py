@@ -9,13 +9,12 @@ This service provides a generic framework where:
 - Email notifications and reminders are sent automatically
 - Everything is configuration-driven (no hardcoding)
 """
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Callable, Dict, List, Optional, Any, Tuple
 from uuid import UUID
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_
 import logging
-import asyncio
 
 from app.models.workflow_config import WorkflowConfiguration, OnboardingRequest
 from app.models.form_layout import FormLayout
@@ -23,7 +22,8 @@ from app.models.entity_field import EntityPermission, EntityFieldPermission, Ent
 from app.models.custom_field import CustomFieldCatalog
 from app.models.business_rule import BusinessRule
 from app.models.agentic_agent import AgenticAgent
-from app.services.permission_resolution import resolve_field_permissions, get_effective_permission
+from app.services.permission_resolution import resolve_layout_permissions, get_effective_permission
+from app.services.field_catalog_index import get_field_catalog_index
 from app.services.business_rules_engine import BusinessRulesEngine
 from app.services.email_service import EmailService
 from app.services.layout_type_mapper import get_layout_type_for_stage
@@ -55,9 +55,9 @@ class WorkflowOrchestrationService:
         self.db = db
         self.tenant_id = tenant_id
         self.rules_engine = BusinessRulesEngine(db, tenant_id)
+        # Stage notifications are queued in the email outbox; the outbox worker
+        # resolves the tenant's SMTP integration when it sends them
         self.email_service = EmailService()
-        # Load email config from database (Integration API)
-        self.email_service.load_config_from_db(db, str(tenant_id))
     
     def get_workflow_for_entity(
         self,
@@ -89,24 +89,31 @@ class WorkflowOrchestrationService:
             # This is a simplified match - in practice, you might have a request_type field
             pass
         
-        workflows = query.all()
+        return self.select_workflow(query.all(), entity_type, entity_data)
+    
+    @staticmethod
+    def select_workflow(
+        workflows: List[WorkflowConfiguration],
+        entity_type: str,
+        entity_data: Dict[str, Any]
+    ) -> Optional[WorkflowConfiguration]:
+        """
+        Pick the workflow for an entity from a tenant's active workflows
         
+        Returns:
+            The first workflow whose trigger rules and conditions match, else the
+            default workflow, else None
+        """
         # Match workflows based on trigger_rules and conditions
         for workflow in workflows:
-            if self._matches_workflow(workflow, entity_type, entity_data):
+            if WorkflowOrchestrationService._matches_workflow(workflow, entity_type, entity_data):
                 return workflow
         
         # Return default workflow if exists
-        default_workflow = self.db.query(WorkflowConfiguration).filter(
-            WorkflowConfiguration.tenant_id == self.tenant_id,
-            WorkflowConfiguration.is_default == True,
-            WorkflowConfiguration.status == "active"
-        ).first()
-        
-        return default_workflow
+        return next((workflow for workflow in workflows if workflow.is_default), None)
     
+    @staticmethod
     def _matches_workflow(
-        self,
         workflow: WorkflowConfiguration,
         entity_type: str,
         entity_data: Dict[str, Any]
@@ -340,6 +347,31 @@ class WorkflowOrchestrationService:
         # If layout exists and has sections, use them
         if layout and layout.sections:
             logger.info(f"Processing layout {layout.id} with {len(layout.sections)} sections for role {user_role}")
+            # Look up field metadata first, then resolve permissions for the whole layout at once
+            field_catalog = get_field_catalog_index(self.db, self.tenant_id, entity_name)
+            field_metadata: Dict[str, Dict[str, Any]] = {}
+            for section in layout.sections:
+                for field_name in (section.get("fields", []) or []):
+                    if field_name not in field_metadata:
+                        field_metadata[field_name] = field_catalog.lookup(field_name)
+            
+            permission_matrix = resolve_layout_permissions(
+                db=self.db,
+                tenant_id=self.tenant_id,
+                fields=[
+                    {
+                        "field_name": field_name,
+                        "entity_name": entity_name if metadata["field_source"] == "entity" else None,
+                        "field_source": metadata["field_source"],
+                        "custom_field_id": metadata["custom_field_id"]
+                    }
+                    for field_name, metadata in field_metadata.items()
+                ],
+                request_type=request_type,
+                workflow_stage=workflow_stage,
+                role=user_role
+            )
+            
             for section in layout.sections:
                 # Resolve permissions for each field in section
                 section_fields = []
@@ -348,91 +380,12 @@ class WorkflowOrchestrationService:
                 logger.debug(f"Processing section {section_id} ({section_title}) with {len(section.get('fields', []))} fields")
                 
                 for field_name in (section.get("fields", []) or []):
-                    # Determine field source and get metadata
-                    field_registry = None
-                    field_source = "entity"
-                    field_label = field_name.replace("_", " ").title()
-                    field_type = "text"
-                    is_required = False
-                    
-                    # First, try to find in EntityFieldRegistry (entity fields)
-                    field_registry = self.db.query(EntityFieldRegistry).filter(
-                        or_(
-                            EntityFieldRegistry.tenant_id == self.tenant_id,
-                            EntityFieldRegistry.tenant_id.is_(None)
-                        ),
-                        EntityFieldRegistry.entity_name == entity_name,
-                        EntityFieldRegistry.field_name == field_name,
-                        EntityFieldRegistry.is_enabled == True
-                    ).first()
-                    
-                    if field_registry:
-                        field_label = field_registry.field_label
-                        field_type = field_registry.field_type_display or "text"
-                        is_required = field_registry.is_required or False
-                        field_source = "entity"
-                    else:
-                        # Check if it's a submission requirement
-                        from app.models.submission_requirement import SubmissionRequirement
-                        requirements = self.db.query(SubmissionRequirement).filter(
-                            SubmissionRequirement.tenant_id == self.tenant_id,
-                            SubmissionRequirement.is_active == True,
-                            SubmissionRequirement.is_enabled == True
-                        ).all()
-                        
-                        # Find requirement with matching field_name (computed from catalog_id)
-                        matching_req = None
-                        for req in requirements:
-                            if req.field_name == field_name:
-                                matching_req = req
-                                break
-                        
-                        if matching_req:
-                            field_label = matching_req.label
-                            field_type = matching_req.field_type or "text"
-                            is_required = matching_req.is_required or False
-                            field_source = "submission_requirement"
-                        else:
-                            # Check if it's a custom field
-                            from app.models.custom_field import CustomFieldCatalog
-                            custom_field = self.db.query(CustomFieldCatalog).filter(
-                                CustomFieldCatalog.tenant_id == self.tenant_id,
-                                CustomFieldCatalog.field_name == field_name,
-                                CustomFieldCatalog.is_enabled == True
-                            ).first()
-                            
-                            if custom_field:
-                                field_label = custom_field.field_label or field_name.replace("_", " ").title()
-                                field_type = custom_field.field_type or "text"
-                                is_required = custom_field.is_required or False
-                                field_source = "custom_field"
-                    
-                    # Resolve permissions using hierarchical system
-                    custom_field_id = None
-                    if field_source == "custom_field":
-                        # Get custom field ID for permission resolution
-                        from app.models.custom_field import CustomFieldCatalog
-                        custom_field = self.db.query(CustomFieldCatalog).filter(
-                            CustomFieldCatalog.tenant_id == self.tenant_id,
-                            CustomFieldCatalog.field_name == field_name,
-                            CustomFieldCatalog.is_enabled == True
-                        ).first()
-                        if custom_field:
-                            custom_field_id = custom_field.id
-                    
-                    permissions = resolve_field_permissions(
-                        db=self.db,
-                        tenant_id=self.tenant_id,
-                        entity_name=entity_name if field_source == "entity" else None,
-                        field_name=field_name,
-                        field_source=field_source,
-                        custom_field_id=custom_field_id,
-                        request_type=request_type,
-                        workflow_stage=workflow_stage,
-                        role=user_role
-                    )
+                    metadata = field_metadata[field_name]
+                    field_label = metadata["label"]
+                    field_type = metadata["field_type"]
+                    is_required = metadata["is_required"]
                     
-                    role_perms = permissions.get(user_role, {})
+                    role_perms = permission_matrix.get(field_name, {}).get(user_role, {})
                     can_edit = role_perms.get("edit", False)
                     
                     # For approvers, ALWAYS show fields from layout (they need to see what was submitted)
@@ -509,20 +462,21 @@ class WorkflowOrchestrationService:
             fields_by_category: Dict[str, List[EntityFieldRegistry]] = {}
             uncategorized_fields = []
             
+            # Resolve permissions for all entity fields at once
+            permission_matrix = resolve_layout_permissions(
+                db=self.db,
+                tenant_id=self.tenant_id,
+                fields=[
+                    {"field_name": field.field_name, "entity_name": entity_name, "field_source": "entity"}
+                    for field in entity_fields
+                ],
+                request_type=request_type,
+                workflow_stage=workflow_stage,
+                role=user_role
+            )
+            
             for field in entity_fields:
-                # Resolve permissions
-                permissions = resolve_field_permissions(
-                    db=self.db,
-                    tenant_id=self.tenant_id,
-                    entity_name=entity_name,
-                    field_name=field.field_name,
-                    field_source="entity",
-                    request_type=request_type,
-                    workflow_stage=workflow_stage,
-                    role=user_role
-                )
-                
-                role_perms = permissions.get(user_role, {})
+                role_perms = permission_matrix.get(field.field_name, {}).get(user_role, {})
                 # Default to True for approvers/tenant_admins if no explicit permission is set
                 # This ensures all submitted fields are visible to approvers
                 can_view = role_perms.get("view")
@@ -552,17 +506,7 @@ class WorkflowOrchestrationService:
             for category, category_fields in fields_by_category.items():
                 section_fields = []
                 for field in category_fields:
-                    permissions = resolve_field_permissions(
-                        db=self.db,
-                        tenant_id=self.tenant_id,
-                        entity_name=entity_name,
-                        field_name=field.field_name,
-                        field_source="entity",
-                        request_type=request_type,
-                        workflow_stage=workflow_stage,
-                        role=user_role
-                    )
-                    role_perms = permissions.get(user_role, {})
+                    role_perms = permission_matrix.get(field.field_name, {}).get(user_role, {})
                     # Default to True for approvers/tenant_admins if no explicit permission is set
                     can_view = role_perms.get("view")
                     if can_view is None:
@@ -777,7 +721,7 @@ class WorkflowOrchestrationService:
             "action_results": action_results
         }
     
-    async def send_stage_notifications(
+    def build_stage_notification(
         self,
         workflow_config: WorkflowConfiguration,
         workflow_stage: str,
@@ -785,10 +729,11 @@ class WorkflowOrchestrationService:
         entity_id: UUID,
         entity_data: Dict[str, Any],
         user: User,
-        recipients_config: Optional[Dict[str, Any]] = None
-    ) -> Dict[str, Any]:
+        recipients_config: Optional[Dict[str, Any]] = None,
+        users_by_role: Optional[Callable[[str], List[User]]] = None
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
         """
-        Send email notifications for a workflow stage
+        Build the email notification for a workflow stage
         
         Args:
             workflow_config: Workflow configuration
@@ -798,9 +743,11 @@ class WorkflowOrchestrationService:
             entity_data: Entity data
             user: Current user (triggering the stage)
             recipients_config: Optional custom recipients config (overrides stage_settings)
+            users_by_role: Optional lookup of the tenant's users with a role (queried if not given)
         
         Returns:
-            Notification results
+            Tuple of (notification with subject, html_body and recipients, None), or
+            (None, reason) if nothing should be sent
         """
         # Get email notifications config from workflow stage settings
         stage_settings = self._get_stage_settings(workflow_config, workflow_stage)
@@ -811,18 +758,19 @@ class WorkflowOrchestrationService:
             email_config = {**email_config, **recipients_config}
         
         if not email_config.get("enabled", False):
-            return {"sent": False, "reason": "Email notifications disabled for this stage"}
+            return None, "Email notifications disabled for this stage"
         
         # Resolve recipients
         recipients = self._resolve_email_recipients(
             email_config.get("recipients", []),
             entity_data,
             user,
-            workflow_stage
+            workflow_stage,
+            users_by_role
         )
         
         if not recipients:
-            return {"sent": False, "reason": "No valid recipients found"}
+            return None, "No valid recipients found"
         
         # Build email content
         subject = email_config.get("subject", f"{entity_type.title()} - {workflow_stage.replace('_', ' ').title()}")
@@ -837,31 +785,73 @@ class WorkflowOrchestrationService:
             workflow_stage
         )
         
-        # Send emails
+        return {"subject": subject, "html_body": html_body, "recipients": recipients}, None
+    
+    def queue_stage_notifications(
+        self,
+        workflow_config: WorkflowConfiguration,
+        workflow_stage: str,
+        entity_type: str,
+        entity_id: UUID,
+        entity_data: Dict[str, Any],
+        user: User,
+        recipients_config: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Queue email notifications for a workflow stage in the email outbox
+        
+        The emails are added to this service's session without committing, so
+        they are saved (or rolled back) together with the caller's work; the
+        email outbox worker sends them once the caller commits.
+        
+        Args:
+            workflow_config: Workflow configuration
+            workflow_stage: Current workflow stage
+            entity_type: Entity type
+            entity_id: Entity ID
+            entity_data: Entity data
+            user: Current user (triggering the stage)
+            recipients_config: Optional custom recipients config (overrides stage_settings)
+        
+        Returns:
+            Notification results ("queued" is False with a "reason" when nothing was queued)
+        """
+        notification, reason = self.build_stage_notification(
+            workflow_config,
+            workflow_stage,
+            entity_type,
+            entity_id,
+            entity_data,
+            user,
+            recipients_config
+        )
+        if notification is None:
+            return {"queued": False, "reason": reason}
+        subject = notification["subject"]
+        html_body = notification["html_body"]
+        recipients = notification["recipients"]
+        
+        # One email per recipient; the email outbox worker sends them over one SMTP session
+        text_body = html_body.replace("<br>", "\n").replace("<p>", "").replace("</p>", "\n")
         results = []
         for recipient in recipients:
-            try:
-                sent, _ = await self.email_service.send_email(
-                    to_email=recipient["email"],
-                    subject=subject,
-                    html_body=html_body,
-                    text_body=html_body.replace("<br>", "\n").replace("<p>", "").replace("</p>", "\n")
-                )
-                results.append({
-                    "recipient": recipient["email"],
-                    "sent": sent,
-                    "role": recipient.get("role")
-                })
-            except Exception as e:
-                logger.error(f"Failed to send email to {recipient['email']}: {e}", exc_info=True)
-                results.append({
-                    "recipient": recipient["email"],
-                    "sent": False,
-                    "error": str(e)
-                })
+            self.email_service.queue_email(
+                self.db,
+                to_email=recipient["email"],
+                subject=subject,
+                html_body=html_body,
+                text_body=text_body,
+                tenant_id=self.tenant_id
+            )
+            results.append({
+                "recipient": recipient["email"],
+                "queued": True,
+                "role": recipient.get("role")
+            })
         
         return {
-            "sent": any(r["sent"] for r in results),
+            "queued": True,
+            "count": len(results),
             "results": results
         }
     
@@ -963,7 +953,8 @@ class WorkflowOrchestrationService:
         recipients_config: List[str],
         entity_data: Dict[str, Any],
         user: User,
-        workflow_stage: str
+        workflow_stage: str,
+        users_by_role: Optional[Callable[[str], List[User]]] = None
     ) -> List[Dict[str, str]]:
         """
         Resolve email recipients from configuration
@@ -975,7 +966,15 @@ class WorkflowOrchestrationService:
         - "tenant_admin" - Tenant admin
         - Email addresses
         - Role names (e.g., "security_reviewer")
+        
+        users_by_role looks up the tenant's users with a role; by default each
+        lookup is a query.
         """
+        if users_by_role is None:
+            users_by_role = lambda role: self.db.query(User).filter(
+                User.tenant_id == self.tenant_id,
+                User.role == role
+            ).all()
         recipients = []
         
         for recipient in recipients_config:
@@ -992,18 +991,12 @@ class WorkflowOrchestrationService:
             elif recipient == "next_approver":
                 # TODO: Determine next approver from workflow configuration
                 # For now, get tenant admin
-                tenant_admin = self.db.query(User).filter(
-                    User.tenant_id == self.tenant_id,
-                    User.role == "tenant_admin"
-                ).first()
+                tenant_admin = next(iter(users_by_role("tenant_admin")), None)
                 if tenant_admin and tenant_admin.email:
                     recipients.append({"email": tenant_admin.email, "role": "next_approver"})
             
             elif recipient == "tenant_admin":
-                tenant_admin = self.db.query(User).filter(
-                    User.tenant_id == self.tenant_id,
-                    User.role == "tenant_admin"
-                ).first()
+                tenant_admin = next(iter(users_by_role("tenant_admin")), None)
                 if tenant_admin and tenant_admin.email:
                     recipients.append({"email": tenant_admin.email, "role": "tenant_admin"})
             
@@ -1013,11 +1006,7 @@ class WorkflowOrchestrationService:
             
             else:
                 # Role name - get users with this role
-                role_users = self.db.query(User).filter(
-                    User.tenant_id == self.tenant_id,
-                    User.role == recipient
-                ).all()
-                for role_user in role_users:
+                for role_user in users_by_role(recipient):
                     if role_user.email:
                         recipients.append({"email": role_user.email, "role": recipient})
         
@@ -1097,7 +1086,7 @@ class WorkflowOrchestrationService:
         1. Evaluate business rules
         2. Validate transition
         3. Update entity state
-        4. Send notifications
+        4. Queue notifications
         5. Schedule reminders
         6. Return new view structure
         
@@ -1137,36 +1126,18 @@ class WorkflowOrchestrationService:
         # TODO: Update entity state to target_stage
         # This would update the entity's workflow_stage field
         
-        # Send notifications for new stage
-        notification_results = {}
+        # Queue notifications for new stage (committed with the caller's session)
         try:
-            # Run async notification in background
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                # Schedule in background
-                asyncio.create_task(
-                    self.send_stage_notifications(
-                        workflow_config,
-                        target_stage,
-                        entity_type,
-                        entity_id,
-                        entity_data,
-                        user
-                    )
-                )
-            else:
-                notification_results = asyncio.run(
-                    self.send_stage_notifications(
-                        workflow_config,
-                        target_stage,
-                        entity_type,
-                        entity_id,
-                        entity_data,
-                        user
-                    )
-                )
+            notification_results = self.queue_stage_notifications(
+                workflow_config,
+                target_stage,
+                entity_type,
+                entity_id,
+                entity_data,
+                user
+            )
         except Exception as e:
-            logger.error(f"Error sending notifications: {e}", exc_info=True)
+            logger.error(f"Error queueing notifications: {e}", exc_info=True)
             notification_results = {"error": str(e)}
         
         # Schedule reminders
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Backfill the materialized action item inbox (action_item_inbox).
+
+Session hooks keep the inbox up to date as source records change; run this
+once after the add_action_item_inbox migration, or to repair a tenant's inbox.
+
+Usage:
+    python scripts/backfill_action_item_inbox.py [tenant_id]
+"""
+import sys
+from pathlib import Path
+from uuid import UUID
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import SessionLocal
+from app.models.tenant import Tenant
+from app.services.action_item_service import ActionItemService
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def backfill_inbox(tenant_id: UUID = None):
+    """Rebuild the inbox for one tenant, or every tenant if none is given"""
+    db = SessionLocal()
+    try:
+        if tenant_id:
+            tenant_ids = [tenant_id]
+        else:
+            tenant_ids = [row.id for row in db.query(Tenant.id).all()]
+        
+        logger.info(f"Rebuilding action item inbox for {len(tenant_ids)} tenant(s)")
+        
+        service = ActionItemService(db)
+        total_entries = 0
+        error_count = 0
+        for current_tenant_id in tenant_ids:
+            try:
+                count = service.rebuild_inbox(current_tenant_id)
+                total_entries += count
+                logger.info(f"Tenant {current_tenant_id}: {count} inbox entries")
+            except Exception as e:
+                logger.error(f"Error rebuilding inbox for tenant {current_tenant_id}: {e}")
+                error_count += 1
+                db.rollback()
+        
+        logger.info(f"✅ Backfill complete: {total_entries} entries, {error_count} errors")
+        return total_entries, error_count
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print("Starting backfill of the action item inbox...")
+    entries, errors = backfill_inbox(UUID(sys.argv[1]) if len(sys.argv) > 1 else None)
+    print(f"✅ Backfill complete: {entries} entries, {errors} errors")
+    sys.exit(0 if errors == 0 else 1)
@@ -0,0 +1,181 @@
+"""
+Benchmark per-request middleware overhead
+
+Drives a minimal ASGI app directly (no server, no network) three ways: with no
+middleware, with the previous SecurityHeadersMiddleware / RateLimitMiddleware /
+MetricsMiddleware chain of BaseHTTPMiddleware subclasses (reproduced below as
+they were before RequestPipelineMiddleware replaced them), and with
+RequestPipelineMiddleware. It reports the time each request spends in the old
+and the new middleware. Redis is disabled so rate limiting uses the in-memory
+fallback, which keeps the numbers about the middleware itself.
+
+Usage:
+    python backend/scripts/benchmark_middleware.py [--requests 20000]
+"""
+import sys
+import argparse
+import asyncio
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+from app.core import security_middleware
+from app.core.config import settings
+from app.core.metrics import http_requests_total, http_request_duration_seconds
+from app.middleware.request_pipeline import RequestPipelineMiddleware
+
+
+class LegacySecurityHeadersMiddleware(BaseHTTPMiddleware):
+    """The former SecurityHeadersMiddleware"""
+    
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["X-Frame-Options"] = "DENY"
+        response.headers["X-XSS-Protection"] = "1; mode=block"
+        if request.url.scheme == "https":
+            response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
+        if settings.ENVIRONMENT == "development":
+            response.headers["Content-Security-Policy"] = "default-src 'self' 'unsafe-inline' 'unsafe-eval' http://localhost:* ws://localhost:*;"
+        else:
+            response.headers["Content-Security-Policy"] = "default-src 'self'"
+        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+        return response
+
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    """The former RateLimitMiddleware, with Redis unavailable (in-memory fallback)"""
+    
+    def __init__(self, app, requests_per_minute: int = 60):
+        super().__init__(app)
+        self.requests_per_minute = requests_per_minute
+    
+    async def dispatch(self, request: Request, call_next):
+        client_ip = request.client.host if request.client else "unknown"
+        forwarded_for = request.headers.get("X-Forwarded-For")
+        if forwarded_for:
+            client_ip = forwarded_for.split(",")[0].strip()
+        _, current_count = security_middleware.check_rate_limit_fallback(
+            client_ip, self.requests_per_minute, window=60
+        )
+        response = await call_next(request)
+        response.headers["X-RateLimit-Limit"] = str(self.requests_per_minute)
+        response.headers["X-RateLimit-Remaining"] = str(self.requests_per_minute - current_count)
+        return response
+
+
+class LegacyMetricsMiddleware(BaseHTTPMiddleware):
+    """The former MetricsMiddleware"""
+    
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        duration = time.time() - start_time
+        http_requests_total.labels(
+            method=request.method,
+            endpoint=request.url.path,
+            status=response.status_code
+        ).inc()
+        http_request_duration_seconds.labels(
+            method=request.method,
+            endpoint=request.url.path
+        ).observe(duration)
+        return response
+
+
+def build_app(variant: str) -> FastAPI:
+    """
+    Build a FastAPI app with a trivial JSON route and a streaming route
+    
+    Args:
+        variant: "bare" (no middleware), "old" (the BaseHTTPMiddleware chain, in
+            the order main.py registered it) or "new" (RequestPipelineMiddleware)
+    """
+    app = FastAPI()
+    
+    @app.get("/ping")
+    async def ping():
+        return {"status": "ok"}
+    
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for _ in range(10):
+                yield b"x" * 1024
+        return StreamingResponse(chunks(), media_type="application/octet-stream")
+    
+    if variant == "old":
+        app.add_middleware(LegacySecurityHeadersMiddleware)
+        app.add_middleware(LegacyRateLimitMiddleware, requests_per_minute=10 ** 9)
+        app.add_middleware(LegacyMetricsMiddleware)
+    elif variant == "new":
+        app.add_middleware(RequestPipelineMiddleware, requests_per_minute=10 ** 9)
+    return app
+
+
+async def run_requests(app: FastAPI, path: str, count: int) -> float:
+    """Send count GET requests through the ASGI app and return seconds per request"""
+    received = []
+    
+    async def receive():
+        if not received:
+            received.append(True)
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.Event().wait()
+    
+    async def send(message):
+        pass
+    
+    def scope():
+        # Each request gets its own receive: body once, then no disconnect until cancelled
+        received.clear()
+        return {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"host", b"testserver")],
+            "client": ("10.0.0.1", 50000),
+            "server": ("testserver", 80),
+        }
+    
+    # Warm up routing, metrics label children and the middleware stack
+    for _ in range(200):
+        await app(scope(), receive, send)
+    
+    start = time.perf_counter()
+    for _ in range(count):
+        await app(scope(), receive, send)
+    return (time.perf_counter() - start) / count
+
+
+async def main(count: int):
+    # Keep rate limiting in-process so Redis latency doesn't dominate
+    security_middleware.get_async_redis = lambda: None
+    
+    apps = {variant: build_app(variant) for variant in ("bare", "old", "new")}
+    
+    print(f"{'route':<10}{'bare (us)':>12}{'old chain (us)':>17}{'new (us)':>11}{'old overhead':>15}{'new overhead':>15}")
+    for path in ("/ping", "/stream"):
+        times = {variant: await run_requests(app, path, count) for variant, app in apps.items()}
+        print(
+            f"{path:<10}{times['bare'] * 1e6:>12.1f}{times['old'] * 1e6:>17.1f}{times['new'] * 1e6:>11.1f}"
+            f"{(times['old'] - times['bare']) * 1e6:>15.1f}{(times['new'] - times['bare']) * 1e6:>15.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark per-request middleware overhead")
+    parser.add_argument("--requests", type=int, default=20000, help="Requests per measurement")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Background worker that sends queued webhook deliveries
+
+Webhook events are queued as pending webhook_deliveries rows; this worker
+claims them in batches, sends them and schedules retries. Run it as a
+long-lived process (several can run side by side), or with --once from cron.
+
+Usage:
+    python -m backend.scripts.dispatch_webhooks [--once]
+    or
+    python backend/scripts/dispatch_webhooks.py [--once]
+"""
+import sys
+import argparse
+import asyncio
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.webhook_dispatcher import WebhookDispatcher
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+async def dispatch(once: bool):
+    """Drain the webhook outbox once, or keep dispatching until interrupted"""
+    dispatcher = WebhookDispatcher()
+    if not once:
+        await dispatcher.run()
+        return
+    
+    try:
+        while True:
+            counts = await dispatcher.run_once()
+            if counts["claimed"] < dispatcher.batch_size:
+                break
+    finally:
+        await dispatcher.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send queued webhook deliveries")
+    parser.add_argument("--once", action="store_true", help="Drain the due deliveries and exit")
+    args = parser.parse_args()
+    
+    try:
+        asyncio.run(dispatch(args.once))
+    except KeyboardInterrupt:
+        logger.info("Webhook dispatcher stopped")
+    sys.exit(0)
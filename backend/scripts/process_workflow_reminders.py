@@ -2,26 +2,27 @@
 Background job script to process workflow reminders
 
 This script should be run periodically (e.g., via cron or scheduler) to:
-1. Find all due reminders
-2. Send reminder emails
+1. Claim due reminders across all tenants
+2. Queue one reminder digest per recipient and workflow stage
 3. Update reminder status
 
+It is safe to run on several hosts at once (reminders are claimed with
+FOR UPDATE SKIP LOCKED). Pass --loop to keep running instead of exiting once
+the due reminders are processed.
+
 Usage:
-    python -m backend.scripts.process_workflow_reminders
+    python -m backend.scripts.process_workflow_reminders [--loop]
     or
-    python backend/scripts/process_workflow_reminders.py
+    python backend/scripts/process_workflow_reminders.py [--loop]
 """
 import sys
-import os
-import asyncio
+import argparse
 from pathlib import Path
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from sqlalchemy.orm import Session
-from app.core.database import SessionLocal
-from app.services.reminder_service import ReminderService
+from app.services.reminder_worker import ReminderWorker
 import logging
 
 logging.basicConfig(
@@ -31,73 +32,37 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-async def process_all_reminders():
+def process_all_reminders():
     """Process all due reminders for all tenants"""
-    db: Session = SessionLocal()
+    worker = ReminderWorker()
+    totals = {"processed": 0, "sent": 0, "failed": 0, "emails_queued": 0}
+    while True:
+        result = worker.run_once()
+        for key in totals:
+            totals[key] += result[key]
+        if result["errors"]:
+            logger.warning(f"Errors processing reminders: {result['errors']}")
+        if result["processed"] < worker.batch_size:
+            break
     
-    try:
-        # Get all unique tenant IDs that have pending reminders
-        from app.models.workflow_reminder import WorkflowReminder
-        from datetime import datetime
-        
-        now = datetime.utcnow()
-        pending_reminders = db.query(WorkflowReminder).filter(
-            WorkflowReminder.is_sent == False,
-            WorkflowReminder.reminder_date <= now
-        ).all()
-        
-        if not pending_reminders:
-            logger.info("No due reminders to process")
-            return
-        
-        # Group by tenant
-        tenants_with_reminders = {}
-        for reminder in pending_reminders:
-            tenant_id = reminder.tenant_id
-            if tenant_id not in tenants_with_reminders:
-                tenants_with_reminders[tenant_id] = []
-            tenants_with_reminders[tenant_id].append(reminder)
-        
-        logger.info(f"Found {len(pending_reminders)} due reminders across {len(tenants_with_reminders)} tenants")
-        
-        # Process reminders for each tenant
-        total_processed = 0
-        total_sent = 0
-        total_failed = 0
-        
-        for tenant_id, reminders in tenants_with_reminders.items():
-            logger.info(f"Processing {len(reminders)} reminders for tenant {tenant_id}")
-            
-            # Create service for this tenant
-            service = ReminderService(db, tenant_id)
-            
-            # Process reminders
-            result = await service.process_due_reminders(limit=len(reminders))
-            
-            total_processed += result["processed"]
-            total_sent += result["sent"]
-            total_failed += result["failed"]
-            
-            if result["errors"]:
-                logger.warning(f"Errors processing reminders for tenant {tenant_id}: {result['errors']}")
-        
-        logger.info(f"Reminder processing complete: {total_processed} processed, {total_sent} sent, {total_failed} failed")
-        
-        return {
-            "processed": total_processed,
-            "sent": total_sent,
-            "failed": total_failed
-        }
-        
-    except Exception as e:
-        logger.error(f"Error processing reminders: {e}", exc_info=True)
-        raise
-    finally:
-        db.close()
+    logger.info(
+        f"Reminder processing complete: {totals['processed']} processed, {totals['sent']} sent "
+        f"in {totals['emails_queued']} emails, {totals['failed']} failed"
+    )
+    return totals
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process due workflow reminders")
+    parser.add_argument("--loop", action="store_true", help="Keep processing reminders until interrupted")
+    args = parser.parse_args()
+    
     logger.info("Starting workflow reminder processing job...")
-    result = asyncio.run(process_all_reminders())
-    logger.info(f"Job completed: {result}")
-
+    try:
+        if args.loop:
+            ReminderWorker().run()
+        else:
+            result = process_all_reminders()
+            logger.info(f"Job completed: {result}")
+    except KeyboardInterrupt:
+        logger.info("Reminder worker stopped")
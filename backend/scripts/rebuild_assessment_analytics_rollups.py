@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Rebuild the assessment analytics rollups (assessment_analytics_rollups).
+
+Session hooks keep the rollups up to date as assignments change; run this to
+repair rollups that drifted from assessment_assignments.
+
+Usage:
+    python scripts/rebuild_assessment_analytics_rollups.py [tenant_id]
+"""
+import sys
+from pathlib import Path
+from uuid import UUID
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import SessionLocal
+from app.models.assessment import Assessment, AssessmentAnalyticsRollup
+from app.models.tenant import Tenant
+from app.services.assessment_analytics import invalidate_assessment_dashboard, refresh_assessment_rollups
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def rebuild_rollups(tenant_id: UUID = None):
+    """Rebuild the rollups for one tenant, or every tenant if none is given"""
+    db = SessionLocal()
+    try:
+        if tenant_id:
+            tenant_ids = [tenant_id]
+        else:
+            tenant_ids = [row.id for row in db.query(Tenant.id).all()]
+        
+        logger.info(f"Rebuilding assessment analytics rollups for {len(tenant_ids)} tenant(s)")
+        
+        total_assessments = 0
+        error_count = 0
+        for current_tenant_id in tenant_ids:
+            try:
+                # Include rollups of deleted assessments so their rows are cleared
+                assessment_ids = {
+                    row.id for row in db.query(Assessment.id).filter(Assessment.tenant_id == current_tenant_id).all()
+                }
+                assessment_ids.update(
+                    row.assessment_id for row in db.query(AssessmentAnalyticsRollup.assessment_id).filter(
+                        AssessmentAnalyticsRollup.tenant_id == current_tenant_id
+                    ).distinct().all()
+                )
+                refresh_assessment_rollups(db, list(assessment_ids))
+                db.commit()
+                invalidate_assessment_dashboard(current_tenant_id)
+                total_assessments += len(assessment_ids)
+                logger.info(f"Tenant {current_tenant_id}: {len(assessment_ids)} assessments")
+            except Exception as e:
+                logger.error(f"Error rebuilding rollups for tenant {current_tenant_id}: {e}")
+                error_count += 1
+                db.rollback()
+        
+        logger.info(f"✅ Rebuild complete: {total_assessments} assessments, {error_count} errors")
+        return total_assessments, error_count
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print("Starting rebuild of the assessment analytics rollups...")
+    assessments, errors = rebuild_rollups(UUID(sys.argv[1]) if len(sys.argv) > 1 else None)
+    print(f"✅ Rebuild complete: {assessments} assessments, {errors} errors")
+    sys.exit(0 if errors == 0 else 1)
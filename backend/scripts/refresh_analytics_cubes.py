@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Background job script to refresh the analytics cubes
+
+This script should be run periodically (e.g., every few minutes via cron or a
+scheduler). It folds new prompt usage into prompt_usage_daily_rollups and
+advances each tenant's watermark. Dashboards compute only the usage after the
+watermark live, so the more often this runs, the less they scan.
+
+Usage:
+    python -m backend.scripts.refresh_analytics_cubes
+    or
+    python backend/scripts/refresh_analytics_cubes.py
+"""
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import SessionLocal
+from app.services.analytics_cube import AnalyticsCubeService
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def refresh_cubes():
+    """Refresh the analytics cubes for every tenant"""
+    db = SessionLocal()
+    try:
+        results = AnalyticsCubeService(db).refresh_all_tenants()
+        folded = sum(results["refreshed"].values())
+        logger.info(f"Refreshed analytics cubes for {len(results['refreshed'])} tenants ({folded} usage groups folded in)")
+        if results["errors"]:
+            logger.error(f"Analytics cube refresh failed for {len(results['errors'])} tenants")
+        return results
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    results = refresh_cubes()
+    sys.exit(0 if not results["errors"] else 1)
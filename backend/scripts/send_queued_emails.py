@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Background worker that sends queued emails
+
+Notification emails are queued as pending email_outbox rows; this worker claims
+them in batches, sends each tenant's messages over one SMTP session and
+schedules retries. Run it as a long-lived process (several can run side by
+side), or with --once from cron.
+
+Usage:
+    python -m backend.scripts.send_queued_emails [--once]
+    or
+    python backend/scripts/send_queued_emails.py [--once]
+"""
+import sys
+import argparse
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.email_outbox import EmailOutboxWorker
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def send(once: bool):
+    """Drain the email outbox once, or keep sending until interrupted"""
+    worker = EmailOutboxWorker()
+    if not once:
+        worker.run()
+        return
+    
+    try:
+        while True:
+            counts = worker.run_once()
+            if counts["claimed"] == 0:
+                break
+    finally:
+        worker.pool.close_all()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send queued emails")
+    parser.add_argument("--once", action="store_true", help="Drain the due emails and exit")
+    args = parser.parse_args()
+    
+    try:
+        send(args.once)
+    except KeyboardInterrupt:
+        logger.info("Email outbox worker stopped")
+    sys.exit(0)
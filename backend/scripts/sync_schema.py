@@ -43,6 +43,8 @@ import app.models.submission_requirement
 import app.models.agent_connection
 import app.models.marketplace
 import app.models.webhook
+import app.models.email_outbox
+import app.models.ticket_counter
 import app.models.adoption
 import app.models.offboarding
 import app.models.approval
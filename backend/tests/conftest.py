@@ -1,9 +1,13 @@
 """
 Pytest configuration and fixtures
 """
+import operator
+import re
+
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.sql import elements, operators
 from fastapi.testclient import TestClient
 from app.core.database import Base, get_db
 from app.main import app
@@ -91,3 +95,261 @@ def admin_user(db):
     db.refresh(user)
     return user
 
+
+# In-memory session fakes for unit tests that don't need a database.
+# Queries against mapped models are evaluated on the rows in FakeSession.tables,
+# so a query that filters on the wrong column or value returns the wrong rows.
+
+_COMPARISONS = {
+    operator.eq: operator.eq,
+    operator.ne: operator.ne,
+    operator.lt: operator.lt,
+    operator.le: operator.le,
+    operator.gt: operator.gt,
+    operator.ge: operator.ge,
+}
+
+
+def _operand(clause, row):
+    """Value of one side of a comparison for a row"""
+    if isinstance(clause, elements.Grouping):
+        return _operand(clause.element, row)
+    if isinstance(clause, elements.BindParameter):
+        return clause.effective_value
+    if isinstance(clause, elements.Null):
+        return None
+    if isinstance(clause, elements.True_):
+        return True
+    if isinstance(clause, elements.False_):
+        return False
+    if isinstance(clause, elements.Tuple):
+        return tuple(_operand(element, row) for element in clause.clauses)
+    if isinstance(clause, elements.ColumnElement) and "proxy_key" in clause._annotations:
+        return getattr(row, clause._annotations["proxy_key"])
+    raise AssertionError(f"FakeQuery can't evaluate {clause!r}")
+
+
+def matches(criterion, row) -> bool:
+    """Evaluate a SQL criterion against an in-memory row (NULL comparisons are false)"""
+    if isinstance(criterion, elements.Grouping):
+        return matches(criterion.element, row)
+    if isinstance(criterion, elements.BooleanClauseList):
+        results = (matches(clause, row) for clause in criterion.clauses)
+        if criterion.operator is operator.and_:
+            return all(results)
+        if criterion.operator is operator.or_:
+            return any(results)
+    elif isinstance(criterion, elements.UnaryExpression) and criterion.operator is operators.inv:
+        return not matches(criterion.element, row)
+    elif isinstance(criterion, elements.BinaryExpression):
+        left, right = _operand(criterion.left, row), _operand(criterion.right, row)
+        if criterion.operator is operators.is_:
+            return left is right if right is None else left == right
+        if criterion.operator is operators.is_not:
+            return left is not right if right is None else left != right
+        if left is None or right is None:
+            return False
+        if criterion.operator is operators.in_op:
+            return left in right
+        if criterion.operator is operators.not_in_op:
+            return left not in right
+        if criterion.operator in _COMPARISONS:
+            return _COMPARISONS[criterion.operator](left, right)
+        if criterion.operator in (operators.like_op, operators.not_like_op):
+            pattern = "".join(".*" if c == "%" else "." if c == "_" else re.escape(c) for c in right)
+            return bool(re.fullmatch(pattern, left, re.S)) == (criterion.operator is operators.like_op)
+    elif isinstance(criterion, elements.ColumnElement) and "proxy_key" in criterion._annotations:
+        # Boolean column used as a condition
+        return bool(_operand(criterion, row))
+    raise AssertionError(f"FakeQuery can't evaluate {criterion!r}")
+
+
+class FakeRow(tuple):
+    """Result row of a column query: unpacks like a tuple, attributes by column key"""
+
+    def __new__(cls, keys, values):
+        row = super().__new__(cls, values)
+        row._keys = keys
+        return row
+
+    def __getattr__(self, name):
+        try:
+            return self[self._keys.index(name)]
+        except ValueError:
+            raise AttributeError(name)
+
+
+class FakeQuery:
+    """
+    Query over FakeSession rows
+
+    filter, filter_by, limit and offset are applied; joins, ordering and row
+    locks are accepted and ignored (with_for_update's arguments are kept on
+    .lock). Queries over canned results (FakeSession(results=...)) return each
+    result set as given.
+    """
+
+    def __init__(self, session, rows, columns=None, canned=False):
+        self.session = session
+        self.rows = rows
+        self.columns = columns
+        self.canned = canned
+        self.lock = None
+
+    def _derive(self, rows):
+        query = FakeQuery(self.session, rows, self.columns, self.canned)
+        query.lock = self.lock
+        return query
+
+    def filter(self, *criteria):
+        if self.canned:
+            return self
+        return self._derive([row for row in self.rows if all(matches(c, row) for c in criteria)])
+
+    def filter_by(self, **values):
+        if self.canned:
+            return self
+        return self._derive([
+            row for row in self.rows if all(getattr(row, key) == value for key, value in values.items())
+        ])
+
+    def join(self, *args, **kwargs):
+        return self
+
+    outerjoin = group_by = order_by = options = distinct = join
+
+    def with_for_update(self, **kwargs):
+        self.lock = kwargs
+        return self
+
+    def limit(self, count):
+        return self._derive(self.rows[:count])
+
+    def offset(self, count):
+        return self._derive(self.rows[count:])
+
+    def _results(self):
+        if self.canned or self.columns is None:
+            return list(self.rows)
+        keys = [column.key for column in self.columns]
+        return [FakeRow(keys, [getattr(row, key) for key in keys]) for row in self.rows]
+
+    def all(self):
+        return self._results()
+
+    def first(self):
+        results = self._results()
+        return results[0] if results else None
+
+    def one(self):
+        results = self._results()
+        assert len(results) == 1, f"Expected one row, got {len(results)}"
+        return results[0]
+
+    def one_or_none(self):
+        results = self._results()
+        assert len(results) <= 1, f"Expected at most one row, got {len(results)}"
+        return results[0] if results else None
+
+    def scalar(self):
+        row = self.first()
+        return row[0] if isinstance(row, tuple) else row
+
+    def count(self):
+        return len(self.rows)
+
+    def update(self, values, synchronize_session=None):
+        self.session.updates.append(values)
+        for row in self.rows:
+            for column, value in values.items():
+                setattr(row, getattr(column, "key", column), value)
+        return len(self.rows)
+
+    def delete(self, synchronize_session=None):
+        rows = list(self.rows)
+        for row in rows:
+            self.session.delete(row)
+        return len(rows)
+
+
+class FakeSession:
+    """
+    In-memory stand-in for a Session
+
+    Args:
+        tables: Rows per mapped model; queries on a model (or its columns) read
+            and filter these lists, and add/delete write to them
+        results: Canned result sets, served in query order, for queries that
+            can't be evaluated in memory (aggregates, joins); filters are not applied
+        bind: Returned by get_bind, for code that runs statements on the engine
+    """
+
+    def __init__(self, tables=None, results=None, bind=None):
+        self.tables = tables if tables is not None else {}
+        self.results = list(results) if results is not None else None
+        self.bind = bind
+        self.info = {}
+        self.queries = []
+        self.query_count = 0
+        self.get_count = 0
+        self.added = []
+        self.deleted = []
+        self.updates = []
+        self.executed = []
+        self.flushes = 0
+        self.commits = 0
+        self.rollbacks = 0
+        self.expunged = False
+        self.closed = False
+
+    def query(self, *entities):
+        self.query_count += 1
+        if self.results is not None:
+            query = FakeQuery(self, self.results.pop(0) if self.results else [], canned=True)
+        else:
+            columns = [entity for entity in entities if hasattr(entity, "class_")] or None
+            model = columns[0].class_ if columns else entities[0]
+            if columns and len(columns) != len(entities):
+                raise AssertionError(f"FakeQuery can't serve {entities!r}; use canned results")
+            query = FakeQuery(self, self.tables.setdefault(model, []), columns)
+        self.queries.append(query)
+        return query
+
+    def get_bind(self):
+        return self.bind
+
+    def get(self, model, ident):
+        self.get_count += 1
+        return next((row for row in self.tables.get(model, []) if row.id == ident), None)
+
+    def add(self, obj):
+        if getattr(obj, "id", False) is None:
+            obj.id = uuid.uuid4()
+        self.added.append(obj)
+        self.tables.setdefault(type(obj), []).append(obj)
+
+    def add_all(self, objects):
+        for obj in objects:
+            self.add(obj)
+
+    def delete(self, obj):
+        self.deleted.append(obj)
+        self.tables[type(obj)].remove(obj)
+
+    def execute(self, statement, params=None):
+        self.executed.append((statement, params))
+
+    def flush(self):
+        self.flushes += 1
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def expunge_all(self):
+        self.expunged = True
+
+    def close(self):
+        self.closed = True
@@ -0,0 +1,206 @@
+"""
+Unit tests for the materialized action item inbox projection and keyset cursors
+"""
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.action_item import ActionItemInboxEntry, ActionItemStatus, InboxVisibility
+from app.models.message import Message
+from app.models.ticket import Ticket
+from app.models.user import User
+from app.services import action_item_projection
+from app.services.action_item_projection import (
+    ActionItemProjector,
+    ORIGIN_MESSAGE,
+    ORIGIN_TICKET,
+)
+from app.services.action_item_service import ActionItemService
+from tests.conftest import FakeSession
+
+
+def make_ticket(tenant_id, status="open"):
+    return SimpleNamespace(
+        id=uuid.uuid4(), tenant_id=tenant_id, assigned_to=uuid.uuid4(), status=status,
+        title="VPN access", description="Needs VPN", submitted_at=datetime(2026, 1, 5),
+        ticket_number="TKT-2026-00001", ticket_type="access", priority="high",
+    )
+
+
+def make_message(tenant_id, recipient_id=None, resource_type="agent", is_read=False, is_archived=False):
+    return SimpleNamespace(
+        id=uuid.uuid4(), tenant_id=tenant_id, recipient_id=recipient_id, sender_id=uuid.uuid4(),
+        resource_type=resource_type, resource_id=uuid.uuid4(), message_type="comment",
+        content="Please review", is_read=is_read, is_archived=is_archived,
+        created_at=datetime(2026, 1, 6), updated_at=datetime(2026, 1, 7),
+    )
+
+
+def make_entry(tenant_id, assigned_at, status=ActionItemStatus.PENDING.value, **audience):
+    return ActionItemInboxEntry(
+        id=uuid.uuid4(), tenant_id=tenant_id, origin=ORIGIN_TICKET, origin_id=uuid.uuid4(),
+        visibility=audience.pop("visibility", InboxVisibility.ASSIGNEE.value), item_type="ticket",
+        title="Ticket: VPN access", status=status, priority="medium", assigned_at=assigned_at,
+        source_type="ticket", source_id=uuid.uuid4(), **audience,
+    )
+
+
+def build_inbox(tenant_id, user_id, role):
+    """Entries visible to the user by assignment, role, participation or tenant visibility, plus ones that aren't"""
+    base = datetime(2026, 3, 1, 9, 0)
+    colleague = uuid.uuid4()
+    visible = [
+        make_entry(tenant_id, base + timedelta(hours=3), assigned_to=user_id),
+        # Same assigned_at: the cursor breaks ties on id
+        make_entry(tenant_id, base + timedelta(hours=2), assigned_to=user_id),
+        make_entry(tenant_id, base + timedelta(hours=2), assigned_role=role),
+        make_entry(tenant_id, base + timedelta(hours=2), assigned_to=colleague, completed_by=user_id,
+                   status=ActionItemStatus.COMPLETED.value),
+        make_entry(tenant_id, base + timedelta(hours=1), visibility=InboxVisibility.TENANT.value),
+        make_entry(tenant_id, base, assigned_to=user_id, visibility=InboxVisibility.PRIVATE.value),
+    ]
+    visible[0].due_date = base - timedelta(days=1)
+    hidden = [
+        make_entry(tenant_id, base, assigned_to=colleague),
+        make_entry(tenant_id, base, assigned_to=colleague, visibility=InboxVisibility.PRIVATE.value),
+        make_entry(tenant_id, base, assigned_role="tenant_admin"),
+        make_entry(uuid.uuid4(), base, assigned_to=user_id),
+    ]
+    return visible, hidden
+
+
+def newest_first(entries):
+    return [str(entry.origin_id) for entry in sorted(entries, key=lambda e: (e.assigned_at, e.id), reverse=True)]
+
+
+def test_visible_entries_match_audience_in_memory():
+    """The visibility filters select by assignee, role, participant and tenant visibility"""
+    tenant_id, user_id = uuid.uuid4(), uuid.uuid4()
+    visible, hidden = build_inbox(tenant_id, user_id, "security_reviewer")
+    db = FakeSession({ActionItemInboxEntry: visible + hidden})
+    service = ActionItemService(db)
+
+    assert set(service._visible_entries(user_id, tenant_id, "security_reviewer").all()) == set(visible)
+    # Admins see the whole tenant apart from other people's private entries
+    assert set(service._visible_entries(user_id, tenant_id, "tenant_admin").all()) == set(visible + hidden[:1] + hidden[2:3])
+
+
+def test_inbox_pages_follow_keyset_cursor(db):
+    """Cursor pages walk the visible entries newest first without gaps or repeats"""
+    tenant_id, user_id = uuid.uuid4(), uuid.uuid4()
+    visible, hidden = build_inbox(tenant_id, user_id, "security_reviewer")
+    db.add_all(visible + hidden)
+    db.commit()
+    service = ActionItemService(db)
+
+    seen, cursor = [], None
+    while True:
+        page = service.get_user_inbox(user_id, tenant_id, limit=2, user_role="security_reviewer", cursor=cursor)
+        seen += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == newest_first(visible)
+    assert page["total"] == len(visible)
+
+
+def test_inbox_counts_aggregate_visible_entries(db):
+    tenant_id, user_id = uuid.uuid4(), uuid.uuid4()
+    visible, hidden = build_inbox(tenant_id, user_id, "security_reviewer")
+    db.add_all(visible + hidden)
+    db.commit()
+    service = ActionItemService(db)
+
+    assert service.get_inbox_counts(user_id, tenant_id, "security_reviewer") == {
+        "pending_count": 5, "completed_count": 1, "overdue_count": 1, "total": 6
+    }
+    assert service.get_inbox_counts(user_id, tenant_id, "security_reviewer", status="overdue")["total"] == 1
+    assert service.get_inbox_counts(user_id, tenant_id, "security_reviewer", action_type="approval")["total"] == 0
+
+    page = service.get_user_inbox(user_id, tenant_id, status="pending", user_role="security_reviewer")
+    assert [item["id"] for item in page["items"]] == newest_first(
+        [entry for entry in visible if entry.status == ActionItemStatus.PENDING.value]
+    )
+
+
+def test_refresh_upserts_and_removes_entries():
+    """Open tickets are projected; closing one removes its entry"""
+    tenant_id = uuid.uuid4()
+    ticket = make_ticket(tenant_id)
+    db = FakeSession({Ticket: [ticket]})
+    projector = ActionItemProjector(db)
+
+    projector.refresh(ORIGIN_TICKET, [ticket.id])
+    [entry] = db.tables[ActionItemInboxEntry]
+    assert entry.origin == ORIGIN_TICKET
+    assert entry.origin_id == ticket.id
+    assert entry.tenant_id == tenant_id
+    assert entry.assigned_to == ticket.assigned_to
+    assert entry.status == "pending"
+    assert entry.priority == "high"
+    assert entry.assigned_at == ticket.submitted_at
+    assert entry.action_url == f"/tickets/{ticket.id}"
+
+    # Updating the source updates the same entry
+    ticket.status = "in_progress"
+    projector.refresh(ORIGIN_TICKET, [ticket.id])
+    assert db.tables[ActionItemInboxEntry] == [entry]
+    assert entry.status == "in_progress"
+
+    # A resolved ticket no longer matches the builder's query
+    ticket.status = "resolved"
+    projector.refresh(ORIGIN_TICKET, [ticket.id])
+    assert db.deleted == [entry]
+    assert db.tables[ActionItemInboxEntry] == []
+
+
+def test_message_visibility():
+    """Direct messages are private to the recipient; public agent comments are tenant-wide"""
+    tenant_id = uuid.uuid4()
+    recipient_id = uuid.uuid4()
+    direct = make_message(tenant_id, recipient_id=recipient_id, resource_type="ticket", is_read=True)
+    public = make_message(tenant_id)
+    ignored = make_message(tenant_id, resource_type="ticket")
+    archived = make_message(tenant_id, is_archived=True)
+    db = FakeSession({Message: [direct, public, ignored, archived], User: []})
+
+    projected = ActionItemProjector(db)._project_messages([direct.id, public.id, ignored.id, archived.id])
+
+    assert set(projected) == {direct.id, public.id}
+    assert projected[direct.id]["visibility"] == InboxVisibility.PRIVATE.value
+    assert projected[direct.id]["assigned_to"] == recipient_id
+    assert projected[direct.id]["status"] == "completed"
+    assert projected[direct.id]["completed_at"] == direct.updated_at
+    assert projected[public.id]["visibility"] == InboxVisibility.TENANT.value
+    assert projected[public.id]["action_url"] == f"/agents/{public.resource_id}?tab=messages"
+    assert projected[public.id]["title"] == "Message from Unknown"
+
+
+def test_flush_hook_collects_changed_sources():
+    """Changed source rows are collected per origin; other models are ignored"""
+    ticket = Ticket(id=uuid.uuid4())
+    message = Message(id=uuid.uuid4())
+    session = SimpleNamespace(info={}, new=[ticket], dirty=[message], deleted=[User(id=uuid.uuid4())])
+
+    action_item_projection._track_inbox_sources(session, None)
+
+    assert session.info["action_item_inbox_changes"] == {
+        ORIGIN_TICKET: {ticket.id},
+        ORIGIN_MESSAGE: {message.id},
+    }
+
+    action_item_projection._discard_inbox_changes(session)
+    assert "action_item_inbox_changes" not in session.info
+
+
+def test_cursor_round_trip():
+    entry = SimpleNamespace(assigned_at=datetime(2026, 3, 1, 12, 30, 15, 123456), id=uuid.uuid4())
+
+    cursor = ActionItemService.encode_cursor(entry)
+
+    assert ActionItemService.decode_cursor(cursor) == (entry.assigned_at, entry.id)
+    with pytest.raises(ValueError):
+        ActionItemService.decode_cursor("not-a-cursor")
@@ -0,0 +1,128 @@
+"""
+Unit tests for the prompt usage analytics cube (watermarked refresh and reads)
+"""
+import uuid
+from datetime import datetime, timedelta
+
+from app.models.agent import Agent
+from app.models.prompt_usage import AnalyticsCubeWatermark, PromptUsageDailyRollup
+from app.services.analytics_cube import (
+    AnalyticsCubeService,
+    CUBE_SETTLE_SECONDS,
+    PROMPT_USAGE_CUBE,
+)
+from tests.conftest import FakeSession
+
+
+def usage_slice(day, agent_id, requests, tokens, cost, user_id=None, role=None, department=None):
+    return (day, agent_id, user_id, role, department, "OpenAI", "gpt-4", requests, tokens, cost)
+
+
+def test_refresh_folds_usage_and_advances_watermark(monkeypatch):
+    tenant_id, agent_id = uuid.uuid4(), uuid.uuid4()
+    now = datetime(2026, 3, 10, 12, 0)
+    day = datetime(2026, 3, 10)
+    batches = [[usage_slice(day, agent_id, 3, 300, 0.5)], [usage_slice(day, agent_id, 2, 100, 0.25)]]
+    calls = []
+
+    def fake_aggregate(self, tenant, since=None, after=None, until=None):
+        calls.append((after, until))
+        return batches.pop(0)
+
+    monkeypatch.setattr(AnalyticsCubeService, "_aggregate_usage", fake_aggregate)
+    db = FakeSession()
+    service = AnalyticsCubeService(db)
+
+    assert service.refresh_prompt_usage(tenant_id, now=now) == 1
+    [watermark] = db.tables[AnalyticsCubeWatermark]
+    upper = now - timedelta(seconds=CUBE_SETTLE_SECONDS)
+    assert (watermark.cube, watermark.watermark) == (PROMPT_USAGE_CUBE, upper)
+    [rollup] = db.tables[PromptUsageDailyRollup]
+    assert (rollup.request_count, rollup.total_tokens, rollup.total_cost) == (3, 300, 0.5)
+
+    # The next refresh only aggregates rows after the watermark and adds them to the same day
+    later = now + timedelta(minutes=5)
+    service.refresh_prompt_usage(tenant_id, now=later)
+    assert calls[1] == (upper, later - timedelta(seconds=CUBE_SETTLE_SECONDS))
+    assert db.tables[PromptUsageDailyRollup] == [rollup]
+    assert (rollup.request_count, rollup.total_tokens, rollup.total_cost) == (5, 400, 0.75)
+
+    # Nothing new since the watermark
+    assert service.refresh_prompt_usage(tenant_id, now=later) == 0
+    assert len(calls) == 2
+
+
+def test_slices_combine_rollup_and_live_tail(monkeypatch):
+    tenant_id, agent_id = uuid.uuid4(), uuid.uuid4()
+    day = datetime(2026, 3, 10)
+    watermark = datetime(2026, 3, 10, 9, 0)
+    live = [usage_slice(day, agent_id, 1, 10, 0.01)]
+    calls = []
+
+    def fake_aggregate(self, tenant, since=None, after=None, until=None):
+        calls.append((since, after))
+        return live
+
+    monkeypatch.setattr(AnalyticsCubeService, "_aggregate_usage", fake_aggregate)
+    since = datetime(2026, 2, 1)
+
+    # Before the first refresh everything is computed live
+    assert AnalyticsCubeService(FakeSession()).prompt_usage_slices(tenant_id, since) == live
+    assert calls == [(since, None)]
+
+    def rollup(tenant, rollup_day):
+        return PromptUsageDailyRollup(
+            tenant_id=tenant, day=rollup_day, agent_id=agent_id, user_id=None, user_role=None, department=None,
+            model_vendor="OpenAI", model_name="gpt-4", request_count=4, total_tokens=40, total_cost=0.2,
+        )
+
+    db = FakeSession({
+        AnalyticsCubeWatermark: [AnalyticsCubeWatermark(tenant_id=tenant_id, cube=PROMPT_USAGE_CUBE, watermark=watermark)],
+        # Another tenant's rollup and one from before the window are left out
+        PromptUsageDailyRollup: [rollup(tenant_id, day), rollup(uuid.uuid4(), day), rollup(tenant_id, datetime(2026, 1, 1))],
+    })
+    slices = AnalyticsCubeService(db).prompt_usage_slices(tenant_id, since)
+    assert slices == [usage_slice(day, agent_id, 4, 40, 0.2)] + live
+    assert calls[1] == (since, watermark)
+
+
+def test_usage_analytics_sections(monkeypatch):
+    tenant_id = uuid.uuid4()
+    agent_a, agent_b = uuid.uuid4(), uuid.uuid4()
+    alice, bob = uuid.uuid4(), uuid.uuid4()
+    now = datetime(2026, 3, 10, 15, 30)
+    today, yesterday = datetime(2026, 3, 10), datetime(2026, 3, 9)
+    slices = [
+        usage_slice(today, agent_a, 2, 200, 1.0, user_id=alice, role="end_user", department="Finance"),
+        usage_slice(today, agent_a, 1, 50, 0.5, user_id=alice, role="end_user", department="Finance"),
+        usage_slice(yesterday, agent_b, 3, 300, 2.0, user_id=bob, role="tenant_admin", department="Finance"),
+        usage_slice(yesterday, agent_b, 1, 10, 0.25),
+        # Last month, outside the 30-day window
+        usage_slice(datetime(2026, 1, 15), agent_b, 9, 900, 9.0),
+    ]
+    monkeypatch.setattr(AnalyticsCubeService, "prompt_usage_slices", lambda self, tenant, since: slices)
+    db = FakeSession({Agent: [Agent(id=agent_a, name="Support bot")]})
+
+    usage = AnalyticsCubeService(db).prompt_usage_analytics(tenant_id, now=now)
+
+    cost = usage["cost_analytics"]
+    assert cost["total_cost"] == 3.75
+    assert cost["daily_cost"] == 1.5
+    assert cost["monthly_cost"] == 3.75
+    assert cost["cost_by_model"] == {"OpenAI/gpt-4": 3.75}
+    assert cost["cost_by_agent"]["Support bot"] == {"cost": 1.5, "requests": 3, "tokens": 250}
+    assert cost["cost_by_agent"][str(agent_b)]["requests"] == 4
+    assert len(cost["cost_trends"]) == 30
+    assert cost["cost_trends"][-1] == {"date": "2026-03-10", "cost": 1.5, "requests": 3}
+    assert cost["cost_trends"][-2] == {"date": "2026-03-09", "cost": 2.25, "requests": 4}
+
+    prompts = usage["prompt_usage"]
+    assert (prompts["total_requests"], prompts["total_tokens"]) == (7, 560)
+    assert prompts["usage_trends"][-1] == {"date": "2026-03-10", "requests": 3, "tokens": 250}
+
+    assert usage["usage_by_role"] == {
+        "end_user": {"requests": 3, "cost": 1.5, "tokens": 250},
+        "tenant_admin": {"requests": 3, "cost": 2.0, "tokens": 300},
+    }
+    assert usage["usage_by_department"]["Finance"] == {"requests": 6, "cost": 3.5, "tokens": 550, "user_count": 2}
+    assert usage["usage_by_department"]["Unknown"]["user_count"] == 0
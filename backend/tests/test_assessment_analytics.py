@@ -0,0 +1,165 @@
+"""
+Unit tests for the rollup-backed assessment analytics dashboard
+"""
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.assessment import AssessmentAssignment
+from app.services import assessment_analytics
+from app.services.assessment_analytics import (
+    AssessmentAnalyticsService,
+    invalidate_assessment_dashboard,
+    parse_quarter,
+    quarter_key,
+)
+from tests.conftest import FakeSession
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    invalidate_assessment_dashboard()
+    yield
+    invalidate_assessment_dashboard()
+
+
+def test_quarter_helpers():
+    assert quarter_key(datetime(2024, 8, 1)) == "2024-Q3"
+    assert parse_quarter("2024-Q3") == datetime(2024, 7, 1)
+    assert parse_quarter("2024-Q5") is None
+    assert parse_quarter("Q1-2024") is None
+
+
+def test_dashboard_is_assembled_from_aggregates(monkeypatch):
+    """Rollup and overdue aggregates feed the overview, quarterly and vendor sections"""
+    monkeypatch.setattr(AssessmentAnalyticsService, "_cve_risk", lambda self, vendor_names: {})
+    acme, ghost = uuid.uuid4(), uuid.uuid4()
+    q1, q2 = datetime(2024, 1, 1), datetime(2024, 4, 1)
+    assignment = SimpleNamespace(id=uuid.uuid4(), due_date=datetime.utcnow() + timedelta(days=10), status="pending")
+    db = FakeSession(results=[
+        # (period_start, vendor_id, assessment_type, status, count)
+        [
+            (q1, acme, "tprm", "completed", 8),
+            (q1, acme, "tprm", "pending", 1),
+            (q2, acme, "tprm", "in_progress", 1),
+            (q2, None, "risk_assessment", "pending", 4),
+            (q2, ghost, "tprm", "completed", 3),
+            (None, acme, "risk_assessment", "completed", 2),
+        ],
+        # Overdue (period_start, vendor_id, assessment_type, count)
+        [(q2, acme, "tprm", 1)],
+        # Vendor names
+        [(acme, "Acme")],
+        # Assessment type distribution
+        [("tprm", 2), ("risk_assessment", 1)],
+        # Grading (vendor_id, vendor_name, human_decision, count)
+        [(acme, "Acme", "approved", 3), (acme, "Acme", None, 2), (acme, "Acme", "escalated", 1)],
+        # Next due
+        [(assignment, "Annual TPRM", "tprm", None)],
+    ])
+
+    dashboard = AssessmentAnalyticsService(db, uuid.uuid4()).build_dashboard()
+
+    assert dashboard["overview"] == {
+        "total_assessments": 3,
+        "total_assignments": 19,
+        "completed_assignments": 13,
+        "pending_assignments": 6,
+        "overdue_assignments": 1,
+        "completion_rate": 13 / 19 * 100,
+    }
+    assert dashboard["quarterly_progress"] == {
+        "2024-Q1": {"total": 9, "completed": 8, "in_progress": 0, "pending": 1, "overdue": 0},
+        "2024-Q2": {"total": 8, "completed": 3, "in_progress": 1, "pending": 4, "overdue": 1},
+    }
+    # Assignments without a vendor, or whose vendor no longer exists, are left out
+    assert list(dashboard["vendor_distribution"]) == [str(acme)]
+    acme_data = dashboard["vendor_distribution"][str(acme)]
+    assert acme_data["assessments"]["tprm"] == {
+        "total": 10, "completed": 8, "pending": 2, "overdue": 1, "risk_status": "red"
+    }
+    assert acme_data["assessments"]["risk_assessment"]["risk_status"] == "green"
+    assert acme_data["overall_risk"] == "red"
+    assert dashboard["vendor_grading_heatmap"][str(acme)]["grading"] == {
+        "accepted": 3, "denied": 0, "need_info": 0, "pending": 2
+    }
+    assert dashboard["next_due_assessments"][0]["vendor_name"] == "Unknown"
+    assert dashboard["next_due_assessments"][0]["days_until_due"] == 9
+    assert dashboard["assessment_type_distribution"] == {"tprm": 2, "risk_assessment": 1}
+
+
+def test_quarter_filter_limits_quarterly_progress(monkeypatch):
+    monkeypatch.setattr(AssessmentAnalyticsService, "_cve_risk", lambda self, vendor_names: {})
+    q1, q2 = datetime(2024, 1, 1), datetime(2024, 4, 1)
+    db = FakeSession(results=[
+        [(q1, None, "tprm", "completed", 2), (q2, None, "tprm", "pending", 5)],
+        # No vendors, so vendor names are not queried
+        [], [("tprm", 1)], [], [],
+    ])
+
+    dashboard = AssessmentAnalyticsService(db, uuid.uuid4()).build_dashboard(quarter="2024-Q2")
+
+    assert list(dashboard["quarterly_progress"]) == ["2024-Q2"]
+    assert dashboard["overview"]["total_assignments"] == 7
+
+
+def test_dashboard_cache_per_filter(monkeypatch):
+    """Dashboards are cached per (tenant, quarter, type) until the tenant is invalidated"""
+    builds = []
+
+    def fake_build(self, quarter=None, assessment_type=None):
+        builds.append((quarter, assessment_type))
+        return {"quarterly_progress": {}}
+
+    monkeypatch.setattr(AssessmentAnalyticsService, "build_dashboard", fake_build)
+    tenant_id = uuid.uuid4()
+    service = AssessmentAnalyticsService(None, tenant_id)
+
+    first = service.get_dashboard(quarter="2024-Q1")
+    first["quarterly_progress"]["2024-Q1"] = {}
+    assert service.get_dashboard(quarter="2024-Q1") == {"quarterly_progress": {}}
+    service.get_dashboard(quarter="2024-Q1", assessment_type="tprm")
+    assert builds == [("2024-Q1", None), ("2024-Q1", "tprm")]
+
+    invalidate_assessment_dashboard(uuid.uuid4())
+    service.get_dashboard(quarter="2024-Q1")
+    assert len(builds) == 2
+
+    invalidate_assessment_dashboard(tenant_id)
+    service.get_dashboard(quarter="2024-Q1")
+    assert len(builds) == 3
+
+
+def test_flush_hook_collects_changed_assessments():
+    tenant_id = uuid.uuid4()
+    assignment = AssessmentAssignment(id=uuid.uuid4(), assessment_id=uuid.uuid4(), tenant_id=tenant_id)
+    session = SimpleNamespace(info={}, new=[assignment], dirty=[], deleted=[SimpleNamespace(id=uuid.uuid4())])
+
+    assessment_analytics._track_assignment_changes(session, None)
+
+    assert session.info["assessment_rollups_changed"] == {assignment.assessment_id: tenant_id}
+
+    assessment_analytics._discard_assignment_changes(session)
+    assert session.info == {}
+
+
+def test_rollup_refresh_locks_assessments_before_counting():
+    """Refreshes of the same assessment are serialized on the assessment row"""
+    tenant_id, assessment_id = uuid.uuid4(), uuid.uuid4()
+    db = FakeSession(results=[
+        # Locked assessment ids
+        [(assessment_id,)],
+        # (tenant_id, assessment_id, vendor_id, period_start, status, count)
+        [(tenant_id, assessment_id, None, datetime(2024, 1, 1), "completed", 3)],
+    ])
+
+    assessment_analytics.refresh_assessment_rollups(db, [assessment_id])
+
+    lock, count = db.queries[:2]
+    assert lock.lock == {"key_share": True}
+    assert count.lock is None
+    assert [(row.assessment_id, row.status, row.assignment_count) for row in db.added] == [
+        (assessment_id, "completed", 3)
+    ]
@@ -0,0 +1,140 @@
+"""
+Unit tests for the bulk fan-out of scheduled assessments
+"""
+import threading
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from app.models.assessment import AssessmentSchedule
+from app.models.user import User
+from app.services import assessment_scheduler
+from app.services.action_item_projection import ORIGIN_ACTION_ITEM, ORIGIN_ASSESSMENT_ASSIGNMENT
+from app.services.assessment_scheduler import AssessmentScheduler, VendorUserResolver
+from app.services.assessment_service import AssessmentService
+from tests.conftest import FakeSession
+
+TENANT_ID = uuid.uuid4()
+NOW = datetime(2026, 4, 1, 6, 0)
+
+
+def make_user(email, role="vendor_user", tenant_id=TENANT_ID, is_active=True):
+    return SimpleNamespace(id=uuid.uuid4(), email=email, role=role, tenant_id=tenant_id, is_active=is_active)
+
+
+def inserts(db, table):
+    """Row chunks of the multi-row INSERTs into a table"""
+    return [rows for statement, rows in db.executed if statement.table.name == table]
+
+
+def make_vendor(contact_email):
+    return SimpleNamespace(id=uuid.uuid4(), contact_email=contact_email)
+
+
+def make_schedule(frequency="quarterly"):
+    assessment = SimpleNamespace(
+        name="Quarterly TPRM", assessment_type="tprm", owner_id=uuid.uuid4(), schedule_interval_months=None
+    )
+    return SimpleNamespace(
+        id=uuid.uuid4(), assessment_id=uuid.uuid4(), tenant_id=TENANT_ID, assessment=assessment,
+        scheduled_date=NOW, due_date=NOW + timedelta(days=30), frequency=frequency,
+        selected_vendor_ids=None, created_by=uuid.uuid4(), status="scheduled", triggered_at=None,
+    )
+
+
+def test_vendor_user_resolver_matches_like_create_assignment():
+    exact = make_user("Security@Acme.com")
+    partial = make_user("ops+security@globex.com")
+    fallback = make_user("someone@initech.com")
+    admin = make_user("admin@example.com", role="tenant_admin")
+    resolver = VendorUserResolver([exact, partial, fallback, admin])
+
+    assert resolver.users_for(make_vendor("security@acme.com")) == [exact]
+    assert resolver.users_for(make_vendor("security@globex.com")) == [partial]
+    assert resolver.users_for(make_vendor("nobody@umbrella.com")) == [exact, partial, fallback]
+    assert resolver.users_for(make_vendor(None)) == []
+
+
+def test_fan_out_bulk_inserts_assignments_action_items_and_audit_rows(monkeypatch):
+    vendors = [make_vendor(f"contact{i}@vendor{i}.com") for i in range(2500)] + [make_vendor(None)]
+    users = [make_user(f"contact{i}@vendor{i}.com") for i in range(2500)]
+    reservations = []
+
+    def reserve(db, tenant_id, count):
+        reservations.append(count)
+        return [f"ASMT-2026-{num:03d}" for num in range(41, 41 + count)]
+
+    monkeypatch.setattr(assessment_scheduler, "reserve_assessment_ticket_ids", reserve)
+    monkeypatch.setattr(AssessmentService, "get_vendors_matching_rules", lambda self, assessment, last_schedule_id=None: vendors)
+    # Inactive and other tenants' users with a matching email are not assigned
+    others = [make_user("contact0@vendor0.com", is_active=False), make_user("contact1@vendor1.com", tenant_id=uuid.uuid4())]
+    db = FakeSession({User: users + others})
+    schedule = make_schedule()
+
+    created = AssessmentScheduler(db=None, session_factory=None).fan_out_schedule(db, schedule, NOW)
+
+    assert created == 2501
+    # One ticket block for the whole schedule
+    assert reservations == [2501]
+    # Rows go out in multi-row INSERTs of at most FANOUT_INSERT_BATCH_SIZE
+    assert [len(chunk) for chunk in inserts(db, "assessment_assignments")] == [1000, 1000, 501]
+    assert [len(chunk) for chunk in inserts(db, "action_items")] == [1000, 1000, 500]
+    assert sum(len(chunk) for chunk in inserts(db, "audit_logs")) == 2501
+
+    assignments = [row for chunk in inserts(db, "assessment_assignments") for row in chunk]
+    action_items = [row for chunk in inserts(db, "action_items") for row in chunk]
+    assert assignments[0]["workflow_ticket_id"] == "ASMT-2026-041"
+    assert assignments[-1]["workflow_ticket_id"] == "ASMT-2026-2541"
+    assert action_items[0]["assigned_to"] == users[0].id
+    assert action_items[0]["source_id"] == assignments[0]["id"]
+    assert action_items[0]["item_metadata"]["workflow_ticket_id"] == "ASMT-2026-041"
+
+    # The bulk rows are registered with the rollup and inbox hooks
+    assert db.info["assessment_rollups_changed"] == {schedule.assessment_id: TENANT_ID}
+    assert len(db.info["action_item_inbox_changes"][ORIGIN_ASSESSMENT_ASSIGNMENT]) == 2501
+    assert len(db.info["action_item_inbox_changes"][ORIGIN_ACTION_ITEM]) == 2500
+
+    assert (schedule.status, schedule.triggered_at) == ("triggered", NOW)
+    next_schedule, = db.added
+    assert isinstance(next_schedule, AssessmentSchedule)
+    assert next_schedule.scheduled_date == NOW + timedelta(days=90)
+    assert db.commits == 0
+
+
+def test_trigger_due_schedules_fans_out_in_parallel_sessions(monkeypatch):
+    good = [make_schedule(frequency="one_time") for _ in range(5)]
+    broken = make_schedule(frequency="one_time")
+    due = good + [broken]
+    lock = threading.Lock()
+    sessions = []
+
+    def session_factory():
+        session = FakeSession()
+        sessions.append(session)
+        return session
+
+    def claim(db, now, skip_ids):
+        with lock:
+            for schedule in due:
+                if schedule.status == "scheduled" and schedule.id not in skip_ids and not getattr(schedule, "claimed", False):
+                    schedule.claimed = True
+                    return schedule
+        return None
+
+    def fan_out(db, schedule, now):
+        if schedule is broken:
+            schedule.claimed = False
+            raise RuntimeError("vendor lookup failed")
+        schedule.status = "triggered"
+        return 10
+
+    scheduler = AssessmentScheduler(db=None, session_factory=session_factory, workers=3)
+    monkeypatch.setattr(scheduler, "claim_due_schedule", claim)
+    monkeypatch.setattr(scheduler, "fan_out_schedule", fan_out)
+
+    assert scheduler.trigger_due_schedules() == 50
+    assert len(sessions) == 3 and all(session.closed for session in sessions)
+    assert sum(session.commits for session in sessions) == 5
+    # A failing schedule is rolled back and left due, not retried in the same run
+    assert broken.status == "scheduled"
+    assert sum(session.rollbacks for session in sessions) == 1 + 3
@@ -0,0 +1,125 @@
+"""
+Unit tests for compiled business rule conditions and the compiled-rule cache
+"""
+import pytest
+from types import SimpleNamespace
+from uuid import uuid4
+
+from app.services import business_rules_engine
+from app.services.business_rules_engine import (
+    BusinessRulesEngine,
+    invalidate_compiled_rules,
+    _compile_condition,
+)
+
+
+def make_rule(rule_id, condition, action="assign_to:user.department_manager", priority=100):
+    return SimpleNamespace(
+        rule_id=rule_id,
+        name=f"Rule {rule_id}",
+        rule_type="conditional",
+        condition_expression=condition,
+        action_expression=action,
+        action_type="assign",
+        action_config=None,
+        priority=priority,
+        is_automatic=True,
+    )
+
+
+@pytest.mark.parametrize("expression,context,expected", [
+    ("user.department == 'IT'", {"user": {"department": "IT"}}, True),
+    ("user.department = 'IT'", {"user": {"department": "HR"}}, False),
+    ("agent.risk_score > 50", {"agent": {"risk_score": 75}}, True),
+    ("agent.risk_score >= 50", {"agent": {"risk_score": 49}}, False),
+    ("agent.category in ['Security', 'Compliance']", {"agent": {"category": "Security"}}, True),
+    ("agent.category not in ['Security', 'Compliance']", {"agent": {"category": "Security"}}, False),
+    ("agent.name contains 'bot'", {"agent": {"name": "ChatBot"}}, True),
+    ("user.department = agent.department", {"user": {"department": "IT"}, "agent": {"department": "IT"}}, True),
+    ("true", {}, True),
+    ("nonsense", {}, False),
+])
+def test_compiled_condition(expression, context, expected):
+    """Compiled conditions evaluate the documented expression syntax"""
+    assert _compile_condition(expression)(context) is expected
+
+
+def test_compiled_condition_is_reused():
+    """The same expression compiles once"""
+    assert _compile_condition("agent.risk_score > 10") is _compile_condition("agent.risk_score > 10")
+
+
+def test_compiled_rules_cached_until_invalidated(monkeypatch):
+    """Rules are loaded once per (tenant, entity_type, screen, rule_type) until invalidated"""
+    tenant_id = uuid4()
+    calls = []
+
+    def fake_get_applicable_rules(self, entity_type, screen=None, rule_type=None):
+        calls.append((entity_type, screen, rule_type))
+        return [
+            make_rule("low", "user.department == 'IT'", priority=200),
+            make_rule("high", "user.department == 'IT'", priority=10),
+        ]
+
+    monkeypatch.setattr(BusinessRulesEngine, "_get_applicable_rules", fake_get_applicable_rules)
+    invalidate_compiled_rules(tenant_id)
+
+    engine = BusinessRulesEngine(None, tenant_id)
+    context = {"user": {"department": "IT", "department_manager": "manager@example.com"}}
+
+    first = engine.evaluate_rules(context, entity_type="user", screen="agent_submission")
+    second = engine.evaluate_rules(context, entity_type="user", screen="agent_submission")
+
+    assert [r["rule_id"] for r in first] == ["high", "low"]
+    assert first[0]["action"]["value"] == "manager@example.com"
+    assert second == first
+    assert len(calls) == 1
+
+    invalidate_compiled_rules(tenant_id)
+    engine.evaluate_rules(context, entity_type="user", screen="agent_submission")
+    assert len(calls) == 2
+
+    monkeypatch.setattr(business_rules_engine, "COMPILED_RULES_TTL_SECONDS", 0)
+    engine.evaluate_rules(context, entity_type="user", screen="agent_submission")
+    assert len(calls) == 3
+
+
+def test_evaluate_rules_bulk_matches_per_context(monkeypatch):
+    """Bulk evaluation loads rules once and returns the same results as evaluate_rules per context"""
+    tenant_id = uuid4()
+    calls = []
+
+    def fake_get_applicable_rules(self, entity_type, screen=None, rule_type=None):
+        calls.append(entity_type)
+        return [
+            make_rule("risky", "agent.risk_score > 50", action="assign_to:agent.owner", priority=10),
+            make_rule("security", "agent.category in ['Security', 'Compliance']", priority=20),
+            make_rule("broken", "agent.risk_score > agent.missing", priority=30),
+        ]
+
+    monkeypatch.setattr(BusinessRulesEngine, "_get_applicable_rules", fake_get_applicable_rules)
+    invalidate_compiled_rules(tenant_id)
+
+    engine = BusinessRulesEngine(None, tenant_id)
+    contexts = [
+        {"agent": {"risk_score": 80, "category": "Security", "owner": "a@example.com"}},
+        {"agent": {"risk_score": 20, "category": "HR", "owner": "b@example.com"}},
+        {"agent": {"risk_score": 60, "category": "Compliance", "owner": "c@example.com"}},
+        {},
+    ]
+
+    bulk = engine.evaluate_rules_bulk(contexts, entity_type="agent", rule_type="assignment")
+
+    assert len(calls) == 1
+    assert [[r["rule_id"] for r in results] for results in bulk] == [
+        ["risky", "security"],
+        [],
+        ["risky", "security"],
+        [],
+    ]
+    assert bulk[2][0]["action"]["value"] == "c@example.com"
+    assert bulk == [
+        engine.evaluate_rules(context, entity_type="agent", rule_type="assignment")
+        for context in contexts
+    ]
+    assert engine.evaluate_rules_bulk([], entity_type="agent") == []
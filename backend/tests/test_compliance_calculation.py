@@ -0,0 +1,179 @@
+"""
+Unit tests for set-based compliance scoring and the incremental compliance snapshot
+"""
+import uuid
+from types import SimpleNamespace
+
+from app.models.assessment import (
+    AssessmentAssignment,
+    AssessmentComplianceSnapshot,
+    AssessmentQuestion,
+    AssessmentQuestionResponse,
+)
+from app.models.compliance_framework import ComplianceFramework
+from app.models.question_library import QuestionLibrary
+from app.services.compliance_calculation_service import (
+    ComplianceCalculationService,
+    KeywordMatcher,
+    compile_keyword_matcher,
+)
+from tests.conftest import FakeSession
+
+
+def build_session(question_count=30):
+    """Assessment whose questions map to two frameworks; every third answer fails"""
+    fw_a, fw_b = uuid.uuid4(), uuid.uuid4()
+    assignment = SimpleNamespace(id=uuid.uuid4(), assessment_id=uuid.uuid4(), tenant_id=uuid.uuid4())
+    criteria = {"type": "exact_match", "pass_condition": "yes", "fail_condition": "no"}
+
+    library, questions, responses = [], [], []
+    for i in range(question_count):
+        qlib = SimpleNamespace(
+            id=uuid.uuid4(),
+            title=f"Library question {i}",
+            compliance_framework_ids=[str(fw_a), str(fw_b)] if i % 2 == 0 else [str(fw_a)],
+            pass_fail_criteria=criteria,
+        )
+        question = SimpleNamespace(
+            id=uuid.uuid4(),
+            assessment_id=assignment.assessment_id,
+            reusable_question_id=qlib.id,
+            title=None,
+        )
+        library.append(qlib)
+        questions.append(question)
+        responses.append(SimpleNamespace(
+            assignment_id=assignment.id,
+            question_id=question.id,
+            value="no" if i % 3 == 0 else "yes",
+            documents=None,
+        ))
+
+    db = FakeSession({
+        AssessmentAssignment: [assignment],
+        AssessmentQuestion: questions,
+        AssessmentQuestionResponse: responses,
+        QuestionLibrary: library,
+        ComplianceFramework: [
+            SimpleNamespace(id=fw_a, name="Framework A", code="FA"),
+            SimpleNamespace(id=fw_b, name="Framework B", code="FB"),
+        ],
+    })
+    return db, assignment, questions, responses, str(fw_a), str(fw_b)
+
+
+def test_calculation_uses_constant_number_of_queries():
+    """All frameworks are scored in one pass with a fixed number of queries"""
+    db, assignment, _, _, fw_a, fw_b = build_session(question_count=30)
+
+    result = ComplianceCalculationService(db).calculate_compliance_for_assignment(assignment.id)
+
+    assert db.query_count == 5
+    framework_a = result["frameworks"][fw_a]
+    assert framework_a["total_questions"] == 30
+    assert framework_a["failed_questions"] == 10
+    assert framework_a["passed_questions"] == 20
+    assert framework_a["compliance_score"] == 66
+    assert framework_a["status"] == "mostly_compliant"
+    assert result["frameworks"][fw_b]["total_questions"] == 15
+    assert len(framework_a["evaluations"]) == 30
+
+
+def test_snapshot_is_updated_incrementally():
+    """Changed answers update the stored snapshot to match a full recalculation"""
+    db, assignment, questions, responses, fw_a, _ = build_session(question_count=6)
+    service = ComplianceCalculationService(db)
+
+    first = service.get_compliance_snapshot(assignment.id)
+    assert first["frameworks"][fw_a]["failed_questions"] == 2
+    assert len(db.tables[AssessmentComplianceSnapshot]) == 1
+
+    # Flip a failing answer to passing and clear another answer
+    responses[0].value = "yes"
+    responses[1].value = None
+    db.query_count = 0
+    service.update_compliance_snapshot(assignment.id, [questions[0].id, questions[1].id])
+    assert db.query_count == 4
+
+    updated = service.get_compliance_snapshot(assignment.id)
+    expected = service.calculate_compliance_for_assignment(assignment.id)
+    assert updated["frameworks"] == expected["frameworks"]
+    assert updated["frameworks"][fw_a]["failed_questions"] == 1
+    assert updated["frameworks"][fw_a]["answered_questions"] == 5
+    assert len(db.tables[AssessmentComplianceSnapshot]) == 1
+
+
+def test_snapshot_rebuilds_when_question_mapping_changes():
+    """A question newly mapped to a framework triggers a full rebuild"""
+    db, assignment, questions, _, fw_a, fw_b = build_session(question_count=4)
+    service = ComplianceCalculationService(db)
+    service.get_compliance_snapshot(assignment.id)
+
+    db.tables[QuestionLibrary][1].compliance_framework_ids = [fw_a, fw_b]
+    service.update_compliance_snapshot(assignment.id, [questions[1].id])
+
+    snapshot = service.get_compliance_snapshot(assignment.id, framework_id=uuid.UUID(fw_b))
+    assert list(snapshot["frameworks"]) == [fw_b]
+    assert snapshot["frameworks"][fw_b]["total_questions"] == 3
+
+
+def test_keyword_matcher_finds_overlapping_keywords():
+    """Every keyword is found in one pass, including prefixes and overlaps"""
+    matcher = KeywordMatcher(("Encrypt", "encryption", "crypt", "AES"))
+
+    found = matcher.find("We use AES encryption at rest")
+
+    assert found == {
+        "aes": [(7, 10)],
+        "encryption": [(11, 21)],
+        "encrypt": [(11, 18)],
+        "crypt": [(13, 18)],
+    }
+    assert compile_keyword_matcher(("a", "b")) is compile_keyword_matcher(("a", "b"))
+
+
+def test_keyword_evaluation_matches_substring_semantics():
+    """Compiled keyword evaluation gives the same verdicts as plain substring checks"""
+    service = ComplianceCalculationService(None)
+    criteria = {"pass_keywords": ["Encrypt", "MFA", "audit log"], "fail_keywords": ["plaintext"]}
+
+    passed = service._evaluate_keywords(criteria, "All data is encrypted and MFA is enforced")
+    assert passed["status"] == "passed"
+    assert passed["reasoning"] == "Response contains relevant keywords: Encrypt, MFA"
+    assert passed["confidence"] == 0.5 + (2 / 3) * 0.4
+    assert passed["matches"] == [
+        {"keyword": "Encrypt", "start": 12, "end": 19},
+        {"keyword": "MFA", "start": 26, "end": 29},
+    ]
+
+    failed = service._evaluate_keywords(criteria, "Passwords are stored in PLAINTEXT with MFA")
+    assert failed["status"] == "failed"
+    assert failed["reasoning"] == "Response contains fail keyword: plaintext"
+
+    assert service._evaluate_keywords(criteria, "Nothing relevant")["status"] == "review"
+    assert service._evaluate_ai(
+        {"evaluation_prompt": "Check", "pass_keywords": ["audit log"]},
+        "We keep an Audit Log of all access",
+        None
+    )["status"] == "passed"
+
+
+def test_keyword_evaluation_treats_null_keyword_lists_as_empty():
+    """Criteria stored with a null keyword list evaluate like an empty list"""
+    service = ComplianceCalculationService(None)
+
+    assert service._evaluate_keywords({"pass_keywords": ["yes"], "fail_keywords": None}, "yes")["status"] == "passed"
+    assert service._evaluate_keywords({"pass_keywords": None, "fail_keywords": ["no"]}, "yes")["status"] == "review"
+    assert service._evaluate_keywords({"pass_keywords": None, "fail_keywords": ["no"]}, "no")["status"] == "failed"
+    assert service._evaluate_ai({"evaluation_prompt": "Check", "pass_keywords": None}, "yes", None)["status"] == "review"
+
+
+def test_keyword_match_positions_index_the_original_text():
+    """Characters whose lowercase form is longer (İ) don't shift the reported positions"""
+    service = ComplianceCalculationService(None)
+    response = "İİ: yes, MFA İs enabled"
+
+    result = service._evaluate_keywords({"pass_keywords": ["yes", "mfa"]}, response)
+
+    assert result["status"] == "passed"
+    assert [response[match["start"]:match["end"]] for match in result["matches"]] == ["yes", "MFA"]
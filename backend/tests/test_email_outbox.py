@@ -0,0 +1,310 @@
+"""
+Unit tests for pooled SMTP sending, the SMTP config cache and the email outbox worker
+
+Mail goes to a local debug SMTP server, which records connections and messages.
+"""
+import asyncio
+import socket
+import socketserver
+import threading
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.email_outbox import EmailOutboxMessage, EmailOutboxStatus
+from app.models.integration import Integration, IntegrationStatus, IntegrationType
+from app.services import email_outbox, email_service
+from app.services.email_outbox import EmailOutboxWorker, TENANT_CLAIM_LIMIT
+from app.services.email_service import EmailService, SMTPConnectionPool, SendDeferred
+from tests.conftest import FakeSession
+
+
+class DebugSMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        server.sockets.append(self.request)
+        self.reply("220 debug ESMTP")
+        mail_from, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip()
+            verb = command[:4].upper()
+            if verb in ("EHLO", "HELO", "NOOP"):
+                self.reply("250 debug")
+            elif verb == "MAIL":
+                mail_from, recipients = command.split(":", 1)[1].split()[0].strip("<>"), []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                address = command.split(":", 1)[1].split()[0].strip("<>")
+                if address.startswith("bounce@"):
+                    self.reply("550 No such user")
+                else:
+                    recipients.append(address)
+                    self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                for data_line in iter(self.rfile.readline, b".\r\n"):
+                    data.append(data_line)
+                server.messages.append((mail_from, recipients, b"".join(data).decode()))
+                self.reply("250 OK")
+            elif verb == "RSET":
+                mail_from, recipients = None, []
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Not implemented")
+
+
+class DebugSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), DebugSMTPHandler)
+        self.connections = 0
+        self.messages = []
+        self.sockets = []
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def drop_connections(self):
+        for sock in self.sockets:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+@pytest.fixture
+def smtp_servers():
+    servers = []
+
+    def start():
+        server = DebugSMTPServer()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def unused_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_send_email_reuses_pooled_session_and_reconnects_when_dropped(smtp_servers, monkeypatch):
+    server = smtp_servers()
+    pool = SMTPConnectionPool()
+    monkeypatch.setattr(email_service, "smtp_pool", pool)
+    service = EmailService()
+    service.smtp_host, service.smtp_port, service.smtp_use_tls = "127.0.0.1", server.port, False
+    service.smtp_user = service.smtp_password = ""
+
+    async def send_three():
+        first = await service.send_email("a@example.com", "One", "<p>1</p>", "1")
+        second = await service.send_email("b@example.com", "Two", "<p>2</p>", cc=["c@example.com"])
+        # The server drops the idle session; the next send reconnects and retries
+        server.drop_connections()
+        third = await service.send_email("d@example.com", "Three", "<p>3</p>")
+        return first, second, third
+
+    results = asyncio.run(send_three())
+    pool.close_all()
+
+    assert results == ((True, None), (True, None), (True, None))
+    assert server.connections == 2
+    assert [recipients for _, recipients, _ in server.messages] == [
+        ["a@example.com"], ["b@example.com", "c@example.com"], ["d@example.com"]
+    ]
+
+
+def test_smtp_config_cache_is_invalidated_on_commit(monkeypatch):
+    tenant_id = uuid.uuid4()
+    integration = SimpleNamespace(
+        id=uuid.uuid4(), tenant_id=tenant_id, integration_type=IntegrationType.SMTP.value, is_active=True,
+        status=IntegrationStatus.ACTIVE.value, config={"smtp_host": "smtp.tenant.example"},
+    )
+    db = FakeSession({Integration: [integration]})
+    email_service.invalidate_smtp_config()
+
+    assert email_service.get_smtp_integration_config(db, tenant_id)[1]["smtp_host"] == "smtp.tenant.example"
+    integration.config = {"smtp_host": "smtp.changed.example"}
+    assert email_service.get_smtp_integration_config(db, tenant_id)[1]["smtp_host"] == "smtp.tenant.example"
+    assert db.query_count == 1
+
+    # Committing a change to the tenant's SMTP integration drops its cached config
+    changed = Integration(tenant_id=tenant_id, integration_type=IntegrationType.SMTP.value)
+    session = SimpleNamespace(new=[changed], dirty=[], deleted=[], info={})
+    email_service._track_smtp_config_changes(session, None)
+    email_service._invalidate_changed_smtp_configs(session)
+
+    assert email_service.get_smtp_integration_config(db, tenant_id)[1]["smtp_host"] == "smtp.changed.example"
+    assert db.query_count == 2
+    email_service.invalidate_smtp_config()
+
+
+def test_worker_sends_each_tenants_messages_over_one_session(smtp_servers, monkeypatch):
+    first_server, second_server = smtp_servers(), smtp_servers()
+    first_tenant, second_tenant, unreachable_tenant = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    configs = {
+        first_tenant: {"smtp_host": "127.0.0.1", "smtp_port": first_server.port, "smtp_use_tls": False,
+                       "smtp_user": "", "smtp_password": "", "from_email": "first@example.com"},
+        second_tenant: {"smtp_host": "127.0.0.1", "smtp_port": second_server.port, "smtp_use_tls": False,
+                        "smtp_user": "", "smtp_password": "", "from_email": "second@example.com"},
+        unreachable_tenant: {"smtp_host": "127.0.0.1", "smtp_port": unused_port(), "smtp_use_tls": False},
+    }
+    monkeypatch.setattr(email_outbox, "get_smtp_integration_config", lambda db, tenant_id: (uuid.uuid4(), configs[tenant_id]))
+
+    def message(tenant_id, to_email):
+        return EmailOutboxMessage(
+            tenant_id=tenant_id, to_email=to_email, subject="Stage update", html_body="<p>Hi</p>",
+            status=EmailOutboxStatus.SENDING.value, attempt_count=0,
+        )
+
+    messages = [
+        message(first_tenant, "r1@example.com"),
+        message(second_tenant, "r2@example.com"),
+        message(first_tenant, "bounce@example.com"),
+        message(first_tenant, "r3@example.com"),
+        message(unreachable_tenant, "r4@example.com"),
+    ]
+    pool = SMTPConnectionPool()
+    worker = EmailOutboxWorker(session_factory=None, pool=pool)
+    for m in messages:
+        m.id, m.lease_token = uuid.uuid4(), uuid.uuid4()
+    db = FakeSession({EmailOutboxMessage: list(messages)})
+    now = datetime(2026, 5, 1, 12, 0)
+
+    errors = worker.send(db, messages)
+    counts = worker.record_results(db, messages, errors, now)
+    pool.close_all()
+
+    # One session per tenant configuration; a rejected recipient doesn't end it
+    assert (first_server.connections, second_server.connections) == (1, 1)
+    assert [(sender, recipients) for sender, recipients, _ in first_server.messages] == [
+        ("first@example.com", ["r1@example.com"]), ("first@example.com", ["r3@example.com"])
+    ]
+    assert [recipients for _, recipients, _ in second_server.messages] == [["r2@example.com"]]
+
+    assert counts == {"sent": 3, "retrying": 1, "failed": 1, "deferred": 0, "lost": 0}
+    assert [m.status for m in messages] == ["sent", "sent", "failed", "sent", "pending"]
+    assert messages[0].sent_at == now and messages[0].attempt_count == 1
+    assert "No such user" in messages[2].last_error
+    assert messages[4].next_attempt_at > now
+    assert db.commits == 1
+    assert all(values[EmailOutboxMessage.lease_token] is None for values in db.updates)
+
+
+def test_claim_caps_each_tenants_messages_and_leases_them_with_one_token():
+    busy_tenant, quiet_tenant = uuid.uuid4(), uuid.uuid4()
+    now = datetime(2026, 5, 1, 12, 0)
+
+    def message(tenant_id, status=EmailOutboxStatus.PENDING.value, next_attempt_at=now):
+        return EmailOutboxMessage(id=uuid.uuid4(), tenant_id=tenant_id, status=status, next_attempt_at=next_attempt_at)
+
+    rows = [message(busy_tenant) for _ in range(TENANT_CLAIM_LIMIT + 5)] + [message(quiet_tenant)]
+    # Not due yet, or already finished
+    waiting = [message(quiet_tenant, next_attempt_at=now + timedelta(minutes=1)), message(quiet_tenant, status="sent")]
+    db = FakeSession({EmailOutboxMessage: rows + waiting})
+
+    claimed = EmailOutboxWorker(session_factory=None, pool=SMTPConnectionPool()).claim_batch(db, now)
+
+    # The rest of the busy tenant's messages wait for the next pass
+    assert len(claimed) == TENANT_CLAIM_LIMIT + 1
+    assert claimed[-1].tenant_id == quiet_tenant
+    assert len({m.lease_token for m in claimed}) == 1 and claimed[0].lease_token is not None
+    assert all(m.status == "sending" and m.next_attempt_at == now + timedelta(seconds=email_outbox.SEND_LEASE_SECONDS) for m in claimed)
+    assert rows[TENANT_CLAIM_LIMIT].lease_token is None
+    assert all(m.lease_token is None for m in waiting)
+    assert db.commits == 1 and db.expunged
+
+
+def test_record_results_skips_messages_whose_lease_was_taken_over():
+    message = EmailOutboxMessage(id=uuid.uuid4(), lease_token=uuid.uuid4(), status=EmailOutboxStatus.SENDING.value, attempt_count=0)
+    # Another worker re-claimed the row after the lease ran out
+    reclaimed = EmailOutboxMessage(id=message.id, lease_token=uuid.uuid4(), status=EmailOutboxStatus.SENDING.value, attempt_count=0)
+    db = FakeSession({EmailOutboxMessage: [reclaimed]})
+
+    counts = EmailOutboxWorker(session_factory=None, pool=SMTPConnectionPool()).record_results(
+        db, [message], [None], datetime(2026, 5, 1, 12, 0)
+    )
+
+    assert counts["lost"] == 1 and counts["sent"] == 0
+    # The worker that re-claimed it owns the row now
+    assert (reclaimed.status, reclaimed.attempt_count) == ("sending", 0)
+    assert message.status == "sending" and message.attempt_count == 0
+
+
+def test_messages_past_the_deadline_are_handed_back_unsent(smtp_servers):
+    server = smtp_servers()
+    settings = email_service.SMTPSettings("127.0.0.1", server.port, use_tls=False, from_email="from@example.com")
+    mime = email_service.build_message(settings, "r@example.com", "Subject", "<p>Hi</p>")
+    pool = SMTPConnectionPool()
+
+    errors = email_service.send_messages(settings, [(mime, ["r@example.com"])], pool, deadline=0)
+    pool.close_all()
+
+    assert isinstance(errors[0], SendDeferred) and server.messages == []
+
+    message = EmailOutboxMessage(id=uuid.uuid4(), lease_token=uuid.uuid4(), status=EmailOutboxStatus.SENDING.value, attempt_count=2)
+    now = datetime(2026, 5, 1, 12, 0)
+    db = FakeSession({EmailOutboxMessage: [message]})
+    counts = EmailOutboxWorker(session_factory=None, pool=pool).record_results(db, [message], errors, now)
+
+    assert counts["deferred"] == 1
+    assert (message.status, message.next_attempt_at, message.attempt_count) == ("pending", now, 2)
+
+
+def test_queue_email_adds_pending_message_without_committing():
+    added = []
+    db = SimpleNamespace(add=added.append)
+    tenant_id = uuid.uuid4()
+
+    message = EmailService.queue_email(db, "r@example.com", "Subject", "<p>Body</p>", tenant_id=tenant_id, bcc=["b@example.com"])
+
+    assert added == [message]
+    assert (message.status, message.tenant_id, message.bcc) == (EmailOutboxStatus.PENDING.value, tenant_id, ["b@example.com"])
+    assert message.next_attempt_at is not None
+
+
+def test_stage_notifications_are_queued_on_the_callers_transaction():
+    from app.services.workflow_orchestration import WorkflowOrchestrationService
+
+    added = []
+    # No commit or rollback: the caller owns the transaction
+    db = SimpleNamespace(add=added.append)
+    service = WorkflowOrchestrationService.__new__(WorkflowOrchestrationService)
+    service.db, service.tenant_id, service.email_service = db, uuid.uuid4(), EmailService()
+    recipients = [{"email": "a@example.com", "role": "approver"}, {"email": "b@example.com"}]
+    service.build_stage_notification = lambda *args: (
+        {"subject": "Review", "html_body": "<p>Please review</p>", "recipients": recipients}, None
+    )
+
+    result = service.queue_stage_notifications(None, "pending_approval", "agent", uuid.uuid4(), {}, None)
+
+    assert (result["queued"], result["count"]) == (True, 2)
+    assert "sent" not in result and all(r["queued"] for r in result["results"])
+    assert [message.to_email for message in added] == ["a@example.com", "b@example.com"]
+    assert all(message.tenant_id == service.tenant_id for message in added)
+
+    service.build_stage_notification = lambda *args: (None, "No valid recipients found")
+    assert service.queue_stage_notifications(None, "pending_approval", "agent", uuid.uuid4(), {}, None) == {
+        "queued": False, "reason": "No valid recipients found"
+    }
@@ -0,0 +1,141 @@
+"""
+Unit tests for off-loop, micro-batched embedding inference and the embedding cache
+"""
+import asyncio
+import threading
+import numpy as np
+import pytest
+
+from app.core import cache
+from app.core.cache import CircuitBreaker
+from app.core.config import Settings
+from app.services import embedding_service as embedding_module
+from app.services.embedding_service import EmbeddingService
+
+
+class FakeModel:
+    """Records encode calls and the thread they ran on"""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, normalize_embeddings=True):
+        self.calls.append((list(texts), threading.get_ident()))
+        return np.array([[float(len(text)), 1.0] for text in texts])
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(Settings, "EMBEDDING_BATCH_SIZE", property(lambda self: 8))
+    monkeypatch.setattr(Settings, "EMBEDDING_BATCH_WINDOW_MS", property(lambda self: 20.0))
+    monkeypatch.setattr(Settings, "EMBEDDING_CACHE_REDIS_TTL", property(lambda self: 0))
+    monkeypatch.setattr(EmbeddingService, "_load_model", lambda self: None)
+    embedding_service = EmbeddingService()
+    embedding_service.model = FakeModel()
+    return embedding_service
+
+
+def test_concurrent_requests_are_micro_batched_off_loop(service):
+    """Concurrent single-text requests share one encode call on a worker thread"""
+    async def run():
+        return await asyncio.gather(*(service.generate_embedding("x" * i) for i in range(1, 6)))
+
+    loop_thread = threading.get_ident()
+    embeddings = asyncio.run(run())
+
+    assert embeddings == [[float(i), 1.0] for i in range(1, 6)]
+    assert len(service.model.calls) == 1
+    texts, thread_id = service.model.calls[0]
+    assert len(texts) == 5
+    assert thread_id != loop_thread
+
+
+def test_full_batch_flushes_without_waiting(service):
+    """Reaching EMBEDDING_BATCH_SIZE flushes immediately and splits larger bursts"""
+    async def run():
+        return await asyncio.gather(*(service.generate_embedding(str(i)) for i in range(10)))
+
+    embeddings = asyncio.run(run())
+
+    assert len(embeddings) == 10
+    assert [len(texts) for texts, _ in service.model.calls] == [8, 2]
+
+
+def test_batch_embeddings_run_off_loop(service):
+    """generate_batch_embeddings encodes the whole list in one off-loop call"""
+    embeddings = asyncio.run(service.generate_batch_embeddings(["a", "bb"]))
+
+    assert embeddings == [[1.0, 1.0], [2.0, 1.0]]
+    assert service.model.calls[0][1] != threading.get_ident()
+    assert asyncio.run(service.generate_batch_embeddings([])) == []
+
+
+class FakeRedis:
+    """In-memory stand-in for the async binary Redis client, or one that fails every call"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.store = {}
+        self.calls = 0
+
+    async def mget(self, keys):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("Redis is down")
+        return [self.store.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def setex(self, key, ttl, value):
+        assert isinstance(value, bytes)
+        self.store[key] = value
+
+    async def execute(self):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("Redis is down")
+
+
+def test_cache_skips_model_for_repeated_texts(service, monkeypatch):
+    """Repeated texts are served from the LRU, then from Redis after a restart"""
+    redis = FakeRedis()
+    monkeypatch.setattr(embedding_module, "get_async_redis_binary", lambda: redis)
+    monkeypatch.setattr(Settings, "EMBEDDING_CACHE_REDIS_TTL", property(lambda self: 3600))
+
+    first = asyncio.run(service.generate_batch_embeddings(["a", "bb", "a"]))
+    again = asyncio.run(service.generate_embedding("bb"))
+
+    assert first == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0]]
+    assert again == [2.0, 1.0]
+    assert [texts for texts, _ in service.model.calls] == [["a", "bb"]]
+    assert len(redis.store) == 2
+    assert all(key.startswith(f"embedding:{service.model_name}:") for key in redis.store)
+
+    # A fresh process has an empty LRU but shares the Redis tier
+    monkeypatch.setattr(Settings, "EMBEDDING_CACHE_SIZE", property(lambda self: 1))
+    fresh = EmbeddingService()
+    fresh.model = FakeModel()
+    assert asyncio.run(fresh.generate_batch_embeddings(["a", "bb", "ccc"])) == [
+        [1.0, 1.0], [2.0, 1.0], [3.0, 1.0]
+    ]
+    assert [texts for texts, _ in fresh.model.calls] == [["ccc"]]
+    assert len(fresh.cache._entries) == 1
+
+
+def test_unreachable_redis_opens_the_breaker(service, monkeypatch):
+    """Redis failures degrade to cache misses and stop further Redis calls once the breaker opens"""
+    breaker = CircuitBreaker("Redis", failure_threshold=2, reset_timeout=30)
+    redis = FakeRedis(fail=True)
+    monkeypatch.setattr(cache, "redis_breaker", breaker)
+    monkeypatch.setattr(cache, "async_redis_binary_client", redis)
+    monkeypatch.setattr(embedding_module, "redis_breaker", breaker)
+    monkeypatch.setattr(Settings, "EMBEDDING_CACHE_REDIS_TTL", property(lambda self: 3600))
+
+    embeddings = asyncio.run(service.generate_batch_embeddings(["a", "bb"]))
+    asyncio.run(service.generate_embedding("ccc"))
+
+    assert embeddings == [[1.0, 1.0], [2.0, 1.0]]
+    # Lookup and write of the first call fail; the second call skips Redis entirely
+    assert redis.calls == 2
+    assert breaker.is_open
@@ -0,0 +1,82 @@
+"""
+Unit tests for batched multi-query retrieval in the enhanced RAG service
+"""
+import asyncio
+import pytest
+from types import SimpleNamespace
+
+from app.services.rag_service import RAGService
+from app.services.embedding_service import embedding_service
+from app.services.enhanced_rag_service import EnhancedRAGService
+
+
+def hit(doc_id, score):
+    return SimpleNamespace(id=doc_id, score=score, payload={"content": f"content {doc_id}"})
+
+
+class FakeQdrantClient:
+    """Answers batch searches from canned results keyed by query vector"""
+
+    def __init__(self, results_by_vector):
+        self.results_by_vector = results_by_vector
+        self.batch_calls = []
+
+    async def get_collections(self):
+        return SimpleNamespace(collections=[SimpleNamespace(name="agent_knowledge_base")])
+
+    async def search_batch(self, collection_name, requests):
+        self.batch_calls.append(list(requests))
+        return [self.results_by_vector.get(request.vector[0], []) for request in requests]
+
+
+@pytest.fixture
+def rag(monkeypatch):
+    service = RAGService(client=FakeQdrantClient({
+        0.0: [hit("a", 0.9), hit("b", 0.8), hit("c", 0.75)],
+        1.0: [hit("b", 0.85), hit("c", 0.8)],
+        2.0: [hit("c", 0.95)],
+    }))
+
+    async def fake_batch_embeddings(texts):
+        return [[float(index)] * 3 for index in range(len(texts))]
+
+    monkeypatch.setattr(embedding_service, "generate_batch_embeddings", fake_batch_embeddings)
+    return service
+
+
+def test_search_many_uses_one_batch_request(rag):
+    """All queries are embedded together and sent as a single Qdrant batch search"""
+    results = asyncio.run(rag.search_many(["q0", "q1", "q2"], agent_id="agent-1", limit=4))
+
+    assert len(rag.client.batch_calls) == 1
+    requests = rag.client.batch_calls[0]
+    assert len(requests) == 3
+    assert all(request.limit == 4 and request.with_payload for request in requests)
+    assert requests[0].filter.must[0].match.value == "agent-1"
+    assert [[r["id"] for r in query_results] for query_results in results] == [["a", "b", "c"], ["b", "c"], ["c"]]
+    assert results[0][0]["content"] == "content a"
+
+
+def test_fuse_results_ranks_by_reciprocal_rank():
+    """Documents found by several queries outrank single-query hits and keep their best score"""
+    service = EnhancedRAGService(base_rag_service=None)
+    fused = service.fuse_results([
+        [{"id": "a", "score": 0.9}, {"id": "b", "score": 0.8}, {"id": "c", "score": 0.75}],
+        [{"id": "b", "score": 0.85}, {"id": "c", "score": 0.8}],
+        [{"id": "c", "score": 0.95}],
+    ])
+
+    assert [r["id"] for r in fused] == ["c", "b", "a"]
+    assert fused[0]["score"] == 0.95
+    assert fused[1]["rrf_score"] == pytest.approx(1 / 62 + 1 / 61)
+
+
+def test_enhanced_search_issues_single_batch(rag):
+    """enhanced_search retrieves all expanded queries in one batch and deduplicates"""
+    service = EnhancedRAGService(base_rag_service=rag)
+    response = asyncio.run(service.enhanced_search("security policy", limit=5, use_reranking=False))
+
+    assert len(rag.client.batch_calls) == 1
+    ids = [r["id"] for r in response["results"]]
+    assert len(ids) == len(set(ids))
+    assert set(ids) <= {"a", "b", "c"}
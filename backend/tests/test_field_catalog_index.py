@@ -0,0 +1,98 @@
+"""
+Unit tests for the field catalog index used by view generation
+"""
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.custom_field import CustomFieldCatalog
+from app.models.entity_field import EntityFieldRegistry
+from app.models.submission_requirement import SubmissionRequirement
+from app.services import field_catalog_index
+from app.services.field_catalog_index import get_field_catalog_index, invalidate_field_catalog
+from tests.conftest import FakeSession
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    invalidate_field_catalog()
+    yield
+    invalidate_field_catalog()
+
+
+def build_session(tenant_id):
+    custom_field_id = uuid.uuid4()
+
+    def registry(tenant, field_name, field_label, field_type_display, is_required, entity_name="agents", is_enabled=True):
+        return SimpleNamespace(tenant_id=tenant, entity_name=entity_name, is_enabled=is_enabled, field_name=field_name,
+                               field_label=field_label, field_type_display=field_type_display, is_required=is_required)
+
+    def requirement(field_name, label, field_type, is_required, tenant=tenant_id, is_active=True):
+        return SimpleNamespace(tenant_id=tenant, is_active=is_active, is_enabled=True, field_name=field_name,
+                               label=label, field_type=field_type, is_required=is_required)
+
+    tables = {
+        EntityFieldRegistry: [
+            registry(tenant_id, "name", "Agent name", "text", True),
+            registry(None, "name", "Name", "text", False),
+            registry(None, "description", "Description", None, None),
+            # Other entities, disabled fields and other tenants are left out
+            registry(None, "website", "Vendor website", "url", False, entity_name="vendors"),
+            registry(tenant_id, "owner", "Accountable owner", "text", False, is_enabled=False),
+            registry(uuid.uuid4(), "name", "Other tenant", "text", True),
+        ],
+        SubmissionRequirement: [
+            requirement("req_sec_01", "Encryption at rest", "textarea", True),
+            requirement("description", "Shadowed", "text", False),
+            requirement("req_old_01", "Retired", "text", False, is_active=False),
+        ],
+        CustomFieldCatalog: [
+            SimpleNamespace(id=custom_field_id, tenant_id=tenant_id, is_enabled=True, field_name="risk_notes",
+                            field_label=None, field_type="textarea", is_required=False),
+        ],
+    }
+    return FakeSession(tables), custom_field_id
+
+
+def test_lookup_merges_sources_in_precedence_order():
+    tenant_id = uuid.uuid4()
+    db, custom_field_id = build_session(tenant_id)
+    index = get_field_catalog_index(db, tenant_id, "agents")
+
+    assert db.query_count == 3
+    assert index.lookup("name")["label"] == "Agent name"
+    assert index.lookup("description") == {
+        "label": "Description", "field_type": "text", "is_required": False,
+        "field_source": "entity", "custom_field_id": None
+    }
+    assert index.lookup("req_sec_01")["field_source"] == "submission_requirement"
+    assert index.lookup("risk_notes") == {
+        "label": "Risk Notes", "field_type": "textarea", "is_required": False,
+        "field_source": "custom_field", "custom_field_id": custom_field_id
+    }
+    assert index.lookup("unknown_field")["label"] == "Unknown Field"
+    # Only the fallback is left for fields that were filtered out
+    assert [index.lookup(name)["label"] for name in ("owner", "website", "req_old_01")] == [
+        "Owner", "Website", "Req Old 01"
+    ]
+
+
+def test_index_is_cached_until_catalog_changes_commit():
+    tenant_id = uuid.uuid4()
+    db, _ = build_session(tenant_id)
+    index = get_field_catalog_index(db, tenant_id, "agents")
+    assert get_field_catalog_index(db, tenant_id, "agents") is index
+    assert db.query_count == 3
+
+    # Lookups hand out copies
+    index.lookup("name")["label"] = "changed"
+    assert index.lookup("name")["label"] == "Agent name"
+
+    session = SimpleNamespace(info={}, new=[CustomFieldCatalog(tenant_id=tenant_id, field_name="x")],
+                              dirty=[], deleted=[])
+    field_catalog_index._track_catalog_changes(session, None)
+    field_catalog_index._invalidate_changed_catalogs(session)
+
+    assert get_field_catalog_index(db, tenant_id, "agents") is not index
+    assert db.query_count == 6
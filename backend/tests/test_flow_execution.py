@@ -1,7 +1,10 @@
 """
 Unit tests for Flow Execution Service
 """
+import asyncio
+import time
 import pytest
+from types import SimpleNamespace
 from uuid import uuid4
 from datetime import datetime
 from sqlalchemy.orm import Session
@@ -90,3 +93,116 @@ def test_flow_execution_error_handling(db: Session, test_user: User, sample_flow
     assert execution.error_message is not None
     assert "error" in execution.error_message.lower() or "Test" in execution.error_message
 
+
+
+class _NoopSession:
+    """Minimal session stand-in for scheduler tests that never touch the database"""
+
+    def __init__(self):
+        self.closed = False
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def _scheduler_fixture(monkeypatch, flow_definition, delay=0.05):
+    """Run _execute_flow_nodes with node execution replaced by a timed stub"""
+    service = FlowExecutionService(_NoopSession())
+    started = []
+    state = {"active": 0, "peak": 0, "sessions": []}
+
+    def fake_node_service():
+        node_service = SimpleNamespace(db=_NoopSession())
+
+        async def fake_execute_node(execution, node, execution_data, flow=None):
+            started.append((node["id"], set(execution_data)))
+            state["sessions"].append(node_service.db)
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            await asyncio.sleep(delay)
+            state["active"] -= 1
+            return SimpleNamespace(output_data={"value": node.get("value", 1)})
+
+        node_service._execute_node = fake_execute_node
+        return node_service
+
+    monkeypatch.setattr(service, "_node_service", fake_node_service)
+    execution = SimpleNamespace(started_at=datetime.utcnow(), current_node_id=None, execution_data=None)
+    flow = SimpleNamespace(flow_definition=flow_definition)
+    return service, execution, flow, started, state
+
+
+def test_flow_fan_out_runs_branches_concurrently(monkeypatch):
+    """Independent branches run in parallel and the join waits for all of them"""
+    nodes = [{"id": "start"}] + [{"id": f"branch{i}"} for i in range(5)] + [{"id": "join"}]
+    edges = [{"from": "start", "to": f"branch{i}"} for i in range(5)]
+    edges += [{"from": f"branch{i}", "to": "join"} for i in range(5)]
+    service, execution, flow, started, state = _scheduler_fixture(
+        monkeypatch, {"nodes": nodes, "edges": edges, "max_parallel_nodes": 5}
+    )
+
+    began = time.monotonic()
+    asyncio.run(service._execute_flow_nodes(execution, flow))
+    elapsed = time.monotonic() - began
+
+    assert state["peak"] == 5
+    assert elapsed < 0.05 * 5  # critical path (3 nodes), not the sum of 7
+    assert [node_id for node_id, _ in started].count("join") == 1
+    join_inputs = dict(started)["join"]
+    assert join_inputs == {"start"} | {f"branch{i}" for i in range(5)}
+    assert set(execution.execution_data) == {node["id"] for node in nodes}
+    assert execution.current_node_id is None
+    # Every node ran on a session of its own, closed afterwards
+    sessions = state["sessions"]
+    assert len({id(session) for session in sessions}) == len(nodes)
+    assert service.db not in sessions
+    assert all(session.closed for session in sessions)
+
+
+def test_flow_concurrency_limit(monkeypatch):
+    """max_parallel_nodes bounds concurrently running nodes"""
+    nodes = [{"id": f"n{i}"} for i in range(6)]
+    service, execution, flow, started, state = _scheduler_fixture(
+        monkeypatch, {"nodes": nodes, "edges": [], "max_parallel_nodes": 2}, delay=0.01
+    )
+
+    asyncio.run(service._execute_flow_nodes(execution, flow))
+
+    assert len(started) == 6
+    assert state["peak"] == 2
+
+
+def test_flow_conditional_edge_skips_branch(monkeypatch):
+    """Nodes whose only incoming edge is inactive are skipped, along with their descendants"""
+    nodes = [{"id": "check", "value": 1}, {"id": "yes"}, {"id": "no"}, {"id": "after_no"}]
+    edges = [
+        {"from": "check", "to": "yes", "condition": {"type": "equals", "field": "check.value", "value": 1}},
+        {"from": "check", "to": "no", "condition": {"type": "equals", "field": "check.value", "value": 2}},
+        {"from": "no", "to": "after_no"},
+    ]
+    service, execution, flow, started, state = _scheduler_fixture(
+        monkeypatch, {"nodes": nodes, "edges": edges}, delay=0
+    )
+
+    asyncio.run(service._execute_flow_nodes(execution, flow))
+
+    assert [node_id for node_id, _ in started] == ["check", "yes"]
+
+
+def test_flow_cycle_rejected(monkeypatch):
+    """Cyclic flow definitions fail validation instead of looping"""
+    nodes = [{"id": "a"}, {"id": "b"}, {"id": "c"}]
+    edges = [{"from": "a", "to": "b"}, {"from": "b", "to": "c"}, {"from": "c", "to": "b"}]
+    service, execution, flow, started, state = _scheduler_fixture(
+        monkeypatch, {"nodes": nodes, "edges": edges}
+    )
+
+    with pytest.raises(ValueError, match="cycle"):
+        asyncio.run(service._execute_flow_nodes(execution, flow))
+    assert started == []
@@ -0,0 +1,169 @@
+"""
+Unit tests for bulk field permission resolution and the per-tenant permission matrix cache
+"""
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.custom_field import CustomFieldCatalog
+from app.models.entity_field import EntityPermission, EntityFieldPermission
+from app.models.form_layout import FormFieldAccess
+from app.models.role_permission import RolePermission
+from app.services import permission_resolution
+from app.services.permission_resolution import (
+    invalidate_permission_matrix,
+    resolve_field_permissions,
+    resolve_layout_permissions,
+)
+from tests.conftest import FakeSession
+
+
+@pytest.fixture(autouse=True)
+def no_redis(monkeypatch):
+    monkeypatch.setattr(permission_resolution, "get_redis", lambda: None)
+    invalidate_permission_matrix()
+    yield
+    invalidate_permission_matrix()
+
+
+def role_permission(tenant_id, key, role, enabled, category="forms_and_data_fields"):
+    return SimpleNamespace(tenant_id=tenant_id, category=category, permission_key=key, role=role, is_enabled=enabled)
+
+
+def field_permission(tenant_id, field_name, role_permissions, entity_name="agents", is_active=True):
+    return SimpleNamespace(tenant_id=tenant_id, entity_name=entity_name, field_name=field_name,
+                           is_active=is_active, role_permissions=role_permissions)
+
+
+def field_access(tenant_id, field_name, role_permissions, request_type="agent_onboarding_workflow", workflow_stage="new"):
+    return SimpleNamespace(tenant_id=tenant_id, field_name=field_name, request_type=request_type,
+                           workflow_stage=workflow_stage, is_active=True, role_permissions=role_permissions)
+
+
+def build_session(tenant_id, field_count=20):
+    custom_field_id = uuid.uuid4()
+    tables = {
+        RolePermission: [
+            role_permission(None, "submission.field.name", "vendor_user", False),
+            role_permission(tenant_id, "submission.field.name", "vendor_user", True),
+            role_permission(None, "approval.field.name", "approver", True),
+            # Other categories and other tenants don't apply
+            role_permission(None, "menu.field.name", "approver", False, category="menu_items"),
+            role_permission(uuid.uuid4(), "submission.field.name", "approver", False),
+        ],
+        EntityPermission: [
+            SimpleNamespace(tenant_id=None, entity_name="agents", is_active=True,
+                            role_permissions={"approver": {"view": True, "edit": False}}),
+            SimpleNamespace(tenant_id=None, entity_name="vendors", is_active=True,
+                            role_permissions={"approver": {"view": False}}),
+        ],
+        EntityFieldPermission: [
+            field_permission(None, "description", {"approver": {"edit": True}}),
+            field_permission(tenant_id, "description", {"approver": {"view": False}}),
+            field_permission(tenant_id, "name", {"approver": {"view": False}}, is_active=False),
+        ],
+        CustomFieldCatalog: [
+            SimpleNamespace(id=custom_field_id, tenant_id=tenant_id, is_enabled=True,
+                            role_permissions={"vendor_user": {"view": True, "edit": True}}),
+        ],
+        FormFieldAccess: [
+            field_access(tenant_id, "name", {"vendor_user": {"edit": False}}),
+            # Another workflow stage
+            field_access(tenant_id, "description", {"approver": {"view": True}}, workflow_stage="approval"),
+        ],
+    }
+    fields = [{"field_name": "name", "entity_name": "agents", "field_source": "entity"},
+              {"field_name": "description", "entity_name": "agents", "field_source": "entity"},
+              {"field_name": "risk_notes", "field_source": "custom_field", "custom_field_id": custom_field_id}]
+    fields += [{"field_name": f"extra_{i}", "entity_name": "agents", "field_source": "entity"}
+               for i in range(field_count - len(fields))]
+    return FakeSession(tables), fields
+
+
+def test_layout_resolves_in_constant_queries():
+    tenant_id = uuid.uuid4()
+    small_db, small_fields = build_session(tenant_id, field_count=3)
+    resolve_layout_permissions(small_db, tenant_id, small_fields, "agent_onboarding_workflow", "new")
+
+    invalidate_permission_matrix()
+    large_db, large_fields = build_session(tenant_id, field_count=200)
+    matrix = resolve_layout_permissions(large_db, tenant_id, large_fields, "agent_onboarding_workflow", "new")
+
+    assert len(matrix) == 200
+    assert large_db.query_count == small_db.query_count == 5
+
+
+def test_hierarchy_precedence_matches_single_field_resolution():
+    tenant_id = uuid.uuid4()
+    db, fields = build_session(tenant_id)
+    matrix = resolve_layout_permissions(db, tenant_id, fields, "agent_onboarding_workflow", "new")
+
+    # Tenant RolePermission wins over platform, then layout override removes edit
+    assert matrix["name"]["vendor_user"] == {"view": True, "edit": False}
+    # Entity baseline, then the tenant field override wins over the platform one
+    assert matrix["description"]["approver"] == {"view": False, "edit": False}
+    assert matrix["risk_notes"] == {"vendor_user": {"view": True, "edit": True}}
+    assert matrix["extra_0"] == {"approver": {"view": True, "edit": False}}
+
+    invalidate_permission_matrix()
+    single = resolve_field_permissions(
+        db, tenant_id, entity_name="agents", field_name="name", field_source="entity",
+        request_type="agent_onboarding_workflow", workflow_stage="new", role="vendor_user"
+    )
+    assert single == {"vendor_user": {"view": True, "edit": False}}
+
+
+def test_approval_requests_use_approval_keys():
+    tenant_id = uuid.uuid4()
+    db, fields = build_session(tenant_id)
+    matrix = resolve_layout_permissions(db, tenant_id, fields[:1], "approval_workflow", None)
+
+    # The approval key is preferred, but other prefixes still match by field name
+    assert matrix["name"]["approver"] == {"view": True, "edit": False}
+    assert matrix["name"]["vendor_user"] == {"view": True, "edit": True}
+
+
+def test_cached_matrix_is_reused_until_invalidated():
+    tenant_id = uuid.uuid4()
+    db, fields = build_session(tenant_id)
+    first = resolve_layout_permissions(db, tenant_id, fields, "agent_onboarding_workflow", "new")
+    queries = db.query_count
+
+    second = resolve_layout_permissions(db, tenant_id, fields, "agent_onboarding_workflow", "new")
+    assert db.query_count == queries
+    assert second == first
+
+    # Callers get copies, not the cached entry
+    second["name"]["vendor_user"]["view"] = False
+    third = resolve_layout_permissions(db, tenant_id, fields, "agent_onboarding_workflow", "new")
+    assert third["name"]["vendor_user"]["view"] is True
+
+    invalidate_permission_matrix(tenant_id)
+    resolve_layout_permissions(db, tenant_id, fields, "agent_onboarding_workflow", "new")
+    assert db.query_count == queries * 2
+
+
+def test_committed_permission_changes_invalidate_tenant():
+    tenant_id = uuid.uuid4()
+    db, fields = build_session(tenant_id)
+    resolve_layout_permissions(db, tenant_id, fields, "agent_onboarding_workflow", "new")
+    queries = db.query_count
+
+    session = SimpleNamespace(
+        info={}, new=[RolePermission(tenant_id=tenant_id, role="vendor_user", category="forms_and_data_fields",
+                                     permission_key="submission.field.name", is_enabled=False)],
+        dirty=[], deleted=[]
+    )
+    permission_resolution._track_permission_changes(session, None)
+
+    # Rolled back changes don't invalidate anything
+    permission_resolution._discard_permission_changes(session)
+    permission_resolution._invalidate_changed_permissions(session)
+    resolve_layout_permissions(db, tenant_id, fields, "agent_onboarding_workflow", "new")
+    assert db.query_count == queries
+
+    permission_resolution._track_permission_changes(session, None)
+    permission_resolution._invalidate_changed_permissions(session)
+    resolve_layout_permissions(db, tenant_id, fields, "agent_onboarding_workflow", "new")
+    assert db.query_count == queries * 2
@@ -0,0 +1,89 @@
+"""
+Unit tests for the authenticated principal cache used by get_current_user
+"""
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1 import auth
+from app.core import principal_cache
+from app.core.principal_cache import invalidate_principal
+from app.models.user import User, UserRole
+from tests.conftest import FakeSession
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(monkeypatch):
+    tokens = {}
+    monkeypatch.setattr("app.core.security.decode_access_token", lambda token: tokens.get(token))
+    invalidate_principal()
+    yield tokens
+    invalidate_principal()
+
+
+def make_user(tenant_id):
+    return User(id=uuid.uuid4(), email="reviewer@example.com", name="Reviewer", role=UserRole.APPROVER,
+                tenant_id=tenant_id, is_active=True)
+
+
+def test_principal_is_cached_per_token_claims(clear_cache):
+    tenant_id = uuid.uuid4()
+    clear_cache["token"] = {"sub": "reviewer@example.com", "tenant_id": str(tenant_id)}
+    db = FakeSession({User: [make_user(tenant_id)]})
+
+    first = auth.get_current_principal(token="token", db=db)
+    second = auth.get_current_principal(token="token", db=db)
+
+    assert first is second
+    assert db.query_count == 1
+    assert first.role is UserRole.APPROVER
+    with pytest.raises(AttributeError):
+        first.role = UserRole.TENANT_ADMIN
+
+
+def test_get_current_user_uses_primary_key_lookup(clear_cache):
+    tenant_id = uuid.uuid4()
+    clear_cache["token"] = {"sub": "reviewer@example.com", "tenant_id": str(tenant_id)}
+    db = FakeSession({User: [make_user(tenant_id)]})
+
+    auth.get_current_user(token="token", db=db)
+    user = auth.get_current_user(token="token", db=db)
+
+    assert user is db.tables[User][0]
+    assert db.query_count == 1
+    assert db.get_count == 2
+
+    # A user deleted after caching is rejected and dropped from the cache
+    db.tables[User].clear()
+    with pytest.raises(HTTPException) as exc:
+        auth.get_current_user(token="token", db=db)
+    assert exc.value.status_code == 401
+    assert principal_cache.get_cached_principal("reviewer@example.com", str(tenant_id)) is None
+
+
+def test_committed_user_changes_invalidate_principal(clear_cache):
+    tenant_id = uuid.uuid4()
+    clear_cache["token"] = {"sub": "reviewer@example.com", "tenant_id": str(tenant_id)}
+    user = make_user(tenant_id)
+    db = FakeSession({User: [user]})
+    auth.get_current_principal(token="token", db=db)
+
+    session = SimpleNamespace(info={}, dirty=[user], deleted=[])
+    principal_cache._track_user_changes(session, None)
+    principal_cache._invalidate_changed_users(session)
+
+    user.role = UserRole.TENANT_ADMIN
+    assert auth.get_current_principal(token="token", db=db).role is UserRole.TENANT_ADMIN
+    assert db.query_count == 2
+
+
+def test_tenant_mismatch_is_rejected(clear_cache):
+    clear_cache["token"] = {"sub": "reviewer@example.com", "tenant_id": str(uuid.uuid4())}
+    db = FakeSession({User: [make_user(uuid.uuid4())]})
+
+    # The lookup is scoped to the token's tenant, so the user isn't found
+    with pytest.raises(HTTPException) as exc:
+        auth.get_current_principal(token="token", db=db)
+    assert exc.value.status_code == 401
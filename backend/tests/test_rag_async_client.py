@@ -0,0 +1,122 @@
+"""
+Unit tests for the async Qdrant backend of RAGService
+"""
+import asyncio
+import uuid
+import pytest
+from types import SimpleNamespace
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import PointStruct
+
+from app.core.config import Settings
+from app.services.rag_service import RAGService
+from app.services.embedding_service import embedding_service
+
+
+@pytest.fixture(autouse=True)
+def fake_embeddings(monkeypatch):
+    async def fake_embedding(text):
+        return [1.0] + [0.0] * 383 if "policy" in text else [0.0, 1.0] + [0.0] * 382
+
+    async def fake_batch_embeddings(texts):
+        return [await fake_embedding(text) for text in texts]
+
+    monkeypatch.setattr(embedding_service, "generate_embedding", fake_embedding)
+    monkeypatch.setattr(embedding_service, "generate_batch_embeddings", fake_batch_embeddings)
+
+
+def test_search_against_in_memory_qdrant():
+    """The collection is created on first use and agent-filtered search runs on the async client"""
+
+    async def scenario():
+        rag = RAGService(client=AsyncQdrantClient(location=":memory:"))
+        assert await rag.search("anything") == []
+
+        vector = await embedding_service.generate_embedding("policy")
+        await rag.client.upsert(
+            collection_name=rag.collection_name,
+            points=[
+                PointStruct(id=str(uuid.uuid4()), vector=vector, payload={"agent_id": "a1", "content": "mine"}),
+                PointStruct(id=str(uuid.uuid4()), vector=vector, payload={"agent_id": "a2", "content": "other"}),
+            ]
+        )
+        results = await rag.search("security policy", agent_id="a1")
+        batched = await rag.search_many(["security policy", "unrelated"], agent_id="a2")
+        await rag.close()
+        return results, batched
+
+    results, batched = asyncio.run(scenario())
+
+    assert [r["content"] for r in results] == ["mine"]
+    assert [[r["content"] for r in query_results] for query_results in batched] == [["other"], []]
+
+
+class SlowQdrantClient:
+    """Tracks how many searches are in flight at once"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def get_collections(self):
+        return SimpleNamespace(collections=[SimpleNamespace(name="agent_knowledge_base")])
+
+    async def search(self, **kwargs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        return []
+
+
+def test_concurrency_limit_and_timeout(monkeypatch):
+    """In-flight Qdrant calls are capped and slow calls time out"""
+    monkeypatch.setattr(Settings, "QDRANT_MAX_CONCURRENCY", property(lambda self: 2))
+    monkeypatch.setattr(Settings, "QDRANT_TIMEOUT_SECONDS", property(lambda self: 1))
+
+    client = SlowQdrantClient(delay=0.01)
+    rag = RAGService(client=client)
+
+    async def run_searches():
+        await asyncio.gather(*(rag.search(f"query {i}") for i in range(6)))
+
+    asyncio.run(run_searches())
+    assert client.max_in_flight == 2
+
+    client.delay = 5
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(rag.search("slow"))
+
+
+def test_agent_knowledge_scrolls_all_pages_and_deletes_by_filter(monkeypatch):
+    """Listing follows every scroll page and deletion removes all of the agent's points"""
+    monkeypatch.setattr(Settings, "RAG_SCROLL_PAGE_SIZE", property(lambda self: 3))
+
+    async def scenario():
+        rag = RAGService(client=AsyncQdrantClient(location=":memory:"))
+        await rag.get_agent_knowledge("a1")  # creates the collection
+        vector = [1.0] + [0.0] * 383
+        await rag.client.upsert(
+            collection_name=rag.collection_name,
+            points=[
+                PointStruct(id=str(uuid.uuid4()), vector=vector, payload={"agent_id": agent_id, "content": str(i)})
+                for i in range(10)
+                for agent_id in ("a1", "a2")
+            ]
+        )
+        listed = await rag.get_agent_knowledge("a1")
+        deleted = await rag.delete_agent_knowledge("a1")
+        remaining = await rag.get_agent_knowledge("a1")
+        other = await rag.get_agent_knowledge("a2")
+        return listed, deleted, remaining, other
+
+    listed, deleted, remaining, other = asyncio.run(scenario())
+
+    assert sorted(int(doc["content"]) for doc in listed) == list(range(10))
+    assert deleted is True
+    assert remaining == []
+    assert len(other) == 10
@@ -0,0 +1,75 @@
+"""
+Unit tests for batched RAG ingestion
+"""
+import asyncio
+import pytest
+from types import SimpleNamespace
+
+from app.core.config import Settings
+from app.services.rag_service import RAGService
+from app.services.embedding_service import embedding_service
+from app.services.document_processor import DocumentProcessor
+from app.services import document_processor as document_processor_module
+
+
+class FakeQdrantClient:
+    """Records upserts instead of talking to Qdrant"""
+
+    def __init__(self):
+        self.upserts = []
+
+    async def get_collections(self):
+        return SimpleNamespace(collections=[SimpleNamespace(name="agent_knowledge_base")])
+
+    async def upsert(self, collection_name, points):
+        self.upserts.append(list(points))
+
+
+@pytest.fixture
+def rag(monkeypatch):
+    service = RAGService(client=FakeQdrantClient())
+
+    monkeypatch.setattr(Settings, "EMBEDDING_BATCH_SIZE", property(lambda self: 4))
+    monkeypatch.setattr(Settings, "RAG_UPSERT_BATCH_SIZE", property(lambda self: 10))
+
+    batches = []
+
+    async def fake_batch_embeddings(texts):
+        batches.append(list(texts))
+        return [[float(len(text))] * 3 for text in texts]
+
+    monkeypatch.setattr(embedding_service, "generate_batch_embeddings", fake_batch_embeddings)
+    service.embedding_batches = batches
+    return service
+
+
+def test_ingest_documents_batches_embeddings_and_upserts(rag):
+    """Embeddings are generated per batch and points are upserted in bulk"""
+    contents = [f"chunk {i}" for i in range(23)]
+    metadatas = [{"chunk_index": i} for i in range(23)]
+
+    doc_ids = asyncio.run(rag.ingest_documents("agent-1", "documentation", contents, metadatas))
+
+    assert len(doc_ids) == 23
+    assert [len(batch) for batch in rag.embedding_batches] == [4, 4, 2, 4, 4, 2, 3]
+    assert [len(points) for points in rag.client.upserts] == [10, 10, 3]
+    first = rag.client.upserts[0][0]
+    assert first.id == doc_ids[0]
+    assert first.payload["chunk_index"] == 0
+    assert first.payload["agent_id"] == "agent-1"
+
+
+def test_ingest_artifact_uses_bulk_ingestion(rag, monkeypatch, tmp_path):
+    """ingest_artifact sends chunks through ingest_documents with per-chunk metadata"""
+    monkeypatch.setattr(document_processor_module, "rag_service", rag)
+    path = tmp_path / "notes.txt"
+    path.write_text("Sentence number one. " * 800)
+
+    processor = DocumentProcessor()
+    count = asyncio.run(processor.ingest_artifact("agent-1", "artifact-1", str(path), "documentation"))
+
+    points = [point for batch in rag.client.upserts for point in batch]
+    assert count == len(points) > 10
+    assert [point.payload["chunk_index"] for point in points] == list(range(count))
+    assert all(point.payload["total_chunks"] == count for point in points)
+    assert all(len(batch) <= 10 for batch in rag.client.upserts)
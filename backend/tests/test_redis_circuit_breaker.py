@@ -0,0 +1,100 @@
+"""
+Unit tests for the Redis circuit breaker and the async Redis rate limiter
+"""
+import asyncio
+
+import pytest
+
+from app.core import cache, security_middleware
+from app.core.cache import CircuitBreaker
+
+
+class FakeScript:
+    def __init__(self, client):
+        self.registered_client = client
+
+    async def __call__(self, keys=None, args=None):
+        return await self.registered_client.run(keys[0], int(args[0]))
+
+
+class FakeAsyncRedis:
+    """Runs the rate limit script in memory, or fails every call"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.counts = {}
+        self.ttls = {}
+        self.calls = 0
+
+    def register_script(self, script):
+        assert "INCR" in script and "EXPIRE" in script
+        return FakeScript(self)
+
+    async def run(self, key, window):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("Redis is down")
+        self.counts[key] = self.counts.get(key, 0) + 1
+        if self.counts[key] == 1:
+            self.ttls[key] = window
+        return self.counts[key]
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = CircuitBreaker("Redis", failure_threshold=3, reset_timeout=30)
+    monkeypatch.setattr(cache, "redis_breaker", breaker)
+    monkeypatch.setattr(security_middleware, "redis_breaker", breaker)
+    monkeypatch.setattr(security_middleware, "_fallback_rate_limit_store", {})
+    return breaker
+
+
+def test_breaker_opens_and_lets_one_trial_through(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker("Redis", failure_threshold=2, reset_timeout=30)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.is_open
+    assert not breaker.allow()
+
+    # After the cool-down a single trial call goes through
+    now[0] += 31
+    assert not breaker.is_open
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    # A failed trial keeps it open, a successful one closes it
+    breaker.record_failure()
+    assert breaker.is_open
+    now[0] += 31
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.allow() and breaker.allow()
+
+
+def test_rate_limit_uses_one_script_call(monkeypatch, breaker):
+    redis = FakeAsyncRedis()
+    monkeypatch.setattr(security_middleware, "get_async_redis", lambda: redis)
+
+    results = [asyncio.run(security_middleware.check_rate_limit_redis("10.0.0.1", 2, window=60)) for _ in range(3)]
+
+    assert results == [(True, 1), (True, 2), (False, 3)]
+    assert redis.calls == 3
+    assert redis.ttls == {"rate_limit:ip:10.0.0.1": 60}
+
+
+def test_rate_limit_falls_back_and_trips_breaker(monkeypatch, breaker):
+    redis = FakeAsyncRedis(fail=True)
+    monkeypatch.setattr(cache, "async_redis_client", redis)
+    monkeypatch.setattr(security_middleware, "get_async_redis", cache.get_async_redis)
+
+    for expected in (1, 2, 3, 4, 5):
+        assert asyncio.run(security_middleware.check_rate_limit_redis("10.0.0.2", 10)) == (True, expected)
+
+    # Three failures open the breaker; later requests skip Redis entirely
+    assert redis.calls == 3
+    assert breaker.is_open
+    assert cache.get_redis() is None
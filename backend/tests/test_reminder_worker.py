@@ -0,0 +1,115 @@
+"""
+Unit tests for the reminder worker (claiming, bulk resolution and per-recipient digests)
+"""
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from app.models.agent import Agent
+from app.models.email_outbox import EmailOutboxMessage
+from app.models.user import User
+from app.models.workflow_config import WorkflowConfiguration
+from app.models.workflow_reminder import WorkflowReminder
+from app.services.reminder_worker import MAX_REMINDER_ATTEMPTS, REMINDER_LEASE_SECONDS, ReminderWorker
+from tests.conftest import FakeSession
+
+
+TENANT_ID = uuid.uuid4()
+STAGE = "pending_approval"
+
+
+def make_user(email, role):
+    return SimpleNamespace(id=uuid.uuid4(), tenant_id=TENANT_ID, email=email, role=role)
+
+
+def make_agent(name):
+    return SimpleNamespace(id=uuid.uuid4(), name=name, type="ai_agent", category="support", status="submitted")
+
+
+def make_reminder(entity_id, recipients, stage=STAGE, send_attempts=0):
+    return WorkflowReminder(
+        id=uuid.uuid4(), tenant_id=TENANT_ID, entity_type="agent", entity_id=entity_id,
+        request_type="agent_onboarding_workflow", workflow_stage=stage, reminder_days=1,
+        reminder_date=datetime(2026, 5, 1), recipients=recipients, is_sent=False, send_attempts=send_attempts,
+    )
+
+
+def test_reminders_are_resolved_in_bulk_and_digested_per_recipient():
+    admin = make_user("admin@example.com", "tenant_admin")
+    reviewers = [make_user("rev1@example.com", "security_reviewer"), make_user("rev2@example.com", "security_reviewer")]
+    first, second = make_agent("Support Bot"), make_agent("Sales Bot")
+    workflow = SimpleNamespace(
+        id=uuid.uuid4(), tenant_id=TENANT_ID, status="active", is_default=True, conditions=None, trigger_rules=None,
+        workflow_steps=[
+            {"workflow_stage": STAGE, "stage_settings": {"email_notifications": {"enabled": True}}},
+            {"workflow_stage": "draft", "stage_settings": {}},
+        ],
+    )
+    reminders = [
+        make_reminder(first.id, ["security_reviewer"]),
+        make_reminder(second.id, ["security_reviewer", "tenant_admin"]),
+        make_reminder(uuid.uuid4(), ["tenant_admin"]),
+        make_reminder(first.id, ["tenant_admin"], stage="draft"),
+    ]
+    db = FakeSession({Agent: [first, second], WorkflowConfiguration: [workflow], User: [admin] + reviewers})
+    worker = ReminderWorker(session_factory=None)
+    worker.claim_batch = lambda db, now, tenant_id=None: reminders
+    now = datetime(2026, 5, 2, 9, 0)
+
+    results = worker.process_batch(db, now)
+
+    # One query each for entities, workflows and role users, however many reminders there are
+    assert len(db.queries) == 3
+    assert (results["processed"], results["sent"], results["failed"]) == (4, 2, 2)
+
+    emails = {message.to_email: message for message in db.added if isinstance(message, EmailOutboxMessage)}
+    assert results["emails_queued"] == len(emails) == 3
+    for reviewer in reviewers:
+        digest = emails[reviewer.email]
+        assert digest.subject == "Reminder: 2 items awaiting Pending Approval"
+        assert "Support Bot" in digest.html_body and "Sales Bot" in digest.html_body
+    # A single reminder is sent as the regular stage notification
+    assert "Sales Bot" in emails["admin@example.com"].html_body
+    assert emails["admin@example.com"].tenant_id == TENANT_ID
+
+    sent, sent_too, missing, disabled = reminders
+    assert sent.is_sent and sent_too.is_sent and sent.sent_at == now and sent.next_attempt_at is None
+    # A missing entity is final; a stage without email notifications is retried later
+    assert (missing.is_sent, missing.last_error) == (True, "Entity not found")
+    assert not disabled.is_sent and disabled.send_attempts == 1
+    assert disabled.next_attempt_at > now
+    assert db.commits == 1
+
+
+def test_reminders_give_up_after_max_attempts():
+    workflow = SimpleNamespace(
+        id=uuid.uuid4(), tenant_id=TENANT_ID, status="active", is_default=True, conditions=None, trigger_rules=None, workflow_steps=[]
+    )
+    agent = make_agent("Support Bot")
+    reminder = make_reminder(agent.id, ["tenant_admin"], send_attempts=MAX_REMINDER_ATTEMPTS - 1)
+    db = FakeSession({Agent: [agent], WorkflowConfiguration: [workflow], User: [make_user("admin@example.com", "tenant_admin")]})
+    worker = ReminderWorker(session_factory=None)
+    worker.claim_batch = lambda db, now, tenant_id=None: [reminder]
+
+    results = worker.process_batch(db, datetime(2026, 5, 2))
+
+    assert results["failed"] == 1 and results["emails_queued"] == 0
+    assert reminder.is_sent and reminder.next_attempt_at is None
+    assert reminder.last_error == "Email notifications disabled for this stage"
+
+
+def test_claim_batch_leases_reminders():
+    reminders = [make_reminder(uuid.uuid4(), ["tenant_admin"]) for _ in range(2)]
+    now = datetime(2026, 5, 2, 9, 0)
+    # Already sent, not due yet, and leased to another worker
+    sent, later, leased = (make_reminder(uuid.uuid4(), ["tenant_admin"]) for _ in range(3))
+    sent.is_sent = True
+    later.reminder_date = now + timedelta(days=1)
+    leased.next_attempt_at = now + timedelta(minutes=1)
+    db = FakeSession({WorkflowReminder: reminders + [sent, later, leased]})
+
+    claimed = ReminderWorker(session_factory=None).claim_batch(db, now)
+
+    assert claimed == reminders
+    assert {reminder.next_attempt_at for reminder in claimed} == {now + timedelta(seconds=REMINDER_LEASE_SECONDS)}
+    assert db.commits == 1
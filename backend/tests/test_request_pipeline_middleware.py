@@ -0,0 +1,73 @@
+"""
+Unit tests for the combined security headers / rate limiting / metrics middleware
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core import security_middleware
+from app.core.config import Settings
+from app.core.metrics import http_requests_total
+from app.middleware.request_pipeline import RequestPipelineMiddleware
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(security_middleware, "get_async_redis", lambda: None)
+    monkeypatch.setattr(security_middleware, "_fallback_rate_limit_store", {})
+    monkeypatch.setattr(Settings, "ENVIRONMENT", property(lambda self: "production"))
+
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"status": "ok"}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"chunk-{i};"
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    app.add_middleware(RequestPipelineMiddleware, requests_per_minute=3)
+    return TestClient(app)
+
+
+def test_headers_and_metrics(client):
+    """Responses carry security and rate limit headers and are counted"""
+    counter = http_requests_total.labels(method="GET", endpoint="/ping", status=200)
+    before = counter._value.get()
+
+    response = client.get("/ping")
+
+    assert response.status_code == 200
+    assert response.headers["X-Content-Type-Options"] == "nosniff"
+    assert response.headers["X-Frame-Options"] == "DENY"
+    assert response.headers["Content-Security-Policy"] == "default-src 'self'"
+    assert response.headers["X-RateLimit-Limit"] == "3"
+    assert response.headers["X-RateLimit-Remaining"] == "2"
+    assert counter._value.get() == before + 1
+
+
+def test_streaming_response_passes_through(client):
+    """Streaming bodies are forwarded chunk by chunk with headers applied"""
+    response = client.get("/stream")
+
+    assert response.text == "chunk-0;chunk-1;chunk-2;"
+    assert response.headers["X-Frame-Options"] == "DENY"
+
+
+def test_rate_limit_exceeded(client):
+    """Requests over the limit get a 429 with rate limit and security headers"""
+    for _ in range(3):
+        assert client.get("/ping").status_code == 200
+
+    response = client.get("/ping")
+
+    assert response.status_code == 429
+    assert response.json() == {"detail": "Rate limit exceeded"}
+    assert response.headers["X-RateLimit-Remaining"] == "0"
+    assert response.headers["Retry-After"] == "60"
+    assert response.headers["X-Content-Type-Options"] == "nosniff"
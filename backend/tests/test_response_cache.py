@@ -0,0 +1,242 @@
+"""
+Unit tests for the tagged response cache and the Redis cache helpers
+"""
+import asyncio
+import fnmatch
+import json
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from starlette.requests import Request
+
+from app.core import cache, response_cache
+from app.core.cache import cache_key, cached, invalidate_cache
+from app.core.response_cache import (
+    cached_response,
+    invalidate_resource,
+    register_tagged_model,
+    resource_tags,
+    response_cache_key,
+)
+
+
+class FakeRedis:
+    """In-memory stand-in for the handful of Redis commands the caches use"""
+
+    def __init__(self):
+        self.data = {}
+        self.commands = []
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    unlink = delete
+
+    def scan_iter(self, match=None, count=None):
+        self.commands.append("scan")
+        return [key for key in list(self.data) if fnmatch.fnmatch(key, match)]
+
+    def keys(self, pattern):
+        raise AssertionError("KEYS must not be used")
+
+    def pipeline(self, transaction=True):
+        redis = self
+
+        class Pipeline:
+            def incr(self, key):
+                redis.incr(key)
+
+            def execute(self):
+                pass
+
+        return Pipeline()
+
+
+class AsyncFakeRedis:
+    """Async view of a FakeRedis, like the redis.asyncio client"""
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    def __getattr__(self, name):
+        method = getattr(self.redis, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+
+        return call
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(response_cache, "get_redis", lambda: fake)
+    monkeypatch.setattr(response_cache, "get_async_redis", lambda: AsyncFakeRedis(fake))
+    monkeypatch.setattr(cache, "get_redis", lambda: fake)
+    monkeypatch.setattr(cache, "get_async_redis", lambda: AsyncFakeRedis(fake))
+    return fake
+
+
+def make_request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def serve(tenant_id, builds, request=None, payload=None):
+    def build():
+        builds.append(tenant_id)
+        return payload if payload is not None else [{"tenant": tenant_id, "build": len(builds)}]
+
+    return asyncio.run(cached_response(
+        request or make_request(),
+        key=response_cache_key("layouts", tenant_id, is_active=True),
+        tags=resource_tags(tenant_id, "form_layouts"),
+        build=build,
+    ))
+
+
+def test_hit_etag_and_not_modified(redis):
+    tenant_id, builds = uuid.uuid4(), []
+
+    first = serve(tenant_id, builds)
+    second = serve(tenant_id, builds)
+
+    assert builds == [tenant_id]
+    assert first.body == second.body
+    assert json.loads(first.body) == [{"tenant": str(tenant_id), "build": 1}]
+    etag = first.headers["etag"]
+    assert second.headers["etag"] == etag
+
+    not_modified = serve(tenant_id, builds, request=make_request(f'W/{etag}, "other"'))
+    assert not_modified.status_code == 304
+    assert not_modified.body == b""
+
+
+def test_tag_invalidation_is_scoped(redis):
+    tenant_a, tenant_b, builds = uuid.uuid4(), uuid.uuid4(), []
+    serve(tenant_a, builds)
+    serve(tenant_b, builds)
+
+    invalidate_resource("form_layouts", tenant_a)
+    serve(tenant_a, builds)
+    serve(tenant_b, builds)
+    assert builds == [tenant_a, tenant_b, tenant_a]
+
+    # Platform-wide rows are part of every tenant's responses
+    invalidate_resource("form_layouts")
+    serve(tenant_a, builds)
+    serve(tenant_b, builds)
+    assert builds == [tenant_a, tenant_b, tenant_a, tenant_a, tenant_b]
+
+
+def test_concurrent_misses_build_once(redis):
+    tenant_id, builds = uuid.uuid4(), []
+
+    async def build():
+        builds.append(tenant_id)
+        await asyncio.sleep(0.05)
+        return {"ok": True}
+
+    async def scenario():
+        return await asyncio.gather(*(
+            cached_response(
+                make_request(),
+                key=response_cache_key("library", tenant_id),
+                tags=resource_tags(tenant_id, "question_library"),
+                build=build,
+            )
+            for _ in range(5)
+        ))
+
+    responses = asyncio.run(scenario())
+
+    assert len(builds) == 1
+    assert {response.body for response in responses} == {b'{"ok":true}'}
+
+
+def test_without_redis_responses_are_built(monkeypatch):
+    monkeypatch.setattr(response_cache, "get_async_redis", lambda: None)
+    builds = []
+    response = serve(uuid.uuid4(), builds, payload={"count": 1})
+    serve(uuid.uuid4(), builds, payload={"count": 1})
+    assert len(builds) == 2
+    assert response.headers["etag"]
+
+
+def test_commit_hooks_bump_tags_of_registered_models(redis):
+    class Widget:
+        def __init__(self, tenant_id):
+            self.tenant_id = tenant_id
+
+    register_tagged_model(Widget, "widgets")
+    tenant_id = uuid.uuid4()
+    session = SimpleNamespace(info={}, new=[Widget(tenant_id)], dirty=[Widget(None)], deleted=[object()])
+
+    response_cache._track_tagged_changes(session, None)
+    assert session.info["response_cache_tags_changed"] == {f"widgets:{tenant_id}", "widgets:platform"}
+
+    response_cache._invalidate_changed_tags(session)
+    assert redis.data[f"response_cache:tag:widgets:{tenant_id}"] == "1"
+    assert redis.data["response_cache:tag:widgets:platform"] == "1"
+    assert session.info == {}
+
+    response_cache._track_tagged_changes(session, None)
+    response_cache._discard_tagged_changes(session)
+    assert session.info == {}
+
+
+def test_cache_key_rejects_objects():
+    tenant_id = uuid.uuid4()
+    assert cache_key("agents", tenant_id, page=2) == f"agents:{tenant_id}:page:2"
+    with pytest.raises(TypeError):
+        cache_key("agents", SimpleNamespace(id=tenant_id))
+
+
+def test_cached_uses_key_builder_and_skips_unkeyable_calls(redis):
+    calls = []
+
+    @cached(ttl=60, key_prefix="agents", key_builder=lambda db, user: str(user.tenant_id))
+    async def list_agents(db, user):
+        calls.append(user.tenant_id)
+        return ["agent"]
+
+    @cached(ttl=60, key_prefix="raw")
+    async def raw(db):
+        calls.append("raw")
+        return ["raw"]
+
+    user = SimpleNamespace(tenant_id=uuid.uuid4())
+    assert asyncio.run(list_agents(object(), user)) == ["agent"]
+    assert asyncio.run(list_agents(object(), user)) == ["agent"]
+    asyncio.run(raw(object()))
+    asyncio.run(raw(object()))
+
+    assert calls == [user.tenant_id, "raw", "raw"]
+    assert f"agents:{user.tenant_id}" in redis.data
+
+
+def test_invalidate_cache_scans(redis):
+    redis.data.update({"agents:1": "a", "agents:2": "b", "vendors:1": "c"})
+    invalidate_cache("agents:*")
+    assert redis.data == {"vendors:1": "c"}
+    assert redis.commands == ["scan"]
@@ -0,0 +1,106 @@
+"""
+Unit tests for the counter-backed ticket ID allocator
+"""
+import threading
+import uuid
+from datetime import datetime
+
+from sqlalchemy.dialects import postgresql
+
+from app.core.ticket_id_generator import TicketNumberAllocator, counter_upsert
+from tests.conftest import FakeSession
+
+TENANT_ID = uuid.uuid4()
+YEAR = datetime.utcnow().year
+
+
+class FakeConnection:
+    def __init__(self, engine):
+        self.engine = engine
+
+    def execute(self, statement):
+        params = statement.compile(dialect=postgresql.dialect()).params
+        key = (params["tenant_id"], params["prefix"], params["year"])
+        with self.engine.lock:
+            self.engine.counters[key] = self.engine.counters.get(key, 0) + params["last_value"]
+            self.engine.statements += 1
+            value = self.engine.counters[key]
+        return type("Result", (), {"scalar_one": lambda self: value})()
+
+
+class FakeEngine:
+    """Stands in for ticket_counters: applies each upsert to an in-memory counter"""
+
+    def __init__(self, counters=None):
+        self.counters = counters or {}
+        self.statements = 0
+        self.transactions = 0
+        self.lock = threading.Lock()
+
+    def begin(self):
+        engine = self
+
+        class Transaction:
+            def __enter__(self):
+                engine.transactions += 1
+                return FakeConnection(engine)
+
+            def __exit__(self, *exc):
+                return False
+
+        return Transaction()
+
+
+def test_counter_upsert_increments_and_returns_in_one_statement():
+    sql = str(counter_upsert(TENANT_ID, "ASMT", YEAR, 5).compile(dialect=postgresql.dialect()))
+
+    assert sql.startswith("INSERT INTO ticket_counters")
+    assert "ON CONFLICT (tenant_id, prefix, year) DO UPDATE SET last_value = (ticket_counters.last_value + excluded.last_value)" in sql
+    assert sql.endswith("RETURNING ticket_counters.last_value")
+
+
+def test_single_ids_come_from_a_cached_block():
+    engine = FakeEngine({(TENANT_ID, "ASMT", YEAR): 998})
+    db = FakeSession(bind=engine)
+    allocator = TicketNumberAllocator("ASMT", block_size=3)
+
+    ids = [allocator.next_id(db, TENANT_ID) for _ in range(4)]
+
+    # Numbering carries on past 999; one counter update per block
+    assert ids == [f"ASMT-{YEAR}-999", f"ASMT-{YEAR}-1000", f"ASMT-{YEAR}-1001", f"ASMT-{YEAR}-1002"]
+    assert engine.statements == 2
+    assert allocator.next_id(db, uuid.uuid4()) == f"ASMT-{YEAR}-001"
+
+
+def test_reserve_returns_a_consecutive_block_after_cached_numbers():
+    engine = FakeEngine()
+    db = FakeSession(bind=engine)
+    allocator = TicketNumberAllocator("ASMT", block_size=10)
+
+    assert allocator.next_id(db, TENANT_ID) == f"ASMT-{YEAR}-001"
+    assert allocator.reserve(db, TENANT_ID, 3) == [f"ASMT-{YEAR}-011", f"ASMT-{YEAR}-012", f"ASMT-{YEAR}-013"]
+    assert allocator.reserve(db, TENANT_ID, 0) == []
+    assert engine.transactions == 2
+
+
+def test_concurrent_allocators_never_hand_out_the_same_id():
+    engine = FakeEngine()
+    db = FakeSession(bind=engine)
+    # Two processes, each with its own cache, sharing the counter row
+    allocators = [TicketNumberAllocator("ASMT", block_size=7), TicketNumberAllocator("ASMT", block_size=7)]
+    ids = []
+    ids_lock = threading.Lock()
+
+    def create(allocator):
+        for _ in range(50):
+            ticket_id = allocator.next_id(db, TENANT_ID)
+            with ids_lock:
+                ids.append(ticket_id)
+
+    threads = [threading.Thread(target=create, args=(allocators[i % 2],)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(ids) == len(set(ids)) == 400
@@ -0,0 +1,188 @@
+"""
+Unit tests for the webhook outbox (enqueueing, delivery attempts and write-back)
+"""
+import asyncio
+import json
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.core import backoff
+from app.core.backoff import RETRY_BASE_SECONDS, RETRY_MAX_SECONDS, retry_delay
+from app.models.webhook import Webhook, WebhookDelivery, WebhookDeliveryStatus, WebhookStatus
+from app.services import webhook_dispatcher
+from app.services.webhook_dispatcher import (
+    DELIVERY_LEASE_SECONDS,
+    DeliveryResult,
+    LEASE_MARGIN_SECONDS,
+    MAX_DELIVERY_ATTEMPTS,
+    PER_WEBHOOK_CONCURRENCY,
+    WebhookDispatcher,
+    claim_limit,
+)
+from app.services.webhook_service import WebhookService
+from tests.conftest import FakeSession
+
+
+def make_webhook(**overrides):
+    values = dict(
+        id=uuid.uuid4(), tenant_id=uuid.uuid4(), url="https://hooks.example.com/in", secret="s3cret",
+        events=["agent.created"], status=WebhookStatus.ACTIVE.value, is_active=True, headers=None, timeout=10,
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def test_enqueue_event_queues_subscribed_webhooks_without_sending():
+    subscribed = make_webhook()
+    other_event = make_webhook(events=["review.created"])
+    paused = make_webhook(status=WebhookStatus.INACTIVE.value)
+    db = FakeSession({Webhook: [subscribed, other_event, paused]})
+
+    deliveries = WebhookService.enqueue_event(db, "agent.created", {"agent_id": "a1"})
+
+    assert [delivery.webhook_id for delivery in deliveries] == [subscribed.id]
+    [delivery] = db.added
+    assert delivery.status == WebhookDeliveryStatus.PENDING.value
+    assert delivery.attempt_count == 0
+    assert delivery.next_attempt_at is not None
+    # Enqueueing leaves the commit to the caller
+    assert db.commits == 0
+
+
+def test_deliver_signs_and_classifies_responses(monkeypatch):
+    webhook = make_webhook()
+    delivery = WebhookDelivery(webhook_id=webhook.id, event_type="agent.created", payload={"agent_id": "a1"})
+    statuses = iter([200, 503, 400])
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(next(statuses), text="ok")
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    dispatcher = WebhookDispatcher(session_factory=None)
+    monkeypatch.setattr(dispatcher, "_client_for", lambda url: client)
+
+    ok, unavailable, rejected = [asyncio.run(dispatcher.deliver(delivery, webhook)) for _ in range(3)]
+
+    body = json.dumps(delivery.payload)
+    assert seen[0].content == body.encode()
+    assert seen[0].headers["X-Webhook-Signature"] == "sha256=" + WebhookService.generate_signature(body, "s3cret")
+    assert ok.succeeded and ok.status_code == 200
+    assert (unavailable.error, unavailable.retryable) == ("HTTP 503", True)
+    assert (rejected.error, rejected.retryable) == ("HTTP 400", False)
+
+    inactive = asyncio.run(dispatcher.deliver(delivery, make_webhook(is_active=False)))
+    assert not inactive.succeeded and not inactive.retryable
+    assert len(seen) == 3
+
+
+def test_deliver_defers_requests_that_would_outlive_the_lease(monkeypatch):
+    webhook = make_webhook(timeout=30)
+    delivery = WebhookDelivery(webhook_id=webhook.id, event_type="agent.created", payload={})
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200)))
+    dispatcher = WebhookDispatcher(session_factory=None)
+    monkeypatch.setattr(dispatcher, "_client_for", lambda url: client)
+    monkeypatch.setattr(webhook_dispatcher.time, "monotonic", lambda: 1000.0)
+
+    late = asyncio.run(dispatcher.deliver(delivery, webhook, deadline=1020.0))
+    in_time = asyncio.run(dispatcher.deliver(delivery, webhook, deadline=1030.0))
+
+    assert late.deferred and in_time.succeeded
+
+
+def test_claim_limit_fits_queued_requests_inside_the_lease():
+    usable = DELIVERY_LEASE_SECONDS - LEASE_MARGIN_SECONDS
+    assert claim_limit(make_webhook(timeout=60)) == PER_WEBHOOK_CONCURRENCY * (usable // 60)
+    assert claim_limit(make_webhook(timeout=10)) == PER_WEBHOOK_CONCURRENCY * (usable // 10)
+    # Timeouts are capped, so a huge one still leaves one round per lease
+    assert claim_limit(make_webhook(timeout=10_000)) >= PER_WEBHOOK_CONCURRENCY
+    assert claim_limit(None) is None
+
+
+def test_record_results_schedules_retries_and_batches_counters(monkeypatch):
+    monkeypatch.setattr(backoff.random, "uniform", lambda low, high: 0)
+    webhook = make_webhook()
+    now = datetime(2026, 5, 1, 12, 0)
+
+    def delivery(attempts=0):
+        return WebhookDelivery(
+            id=uuid.uuid4(), webhook_id=webhook.id, payload={}, attempt_count=attempts, lease_token=uuid.uuid4()
+        )
+
+    sent, retried, exhausted, rejected = delivery(), delivery(1), delivery(MAX_DELIVERY_ATTEMPTS - 1), delivery()
+    results = [
+        DeliveryResult(status_code=200, completed_at=now),
+        DeliveryResult(status_code=503, error="HTTP 503", retryable=True),
+        DeliveryResult(status_code=408, error="Request timeout", retryable=True),
+        DeliveryResult(status_code=404, error="HTTP 404", response_body="no such hook"),
+    ]
+    db = FakeSession({WebhookDelivery: [sent, retried, exhausted, rejected]})
+
+    counts = WebhookDispatcher(session_factory=None).record_results(
+        db, [(sent, webhook), (retried, webhook), (exhausted, webhook), (rejected, webhook)], results, now
+    )
+
+    assert counts == {"succeeded": 1, "retrying": 1, "failed": 2, "deferred": 0, "lost": 0}
+    assert (sent.status, sent.attempt_count, sent.next_attempt_at) == ("succeeded", 1, None)
+    assert retried.status == WebhookDeliveryStatus.PENDING.value
+    assert retried.next_attempt_at == now + timedelta(seconds=RETRY_BASE_SECONDS * 2)
+    assert exhausted.status == rejected.status == WebhookDeliveryStatus.FAILED.value
+    assert rejected.error_message == "HTTP 404"
+
+    # One guarded update per delivery plus one counter update per webhook, in one commit
+    assert len(db.updates) == 5 and db.commits == 1
+    values = {column.key: value for column, value in db.updates[-1].items()}
+    assert values["last_triggered_at"] == now
+    assert values["last_error"] == "HTTP 404: no such hook"
+
+
+def test_record_results_skips_deliveries_whose_lease_was_taken_over():
+    webhook = make_webhook()
+    now = datetime(2026, 5, 1, 12, 0)
+    delivery = WebhookDelivery(
+        id=uuid.uuid4(), webhook_id=webhook.id, payload={}, attempt_count=2,
+        status=WebhookDeliveryStatus.DELIVERING.value, lease_token=uuid.uuid4()
+    )
+    # Another dispatcher re-claimed the row after the lease ran out
+    reclaimed = WebhookDelivery(
+        id=delivery.id, webhook_id=webhook.id, payload={}, attempt_count=2,
+        status=WebhookDeliveryStatus.DELIVERING.value, lease_token=uuid.uuid4()
+    )
+    db = FakeSession({WebhookDelivery: [reclaimed]})
+
+    counts = WebhookDispatcher(session_factory=None).record_results(
+        db, [(delivery, webhook)], [DeliveryResult(status_code=200, completed_at=now)], now
+    )
+
+    assert counts["lost"] == 1 and counts["succeeded"] == 0
+    # Neither the delivery nor the webhook's counters reflect the stale result
+    assert len(db.updates) == 1
+    assert (delivery.status, delivery.attempt_count) == (WebhookDeliveryStatus.DELIVERING.value, 2)
+    assert (reclaimed.status, reclaimed.attempt_count) == (WebhookDeliveryStatus.DELIVERING.value, 2)
+
+
+def test_record_results_hands_back_deferred_deliveries_without_an_attempt():
+    webhook = make_webhook()
+    now = datetime(2026, 5, 1, 12, 0)
+    delivery = WebhookDelivery(id=uuid.uuid4(), webhook_id=webhook.id, payload={}, attempt_count=1, lease_token=uuid.uuid4())
+    db = FakeSession({WebhookDelivery: [delivery]})
+
+    counts = WebhookDispatcher(session_factory=None).record_results(
+        db, [(delivery, webhook)], [DeliveryResult(deferred=True)], now
+    )
+
+    assert counts["deferred"] == 1
+    assert (delivery.status, delivery.next_attempt_at, delivery.attempt_count) == ("pending", now, 1)
+    assert delivery.lease_token is None
+
+
+def test_retry_delay_backs_off_exponentially(monkeypatch):
+    monkeypatch.setattr(backoff.random, "uniform", lambda low, high: high)
+    assert retry_delay(1) == pytest.approx(RETRY_BASE_SECONDS * 1.1)
+    assert retry_delay(3) == pytest.approx(RETRY_BASE_SECONDS * 4 * 1.1)
+    assert retry_delay(30) == pytest.approx(RETRY_MAX_SECONDS * 1.1)